@@ -77,42 +77,99 @@ class RecommendationsEngine:
     Analyzes consumption patterns and suggests optimization actions
     """
     
-    def __init__(self, carbon_data_loader=None):
+    def __init__(self, carbon_data_loader=None, metrics_source=None):
         """
         Initialize the recommendations engine
         
         Args:
             carbon_data_loader: CarbonDataLoader instance for data access
+            metrics_source: Optional collector exposing get_snapshot() (SNMPCollector or
+                a shared snapshot reader); its sensor readings replace static config values
         """
         from data_sources.carbon_data import get_carbon_data_loader
         self.carbon_loader = carbon_data_loader or get_carbon_data_loader()
+        self.metrics_source = metrics_source
+    
+    def data_version(self) -> tuple:
+        """Version of the inputs behind the recommendations (config digest, sensor snapshot)"""
+        snapshot = self.metrics_source.get_snapshot() if self.metrics_source is not None else None
+        return (self.carbon_loader.data_version, snapshot.version if snapshot is not None else None)
+    
+    @staticmethod
+    def _server_type(device_id: str) -> Optional[str]:
+        """Map a collector device ID to a server type of the carbon data config"""
+        if 'VXRAIL' in device_id:
+            return 'vxrail'
+        if 'HP' in device_id:
+            return 'hp_proliant'
+        return None
+    
+    def _sensor_samples(self) -> Dict[str, Dict[str, List[float]]]:
+        """Sensor readings of the latest collector snapshot, grouped by server type and field"""
+        snapshot = self.metrics_source.get_snapshot() if self.metrics_source is not None else None
+        if snapshot is None:
+            return {}
+        
+        samples: Dict[str, Dict[str, List[float]]] = {}
+        for metric in snapshot.metrics:
+            server_type = self._server_type(metric.device_id)
+            # Simulated and cached fallbacks carry no new measurement
+            if metric.sensors is None or metric.status != 'success' or server_type is None:
+                continue
+            fields = samples.setdefault(server_type, {"cpu_percent": [], "inlet_temp_c": [], "fan_percent": []})
+            for field, values in fields.items():
+                value = getattr(metric.sensors, field)
+                if value is not None:
+                    values.append(value)
+        return samples
     
     def detect_idle_resources(self) -> List[Dict]:
         """
         Detect idle or underutilized server resources
         
+        Uses the measured CPU utilization of each server type when the
+        collector reports it, and the static avg_utilization_percent otherwise.
+        
         Returns:
             List of idle resource detections
         """
         server_metrics = self.carbon_loader.get_server_metrics()
+        samples = self._sensor_samples()
         
         idle_resources = []
         
         # Analyze each server type for low utilization
         for server in server_metrics:
-            if server["utilization_percent"] < 50:  # Below 50% utilization
+            cpu = samples.get(server["type"], {}).get("cpu_percent", [])
+            if cpu:
+                utilization = round(sum(cpu) / len(cpu), 1)
+                source = "measured"
+            else:
+                utilization = server["utilization_percent"]
+                source = "config"
+            
+            if utilization < 50:  # Below 50% utilization
                 idle_resources.append({
                     "resource_type": "servers",
                     "server_type": server["type"],
                     "model": server["model"],
                     "count": server["count"],
-                    "current_utilization": server["utilization_percent"],
-                    "waste_percentage": round((50 - server["utilization_percent"]), 1),
-                    "potential_savings_kwh": server["annual_consumption_kwh"] * ((50 - server["utilization_percent"]) / 100)
+                    "current_utilization": utilization,
+                    "utilization_source": source,
+                    "measured_devices": len(cpu),
+                    "waste_percentage": round((50 - utilization), 1),
+                    "potential_savings_kwh": server["annual_consumption_kwh"] * ((50 - utilization) / 100)
                 })
         
         return idle_resources
     
+    def _measured_inlet_temperature(self) -> Optional[Dict]:
+        """Fleet-wide measured inlet temperature (average and hottest server), if any"""
+        inlet = [value for fields in self._sensor_samples().values() for value in fields["inlet_temp_c"]]
+        if not inlet:
+            return None
+        return {"average": round(sum(inlet) / len(inlet), 1), "max": max(inlet)}
+    
     def get_all_recommendations(self) -> List[Dict]:
         """
         Generate all AI-powered recommendations for datacenter optimization
@@ -211,21 +268,28 @@ class RecommendationsEngine:
         temp_brl = temp_savings_kwh * self.carbon_loader.get_energy_costs().get("base_rate_brl_per_kwh", 0.60)
         
         current_temp = datacenter.get("temperature_setpoint_c", 22)
-        
-        rec = Recommendation(
-            title=f"Aumentar Temperatura do Datacenter de {current_temp}°C para 24°C",
-            description=f"Temperatura atual ({current_temp}°C) está abaixo das recomendações ASHRAE (24-27°C). "
-                       f"Aumentar setpoint para 24°C pode reduzir consumo de cooling em até 10%, "
-                       f"representando economia de {temp_savings_kwh:,.0f} kWh/ano sem impacto nos equipamentos.",
-            category=RecommendationCategory.ENERGY_SAVINGS,
-            priority=RecommendationPriority.HIGH,
-            impact_kwh=temp_savings_kwh,
-            impact_co2_kg=temp_co2,
-            impact_brl=temp_brl,
-            implementation_effort="Baixo - Ajuste de configuração CRAC",
-            estimated_time="1 semana"
-        )
-        recommendations.append(rec)
+        temp_label = "Temperatura atual"
+        inlet = self._measured_inlet_temperature()
+        if inlet is not None:
+            # Inlet air measured at the servers is what ASHRAE ranges refer to
+            current_temp = inlet["average"]
+            temp_label = f"Temperatura de entrada medida nos servidores (média; máx. {inlet['max']:.0f}°C)"
+        
+        if current_temp < 24:
+            rec = Recommendation(
+                title=f"Aumentar Temperatura do Datacenter de {current_temp}°C para 24°C",
+                description=f"{temp_label} ({current_temp}°C) está abaixo das recomendações ASHRAE (24-27°C). "
+                           f"Aumentar setpoint para 24°C pode reduzir consumo de cooling em até 10%, "
+                           f"representando economia de {temp_savings_kwh:,.0f} kWh/ano sem impacto nos equipamentos.",
+                category=RecommendationCategory.ENERGY_SAVINGS,
+                priority=RecommendationPriority.HIGH,
+                impact_kwh=temp_savings_kwh,
+                impact_co2_kg=temp_co2,
+                impact_brl=temp_brl,
+                implementation_effort="Baixo - Ajuste de configuração CRAC",
+                estimated_time="1 semana"
+            )
+            recommendations.append(rec)
         
         # Hot/Cold aisle containment
         containment_savings_kwh = cooling["annual_savings_kwh"] * 0.40  # 40% from containment
@@ -1,4 +1,5 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+import atexit
 import json
 import datetime
 import random
@@ -6,6 +7,8 @@ import threading
 import time
 import os
 import logging
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -13,7 +16,7 @@ logger = logging.getLogger(__name__)
 
 # Importar SNMP collector
 try:
-    from snmp_collector import SNMPCollector
+    from snmp_collector import SNMPCollector, SharedSnapshotCollector, ShardedSnapshotCollector
     SNMP_COLLECTOR_AVAILABLE = True
     logger.info("SNMP Collector carregado com sucesso")
 except ImportError as e:
@@ -23,13 +26,21 @@ except ImportError as e:
 # Importar novos módulos
 from data_sources.carbon_data import get_carbon_data_loader
 from ai_engine.recommendations import get_recommendations_engine
+from routes.broadcast import KEEPALIVE_FRAME, Broadcaster
+from routes.conditional import conditional_response, etag_from, make_etag
+from routes.singleflight import SingleFlight
 
 app = Flask(__name__)
 
 # Registrar blueprints para novas rotas
 try:
-    from routes.api_routes import api_bp
+    from routes.api_routes import api_bp, register_batch_resource
     app.register_blueprint(api_bp)
+    # /api/batch também compõe as métricas principais (o mesmo snapshot de /api/metrics)
+    register_batch_resource(
+        'metrics', lambda args, snapshot: snapshot.to_dict(), lambda snapshot: snapshot.etag,
+        resolve=lambda: obter_snapshot_metricas()
+    )
     logger.info("API routes registradas com sucesso")
 except ImportError as e:
     logger.warning(f"Não foi possível carregar rotas adicionais: {e}")
@@ -80,14 +91,24 @@ class RenaultInfrastructure:
         
         return consumo_total_datacenter
 
-    def calcular_emissoes_anuais(self):
-        """Calcula emissões anuais de CO2 do datacenter"""
-        consumo_anual = self.consumo_atual * 24 * 365
-        return consumo_anual * self.fator_emissao
+    def calcular_emissoes_anuais(self, consumo_kwh: Optional[float] = None,
+                                 consumo_anual_kwh: Optional[float] = None):
+        """
+        Calcula emissões anuais de CO2 do datacenter
+        
+        consumo_anual_kwh (energia medida, anualizada) tem precedência; sem ele,
+        estima extrapolando o consumo de uma hora (padrão: consumo_atual) x 24 x 365.
+        """
+        if consumo_anual_kwh is None:
+            if consumo_kwh is None:
+                consumo_kwh = self.consumo_atual
+            consumo_anual_kwh = consumo_kwh * 24 * 365
+        return consumo_anual_kwh * self.fator_emissao
 
-    def calcular_arvores_equivalentes(self):
+    def calcular_arvores_equivalentes(self, consumo_kwh: Optional[float] = None,
+                                      consumo_anual_kwh: Optional[float] = None):
         """Calcula equivalência em árvores para sequestro de CO2"""
-        emissoes = self.calcular_emissoes_anuais()
+        emissoes = self.calcular_emissoes_anuais(consumo_kwh, consumo_anual_kwh)
         return int(emissoes / self.sequestro_arvore)
 
     def calcular_economia_potencial(self):
@@ -101,41 +122,156 @@ class RenaultInfrastructure:
 infra = RenaultInfrastructure()
 
 # Instância global do SNMP collector (se disponível)
+# Com ECOTI_SNAPSHOT_FILE, um processo coletor separado (python -m collector.service)
+# publica o snapshot e este worker apenas o lê, sem tráfego SNMP próprio.
+# Vários arquivos separados por os.pathsep (um por nó coletor) são agregados.
+SNAPSHOT_FILE = os.environ.get('ECOTI_SNAPSHOT_FILE')
 snmp_collector = None
 if SNMP_COLLECTOR_AVAILABLE:
     try:
-        snmp_collector = SNMPCollector()
-        logger.info("SNMP Collector inicializado")
+        if SNAPSHOT_FILE and os.pathsep in SNAPSHOT_FILE:
+            snapshot_files = [path for path in SNAPSHOT_FILE.split(os.pathsep) if path]
+            snmp_collector = ShardedSnapshotCollector(
+                {os.path.basename(path) or path: path for path in snapshot_files}
+            )
+            logger.info(f"Agregando snapshots de {len(snapshot_files)} nós coletores")
+        elif SNAPSHOT_FILE:
+            snmp_collector = SharedSnapshotCollector(SNAPSHOT_FILE)
+            logger.info(f"Lendo snapshot do processo coletor em {SNAPSHOT_FILE}")
+        else:
+            snmp_collector = SNMPCollector()
+            logger.info("SNMP Collector inicializado")
+            # Coleta em background: /api/metrics apenas lê o último snapshot
+            if os.environ.get('TESTING') != '1':
+                snmp_collector.start()
+        if os.environ.get('TESTING') != '1':
+            atexit.register(snmp_collector.close)
     except Exception as e:
         logger.warning(f"Erro ao inicializar SNMP Collector: {e}")
         snmp_collector = None
 
+# Recomendações usam os sensores medidos (modo batch) no lugar dos valores estáticos
+get_recommendations_engine().metrics_source = snmp_collector
+
 
 @app.route("/")
 def dashboard():
     return render_template("dashboard.html")
 
 
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """
+    Métricas de /api/metrics derivadas de um ciclo de coleta
+    
+    Imutável e com todos os valores pré-calculados: os handlers apenas
+    leem a referência publicada, sem lock e sem escrever em `infra`.
+    """
+    version: int
+    cycle_key: Optional[tuple]  # Ciclo de origem (None = sem ciclo, recalculado a cada leitura)
+    generated_at: datetime.datetime
+    consumo_atual: float
+    emissoes_co2: float
+    economia_potencial: float
+    arvores_equivalentes: int
+    pue_atual: float
+    pue_alvo: float
+    servidores_total: int
+    consolidacao_potencial: int
+    reducao_percentual: float
+    fonte: str
+    energia: Optional[Dict] = None
+    emissoes_estimadas: bool = True  # False quando vêm da energia medida pelo coletor
+    etag: str = ''  # Digest do payload (igual em todos os workers para os mesmos dados)
+    
+    def to_dict(self) -> Dict:
+        """Payload JSON de /api/metrics"""
+        metrics = {
+            "consumo_atual": self.consumo_atual,
+            "emissoes_co2": self.emissoes_co2,
+            "economia_potencial": self.economia_potencial,
+            "arvores_equivalentes": self.arvores_equivalentes,
+            "pue_atual": self.pue_atual,
+            "pue_alvo": self.pue_alvo,
+            "servidores_total": self.servidores_total,
+            "consolidacao_potencial": self.consolidacao_potencial,
+            "reducao_percentual": self.reducao_percentual,
+            "fonte": self.fonte,
+            "emissoes_estimadas": self.emissoes_estimadas,
+            "escopo": "datacenter-servidores-apenas"
+        }
+        if self.energia is not None:
+            metrics["energia"] = dict(self.energia)
+        return metrics
+
+
+# Último MetricsSnapshot publicado (troca atômica da referência)
+_metrics_snapshot: Optional[MetricsSnapshot] = None
+_metrics_version = 0
+_metrics_lock = threading.Lock()
+
+# Leitores que encontram o snapshot desatualizado compartilham uma única reconstrução
+metrics_flight = SingleFlight()
+
+
 @app.route("/api/metrics")
 def get_metrics():
     """
     Endpoint principal de métricas do datacenter (servidores apenas)
     
     Retorna métricas de consumo, PUE, emissões e economia potencial
-    Tenta coletar dados via SNMP primeiro, com fallback para dados simulados
+    Tenta coletar dados via SNMP primeiro, com fallback para dados simulados.
+    Polls sem mudança (If-None-Match igual ao ETag) recebem 304 sem corpo.
+    """
+    snapshot = obter_snapshot_metricas()
+    return conditional_response(
+        snapshot.etag, lambda: jsonify(snapshot.to_dict()), last_modified=snapshot.generated_at
+    )
+
+
+def _chave_ciclo() -> Optional[tuple]:
     """
+    Identifica o ciclo de coleta atual
+    
+    Com o agendador ativo, a versão e o instante do snapshot do coletor; sem
+    coletor, a hora (a simulação só varia por hora). None quando o coletor
+    existe mas não roda em background: cada leitura dispara uma coleta.
+    """
+    if snmp_collector:
+        if not snmp_collector.is_running():
+            return None
+        snapshot = snmp_collector.get_snapshot()
+        return ('coletor', snapshot.version, snapshot.generated_at) if snapshot else None
+    return ('simulado', datetime.datetime.now().hour)
+
+
+def obter_snapshot_metricas() -> MetricsSnapshot:
+    """Retorna o MetricsSnapshot do ciclo atual, reconstruindo-o uma vez por ciclo"""
+    chave = _chave_ciclo()
+    snapshot = _metrics_snapshot
+    if chave is not None and snapshot is not None and snapshot.cycle_key == chave:
+        return snapshot
+    snapshot, _ = metrics_flight.do(chave, lambda: _publicar_snapshot_metricas(chave))
+    return snapshot
+
+
+def _publicar_snapshot_metricas(chave: Optional[tuple]) -> MetricsSnapshot:
+    """Calcula todas as métricas derivadas de um ciclo e publica o novo snapshot"""
+    global _metrics_snapshot, _metrics_version
+    
     consumo_datacenter_kwh = 0
     fonte = 'simulado'
     
     # Tentar coletar via SNMP
     if snmp_collector:
         try:
-            # Coletar consumo dos servidores via SNMP
-            consumo_servidores_kwh, fonte_snmp = snmp_collector.get_total_consumption_kwh()
-            # Aplicar PUE para obter consumo total do datacenter
-            consumo_datacenter_kwh = consumo_servidores_kwh * infra.pue_atual
+            # Ler a potência dos servidores do último snapshot SNMP
+            potencia_servidores_kw, fonte_snmp = snmp_collector.get_total_power_kw()
+            # Aplicar PUE para obter a demanda total do datacenter (kW; os
+            # campos *_kwh do payload seguem a convenção de calcular_consumo_atual)
+            consumo_datacenter_kwh = potencia_servidores_kw * infra.pue_atual
             fonte = fonte_snmp
-            logger.info(f"Métricas coletadas via SNMP: {consumo_servidores_kwh:.2f} kWh servidores, {consumo_datacenter_kwh:.2f} kWh total (PUE: {infra.pue_atual})")
+            logger.info(f"Métricas coletadas via SNMP: {potencia_servidores_kw:.2f} kW servidores, {consumo_datacenter_kwh:.2f} kW total (PUE: {infra.pue_atual})")
         except Exception as e:
             logger.warning(f"Erro na coleta SNMP, usando simulação: {e}")
             consumo_datacenter_kwh = infra.calcular_consumo_atual()
@@ -144,30 +280,265 @@ def get_metrics():
         # Usar dados simulados do datacenter
         consumo_datacenter_kwh = infra.calcular_consumo_atual()
     
-    # Atualizar infraestrutura
-    infra.consumo_atual = consumo_datacenter_kwh
-    
     # Obter dados de otimização
     optimization = infra.carbon_loader.get_optimization_potential()
     consolidation = infra.carbon_loader.get_consolidation_potential()
     
-    return jsonify(
-        {
-            "consumo_atual": round(consumo_datacenter_kwh, 2),
-            "emissoes_co2": round(infra.calcular_emissoes_anuais(), 2),
-            "economia_potencial": round(infra.calcular_economia_potencial(), 2),
-            "arvores_equivalentes": infra.calcular_arvores_equivalentes(),
-            "pue_atual": infra.pue_atual,
-            "pue_alvo": infra.pue_alvo,
-            "servidores_total": infra.servidores_hp + infra.vxrail,
-            "consolidacao_potencial": consolidation['servers_to_consolidate'],
-            "reducao_percentual": round(optimization['reduction_percentage'], 1),
-            "fonte": fonte,
-            "escopo": "datacenter-servidores-apenas"
-        }
+    # Energia integrada das leituras (kWh reais, não extrapolados)
+    energia = None
+    consumo_anual_kwh = None
+    if snmp_collector:
+        try:
+            resumo = snmp_collector.get_energy_summary()
+            energia = _energy_summary_payload(resumo)
+            snapshot_coletor = snmp_collector.get_snapshot()
+            dispositivos = len(snapshot_coletor.metrics) if snapshot_coletor else 0
+            consumo_anual_kwh = _consumo_anual_medido(resumo, dispositivos)
+        except Exception as e:
+            logger.warning(f"Energia acumulada indisponível: {e}")
+    
+    with _metrics_lock:
+        _metrics_version += 1
+        snapshot = MetricsSnapshot(
+            version=_metrics_version,
+            cycle_key=chave,
+            generated_at=datetime.datetime.now(),
+            consumo_atual=round(consumo_datacenter_kwh, 2),
+            emissoes_co2=round(infra.calcular_emissoes_anuais(consumo_datacenter_kwh, consumo_anual_kwh), 2),
+            economia_potencial=round(infra.calcular_economia_potencial(), 2),
+            arvores_equivalentes=infra.calcular_arvores_equivalentes(consumo_datacenter_kwh, consumo_anual_kwh),
+            pue_atual=infra.pue_atual,
+            pue_alvo=infra.pue_alvo,
+            servidores_total=infra.servidores_hp + infra.vxrail,
+            consolidacao_potencial=consolidation['servers_to_consolidate'],
+            reducao_percentual=round(optimization['reduction_percentage'], 1),
+            fonte=fonte,
+            energia=energia,
+            emissoes_estimadas=consumo_anual_kwh is None
+        )
+        snapshot = replace(snapshot, etag=make_etag(snapshot.to_dict()))
+        _metrics_snapshot = snapshot
+    return snapshot
+
+
+# Stream SSE: uma thread publica cada MetricsSnapshot novo para todos os clientes
+STREAM_KEEPALIVE_SECONDS = 15.0  # Comentário periódico para proxies não fecharem a conexão
+STREAM_POLL_SECONDS = 1.0  # Verificação de novo ciclo sem coletor no processo
+metrics_stream = Broadcaster()
+_stream_thread: Optional[threading.Thread] = None
+_stream_lock = threading.Lock()
+atexit.register(metrics_stream.close)
+
+
+@app.route("/api/stream")
+def stream_metrics():
+    """
+    Stream SSE das métricas de /api/metrics
+    
+    Envia o evento 'snapshot' (payload completo) na conexão e um evento
+    'delta' (apenas os campos alterados) a cada ciclo publicado pelo coletor.
+    Todos os clientes recebem os mesmos frames já serializados; na reconexão
+    (Last-Event-ID) chegam só os deltas perdidos.
+    """
+    _iniciar_stream()
+    ultimo = request.headers.get("Last-Event-ID", "")
+    ultimo = int(ultimo) if ultimo.isdigit() else None
+    return Response(
+        _eventos_stream(ultimo),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+def _eventos_stream(ultimo: Optional[int]):
+    """Frames SSE de um cliente até ele desconectar ou o servidor encerrar"""
+    with metrics_stream.subscription():
+        yield b"retry: 3000\n\n"
+        while not metrics_stream.closed:
+            frames, ultimo = metrics_stream.next_frames(ultimo, STREAM_KEEPALIVE_SECONDS)
+            yield b"".join(frames) if frames else KEEPALIVE_FRAME
+
+
+def _iniciar_stream():
+    """Inicia (uma vez por processo) a thread que alimenta o stream"""
+    global _stream_thread
+    with _stream_lock:
+        if _stream_thread is None or not _stream_thread.is_alive():
+            _stream_thread = threading.Thread(target=_transmitir_metricas, name="metrics-stream", daemon=True)
+            _stream_thread.start()
+
+
+def _transmitir_metricas():
+    """
+    Publica no stream um evento por MetricsSnapshot novo
+    
+    Com o coletor em background no processo, acorda quando o ciclo é
+    publicado (wait_for_snapshot); nos demais modos (snapshot compartilhado,
+    simulação) verifica a cada STREAM_POLL_SECONDS.
+    """
+    anterior = None
+    while not metrics_stream.closed:
+        versao = _versao_snapshot_local()
+        try:
+            snapshot = obter_snapshot_metricas()
+            if anterior is None or snapshot.etag != anterior.etag:
+                atual = snapshot.to_dict()
+                delta = atual if anterior is None else _diferenca_metricas(anterior.to_dict(), atual)
+                metrics_stream.publish(delta, atual)
+                anterior = snapshot
+        except Exception as e:
+            logger.warning(f"Erro ao publicar métricas no stream: {e}")
+        
+        if versao is not None:
+            snmp_collector.wait_for_snapshot(versao, STREAM_KEEPALIVE_SECONDS)
+        else:
+            time.sleep(STREAM_POLL_SECONDS)
+
+
+def _versao_snapshot_local() -> Optional[int]:
+    """Versão do snapshot do coletor em background deste processo (None se não houver)"""
+    if not hasattr(snmp_collector, "wait_for_snapshot") or not snmp_collector.is_running():
+        return None
+    snapshot = snmp_collector.get_snapshot()
+    return snapshot.version if snapshot else None
+
+
+def _diferenca_metricas(anterior: Dict, atual: Dict) -> Dict:
+    """Campos de `atual` que mudaram em relação a `anterior` (removidos vão como None)"""
+    delta = {chave: valor for chave, valor in atual.items() if anterior.get(chave) != valor}
+    delta.update({chave: None for chave in anterior if chave not in atual})
+    return delta
+
+
+ENERGIA_MINIMA_HORAS = 1.0  # Janela mínima de energia medida para anualizar as emissões
+COBERTURA_MINIMA = 0.9  # Fração mínima dos segundos-dispositivo esperados que foi medida
+
+
+def _energy_summary_payload(summary):
+    """Serializa o EnergySummary do coletor (servidores e datacenter via PUE)"""
+    return {
+        "servidores_kwh_total": round(summary.total_kwh, 4),
+        "servidores_kwh_hora_atual": round(summary.current_hour_kwh, 4),
+        "servidores_kwh_hoje": round(summary.today_kwh, 4),
+        "servidores_kwh_24h": round(summary.last_24h_kwh, 4),
+        "datacenter_kwh_hoje": round(summary.today_kwh * infra.pue_atual, 4),
+        "datacenter_kwh_24h": round(summary.last_24h_kwh * infra.pue_atual, 4),
+        "dispositivos": summary.devices,
+        "lacunas_segundos": round(summary.gap_seconds, 1),
+        "desde": summary.since.isoformat() if summary.since else None
+    }
+
+
+def _consumo_anual_medido(resumo, dispositivos: int,
+                          agora: Optional[datetime.datetime] = None) -> Optional[float]:
+    """
+    kWh anuais do datacenter a partir da energia integrada nas últimas 24 horas
+    
+    A janela vai da primeira leitura (no máximo 24h atrás) até agora. Só
+    leituras bem-sucedidas são integradas, então dispositivos com falha,
+    simulados ou em lacuna não somam energia: a energia medida é dividida
+    pela cobertura (segundos-dispositivo medidos / dispositivos x duração
+    da janela) e anualizada com o PUE atual.
+    
+    None (o chamador cai na estimativa pelo consumo instantâneo) enquanto a
+    janela é menor que ENERGIA_MINIMA_HORAS ou a cobertura fica abaixo de
+    COBERTURA_MINIMA.
+    """
+    if resumo is None or resumo.since is None or resumo.last_24h_kwh <= 0 or dispositivos <= 0:
+        return None
+    agora = agora or datetime.datetime.now()
+    inicio_janela = agora.replace(minute=0, second=0, microsecond=0) - datetime.timedelta(hours=23)
+    horas = (agora - max(resumo.since, inicio_janela)).total_seconds() / 3600
+    if horas < ENERGIA_MINIMA_HORAS:
+        return None
+    cobertura = resumo.last_24h_device_seconds / (dispositivos * horas * 3600)
+    if cobertura < COBERTURA_MINIMA:
+        return None
+    return resumo.last_24h_kwh / min(cobertura, 1.0) / horas * 24 * 365 * infra.pue_atual
+
+
+def _versao_coletor():
+    """
+    Versão de /api/energy e /api/collector/stats pelos contadores do coletor
+    
+    None (resposta sem ETag) sem coletor ou com o snapshot indisponível.
+    """
+    if not snmp_collector:
+        return None
+    try:
+        return snmp_collector.get_data_version()
+    except Exception:
+        return None
+
+
+@app.route("/api/energy")
+@etag_from(_versao_coletor)
+def get_energy():
+    """
+    Energia consumida pelos servidores em buckets por hora e por dia
+    
+    Valores integrados das leituras de potência do coletor SNMP (kWh de TI,
+    sem PUE). O ETag vem de get_data_version (versão do snapshot e sequências
+    da energia e da telemetria): o payload só é montado quando muda.
+    """
+    if not snmp_collector:
+        return jsonify({"error": "SNMP Collector não disponível"}), 503
+    
+    try:
+        summary = snmp_collector.get_energy_summary()
+        hourly, daily = snmp_collector.get_energy_buckets()
+    except Exception as e:
+        logger.warning(f"Energia acumulada indisponível: {e}")
+        return jsonify({"error": "Energia acumulada indisponível"}), 503
+    
+    payload = {
+        "resumo": _energy_summary_payload(summary),
+        "por_hora": [
+            {"inicio": hour.isoformat(), "kwh": round(kwh, 4)} for hour, kwh in hourly
+        ],
+        "por_dia": [
+            {"dia": day.isoformat(), "kwh": round(kwh, 4)} for day, kwh in daily
+        ]
+    }
+    return jsonify(payload)
+
+
+@app.route("/api/collector/stats")
+@etag_from(_versao_coletor)
+def get_collector_stats():
+    """
+    Telemetria do coletor SNMP: RTT, timeouts, retries, cache, ciclos e fila
+    
+    cache_hit_ratio cobre apenas as coletas sob demanda: a coleta agendada
+    não consulta o cache, então fica None enquanto só o agendador coleta.
+    ?dispositivos=1 inclui contadores e histograma de RTT de cada
+    dispositivo (apenas com o coletor no próprio processo). ETag pela
+    versão do coletor, como em /api/energy.
+    """
+    if not snmp_collector:
+        return jsonify({"error": "SNMP Collector não disponível"}), 503
+    
+    devices = request.args.get("dispositivos") in ("1", "true")
+    try:
+        telemetry = snmp_collector.get_telemetry(devices=devices)
+    except Exception as e:
+        logger.warning(f"Telemetria do coletor indisponível: {e}")
+        return jsonify({"error": "Telemetria do coletor indisponível"}), 503
+    
+    snapshot = snmp_collector.get_snapshot()
+    payload = {
+        "telemetria": telemetry,
+        "snapshot": {
+            "versao": snapshot.version,
+            "gerado_em": snapshot.generated_at.isoformat(),
+            "dispositivos": len(snapshot.metrics),
+            "duracao_ciclo_segundos": round(snapshot.cycle_duration_seconds, 3)
+        } if snapshot else None,
+        "coletando": snmp_collector.is_running()
+    }
+    return jsonify(payload)
+
+
 @app.route("/sobre")
 def sobre():
     """Página com informações sobre o projeto EcoCode.AI e a equipe UniBrasil"""
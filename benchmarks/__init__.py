@@ -0,0 +1,6 @@
+"""
+Benchmarks do coletor SNMP do EcoTI Dashboard
+
+Inclui um simulador local de agentes SNMPv3 e a suíte de carga do
+SNMPCollector, para medir o coletor sem hardware iLO/iDRAC real.
+"""
@@ -0,0 +1,259 @@
+"""
+Benchmark de carga do SNMPCollector contra o simulador local SNMPv3
+
+Para cada tamanho de frota sobe os agentes simulados em processos
+separados (para não disputar CPU com o coletor), gera um
+renault_servers.json temporário e mede collect_all_metrics com o cache
+desligado: vazão (dispositivos/s) e tempos de ciclo p50/p99.
+
+O primeiro ciclo inclui a descoberta do engine ID e a localização das
+chaves USM, por isso é reportado à parte (warm-up).
+
+Com --protocol redfish a mesma frota é servida pelo servidor Redfish
+local (benchmarks.redfish_mock_server); o warm-up inclui a abertura das
+conexões e o login das sessões, reaproveitadas nos ciclos medidos.
+
+Uso:
+    python -m benchmarks.bench_snmp_collector --sizes 100,1000,10000 --cycles 5
+    python -m benchmarks.bench_snmp_collector --sizes 100,1000 --protocol redfish
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import redfish_mock_server  # noqa: E402
+from benchmarks.snmp_agent_simulator import (  # noqa: E402
+    DEFAULT_BASE_PORT,
+    DEFAULT_CREDENTIALS,
+    PROFILES,
+    serve_in_process,
+)
+from snmp_collector import SNMPCollector  # noqa: E402
+
+
+@dataclass
+class BenchmarkResult:
+    """Resultado de um tamanho de frota"""
+    devices: int
+    warmup_seconds: float
+    cycle_seconds: List[float]
+    snmp_real: int  # Leituras reais no último ciclo (snmp_real ou redfish)
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.cycle_seconds, 50)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.cycle_seconds, 99)
+
+    @property
+    def throughput(self) -> float:
+        """Dispositivos coletados por segundo (média dos ciclos medidos)"""
+        return self.devices / statistics.mean(self.cycle_seconds)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear entre as amostras ordenadas"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class AgentFleet:
+    """Agentes simulados divididos em processos, cada um com sua faixa de portas"""
+
+    def __init__(self, devices: int, processes: int, base_port: int, profile: str, seed: int,
+                 protocol: str = 'snmp'):
+        self.devices = devices
+        self.base_port = base_port
+        self.profile = profile
+        self.seed = seed
+        self.protocol = protocol
+        self.processes = max(1, min(processes, devices))
+        self._context = multiprocessing.get_context('spawn')
+        self._stop = self._context.Event()
+        self._workers: List = []
+
+    def servers_config(self, generation: str = 'gen10') -> List[Dict]:
+        """Mesmas entradas de SNMPAgentSimulator/RedfishMockServer.servers_config, sem abrir portas"""
+        endpoint = {'protocol': 'redfish', 'scheme': 'http'} if self.protocol == 'redfish' else {}
+        return [
+            {
+                'device_id': f"SIM-{index:05d}",
+                'ip_address': '127.0.0.1',
+                'port': self.base_port + index,
+                **endpoint,
+                'generation': generation,
+                'type': 'physical',
+                'location': 'Simulador'
+            }
+            for index in range(self.devices)
+        ]
+
+    def start(self):
+        target = redfish_mock_server.serve_in_process if self.protocol == 'redfish' else serve_in_process
+        shard_size = -(-self.devices // self.processes)
+        for first in range(0, self.devices, shard_size):
+            count = min(shard_size, self.devices - first)
+            ready = self._context.Event()
+            worker = self._context.Process(
+                target=target,
+                args=(count, self.base_port + first, self.profile, self.seed + first, first, ready, self._stop),
+                daemon=True
+            )
+            worker.start()
+            self._workers.append((worker, ready))
+
+        for worker, ready in self._workers:
+            while not ready.wait(timeout=1):
+                if not worker.is_alive():
+                    self.stop()
+                    raise RuntimeError(f"Processo do simulador terminou com código {worker.exitcode}")
+
+    def stop(self):
+        self._stop.set()
+        for worker, _ in self._workers:
+            worker.join(timeout=15)
+            if worker.is_alive():
+                worker.terminate()
+        self._workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def write_config(path: str, servers: List[Dict], mode: str, concurrency: int,
+                 timeout_seconds: float, max_retries: int):
+    """renault_servers.json temporário com cache desligado (todo ciclo consulta SNMP)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'snmp_credentials': DEFAULT_CREDENTIALS,
+            'redfish_credentials': redfish_mock_server.DEFAULT_CREDENTIALS,
+            'coleta_config': {
+                'timeout_seconds': timeout_seconds,
+                'max_retries': max_retries,
+                'cache_ttl_minutes': 0,
+                'cache_stale_minutes': 0,
+                'max_concurrent_connections': concurrency,
+                'collection_mode': mode,
+                'cycle_deadline_seconds': 3600
+            },
+            'servers': servers
+        }, f)
+
+
+def run_size(devices: int, cycles: int, args) -> BenchmarkResult:
+    """Mede um tamanho de frota: warm-up + `cycles` ciclos completos"""
+    base_port = args.base_port or (
+        redfish_mock_server.DEFAULT_BASE_PORT if args.protocol == 'redfish' else DEFAULT_BASE_PORT
+    )
+    with AgentFleet(devices, args.agent_processes, base_port, args.profile, args.seed,
+                    args.protocol) as fleet, \
+            tempfile.TemporaryDirectory() as workdir:
+        config_file = os.path.join(workdir, 'renault_servers.json')
+        write_config(config_file, fleet.servers_config(), args.mode, args.concurrency,
+                     args.timeout, args.retries)
+
+        collector = SNMPCollector(config_file)
+        try:
+            started = time.perf_counter()
+            collector.collect_all_metrics()
+            warmup = time.perf_counter() - started
+
+            timings = []
+            snmp_real = 0
+            for _ in range(cycles):
+                started = time.perf_counter()
+                metrics = collector.collect_all_metrics()
+                timings.append(time.perf_counter() - started)
+                snmp_real = sum(1 for m in metrics if m.source in ('snmp_real', 'redfish'))
+        finally:
+            collector.close()
+
+    return BenchmarkResult(devices=devices, warmup_seconds=warmup, cycle_seconds=timings, snmp_real=snmp_real)
+
+
+def format_report(results: List[BenchmarkResult], args) -> str:
+    lines = [
+        f"Protocolo: {args.protocol} | perfil: {args.profile} | modo: {args.mode} | concorrência: {args.concurrency} | "
+        f"ciclos: {args.cycles} | processos do simulador: {args.agent_processes}",
+        f"{'dispositivos':>12} {'warm-up (s)':>12} {'p50 (s)':>9} {'p99 (s)':>9} "
+        f"{'disp/s':>9} {'snmp_real':>10}",
+    ]
+    for result in results:
+        lines.append(
+            f"{result.devices:>12} {result.warmup_seconds:>12.2f} {result.p50:>9.2f} {result.p99:>9.2f} "
+            f"{result.throughput:>9.0f} {result.snmp_real:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga do SNMPCollector")
+    parser.add_argument('--sizes', default='100,1000,10000', help="Tamanhos de frota separados por vírgula")
+    parser.add_argument('--cycles', type=int, default=5, help="Ciclos medidos por tamanho (após o warm-up)")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='lan')
+    parser.add_argument('--mode', choices=('power', 'batch'), default='power', help="collection_mode do coletor")
+    parser.add_argument('--concurrency', type=int, default=256, help="max_concurrent_connections")
+    parser.add_argument('--timeout', type=float, default=3, help="timeout_seconds")
+    parser.add_argument('--retries', type=int, default=1, help="max_retries")
+    parser.add_argument('--agent-processes', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Processos do simulador")
+    parser.add_argument('--protocol', choices=('snmp', 'redfish'), default='snmp',
+                        help="Backend medido (simulador SNMPv3 ou servidor Redfish local)")
+    parser.add_argument('--base-port', type=int, help="Porta do primeiro dispositivo (padrão por protocolo)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('snmp_collector').setLevel(logging.CRITICAL)
+
+    results = []
+    for devices in (int(size) for size in args.sizes.split(',') if size.strip()):
+        result = run_size(devices, args.cycles, args)
+        results.append(result)
+        if not args.json:
+            print(f"{devices} dispositivos: p50 {result.p50:.2f}s, p99 {result.p99:.2f}s, "
+                  f"{result.throughput:.0f} disp/s", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps([
+            {
+                'devices': r.devices,
+                'warmup_seconds': r.warmup_seconds,
+                'cycle_seconds': r.cycle_seconds,
+                'p50_seconds': r.p50,
+                'p99_seconds': r.p99,
+                'devices_per_second': r.throughput,
+                'snmp_real': r.snmp_real
+            }
+            for r in results
+        ], indent=2))
+    else:
+        print(format_report(results, args))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""
+Servidor Redfish local para testes e benchmark do coletor
+
+Serve o recurso Power (PowerControl com PowerMetrics, além de Voltages e
+PowerSupplies para um corpo de tamanho realista) para N chassis
+sintéticos, um por porta TCP em localhost, em HTTP/1.1 com keep-alive e
+SessionService (X-Auth-Token) ou Basic auth. Usa os mesmos perfis de
+latência do simulador SNMP; dispositivos mudos aceitam a conexão e nunca
+respondem. Sem TLS (scheme 'http').
+
+Uso:
+    python -m benchmarks.redfish_mock_server --devices 100 --profile wan
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.snmp_agent_simulator import PROFILES, SimulatedDevice  # noqa: E402
+from collector.redfish import SESSIONS_PATH  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_BASE_PORT = 18000
+DEFAULT_CREDENTIALS = {'username': 'ecoti_sim', 'password': 'simulador-redfish'}
+CHASSIS_ID = '1'
+VOLTAGE_SENSORS = 24
+
+
+class MockChassis(SimulatedDevice):
+    """Chassi sintético: mesmo consumo base do dispositivo SNMP de mesmo índice"""
+
+    def power_resource(self) -> Dict:
+        watts = int(self.base_watts * (1 + self._rng.uniform(-0.05, 0.05)))
+        path = f"/redfish/v1/Chassis/{CHASSIS_ID}/Power"
+        return {
+            '@odata.id': path,
+            '@odata.type': '#Power.v1_5_0.Power',
+            'Id': 'Power',
+            'Name': 'Power',
+            'PowerControl': [{
+                '@odata.id': f"{path}#/PowerControl/0",
+                'MemberId': '0',
+                'Name': 'System Power Control',
+                'PowerConsumedWatts': watts,
+                'PowerCapacityWatts': 1600,
+                'PowerMetrics': {
+                    'IntervalInMin': 20,
+                    'AverageConsumedWatts': self.base_watts,
+                    'MinConsumedWatts': int(self.base_watts * 0.9),
+                    'MaxConsumedWatts': int(self.base_watts * 1.1)
+                },
+                'RelatedItem': [{'@odata.id': f"/redfish/v1/Chassis/{CHASSIS_ID}"}],
+                'Status': {'State': 'Enabled', 'Health': 'OK'}
+            }],
+            'Voltages': [
+                {
+                    '@odata.id': f"{path}#/Voltages/{sensor}",
+                    'MemberId': str(sensor),
+                    'Name': f"Voltage Sensor {sensor}",
+                    'ReadingVolts': 12.0,
+                    'UpperThresholdCritical': 13.2,
+                    'LowerThresholdCritical': 10.8,
+                    'PhysicalContext': 'PowerSupply',
+                    'Status': {'State': 'Enabled', 'Health': 'OK'}
+                }
+                for sensor in range(VOLTAGE_SENSORS)
+            ],
+            'PowerSupplies': [
+                {
+                    '@odata.id': f"{path}#/PowerSupplies/{bay}",
+                    'MemberId': str(bay),
+                    'Name': f"HpeServerPowerSupply {bay + 1}",
+                    'PowerCapacityWatts': 800,
+                    'LastPowerOutputWatts': watts // 2,
+                    'Status': {
+                        'State': 'Enabled',
+                        'Health': 'Warning' if self.degraded_psu and bay == 1 else 'OK'
+                    }
+                }
+                for bay in range(2)
+            ]
+        }
+
+
+class RedfishMockServer:
+    """
+    N serviços Redfish sintéticos em portas consecutivas de localhost
+
+    Roda em uma thread com event loop próprio; start() retorna quando
+    todas as portas estão abertas. keepalive_timeout (segundos) fecha
+    conexões ociosas como um BMC real; chunked usa Transfer-Encoding
+    chunked no recurso Power.
+    """
+
+    def __init__(self, device_count: int, base_port: int = DEFAULT_BASE_PORT, host: str = DEFAULT_HOST,
+                 profile: str = 'lan', seed: int = 0, credentials: Optional[Dict[str, str]] = None,
+                 first_index: int = 0, keepalive_timeout: Optional[float] = None, chunked: bool = False):
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil desconhecido: {profile} (opções: {', '.join(PROFILES)})")
+
+        self.host = host
+        self.base_port = base_port
+        self.profile = PROFILES[profile]
+        self.credentials = dict(credentials or DEFAULT_CREDENTIALS)
+        self.keepalive_timeout = keepalive_timeout
+        self.chunked = chunked
+        self.rng = random.Random(seed)
+
+        mute_count = int(device_count * self.profile.timeout_rate)
+        mute = set(self.rng.sample(range(device_count), mute_count))
+        self.devices = [
+            MockChassis(first_index + offset, base_port + offset, self.rng, mute=offset in mute)
+            for offset in range(device_count)
+        ]
+
+        self.sessions: Dict[str, int] = {}  # token -> porta
+        self._session_ids = itertools.count(1)
+        self.connections = 0
+        self.requests = 0
+        self.logins = 0
+        self._servers: List[asyncio.AbstractServer] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def servers_config(self, generation: str = 'gen10') -> List[Dict]:
+        """Entradas 'servers' para renault_servers.json apontando para o servidor mock"""
+        return [
+            {
+                'device_id': device.device_id,
+                'ip_address': self.host,
+                'port': device.port,
+                'protocol': 'redfish',
+                'scheme': 'http',
+                'generation': generation,
+                'type': 'physical',
+                'location': 'Simulador'
+            }
+            for device in self.devices
+        ]
+
+    async def _handle(self, device: MockChassis, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+
+                if device.mute:
+                    await asyncio.Event().wait()
+
+                delay = self.profile.delay_seconds(self.rng)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                method, path = request_line.decode('latin-1').split()[:2]
+                self.requests += 1
+                writer.write(self._respond(device, method, path, headers, body))
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # stop(): encerrar sem que start_server registre a tarefa cancelada como erro
+            pass
+        finally:
+            writer.close()
+
+    def _authorized(self, device: MockChassis, headers: Dict[str, str]) -> bool:
+        token = headers.get('x-auth-token')
+        if token is not None:
+            return self.sessions.get(token) == device.port
+        authorization = headers.get('authorization', '')
+        if authorization.startswith('Basic '):
+            expected = f"{self.credentials['username']}:{self.credentials['password']}"
+            return base64.b64decode(authorization[6:]).decode('utf-8', 'replace') == expected
+        return False
+
+    def _respond(self, device: MockChassis, method: str, path: str, headers: Dict[str, str],
+                 body: bytes) -> bytes:
+        if method == 'POST' and path == SESSIONS_PATH:
+            try:
+                login = json.loads(body or b'{}')
+            except ValueError:
+                login = {}
+            if (login.get('UserName'), login.get('Password')) != (
+                    self.credentials['username'], self.credentials['password']):
+                return self._response(401, {'error': 'Unauthorized'})
+            session_id = next(self._session_ids)
+            token = f"token-{device.port}-{session_id}"
+            self.sessions[token] = device.port
+            self.logins += 1
+            location = f"{SESSIONS_PATH}/{session_id}"
+            return self._response(201, {'@odata.id': location, 'Id': str(session_id)},
+                                  {'X-Auth-Token': token, 'Location': location})
+
+        if method == 'DELETE' and path.startswith(SESSIONS_PATH + '/'):
+            token = headers.get('x-auth-token')
+            if self.sessions.get(token) != device.port:
+                return self._response(401, {'error': 'Unauthorized'})
+            del self.sessions[token]
+            return self._response(204, None)
+
+        if method == 'GET' and path == f"/redfish/v1/Chassis/{CHASSIS_ID}/Power":
+            if not self._authorized(device, headers):
+                return self._response(401, {'error': 'Unauthorized'})
+            return self._response(200, device.power_resource(), chunked=self.chunked)
+
+        return self._response(404, {'error': 'Not Found'})
+
+    @staticmethod
+    def _response(status: int, payload, headers: Optional[Dict[str, str]] = None, chunked: bool = False) -> bytes:
+        reasons = {200: 'OK', 201: 'Created', 204: 'No Content', 401: 'Unauthorized', 404: 'Not Found'}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, 'Unknown')}", "Content-Type: application/json"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+            pieces = [body[i:i + 1024] for i in range(0, len(body), 1024)]
+            body = b''.join(b'%x\r\n%s\r\n' % (len(piece), piece) for piece in pieces) + b'0\r\n\r\n'
+        else:
+            lines.append(f"Content-Length: {len(body)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+    def start(self):
+        """Abre as portas e começa a responder em background"""
+        if self._thread is not None:
+            return
+
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._loop = loop
+
+        async def setup():
+            for device in self.devices:
+                server = await asyncio.start_server(
+                    lambda r, w, device=device: self._handle(device, r, w), self.host, device.port
+                )
+                self._servers.append(server)
+
+        def run():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(setup())
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+                return
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='redfish-mock-server', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            self._close_servers()
+            loop.close()
+            raise errors[0]
+
+        logger.info(
+            f"Redfish mock: {len(self.devices)} chassis em {self.host}:"
+            f"{self.base_port}-{self.base_port + len(self.devices) - 1} (perfil {self.profile.name})"
+        )
+
+    def _close_servers(self):
+        for server in self._servers:
+            server.close()
+        self._servers = []
+
+    def stop(self):
+        """Fecha as portas e encerra o event loop"""
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None:
+            return
+
+        async def shutdown():
+            self._close_servers()
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop)
+        thread.join(timeout=10)
+        if not thread.is_alive():
+            loop.close()
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def serve_in_process(device_count: int, base_port: int, profile: str, seed: int,
+                     first_index: int, ready, stop):
+    """Alvo de multiprocessing.Process: serve até `stop` ser sinalizado"""
+    logging.getLogger().setLevel(logging.WARNING)
+    server = RedfishMockServer(device_count, base_port=base_port, profile=profile,
+                               seed=seed, first_index=first_index)
+    server.start()
+    ready.set()
+    try:
+        stop.wait()
+    finally:
+        server.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor Redfish local (recurso Power)")
+    parser.add_argument('--devices', type=int, default=100, help="Número de chassis sintéticos")
+    parser.add_argument('--base-port', type=int, default=DEFAULT_BASE_PORT, help="Porta do primeiro chassi")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='lan', help="Perfil de latência")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keepalive-timeout', type=float, help="Fecha conexões ociosas após N segundos")
+    parser.add_argument('--write-config', metavar='ARQUIVO',
+                        help="Grava um renault_servers.json apontando para o servidor mock")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = RedfishMockServer(args.devices, base_port=args.base_port, profile=args.profile,
+                               seed=args.seed, keepalive_timeout=args.keepalive_timeout)
+
+    if args.write_config:
+        with open(args.write_config, 'w', encoding='utf-8') as f:
+            json.dump({
+                'redfish_credentials': server.credentials,
+                'coleta_config': {},
+                'servers': server.servers_config()
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"Configuração gravada em {args.write_config}")
+
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        logger.info(f"Conexões: {server.connections}, requisições: {server.requests}, logins: {server.logins}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""
+Simulador local de agentes SNMPv3 para o EcoTI Dashboard
+
+Serve as tabelas de HPServerOIDs (consumo, saúde do sistema, sensores e
+coluna de fontes) para N dispositivos sintéticos, um por porta UDP em localhost, com
+perfis configuráveis de latência, perda de pacotes e dispositivos mudos.
+
+Todos os dispositivos compartilham um único SnmpEngine (um engine ID por
+processo); para escalar, rode vários processos com faixas de portas
+distintas (ver serve_in_process).
+
+Uso:
+    python -m benchmarks.snmp_agent_simulator --devices 100 --profile wan
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pysnmp.carrier.asyncio.dgram import udp
+from pysnmp.entity import config, engine
+from pysnmp.entity.rfc3413 import context
+from pysnmp.entity.rfc3413.cmdrsp import CommandResponderBase
+from pysnmp.proto import rfc1902, rfc1905
+from pysnmp.proto.api import v2c
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snmp_collector import HPServerOIDs  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_BASE_PORT = 16100
+DEFAULT_CREDENTIALS = {
+    'username': 'ecoti_sim',
+    'auth_key': 'simulador-auth-key',
+    'priv_key': 'simulador-priv-key',
+    'auth_protocol': 'SHA',
+    'priv_protocol': 'AES'
+}
+
+# Linhas servidas na coluna power_supply_status (uma por fonte)
+PSU_ROWS = 2
+PSU_OK = 2
+PSU_DEGRADED = 3
+HEALTH_OK = 2
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """
+    Perfil de rede/agente aplicado a cada resposta
+
+    latency_ms ± jitter_ms é o atraso antes de responder; loss_rate é a
+    probabilidade de descartar uma requisição; timeout_rate é a fração de
+    dispositivos que nunca respondem (porta aberta, ninguém lendo).
+    """
+    name: str
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    loss_rate: float = 0.0
+    timeout_rate: float = 0.0
+
+    def delay_seconds(self, rng: random.Random) -> float:
+        """Atraso sorteado para uma resposta"""
+        jitter = rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+
+PROFILES: Dict[str, FaultProfile] = {
+    'lan': FaultProfile('lan', latency_ms=1, jitter_ms=0.5),
+    'wan': FaultProfile('wan', latency_ms=20, jitter_ms=10, loss_rate=0.01),
+    'degraded': FaultProfile('degraded', latency_ms=80, jitter_ms=40, loss_rate=0.05, timeout_rate=0.02),
+    'outage': FaultProfile('outage', latency_ms=5, jitter_ms=2, timeout_rate=0.2),
+}
+
+
+def _oid(dotted: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in dotted.split('.'))
+
+
+def _build_oid_index() -> Tuple[List[Tuple[int, ...]], Dict[Tuple[int, ...], Tuple[str, int, float]]]:
+    """
+    Índice ordenado com os OIDs de todas as gerações de HPServerOIDs
+
+    Cada OID aponta para (nome do valor, linha, escala); power_supply_status
+    é servido como coluna com PSU_ROWS linhas, os demais como escalares.
+    """
+    kinds: Dict[Tuple[int, ...], Tuple[str, int, float]] = {}
+    for oids in (HPServerOIDs.GEN8, HPServerOIDs.GEN9, HPServerOIDs.GEN10, HPServerOIDs.VXRAIL):
+        for name, dotted in oids.items():
+            if name == 'power_supply_status':
+                for row in range(1, PSU_ROWS + 1):
+                    kinds[_oid(dotted) + (row,)] = (name, row, 1.0)
+            else:
+                kinds[_oid(dotted)] = (name, 0, HPServerOIDs.SCALES.get(dotted, 1.0))
+    return sorted(kinds), kinds
+
+
+class SimulatedDevice:
+    """Valores de um servidor sintético (consumo com ruído a cada leitura)"""
+
+    def __init__(self, index: int, port: int, rng: random.Random, mute: bool = False):
+        self.index = index
+        self.port = port
+        self.mute = mute
+        self.base_watts = 180 + (index * 37) % 320
+        # Um em cada 50 dispositivos com a segunda fonte degradada
+        self.degraded_psu = index % 50 == 49
+        self._rng = rng
+
+    @property
+    def device_id(self) -> str:
+        return f"SIM-{self.index:05d}"
+
+    @property
+    def sensors(self) -> Dict[str, int]:
+        """Temperatura de entrada (°C), ventilação (%) e CPU (%) fixas por dispositivo"""
+        return {
+            'inlet_temperature': 19 + self.index % 9,
+            'fan_speed': 30 + self.index % 40,
+            'cpu_utilization': 5 + (self.index * 13) % 90
+        }
+
+    def value(self, name: str, row: int, scale: float = 1.0):
+        if name == 'power_consumption':
+            noise = self._rng.uniform(-0.05, 0.05)
+            return v2c.Integer(int(self.base_watts * (1 + noise)))
+        if name == 'power_supply_status':
+            degraded = self.degraded_psu and row == PSU_ROWS
+            return v2c.Integer(PSU_DEGRADED if degraded else PSU_OK)
+        if name in HPServerOIDs.SENSOR_FIELDS:
+            return v2c.Integer(round(self.sensors[name] / scale))
+        return v2c.Integer(HEALTH_OK)
+
+
+class _SimulatedResponder(CommandResponderBase):
+    """
+    Responde GET/GETNEXT/GETBULK direto das tabelas do simulador
+
+    Não usa a instrumentação MIB do pysnmp: o dispositivo é identificado
+    pelo transport domain da requisição, e a resposta pode ser atrasada
+    (loop.call_later) ou descartada conforme o perfil.
+    """
+
+    SUPPORTED_PDU_TYPES = (
+        rfc1905.GetRequestPDU.tagSet,
+        rfc1905.GetNextRequestPDU.tagSet,
+        rfc1905.GetBulkRequestPDU.tagSet,
+    )
+    max_varbinds = 64
+
+    def __init__(self, snmp_engine, snmp_context, simulator: 'SNMPAgentSimulator'):
+        super().__init__(snmp_engine, snmp_context)
+        self.simulator = simulator
+        self._deferred = set()
+
+    def handle_management_operation(self, snmpEngine, stateReference, contextName, PDU):
+        transport_domain, _ = snmpEngine.message_dispatcher.get_transport_info(stateReference)
+        device = self.simulator.devices[transport_domain[-1]]
+        simulator = self.simulator
+
+        if simulator.rng.random() < simulator.profile.loss_rate:
+            simulator.dropped += 1
+            return
+
+        var_binds = self._respond(device, PDU)
+        delay = simulator.profile.delay_seconds(simulator.rng)
+        if delay <= 0:
+            self.send_varbinds(snmpEngine, stateReference, 0, 0, var_binds)
+            simulator.answered += 1
+            return
+
+        # process_pdu libera o estado ao retornar; manter até o envio adiado
+        self._deferred.add(stateReference)
+        asyncio.get_running_loop().call_later(
+            delay, self._send_deferred, snmpEngine, stateReference, var_binds
+        )
+
+    def _send_deferred(self, snmp_engine, state_reference, var_binds):
+        self._deferred.discard(state_reference)
+        try:
+            self.send_varbinds(snmp_engine, state_reference, 0, 0, var_binds)
+            self.simulator.answered += 1
+        finally:
+            super().release_state_information(state_reference)
+
+    def release_state_information(self, stateReference):
+        if stateReference in self._deferred:
+            return
+        super().release_state_information(stateReference)
+
+    def _respond(self, device: SimulatedDevice, PDU) -> List[Tuple]:
+        req_var_binds = v2c.apiPDU.get_varbinds(PDU)
+
+        if PDU.tagSet == rfc1905.GetRequestPDU.tagSet:
+            return [self._get(device, tuple(name)) for name, _ in req_var_binds]
+        if PDU.tagSet == rfc1905.GetNextRequestPDU.tagSet:
+            return [self._get_next(device, tuple(name)) for name, _ in req_var_binds]
+
+        # GETBULK (RFC 3416 4.2.3)
+        non_repeaters = min(max(int(v2c.apiBulkPDU.get_non_repeaters(PDU)), 0), len(req_var_binds))
+        max_repetitions = max(int(v2c.apiBulkPDU.get_max_repetitions(PDU)), 0)
+        repeaters = len(req_var_binds) - non_repeaters
+        if repeaters:
+            max_repetitions = min(max_repetitions, self.max_varbinds // repeaters)
+
+        response = [self._get_next(device, tuple(name)) for name, _ in req_var_binds[:non_repeaters]]
+        cursor = [tuple(name) for name, _ in req_var_binds[non_repeaters:]]
+        for _ in range(max_repetitions if repeaters else 0):
+            row = [self._get_next(device, name) for name in cursor]
+            response.extend(row)
+            cursor = [tuple(name) for name, _ in row]
+        return response
+
+    def _get(self, device: SimulatedDevice, name: Tuple[int, ...]) -> Tuple:
+        kind = self.simulator.oid_kinds.get(name)
+        if kind is None:
+            return rfc1902.ObjectName(name), rfc1905.noSuchInstance
+        return rfc1902.ObjectName(name), device.value(*kind)
+
+    def _get_next(self, device: SimulatedDevice, name: Tuple[int, ...]) -> Tuple:
+        position = bisect.bisect_right(self.simulator.oid_index, name)
+        if position >= len(self.simulator.oid_index):
+            return rfc1902.ObjectName(name), rfc1905.endOfMibView
+        next_name = self.simulator.oid_index[position]
+        return rfc1902.ObjectName(next_name), device.value(*self.simulator.oid_kinds[next_name])
+
+
+class SNMPAgentSimulator:
+    """
+    N agentes SNMPv3 sintéticos em portas consecutivas de localhost
+
+    Roda em uma thread com event loop próprio; start() retorna quando
+    todas as portas estão abertas.
+    """
+
+    def __init__(self, device_count: int, base_port: int = DEFAULT_BASE_PORT,
+                 host: str = DEFAULT_HOST, profile: str = 'lan', seed: int = 0,
+                 credentials: Optional[Dict[str, str]] = None, first_index: int = 0):
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil desconhecido: {profile} (opções: {', '.join(PROFILES)})")
+
+        self.host = host
+        self.base_port = base_port
+        self.profile = PROFILES[profile]
+        self.credentials = dict(credentials or DEFAULT_CREDENTIALS)
+        self.rng = random.Random(seed)
+        self.oid_index, self.oid_kinds = _build_oid_index()
+
+        mute_count = int(device_count * self.profile.timeout_rate)
+        mute = set(self.rng.sample(range(device_count), mute_count))
+        self.devices = [
+            SimulatedDevice(first_index + offset, base_port + offset, self.rng, mute=offset in mute)
+            for offset in range(device_count)
+        ]
+
+        self.answered = 0
+        self.dropped = 0
+        self._engine = None
+        self._mute_sockets: List[socket.socket] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def servers_config(self, generation: str = 'gen10') -> List[Dict]:
+        """Entradas 'servers' para renault_servers.json apontando para o simulador"""
+        return [
+            {
+                'device_id': device.device_id,
+                'ip_address': self.host,
+                'port': device.port,
+                'generation': generation,
+                'type': 'physical',
+                'location': 'Simulador'
+            }
+            for device in self.devices
+        ]
+
+    def _setup(self):
+        """Registra transports, usuário USM e responder (na thread do loop)"""
+        snmp_engine = engine.SnmpEngine()
+
+        for offset, device in enumerate(self.devices):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((self.host, device.port))
+            if device.mute:
+                # Porta aberta que ninguém lê: o cliente só vê timeout
+                self._mute_sockets.append(sock)
+                continue
+            config.add_transport(
+                snmp_engine,
+                udp.DOMAIN_NAME + (offset,),
+                udp.UdpTransport(loop=self._loop).open_server_mode(sock=sock)
+            )
+
+        creds = self.credentials
+        config.add_v3_user(
+            snmp_engine,
+            creds['username'],
+            config.USM_AUTH_HMAC96_SHA if creds.get('auth_protocol', 'SHA') == 'SHA' else config.USM_AUTH_HMAC96_MD5,
+            creds['auth_key'],
+            config.USM_PRIV_CFB128_AES if creds.get('priv_protocol', 'AES') == 'AES' else config.USM_PRIV_CBC56_DES,
+            creds['priv_key']
+        )
+        _SimulatedResponder(snmp_engine, context.SnmpContext(snmp_engine), self)
+        self._engine = snmp_engine
+
+    def start(self):
+        """Abre as portas e começa a responder em background"""
+        if self._thread is not None:
+            return
+
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._loop = loop
+
+        def run():
+            asyncio.set_event_loop(loop)
+            try:
+                self._setup()
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+                return
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='snmp-agent-simulator', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            self._close_sockets()
+            raise errors[0]
+
+        logger.info(
+            f"Simulador SNMP: {len(self.devices)} dispositivos em {self.host}:"
+            f"{self.base_port}-{self.base_port + len(self.devices) - 1} (perfil {self.profile.name})"
+        )
+
+    def stop(self):
+        """Fecha as portas e encerra o event loop"""
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None:
+            return
+
+        async def shutdown():
+            if self._engine is not None:
+                self._engine.close_dispatcher()
+            self._engine = None
+            # Cancelar timers do dispatcher e respostas ainda não enviadas
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop)
+        thread.join(timeout=10)
+        if not thread.is_alive():
+            loop.close()
+        self._close_sockets()
+        self._loop = None
+        self._thread = None
+
+    def discovery_reports(self) -> Dict[str, int]:
+        """Reports de descoberta SNMPv3 enviados (engine ID desconhecido e fora da janela de tempo)"""
+        if self._engine is None:
+            return {'unknown_engine_ids': 0, 'not_in_time_windows': 0}
+        unknown, not_in_time = self._engine.get_mib_builder().import_symbols(
+            '__SNMP-USER-BASED-SM-MIB', 'usmStatsUnknownEngineIDs', 'usmStatsNotInTimeWindows'
+        )
+        return {'unknown_engine_ids': int(unknown.syntax), 'not_in_time_windows': int(not_in_time.syntax)}
+
+    def _close_sockets(self):
+        for sock in self._mute_sockets:
+            sock.close()
+        self._mute_sockets = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def serve_in_process(device_count: int, base_port: int, profile: str, seed: int,
+                     first_index: int, ready, stop):
+    """
+    Alvo de multiprocessing.Process: serve até `stop` ser sinalizado
+
+    Permite dividir milhares de dispositivos entre processos, para que o
+    simulador não dispute CPU com o coletor medido.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    simulator = SNMPAgentSimulator(device_count, base_port=base_port, profile=profile,
+                                   seed=seed, first_index=first_index)
+    simulator.start()
+    ready.set()
+    try:
+        stop.wait()
+    finally:
+        simulator.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulador local de agentes SNMPv3 (HPServerOIDs)")
+    parser.add_argument('--devices', type=int, default=100, help="Número de dispositivos sintéticos")
+    parser.add_argument('--base-port', type=int, default=DEFAULT_BASE_PORT, help="Porta do primeiro dispositivo")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='lan', help="Perfil de latência/perda")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write-config', metavar='ARQUIVO',
+                        help="Grava um renault_servers.json apontando para o simulador")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    simulator = SNMPAgentSimulator(args.devices, base_port=args.base_port,
+                                   profile=args.profile, seed=args.seed)
+
+    if args.write_config:
+        with open(args.write_config, 'w', encoding='utf-8') as f:
+            json.dump({
+                'snmp_credentials': simulator.credentials,
+                'coleta_config': {},
+                'servers': simulator.servers_config()
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"Configuração gravada em {args.write_config}")
+
+    simulator.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        logger.info(f"Respostas: {simulator.answered}, descartadas: {simulator.dropped}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""
+Collector package for EcoTI Dashboard
+Componentes de suporte ao coletor SNMP (resiliência, agendamento, estado)
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,182 @@
+"""
+Publicação por diferença das métricas coletadas
+
+ChangeTracker guarda a última métrica publicada de cada dispositivo e,
+a cada lote coletado, emite eventos apenas para dispositivos cuja
+potência variou mais que `deadband_watts`, cujo status ou fonte mudou,
+ou que entraram/saíram da frota. O total da frota e a contagem de
+fontes são mantidos incrementalmente a partir desses eventos, em
+miliwatts inteiros (soma exata, sem deriva de ponto flutuante).
+
+Em regime, a maior parte das leituras cai dentro da banda morta: o lote
+custa uma comparação por dispositivo e nenhum snapshot é reconstruído.
+Os eventos ficam em um log circular versionado para consumidores que
+acompanham apenas as mudanças (changes_since).
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from collector.models import ServerMetrics
+
+# Fontes agregadas quando toda a frota vem da mesma origem (ver collector.models.summarize_metrics)
+KNOWN_SOURCES = ('snmp_real', 'redfish', 'cached', 'simulado')
+
+
+def _milliwatts(watts: float) -> int:
+    return int(round(watts * 1000))
+
+
+@dataclass(frozen=True)
+class MetricChange:
+    """Mudança publicada de um dispositivo (current None = removido da frota)"""
+    version: int
+    device_id: str
+    previous: Optional[ServerMetrics]
+    current: Optional[ServerMetrics]
+
+    @property
+    def delta_watts(self) -> float:
+        before = self.previous.power_consumption_watts if self.previous is not None else 0.0
+        after = self.current.power_consumption_watts if self.current is not None else 0.0
+        return after - before
+
+
+class ChangeTracker:
+    """
+    Estado publicado da frota, atualizado por eventos de mudança
+
+    Thread-safe: lotes chegam do event loop do coletor, recargas de
+    configuração do agendador e leituras das threads HTTP.
+    """
+
+    def __init__(self, deadband_watts: float = 0.0, log_size: int = 4096):
+        if deadband_watts < 0:
+            raise ValueError("deadband_watts não pode ser negativo")
+        self.deadband_watts = deadband_watts
+        self._lock = threading.Lock()
+        self._published: Dict[str, ServerMetrics] = {}
+        self._total_mw = 0
+        self._sources: Dict[str, int] = {}
+        self._log: Deque[MetricChange] = deque(maxlen=log_size)
+        self._log_floor = 0  # Maior versão com eventos já descartados do log
+        self.suppressed = 0  # Leituras absorvidas pela banda morta
+
+    def _is_change(self, previous: Optional[ServerMetrics], current: ServerMetrics) -> bool:
+        if previous is None:
+            return True
+        if previous.status != current.status or previous.source != current.source:
+            return True
+        return abs(current.power_consumption_watts - previous.power_consumption_watts) > self.deadband_watts
+
+    def _set(self, device_id: str, metric: Optional[ServerMetrics]) -> Optional[ServerMetrics]:
+        """Troca a métrica publicada e ajusta total e fontes (chamar com o lock)"""
+        previous = self._published.pop(device_id, None) if metric is None else self._published.get(device_id)
+        if previous is not None:
+            self._total_mw -= _milliwatts(previous.power_consumption_watts)
+            self._sources[previous.source] -= 1
+        if metric is not None:
+            self._published[device_id] = metric
+            self._total_mw += _milliwatts(metric.power_consumption_watts)
+            self._sources[metric.source] = self._sources.get(metric.source, 0) + 1
+        return previous
+
+    def _record(self, changes: List[MetricChange]):
+        log = self._log
+        for change in changes:
+            if len(log) == log.maxlen:
+                self._log_floor = log[0].version
+            log.append(change)
+
+    def apply(self, metrics: Iterable[ServerMetrics], version: int) -> List[MetricChange]:
+        """
+        Aplica um lote parcial (dispositivos ausentes não mudam)
+
+        Args:
+            version: Versão atribuída aos eventos deste lote
+
+        Returns:
+            Eventos emitidos (vazio se tudo caiu na banda morta)
+        """
+        changes = []
+        with self._lock:
+            for metric in metrics:
+                previous = self._published.get(metric.device_id)
+                if not self._is_change(previous, metric):
+                    self.suppressed += 1
+                    continue
+                self._set(metric.device_id, metric)
+                changes.append(MetricChange(version, metric.device_id, previous, metric))
+            self._record(changes)
+        return changes
+
+    def sync(self, metrics: Iterable[ServerMetrics], version: int) -> List[MetricChange]:
+        """
+        Aplica a frota completa: dispositivos fora de `metrics` são removidos
+
+        A ordem publicada passa a ser a de `metrics`.
+        """
+        changes = []
+        with self._lock:
+            incoming = {metric.device_id: metric for metric in metrics}
+            for device_id in [d for d in self._published if d not in incoming]:
+                previous = self._set(device_id, None)
+                changes.append(MetricChange(version, device_id, previous, None))
+
+            ordered: Dict[str, ServerMetrics] = {}
+            for device_id, metric in incoming.items():
+                previous = self._published.get(device_id)
+                if self._is_change(previous, metric):
+                    self._set(device_id, metric)
+                    changes.append(MetricChange(version, device_id, previous, metric))
+                else:
+                    self.suppressed += 1
+                ordered[device_id] = self._published[device_id]
+            self._published = ordered
+            self._record(changes)
+        return changes
+
+    def remove(self, device_id: str, version: int) -> Optional[MetricChange]:
+        """Retira um dispositivo do estado publicado"""
+        with self._lock:
+            if device_id not in self._published:
+                return None
+            change = MetricChange(version, device_id, self._set(device_id, None), None)
+            self._record([change])
+        return change
+
+    def state(self) -> Tuple[Tuple[ServerMetrics, ...], float, str]:
+        """(métricas publicadas, total em watts, fonte agregada) em um único instante"""
+        with self._lock:
+            return tuple(self._published.values()), self._total_mw / 1000, self._fonte()
+
+    def _fonte(self) -> str:
+        present = [source for source, count in self._sources.items() if count]
+        if len(present) > 1:
+            return 'mixed'
+        source = present[0] if present else 'snmp_real'
+        return source if source in KNOWN_SOURCES else 'mixed'
+
+    @property
+    def total_watts(self) -> float:
+        with self._lock:
+            return self._total_mw / 1000
+
+    def changes_since(self, version: int) -> Optional[List[MetricChange]]:
+        """
+        Eventos com versão maior que `version`
+
+        Returns:
+            None se parte desses eventos já saiu do log (o consumidor deve
+            recomeçar a partir de um snapshot completo)
+        """
+        with self._lock:
+            if version < self._log_floor:
+                return None
+            return [change for change in self._log if change.version > version]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._published)
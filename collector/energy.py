@@ -0,0 +1,211 @@
+"""
+Contabilização de energia do coletor SNMP
+
+EnergyIntegrator acumula kWh por dispositivo integrando as amostras de
+potência (W) pelo método dos trapézios. Cada amostra custa O(1): o
+trecho entre duas leituras é dividido apenas nas fronteiras de hora
+que atravessa. Os totais da frota são consolidados em buckets por hora
+e por dia.
+
+Lacunas são explícitas: se o intervalo entre duas leituras excede
+max_gap_seconds, o trecho não é integrado (não se inventa consumo) e a
+duração fica registrada como lacuna do dispositivo. Cada bucket por hora
+também soma os segundos-dispositivo integrados, para que o consumidor
+saiba quanto da frota a energia medida efetivamente cobre.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+SECONDS_PER_HOUR = 3600.0
+
+
+@dataclass
+class DeviceEnergy:
+    """Estado de integração de um dispositivo"""
+    last_timestamp: Optional[datetime] = None
+    last_watts: float = 0.0
+    total_kwh: float = 0.0
+    hour_start: Optional[datetime] = None
+    hour_kwh: float = 0.0
+    day: Optional[date] = None
+    day_kwh: float = 0.0
+    samples: int = 0
+    gaps: int = 0
+    gap_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class EnergySummary:
+    """Totais de energia da frota em um instante"""
+    total_kwh: float
+    current_hour_kwh: float
+    today_kwh: float
+    last_24h_kwh: float
+    devices: int
+    gap_seconds: float
+    since: Optional[datetime]
+    last_24h_device_seconds: float = 0.0  # Segundos-dispositivo integrados em last_24h_kwh
+
+
+def _hour_of(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class EnergyIntegrator:
+    """
+    Integrador trapezoidal de potência em energia
+
+    Thread-safe: amostras chegam do event loop do coletor e leituras das
+    threads HTTP. Os buckets da frota guardam as últimas
+    `hourly_retention` horas e `daily_retention` dias.
+    """
+
+    def __init__(self, max_gap_seconds: float = 900.0, hourly_retention: int = 48,
+                 daily_retention: int = 31):
+        if max_gap_seconds <= 0:
+            raise ValueError("max_gap_seconds deve ser maior que zero")
+        self.max_gap_seconds = max_gap_seconds
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+
+        self._devices: Dict[str, DeviceEnergy] = {}
+        self._hourly: Dict[datetime, float] = {}
+        self._hourly_seconds: Dict[datetime, float] = {}
+        self._daily: Dict[date, float] = {}
+        self._total_kwh = 0.0
+        self._gap_seconds = 0.0
+        self._since: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.sequence = 0  # Incrementado a cada amostra aceita ou dispositivo removido
+
+    def add_sample(self, device_id: str, timestamp: datetime, watts: float) -> float:
+        """
+        Registra uma leitura de potência de um dispositivo
+
+        Leituras repetidas ou fora de ordem (timestamp <= último) são
+        ignoradas, então reenviar a mesma amostra em cache é inofensivo.
+
+        Returns:
+            kWh acrescentados por esta amostra
+        """
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                state = self._devices[device_id] = DeviceEnergy()
+
+            previous = state.last_timestamp
+            if previous is not None and timestamp <= previous:
+                return 0.0
+
+            state.samples += 1
+            self.sequence += 1
+            added = 0.0
+            if previous is not None:
+                elapsed = (timestamp - previous).total_seconds()
+                if elapsed > self.max_gap_seconds:
+                    state.gaps += 1
+                    state.gap_seconds += elapsed
+                    self._gap_seconds += elapsed
+                else:
+                    added = self._integrate(state, previous, state.last_watts, timestamp, watts)
+
+            if self._since is None:
+                self._since = timestamp
+            state.last_timestamp = timestamp
+            state.last_watts = watts
+            return added
+
+    def _integrate(self, state: DeviceEnergy, start: datetime, start_watts: float,
+                   end: datetime, end_watts: float) -> float:
+        """Integra o trecho [start, end], dividindo nas fronteiras de hora"""
+        total = 0.0
+        slope = (end_watts - start_watts) / (end - start).total_seconds()
+
+        while start < end:
+            boundary = _hour_of(start) + timedelta(hours=1)
+            segment_end = min(boundary, end)
+            seconds = (segment_end - start).total_seconds()
+            segment_end_watts = start_watts + slope * seconds
+            kwh = (start_watts + segment_end_watts) / 2 * seconds / SECONDS_PER_HOUR / 1000
+
+            self._add_to_buckets(state, start, kwh, seconds)
+            total += kwh
+            start, start_watts = segment_end, segment_end_watts
+
+        return total
+
+    def _add_to_buckets(self, state: DeviceEnergy, timestamp: datetime, kwh: float, seconds: float):
+        hour = _hour_of(timestamp)
+        day = timestamp.date()
+
+        state.total_kwh += kwh
+        if state.hour_start != hour:
+            state.hour_start, state.hour_kwh = hour, 0.0
+        state.hour_kwh += kwh
+        if state.day != day:
+            state.day, state.day_kwh = day, 0.0
+        state.day_kwh += kwh
+
+        self._total_kwh += kwh
+        self._hourly[hour] = self._hourly.get(hour, 0.0) + kwh
+        self._hourly_seconds[hour] = self._hourly_seconds.get(hour, 0.0) + seconds
+        self._daily[day] = self._daily.get(day, 0.0) + kwh
+        self._prune(self._hourly, self.hourly_retention)
+        self._prune(self._hourly_seconds, self.hourly_retention)
+        self._prune(self._daily, self.daily_retention)
+
+    @staticmethod
+    def _prune(buckets: Dict, retention: int):
+        """Descarta os buckets mais antigos além da retenção"""
+        while len(buckets) > retention:
+            oldest = min(buckets)
+            del buckets[oldest]
+
+    def forget(self, device_id: str):
+        """Remove o estado de um dispositivo (a energia já contabilizada permanece na frota)"""
+        with self._lock:
+            if self._devices.pop(device_id, None) is not None:
+                self.sequence += 1
+
+    def device_energy(self, device_id: str) -> Optional[DeviceEnergy]:
+        """Cópia do estado de integração de um dispositivo"""
+        with self._lock:
+            state = self._devices.get(device_id)
+            return DeviceEnergy(**vars(state)) if state is not None else None
+
+    def hourly(self) -> List[Tuple[datetime, float]]:
+        """kWh da frota por hora, em ordem cronológica"""
+        with self._lock:
+            return sorted(self._hourly.items())
+
+    def daily(self) -> List[Tuple[date, float]]:
+        """kWh da frota por dia, em ordem cronológica"""
+        with self._lock:
+            return sorted(self._daily.items())
+
+    @property
+    def total_kwh(self) -> float:
+        return self._total_kwh
+
+    def summary(self, now: Optional[datetime] = None) -> EnergySummary:
+        """Totais da frota: acumulado, hora corrente, hoje e últimas 24 horas"""
+        now = now or datetime.now()
+        current_hour = _hour_of(now)
+        window_start = current_hour - timedelta(hours=23)
+        in_window = lambda hour: window_start <= hour <= current_hour
+        with self._lock:
+            return EnergySummary(
+                total_kwh=self._total_kwh,
+                current_hour_kwh=self._hourly.get(current_hour, 0.0),
+                today_kwh=self._daily.get(now.date(), 0.0),
+                last_24h_kwh=sum(kwh for hour, kwh in self._hourly.items() if in_window(hour)),
+                devices=len(self._devices),
+                gap_seconds=self._gap_seconds,
+                since=self._since,
+                last_24h_device_seconds=sum(
+                    seconds for hour, seconds in self._hourly_seconds.items() if in_window(hour)
+                )
+            )
@@ -0,0 +1,247 @@
+"""
+Histórico recente de potência por dispositivo
+
+SNMPCollector.cache guarda só a última leitura de cada servidor. Para
+tendências e detecção de anomalias, SampleHistory mantém por dispositivo
+um buffer circular de tamanho fixo com as leituras do último período
+(padrão: 24h), no estilo round-robin (RRD):
+
+- O tempo é dividido em células de `step` segundos (o intervalo de
+  coleta); a posição de uma leitura no buffer vem do próprio timestamp,
+  então timestamps não são armazenados e a janela de uma consulta é
+  localizada por aritmética, sem busca
+- Cada célula é um inteiro sem sinal de 16 bits (array('H')) com a
+  potência em watts inteiros — a resolução dos OIDs de potência do
+  iLO/iDRAC. Células sem leitura (falha, circuito aberto, lacuna) ficam
+  com MISSING
+
+Custo: append O(1) amortizado (lacunas são preenchidas por atribuição de
+fatia) e consultas de janela como fatias do array, com soma, contagem e
+mínimo feitos em C. Memória: 2 bytes por célula — 10 mil dispositivos x
+2880 células (24h a cada 30s) ocupam ~55 MiB.
+"""
+
+import math
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+TYPECODE = 'H'
+MISSING = 0xFFFF  # Célula sem leitura
+MAX_WATTS = MISSING - 1
+
+
+def _encode(watts: float) -> int:
+    return min(max(int(round(watts)), 0), MAX_WATTS)
+
+
+@dataclass(frozen=True)
+class HistoryWindow:
+    """Fatia do histórico de um dispositivo (cópia; não muda com novas leituras)"""
+    start: float  # Início (epoch, segundos) da primeira célula
+    step: float
+    watts: array
+
+    def __len__(self) -> int:
+        return len(self.watts)
+
+    @property
+    def end(self) -> float:
+        """Fim (epoch, segundos) da última célula"""
+        return self.start + len(self.watts) * self.step
+
+    @property
+    def count(self) -> int:
+        """Células com leitura"""
+        return len(self.watts) - self.watts.count(MISSING)
+
+    @property
+    def coverage(self) -> float:
+        """Fração das células da janela com leitura (0.0 em janela vazia)"""
+        return self.count / len(self.watts) if self.watts else 0.0
+
+    def mean(self) -> Optional[float]:
+        count = self.count
+        if not count:
+            return None
+        missing = len(self.watts) - count
+        return (sum(self.watts) - missing * MISSING) / count
+
+    def minimum(self) -> Optional[int]:
+        # MISSING é o maior valor representável: nunca vence o mínimo
+        return min(self.watts) if self.count else None
+
+    def maximum(self) -> Optional[int]:
+        count = self.count
+        if not count:
+            return None
+        if count == len(self.watts):
+            return max(self.watts)
+        return max(value for value in self.watts if value != MISSING)
+
+    def points(self) -> Iterator[Tuple[float, int]]:
+        """Pares (início da célula, watts) das células com leitura"""
+        start, step = self.start, self.step
+        for index, value in enumerate(self.watts):
+            if value != MISSING:
+                yield start + index * step, value
+
+
+class SampleRing:
+    """Buffer circular de `capacity` células de `step` segundos"""
+
+    __slots__ = ('step', 'capacity', '_watts', '_newest', '_oldest')
+
+    def __init__(self, capacity: int, step: float):
+        if capacity < 1:
+            raise ValueError("capacity deve ser maior que zero")
+        if step <= 0:
+            raise ValueError("step deve ser maior que zero")
+        self.step = step
+        self.capacity = capacity
+        self._watts = array(TYPECODE, [MISSING]) * capacity
+        self._newest: Optional[int] = None  # Índice absoluto (timestamp // step) da célula mais recente
+        self._oldest: Optional[int] = None  # Célula da leitura mais antiga já registrada
+
+    def append(self, timestamp: float, watts: float) -> bool:
+        """
+        Registra uma leitura na célula do seu timestamp
+
+        Leitura na mesma célula da anterior a substitui (reenviar uma cópia
+        em cache é inofensivo). Leituras fora de ordem ainda dentro do
+        buffer ocupam a própria célula; mais antigas que o buffer são
+        descartadas.
+
+        Returns:
+            False se a leitura era antiga demais para o buffer
+        """
+        cell = int(timestamp // self.step)
+        newest = self._newest
+        if newest is None or cell > newest:
+            if newest is not None:
+                self._clear(newest + 1, min(cell - newest - 1, self.capacity))
+            self._newest = cell
+        elif cell <= newest - self.capacity:
+            return False
+        if self._oldest is None or cell < self._oldest:
+            self._oldest = cell
+        self._watts[cell % self.capacity] = _encode(watts)
+        return True
+
+    def _clear(self, first_cell: int, count: int):
+        """Marca `count` células a partir de `first_cell` como sem leitura"""
+        if count <= 0:
+            return
+        start = first_cell % self.capacity
+        head = min(count, self.capacity - start)
+        self._watts[start:start + head] = array(TYPECODE, [MISSING]) * head
+        if count > head:
+            self._watts[:count - head] = array(TYPECODE, [MISSING]) * (count - head)
+
+    def window(self, start: float, end: float) -> HistoryWindow:
+        """Células que intersectam [start, end], limitadas ao conteúdo do buffer"""
+        newest = self._newest
+        if newest is None:
+            return HistoryWindow(start=start, step=self.step, watts=array(TYPECODE))
+        first = max(int(start // self.step), newest - self.capacity + 1, self._oldest)
+        last = min(int(end // self.step), newest)
+        if first > last:
+            return HistoryWindow(start=start, step=self.step, watts=array(TYPECODE))
+
+        count = last - first + 1
+        offset = first % self.capacity
+        if offset + count <= self.capacity:
+            watts = self._watts[offset:offset + count]
+        else:
+            watts = self._watts[offset:] + self._watts[:offset + count - self.capacity]
+        return HistoryWindow(start=first * self.step, step=self.step, watts=watts)
+
+    @property
+    def newest(self) -> Optional[float]:
+        """Início (epoch, segundos) da célula mais recente"""
+        return self._newest * self.step if self._newest is not None else None
+
+    @property
+    def nbytes(self) -> int:
+        return self._watts.itemsize * self.capacity
+
+
+class SampleHistory:
+    """
+    Histórico de potência de todos os dispositivos
+
+    Thread-safe: leituras chegam do event loop do coletor e consultas das
+    threads HTTP. As consultas devolvem cópias (HistoryWindow).
+    """
+
+    def __init__(self, step_seconds: float = 30.0, retention_seconds: float = 86400.0):
+        self._lock = threading.Lock()
+        self._rings: Dict[str, SampleRing] = {}
+        self.step_seconds = step_seconds
+        self.retention_seconds = retention_seconds
+        self.configure(step_seconds, retention_seconds)
+
+    @property
+    def capacity(self) -> int:
+        return max(1, math.ceil(self.retention_seconds / self.step_seconds))
+
+    def configure(self, step_seconds: float, retention_seconds: float):
+        """
+        Ajusta célula e retenção; o histórico existente é descartado se mudarem
+
+        (as células antigas não são reamostradas)
+        """
+        if step_seconds <= 0 or retention_seconds <= 0:
+            raise ValueError("step_seconds e retention_seconds devem ser maiores que zero")
+        with self._lock:
+            if (step_seconds, retention_seconds) != (self.step_seconds, self.retention_seconds):
+                self._rings.clear()
+            self.step_seconds = step_seconds
+            self.retention_seconds = retention_seconds
+
+    def record(self, device_id: str, timestamp: datetime, watts: float) -> bool:
+        """Registra uma leitura de potência (False se antiga demais para o buffer)"""
+        with self._lock:
+            ring = self._rings.get(device_id)
+            if ring is None:
+                ring = self._rings[device_id] = SampleRing(self.capacity, self.step_seconds)
+            return ring.append(timestamp.timestamp(), watts)
+
+    def window(self, device_id: str, seconds: Optional[float] = None,
+               now: Optional[float] = None) -> Optional[HistoryWindow]:
+        """
+        Leituras dos últimos `seconds` segundos de um dispositivo
+
+        Args:
+            seconds: Tamanho da janela (None = todo o histórico retido)
+            now: Fim da janela (epoch, segundos; padrão: agora)
+
+        Returns:
+            None se o dispositivo não tem histórico
+        """
+        now = time.time() if now is None else now
+        seconds = self.retention_seconds if seconds is None else seconds
+        with self._lock:
+            ring = self._rings.get(device_id)
+            return ring.window(now - seconds, now) if ring is not None else None
+
+    def forget(self, device_id: str):
+        """Descarta o histórico de um dispositivo removido da configuração"""
+        with self._lock:
+            self._rings.pop(device_id, None)
+
+    def devices(self) -> List[str]:
+        with self._lock:
+            return list(self._rings)
+
+    def nbytes(self) -> int:
+        """Memória ocupada pelos buffers (sem o overhead dos objetos Python)"""
+        with self._lock:
+            return sum(ring.nbytes for ring in self._rings.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rings)
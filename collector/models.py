@@ -0,0 +1,94 @@
+"""
+Modelo de dados do coletor
+
+Leituras por servidor e snapshots por ciclo, todos imutáveis: a mesma
+instância é compartilhada entre cache, snapshot publicado, handlers HTTP
+e os leitores dos processos web (ver collector.shared_snapshot).
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from collector.energy import EnergySummary
+
+
+@dataclass(frozen=True)
+class SensorReadings:
+    """Leituras de sensores de um servidor (None = OID ausente na geração ou sem resposta)"""
+    inlet_temp_c: Optional[float] = None
+    fan_percent: Optional[float] = None
+    cpu_percent: Optional[float] = None
+
+    def as_tuple(self) -> Tuple[Optional[float], ...]:
+        return (self.inlet_temp_c, self.fan_percent, self.cpu_percent)
+
+
+@dataclass(frozen=True)
+class ServerMetrics:
+    """Métricas coletadas de um servidor (imutável: compartilhada entre cache e snapshots)"""
+    device_id: str
+    power_consumption_watts: float
+    timestamp: datetime
+    source: str  # 'snmp_real', 'redfish', 'cached', 'simulated'
+    status: str  # 'success', 'timeout', 'error'
+    error_message: Optional[str] = None
+    system_health: Optional[int] = None  # Preenchido no modo de coleta 'batch'
+    power_supply_status: Optional[Tuple[int, ...]] = None  # Status de cada fonte (walk da tabela PSU)
+    power_stats: Optional[Tuple[Optional[float], ...]] = None  # Redfish: (média, mínimo, máximo) do intervalo do BMC
+    sensors: Optional[SensorReadings] = None  # Modo 'batch': temperatura, ventilação e CPU no mesmo PDU
+
+
+@dataclass(frozen=True)
+class CollectorSnapshot:
+    """
+    Retrato imutável de um ciclo de coleta
+
+    Publicado pelo agendador em background; os handlers HTTP apenas leem
+    a referência atual, sem disparar coleta SNMP.
+    """
+    version: int
+    generated_at: datetime
+    metrics: Tuple[ServerMetrics, ...]
+    total_watts: float
+    fonte: str  # 'snmp_real', 'redfish', 'cached', 'simulado', 'mixed'
+    cycle_duration_seconds: float = 0.0
+
+    @property
+    def total_kw(self) -> float:
+        """Potência instantânea total em kW (energia integrada em kWh: EnergySummary)"""
+        return self.total_watts / 1000
+
+
+@dataclass(frozen=True)
+class SharedSnapshot:
+    """Conteúdo publicado pelo processo coletor para os workers (ver encode_shared_snapshot)"""
+    snapshot: CollectorSnapshot
+    energy: EnergySummary
+    hourly: Tuple[Tuple[datetime, float], ...]
+    daily: Tuple[Tuple[date, float], ...]
+    telemetry: Optional[Dict] = None
+
+
+def summarize_metrics(metrics: Sequence[ServerMetrics]) -> Tuple[float, str]:
+    """
+    Soma o consumo e determina a fonte dominante de uma lista de métricas
+
+    Returns:
+        Tupla (total_watts, fonte)
+    """
+    total_watts = sum(m.power_consumption_watts for m in metrics)
+
+    sources = [m.source for m in metrics]
+    if all(s == 'snmp_real' for s in sources):
+        fonte = 'snmp_real'
+    elif all(s == 'redfish' for s in sources):
+        fonte = 'redfish'
+    elif all(s == 'cached' for s in sources):
+        fonte = 'cached'
+    elif all(s == 'simulado' for s in sources):
+        fonte = 'simulado'
+    else:
+        fonte = 'mixed'
+
+    return total_watts, fonte
@@ -0,0 +1,500 @@
+"""
+Cliente Redfish (iLO 5 / iDRAC 9) para o coletor
+
+HP Gen10 e Dell iDRAC expõem no recurso Power do chassi, além do consumo
+instantâneo, a média, o mínimo e o máximo do intervalo medido pelo BMC
+(PowerControl[].PowerMetrics). O cliente roda no event loop dedicado do
+coletor, sem threads:
+
+- Conexões HTTP/1.1 keep-alive em um pool por host (asyncio streams);
+  conexões que o BMC fechou por inatividade são detectadas e refeitas
+  sem contar como falha
+- Sessão Redfish (X-Auth-Token) criada uma vez por host e reaproveitada
+  entre ciclos; 401 refaz o login uma única vez. Opcionalmente Basic auth
+- Corpo lido em blocos e analisado de forma incremental: apenas o array
+  PowerControl é decodificado; o restante do recurso (Voltages,
+  PowerSupplies, Oem) é descartado sem montar objetos, só lido até o fim
+  para a conexão voltar ao pool
+
+A concorrência é limitada pelo mesmo semáforo dos GETs SNMP.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import re
+import ssl
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 443
+SESSIONS_PATH = '/redfish/v1/SessionService/Sessions'
+POWER_PATH = '/redfish/v1/Chassis/{chassis_id}/Power'
+
+# Chassi padrão por geração: iLO usa "1", iDRAC "System.Embedded.1"
+DEFAULT_CHASSIS = {'vxrail': 'System.Embedded.1'}
+DEFAULT_CHASSIS_ID = '1'
+
+READ_CHUNK = 16384
+MAX_HEADER_BYTES = 65536
+MAX_POWER_CONTROL_BYTES = 1 << 20
+LOGOUT_TIMEOUT_SECONDS = 2.0
+
+HostKey = Tuple[str, str, int]  # (scheme, host, port)
+
+
+class RedfishError(Exception):
+    """Falha de uma requisição Redfish (status HTTP quando houver resposta)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class PowerReading:
+    """Leitura de PowerControl de um chassi (watts)"""
+    consumed_watts: float
+    average_watts: Optional[float] = None
+    min_watts: Optional[float] = None
+    max_watts: Optional[float] = None
+    interval_minutes: Optional[int] = None
+
+    @classmethod
+    def from_power_control(cls, power_control: List[Dict]) -> 'PowerReading':
+        """Primeiro membro com PowerConsumedWatts (o total do chassi no iLO e no iDRAC)"""
+        for member in power_control:
+            if isinstance(member, dict) and member.get('PowerConsumedWatts') is not None:
+                metrics = member.get('PowerMetrics') or {}
+                return cls(
+                    consumed_watts=float(member['PowerConsumedWatts']),
+                    average_watts=_to_float(metrics.get('AverageConsumedWatts')),
+                    min_watts=_to_float(metrics.get('MinConsumedWatts')),
+                    max_watts=_to_float(metrics.get('MaxConsumedWatts')),
+                    interval_minutes=metrics.get('IntervalInMin')
+                )
+        raise RedfishError("PowerControl sem PowerConsumedWatts")
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PowerControlParser:
+    """
+    Extrai o array PowerControl do recurso Power à medida que o corpo chega
+
+    Antes da chave só um trecho curto do fim do buffer é mantido (a chave
+    pode cair entre dois blocos). Depois dela, cada byte novo é varrido uma
+    única vez acompanhando a profundidade de colchetes/chaves fora de
+    strings, e o array é decodificado uma só vez, quando fecha. Blocos
+    seguintes são ignorados; o buffer nunca passa de MAX_POWER_CONTROL_BYTES.
+    """
+
+    _KEY = re.compile(rb'"PowerControl"\s*:')
+    _KEEP = 64
+    _OPEN = frozenset(b'[{')
+    _CLOSE = frozenset(b']}')
+    _WHITESPACE = frozenset(b' \t\r\n')
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._found = False
+        self._scanned = 0  # Bytes do buffer já varridos após a chave
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.value: Optional[List[Dict]] = None
+
+    @property
+    def done(self) -> bool:
+        return self.value is not None
+
+    def feed(self, chunk: bytes):
+        if self.value is not None:
+            return
+        self._buffer += chunk
+
+        if not self._found:
+            match = self._KEY.search(self._buffer)
+            if match is None:
+                del self._buffer[:-self._KEEP]
+                return
+            del self._buffer[:match.end()]
+            self._found = True
+
+        if len(self._buffer) > MAX_POWER_CONTROL_BYTES:
+            raise RedfishError("PowerControl excede o tamanho máximo esperado")
+
+        end = self._scan()
+        if end is None:
+            return  # Array ainda incompleto
+        try:
+            value = json.loads(self._buffer[:end].decode('utf-8'))
+        except ValueError as e:
+            raise RedfishError(f"PowerControl inválido: {e}")
+        if not isinstance(value, list):
+            raise RedfishError("PowerControl não é um array")
+        self.value = value
+        self._buffer = bytearray()
+
+    def _scan(self) -> Optional[int]:
+        """Continua a varredura; retorna o fim do valor quando ele fecha"""
+        buffer = self._buffer
+        for position in range(self._scanned, len(buffer)):
+            byte = buffer[position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif byte == 0x5C:  # barra invertida
+                    self._escape = True
+                elif byte == 0x22:  # aspas
+                    self._in_string = False
+            elif byte == 0x22:
+                self._in_string = True
+            elif byte in self._OPEN:
+                self._depth += 1
+            elif byte in self._CLOSE:
+                self._depth -= 1
+                if self._depth == 0:
+                    return position + 1
+            elif self._depth == 0 and byte not in self._WHITESPACE:
+                raise RedfishError("PowerControl não é um array")
+        self._scanned = len(buffer)
+        return None
+
+
+class HTTPConnection:
+    """Conexão HTTP/1.1 keep-alive sobre asyncio streams"""
+
+    __slots__ = ('key', 'reader', 'writer', 'last_used')
+
+    def __init__(self, key: HostKey, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    @property
+    def is_closed(self) -> bool:
+        """Servidor encerrou a conexão (FIN já recebido) ou transporte fechado"""
+        return self.reader.at_eof() or self.writer.is_closing()
+
+    async def request(self, method: str, path: str, headers: Dict[str, str], body: Optional[bytes] = None,
+                      on_chunk: Optional[Callable[[bytes], None]] = None) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """
+        Envia uma requisição e lê a resposta completa
+
+        Args:
+            on_chunk: Recebe cada bloco do corpo (o corpo não é acumulado)
+
+        Returns:
+            (status, cabeçalhos em minúsculas, corpo, conexão reutilizável)
+        """
+        _, host, port = self.key
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Accept: application/json"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if body is not None:
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Conexão encerrada pelo servidor")
+        try:
+            version, status_text = status_line.decode('latin-1').split(None, 2)[:2]
+            status = int(status_text)
+        except ValueError:
+            raise RedfishError(f"Linha de status inválida: {status_line[:80]!r}")
+
+        response_headers = await self._read_headers()
+        chunks: List[bytes] = []
+        sink = on_chunk if on_chunk is not None else chunks.append
+
+        reusable = version == 'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            pass
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            await self._read_chunked(sink)
+        elif 'content-length' in response_headers:
+            remaining = int(response_headers['content-length'])
+            while remaining > 0:
+                data = await self.reader.readexactly(min(remaining, READ_CHUNK))
+                remaining -= len(data)
+                sink(data)
+        else:
+            # Sem tamanho: corpo vai até o fim da conexão
+            reusable = False
+            while True:
+                data = await self.reader.read(READ_CHUNK)
+                if not data:
+                    break
+                sink(data)
+
+        self.last_used = time.monotonic()
+        return status, response_headers, b''.join(chunks), reusable
+
+    async def _read_headers(self) -> Dict[str, str]:
+        headers = {}
+        size = 0
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionResetError("Conexão encerrada durante os cabeçalhos")
+            size += len(line)
+            if size > MAX_HEADER_BYTES:
+                raise RedfishError("Cabeçalhos da resposta excedem o limite")
+            if line in (b'\r\n', b'\n'):
+                return headers
+            name, sep, value = line.decode('latin-1').partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+    async def _read_chunked(self, sink: Callable[[bytes], None]):
+        while True:
+            size_line = await self.reader.readline()
+            try:
+                size = int(size_line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise RedfishError("Codificação chunked inválida")
+            if size == 0:
+                # Trailers opcionais até a linha vazia
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            remaining = size
+            while remaining > 0:
+                data = await self.reader.readexactly(min(remaining, READ_CHUNK))
+                remaining -= len(data)
+                sink(data)
+            await self.reader.readexactly(2)
+
+    def close(self):
+        if not self.writer.is_closing():
+            self.writer.close()
+
+
+class ConnectionPool:
+    """
+    Conexões ociosas por host, reaproveitadas entre requisições e ciclos
+
+    Cada host mantém até `max_idle_per_host` conexões ociosas; conexões
+    paradas há mais de `idle_timeout` segundos são descartadas.
+    """
+
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, max_idle_per_host: int = 2,
+                 idle_timeout: float = 300.0):
+        self.ssl_context = ssl_context
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[HostKey, Deque[HTTPConnection]] = {}
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self, key: HostKey) -> Tuple[HTTPConnection, bool]:
+        """Conexão para o host: (conexão, veio do pool)"""
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            connection = idle.pop()
+            if connection.is_closed or now - connection.last_used > self.idle_timeout:
+                connection.close()
+                continue
+            self.reused += 1
+            return connection, True
+
+        scheme, host, port = key
+        ssl_context = self.ssl_context if scheme == 'https' else None
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=ssl_context, limit=MAX_HEADER_BYTES,
+            server_hostname=host if ssl_context is not None else None
+        )
+        self.opened += 1
+        return HTTPConnection(key, reader, writer), False
+
+    def release(self, connection: HTTPConnection, reusable: bool):
+        """Devolve a conexão ao pool (ou a fecha, se não reutilizável ou pool cheio)"""
+        idle = self._idle.setdefault(connection.key, deque())
+        if not reusable or connection.is_closed or len(idle) >= self.max_idle_per_host:
+            connection.close()
+            return
+        idle.append(connection)
+
+    def discard(self, key: HostKey):
+        """Fecha as conexões ociosas de um host"""
+        for connection in self._idle.pop(key, ()):
+            connection.close()
+
+    def close(self):
+        for key in list(self._idle):
+            self.discard(key)
+
+    def idle_count(self) -> int:
+        return sum(len(idle) for idle in self._idle.values())
+
+
+class RedfishClient:
+    """
+    Consultas ao recurso Power de hosts Redfish
+
+    Uso restrito ao event loop do coletor (pool e sessões não são
+    thread-safe).
+    """
+
+    def __init__(self, username: str, password: str, auth: str = 'session', verify_tls: bool = True,
+                 ca_file: Optional[str] = None, max_idle_per_host: int = 2):
+        if auth not in ('session', 'basic'):
+            raise ValueError("auth deve ser 'session' ou 'basic'")
+        self.username = username
+        self.password = password
+        self.auth = auth
+        self.pool = ConnectionPool(self._make_ssl_context(verify_tls, ca_file), max_idle_per_host)
+        self._sessions: Dict[HostKey, Tuple[str, Optional[str]]] = {}  # token, Location da sessão
+        self._login_locks: Dict[HostKey, asyncio.Lock] = {}
+        self._forgetting: Set[asyncio.Task] = set()  # Logouts de hosts descartados em andamento
+        self.logins = 0
+
+    @staticmethod
+    def _make_ssl_context(verify_tls: bool, ca_file: Optional[str]) -> ssl.SSLContext:
+        context = ssl.create_default_context(cafile=ca_file)
+        if not verify_tls:
+            # BMCs costumam usar certificado autoassinado
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return context
+
+    async def _request(self, key: HostKey, method: str, path: str, headers: Dict[str, str],
+                       body: Optional[bytes] = None,
+                       on_chunk: Optional[Callable[[bytes], None]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Requisição em uma conexão do pool
+
+        Conexão reaproveitada que o servidor já fechou falha antes de
+        qualquer resposta; nesse caso a requisição é repetida uma vez em
+        conexão nova.
+        """
+        for _ in range(2):
+            connection, reused = await self.pool.acquire(key)
+            try:
+                status, response_headers, data, reusable = await connection.request(
+                    method, path, headers, body, on_chunk
+                )
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as e:
+                connection.close()
+                if reused and not getattr(e, 'partial', None):
+                    continue
+                raise RedfishError(f"Conexão com {key[1]}:{key[2]} interrompida: {e}")
+            except BaseException:
+                # Timeout/cancelamento no meio da resposta: estado da conexão indefinido
+                connection.close()
+                raise
+            self.pool.release(connection, reusable)
+            return status, response_headers, data
+        raise RedfishError(f"Conexão com {key[1]}:{key[2]} interrompida")
+
+    async def _session_headers(self, key: HostKey) -> Dict[str, str]:
+        if self.auth == 'basic':
+            credentials = base64.b64encode(f"{self.username}:{self.password}".encode('utf-8')).decode('ascii')
+            return {'Authorization': f"Basic {credentials}"}
+
+        session = self._sessions.get(key)
+        if session is None:
+            lock = self._login_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = await self._login(key)
+        return {'X-Auth-Token': session[0]}
+
+    async def _login(self, key: HostKey) -> Tuple[str, Optional[str]]:
+        """Cria uma sessão Redfish (POST SessionService/Sessions)"""
+        body = json.dumps({'UserName': self.username, 'Password': self.password}).encode('utf-8')
+        status, headers, _ = await self._request(key, 'POST', SESSIONS_PATH, {}, body)
+        token = headers.get('x-auth-token')
+        if status not in (200, 201) or not token:
+            raise RedfishError(f"Login Redfish recusado por {key[1]}:{key[2]} (HTTP {status})", status)
+        location = headers.get('location')
+        session = (token, location)
+        self._sessions[key] = session
+        self.logins += 1
+        logger.debug(f"Sessão Redfish criada em {key[1]}:{key[2]}")
+        return session
+
+    async def get_power(self, host: str, port: int = DEFAULT_PORT, chassis_id: str = DEFAULT_CHASSIS_ID,
+                        scheme: str = 'https') -> PowerReading:
+        """Lê PowerControl do chassi (uma requisição em regime)"""
+        key = (scheme, host, port)
+        path = POWER_PATH.format(chassis_id=chassis_id)
+
+        for attempt in range(2):
+            headers = await self._session_headers(key)
+            parser = PowerControlParser()
+            status, _, _ = await self._request(key, 'GET', path, headers, on_chunk=parser.feed)
+            if status == 401 and self.auth == 'session':
+                if attempt == 0:
+                    # Sessão expirada ou removida no BMC: novo login
+                    self._sessions.pop(key, None)
+                    continue
+                # Sessão recém-criada também recusada: nada deste host é reaproveitado
+                self.forget(host, port, scheme)
+            if status != 200:
+                raise RedfishError(f"GET {path} em {host}:{port} retornou HTTP {status}", status)
+            if not parser.done:
+                raise RedfishError(f"Recurso {path} em {host}:{port} sem PowerControl")
+            return PowerReading.from_power_control(parser.value)
+        raise RedfishError(f"Autenticação Redfish recusada por {host}:{port}", 401)
+
+    async def _logout(self, key: HostKey, token: str, location: str):
+        """Encerra uma sessão no BMC (DELETE na Location da sessão)"""
+        path = urlsplit(location).path if '://' in location else location
+        await self._request(key, 'DELETE', path, {'X-Auth-Token': token})
+
+    def forget(self, host: str, port: int, scheme: str = 'https'):
+        """
+        Descarta sessão e conexões de um host (falha de consulta ou endpoint alterado)
+
+        A sessão é encerrada no BMC em background, em melhor esforço: BMCs
+        aceitam poucas sessões simultâneas. Chamar no event loop do cliente.
+        """
+        key = (scheme, host, port)
+        session = self._sessions.pop(key, None)
+        if session is None or not session[1]:
+            self.pool.discard(key)
+            return
+        task = asyncio.ensure_future(self._forget_session(key, *session))
+        self._forgetting.add(task)
+        task.add_done_callback(self._forgetting.discard)
+
+    async def _forget_session(self, key: HostKey, token: str, location: str):
+        try:
+            await asyncio.wait_for(self._logout(key, token, location), LOGOUT_TIMEOUT_SECONDS)
+        except (RedfishError, OSError, asyncio.TimeoutError) as e:
+            logger.debug(f"Logout Redfish em {key[1]}:{key[2]} falhou: {e}")
+        finally:
+            self.pool.discard(key)
+
+    async def close(self, timeout: float = 2.0):
+        """Encerra as sessões abertas nos BMCs (melhor esforço) e fecha as conexões"""
+        logouts = [
+            self._logout(key, token, location)
+            for key, (token, location) in self._sessions.items() if location
+        ]
+        logouts.extend(self._forgetting)
+        self._sessions.clear()
+        if logouts:
+            try:
+                await asyncio.wait_for(asyncio.gather(*logouts, return_exceptions=True), timeout)
+            except asyncio.TimeoutError:
+                logger.debug("Encerramento de sessões Redfish excedeu o prazo")
+        self.pool.close()
@@ -0,0 +1,175 @@
+"""
+Resiliência por dispositivo para o coletor SNMP
+
+- CircuitBreaker: pula hosts sabidamente fora do ar durante um cooldown
+  e volta a testá-los com uma única sonda (half-open)
+- RTTEstimator: timeout adaptativo a partir da EWMA do RTT observado
+  (mesmo cálculo do RTO do TCP, RFC 6298)
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um dispositivo
+
+    Estados:
+    - closed: consultas normais; falhas consecutivas são contadas
+    - open: consultas bloqueadas até o fim do cooldown
+    - half_open: uma única sonda liberada; sucesso fecha, falha reabre
+      com cooldown dobrado (até max_cooldown_seconds)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 60.0,
+        max_cooldown_seconds: float = 600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.cooldown_seconds = cooldown_seconds
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Indica se uma consulta pode ser feita agora"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.cooldown_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        # half_open: apenas uma sonda por vez
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        """Registra consulta bem-sucedida e fecha o circuito"""
+        self.reset()
+
+    def reset(self):
+        """Fecha o circuito e zera falhas e cooldown (ex.: credenciais trocadas)"""
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown_seconds = self.base_cooldown_seconds
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Registra consulta com falha; abre o circuito ao atingir o limite"""
+        if self.state == self.HALF_OPEN:
+            # Sonda falhou: reabrir com cooldown maior
+            self.cooldown_seconds = min(self.cooldown_seconds * 2, self.max_cooldown_seconds)
+            self._open()
+            return
+
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self._probe_in_flight = False
+
+    def restore(self, state: str, failures: int, opened_at: Optional[float], cooldown_seconds: float):
+        """
+        Restaura estado persistido (warm start)
+
+        Uma sonda half-open interrompida volta como open com o instante de
+        abertura original, liberando nova sonda assim que o cooldown vencer.
+        """
+        self.state = self.OPEN if state == self.HALF_OPEN else state
+        self.failures = failures
+        self.opened_at = opened_at
+        self.cooldown_seconds = cooldown_seconds
+        self._probe_in_flight = False
+        if self.state == self.OPEN and self.opened_at is None:
+            self.opened_at = self.clock()
+
+    @property
+    def is_half_open(self) -> bool:
+        return self.state == self.HALF_OPEN
+
+
+class RTTEstimator:
+    """
+    Estimador de RTT por EWMA com timeout adaptativo
+
+    timeout = clamp((SRTT + k x RTTVAR) x backoff, min_timeout, max_timeout)
+
+    Antes da primeira amostra o timeout é max_timeout. Cada timeout dobra o
+    fator de backoff até a próxima resposta.
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = 0.2,
+        max_timeout: float = 3.0,
+        alpha: float = 0.125,
+        beta: float = 0.25,
+        k: float = 4.0,
+    ):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.alpha = alpha
+        self.beta = beta
+        self.k = k
+
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.backoff = 1.0
+
+    def observe(self, rtt: float):
+        """Incorpora uma amostra de RTT (segundos)"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+        self.backoff = 1.0
+
+    def restore(self, srtt: Optional[float], rttvar: Optional[float]):
+        """Restaura estimativas persistidas (warm start)"""
+        self.srtt = srtt
+        self.rttvar = rttvar if srtt is not None else None
+        self.backoff = 1.0
+
+    def on_timeout(self):
+        """Registra um timeout: dobra o timeout até a próxima resposta"""
+        self.backoff = min(self.backoff * 2, 64.0)
+
+    def timeout(self) -> float:
+        """Timeout atual em segundos"""
+        if self.srtt is None:
+            return self.max_timeout
+        rto = (self.srtt + self.k * self.rttvar) * self.backoff
+        return max(self.min_timeout, min(rto, self.max_timeout))
+
+
+@dataclass
+class DeviceHealth:
+    """Estado de saúde de um dispositivo: circuit breaker + estimativa de RTT"""
+
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    rtt: RTTEstimator = field(default_factory=RTTEstimator)
@@ -0,0 +1,70 @@
+"""
+Agendamento escalonado de coleta
+
+TimingWheel distribui os dispositivos em slots do intervalo de coleta a
+partir de um hash estável do device_id. A cada tick o agendador consulta
+apenas o slot corrente, de modo que a frota é varrida uniformemente ao
+longo do intervalo em vez de em uma rajada única.
+"""
+
+import zlib
+from typing import Dict, List
+
+
+class TimingWheel:
+    """
+    Roda de tempo com `slot_count` slots
+
+    O slot de um dispositivo depende apenas do device_id e do número de
+    slots, então adicionar ou remover servidores não move os demais.
+    """
+
+    def __init__(self, slot_count: int):
+        if slot_count < 1:
+            raise ValueError("slot_count deve ser maior que zero")
+        self.slot_count = slot_count
+        self._slots: List[Dict[str, Dict]] = [{} for _ in range(slot_count)]
+        self._slot_of: Dict[str, int] = {}
+
+    @staticmethod
+    def slot_for(device_id: str, slot_count: int) -> int:
+        """Slot estável de um dispositivo (CRC32 do device_id)"""
+        return zlib.crc32(device_id.encode("utf-8")) % slot_count
+
+    def add(self, server_config: Dict):
+        """Adiciona (ou atualiza) um servidor na roda"""
+        device_id = server_config.get("device_id", "unknown")
+        self.remove(device_id)
+        slot = self.slot_for(device_id, self.slot_count)
+        self._slots[slot][device_id] = server_config
+        self._slot_of[device_id] = slot
+
+    def remove(self, device_id: str) -> bool:
+        """Remove um servidor da roda; retorna False se não estava presente"""
+        slot = self._slot_of.pop(device_id, None)
+        if slot is None:
+            return False
+        self._slots[slot].pop(device_id, None)
+        return True
+
+    def devices_in(self, slot: int) -> List[Dict]:
+        """Servidores agendados para um slot"""
+        return list(self._slots[slot % self.slot_count].values())
+
+    def slot_sizes(self) -> List[int]:
+        """Quantidade de servidores em cada slot"""
+        return [len(slot) for slot in self._slots]
+
+    def __contains__(self, device_id: str) -> bool:
+        return device_id in self._slot_of
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    @classmethod
+    def from_servers(cls, servers: List[Dict], slot_count: int) -> "TimingWheel":
+        """Cria uma roda já populada com os servidores"""
+        wheel = cls(slot_count)
+        for server in servers:
+            wheel.add(server)
+        return wheel
@@ -0,0 +1,73 @@
+"""
+Processo coletor standalone
+
+Roda o SNMPCollector com o agendador em background e publica cada
+snapshot no arquivo compartilhado (mmap). Os workers WSGI apontam
+ECOTI_SNAPSHOT_FILE para o mesmo arquivo e apenas leem, de modo que o
+tráfego SNMP não cresce com o número de workers.
+
+Uso:
+    python -m collector.service --config renault_servers.json \\
+        --snapshot-file /dev/shm/ecoti_snapshot
+
+Com vários nós coletores, cada processo recebe o próprio --node-id e
+coleta apenas os dispositivos que o hash consistente lhe atribui:
+    python -m collector.service --nodes coletor-a,coletor-b \\
+        --node-id coletor-a --snapshot-file /dev/shm/coletor-a
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+from typing import List, Optional
+
+from snmp_collector import SNMPCollector
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Processo coletor SNMP do EcoTI Dashboard")
+    parser.add_argument('--config', default='renault_servers.json', help="Arquivo de configuração SNMP")
+    parser.add_argument('--snapshot-file',
+                        help="Arquivo do snapshot compartilhado (padrão: coleta_config.shared_snapshot_file)")
+    parser.add_argument('--node-id', help="Nó deste processo (padrão: coleta_config.shard_node_id)")
+    parser.add_argument('--nodes',
+                        help="Nós coletores separados por vírgula (padrão: coleta_config.shard_nodes)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    collector = SNMPCollector(config_file=args.config)
+    if args.snapshot_file:
+        collector.shared_snapshot_file = args.snapshot_file
+    if not collector.shared_snapshot_file:
+        logger.error("Informe --snapshot-file ou coleta_config.shared_snapshot_file")
+        return 2
+    if args.node_id or args.nodes:
+        nodes = [node.strip() for node in args.nodes.split(',') if node.strip()] if args.nodes else None
+        collector.configure_shard(args.node_id or collector.shard_node_id, nodes)
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info(f"Sinal {signum} recebido - encerrando coletor")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    collector.start()
+    logger.info(f"Coletor publicando snapshot em {collector.shared_snapshot_file}")
+    try:
+        while not stop.wait(1):
+            pass
+    finally:
+        collector.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Particionamento da frota entre nós coletores
+
+HashRing atribui cada device_id a um nó por hash consistente com nós
+virtuais: cada nó ocupa `vnodes` pontos do anel e um dispositivo
+pertence ao primeiro ponto no sentido horário do seu hash. Quando um nó
+entra ou sai, só mudam de dono os dispositivos dos arcos afetados
+(~1/N da frota), e os demais mantêm cache, circuit breaker e energia
+no nó em que já estavam.
+
+O hash é MD5 (64 bits iniciais), estável entre processos e máquinas —
+ao contrário de hash(), que varia com PYTHONHASHSEED.
+
+ShardedSnapshotCollector combina, nos processos web, os snapshots
+parciais publicados por cada nó.
+"""
+
+import bisect
+import hashlib
+import logging
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from collector.energy import EnergySummary
+from collector.models import CollectorSnapshot, ServerMetrics, SharedSnapshot, summarize_metrics
+from collector.shared_snapshot import SharedSnapshotCollector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VNODES = 160
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Anel de hash consistente com nós virtuais"""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = DEFAULT_VNODES):
+        if vnodes < 1:
+            raise ValueError("vnodes deve ser maior que zero")
+        self.vnodes = vnodes
+        self._nodes: List[str] = []
+        self._points: List[Tuple[int, str]] = []
+        self._hashes: List[int] = []
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add_node(self, node: str):
+        """Adiciona um nó ao anel (idempotente)"""
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for replica in range(self.vnodes):
+            bisect.insort(self._points, (_hash(f"{node}#{replica}"), node))
+        self._hashes = [point for point, _ in self._points]
+
+    def remove_node(self, node: str) -> bool:
+        """Remove um nó do anel; retorna False se não estava presente"""
+        if node not in self._nodes:
+            return False
+        self._nodes.remove(node)
+        self._points = [point for point in self._points if point[1] != node]
+        self._hashes = [point for point, _ in self._points]
+        return True
+
+    def node_for(self, key: str) -> Optional[str]:
+        """Nó responsável por uma chave (None se o anel estiver vazio)"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Chaves agrupadas por nó (todos os nós presentes, mesmo sem chaves)"""
+        assignment: Dict[str, List[str]] = {node: [] for node in self._nodes}
+        for key in keys:
+            node = self.node_for(key)
+            if node is not None:
+                assignment[node].append(key)
+        return assignment
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+def select_shard(servers: List[Dict], ring: HashRing, node_id: str) -> List[Dict]:
+    """Servidores de `servers` atribuídos a `node_id` (mantém a ordem original)"""
+    return [server for server in servers if ring.node_for(server.get("device_id", "unknown")) == node_id]
+
+
+class ShardedSnapshotCollector:
+    """
+    Agregador dos snapshots parciais publicados por vários nós coletores
+
+    Cada nó (python -m collector.service --node-id ...) publica apenas a
+    sua parte da frota; este leitor combina os snapshots em uma visão
+    única com a mesma interface do SNMPCollector. O merge só é refeito
+    quando algum nó publica um snapshot novo.
+
+    Nós ausentes ou desatualizados ficam de fora do total (registrado no
+    log e em get_shard_status); sem nenhum nó disponível, a leitura falha.
+    A versão do snapshot combinado não é monotônica entre rebalanceamentos
+    (ver _merge).
+    """
+
+    def __init__(self, paths: Dict[str, str], max_age_seconds: float = 300.0):
+        """
+        Args:
+            paths: Arquivo de snapshot compartilhado de cada nó (node_id -> caminho)
+            max_age_seconds: Idade máxima de um snapshot parcial
+        """
+        if not paths:
+            raise ValueError("Informe ao menos um snapshot de nó coletor")
+        self.shards = {node: SharedSnapshotCollector(path, max_age_seconds) for node, path in paths.items()}
+        self._lock = threading.Lock()
+        self._parts: Optional[Tuple] = None
+        self._merged: Optional[SharedSnapshot] = None
+        self._missing: List[str] = []
+
+    def _read_parts(self) -> Dict[str, Optional[SharedSnapshot]]:
+        parts = {}
+        for node, shard in self.shards.items():
+            try:
+                parts[node] = shard.read()
+            except RuntimeError as e:
+                logger.debug(f"Snapshot do nó {node} indisponível: {e}")
+                parts[node] = None
+        return parts
+
+    def read(self) -> SharedSnapshot:
+        """Visão combinada dos nós disponíveis; erro se nenhum nó publicou"""
+        parts = self._read_parts()
+        available = [part for part in parts.values() if part is not None]
+        if not available:
+            raise RuntimeError(f"Nenhum snapshot de nó coletor disponível ({len(parts)} nós)")
+
+        with self._lock:
+            # Cada leitor devolve o mesmo objeto enquanto não há publicação nova
+            if self._parts is not None and len(self._parts) == len(available) and all(
+                a is b for a, b in zip(self._parts, available)
+            ):
+                return self._merged
+
+            missing = [node for node, part in parts.items() if part is None]
+            if missing and missing != self._missing:
+                logger.warning(f"Nós coletores sem snapshot recente: {', '.join(missing)} - total parcial")
+            self._missing = missing
+            self._merged = self._merge(available)
+            self._parts = tuple(available)
+            return self._merged
+
+    @staticmethod
+    def _merge(parts: List[SharedSnapshot]) -> SharedSnapshot:
+        """
+        Combina snapshots parciais
+
+        Durante um rebalanceamento o nó antigo pode ainda publicar um
+        dispositivo já movido; prevalece a leitura mais recente.
+
+        A versão combinada é a soma das versões dos nós disponíveis: só é
+        monotônica enquanto o conjunto de nós não muda. Um nó que sai do
+        total (ou reinicia a sua contagem) faz a soma recuar, então ETags e
+        consumidores incrementais não devem se basear nela (ver
+        get_data_version).
+        """
+        latest: Dict[str, ServerMetrics] = {}
+        for part in parts:
+            for metric in part.snapshot.metrics:
+                current = latest.get(metric.device_id)
+                if current is None or metric.timestamp > current.timestamp:
+                    latest[metric.device_id] = metric
+        metrics = tuple(latest[device_id] for device_id in sorted(latest))
+        total_watts, fonte = summarize_metrics(metrics)
+
+        snapshots = [part.snapshot for part in parts]
+        merged = CollectorSnapshot(
+            version=sum(snapshot.version for snapshot in snapshots),
+            generated_at=min(snapshot.generated_at for snapshot in snapshots),
+            metrics=metrics,
+            total_watts=total_watts,
+            fonte=fonte,
+            cycle_duration_seconds=max(snapshot.cycle_duration_seconds for snapshot in snapshots)
+        )
+
+        summaries = [part.energy for part in parts]
+        since = [summary.since for summary in summaries if summary.since is not None]
+        energy = EnergySummary(
+            total_kwh=sum(summary.total_kwh for summary in summaries),
+            current_hour_kwh=sum(summary.current_hour_kwh for summary in summaries),
+            today_kwh=sum(summary.today_kwh for summary in summaries),
+            last_24h_kwh=sum(summary.last_24h_kwh for summary in summaries),
+            devices=sum(summary.devices for summary in summaries),
+            gap_seconds=sum(summary.gap_seconds for summary in summaries),
+            since=min(since) if since else None,
+            last_24h_device_seconds=sum(summary.last_24h_device_seconds for summary in summaries)
+        )
+
+        hourly: Dict[datetime, float] = {}
+        daily: Dict[date, float] = {}
+        for part in parts:
+            for hour, kwh in part.hourly:
+                hourly[hour] = hourly.get(hour, 0.0) + kwh
+            for day, kwh in part.daily:
+                daily[day] = daily.get(day, 0.0) + kwh
+        return SharedSnapshot(merged, energy, tuple(sorted(hourly.items())), tuple(sorted(daily.items())))
+
+    def get_snapshot(self) -> Optional[CollectorSnapshot]:
+        """Snapshot combinado dos nós coletores (None se nenhum disponível)"""
+        try:
+            return self.read().snapshot
+        except RuntimeError:
+            return None
+
+    def get_total_power_kw(self) -> Tuple[float, str]:
+        """Potência instantânea total da frota (kW) somando os nós disponíveis"""
+        snapshot = self.read().snapshot
+        return snapshot.total_kw, snapshot.fonte
+
+    def get_energy_summary(self) -> EnergySummary:
+        """Energia acumulada somada entre os nós coletores"""
+        return self.read().energy
+
+    def get_energy_buckets(self) -> Tuple[List[Tuple[datetime, float]], List[Tuple[date, float]]]:
+        """kWh por hora e por dia somados entre os nós coletores"""
+        shared = self.read()
+        return list(shared.hourly), list(shared.daily)
+
+    def get_telemetry(self, devices: bool = False) -> Dict:
+        """Telemetria de cada nó coletor (None para nós indisponíveis)"""
+        telemetry = {}
+        for node, shard in self.shards.items():
+            try:
+                telemetry[node] = shard.get_telemetry()
+            except RuntimeError:
+                telemetry[node] = None
+        return {'nodes': telemetry}
+
+    def get_data_version(self) -> Tuple:
+        """
+        Versão de cada nó coletor (None para nós indisponíveis)
+
+        Tupla por nó em vez da soma das versões: um nó que volta a
+        publicar (ou sai do total) sempre muda a versão combinada.
+        """
+        versions = []
+        for node, shard in self.shards.items():
+            try:
+                versions.append((node, shard.get_data_version()))
+            except RuntimeError:
+                versions.append((node, None))
+        if all(version is None for _, version in versions):
+            raise RuntimeError(f"Nenhum snapshot de nó coletor disponível ({len(versions)} nós)")
+        return tuple(versions)
+
+    def get_shard_status(self) -> Dict[str, Optional[Dict]]:
+        """Versão, idade e dispositivos do snapshot de cada nó (None se indisponível)"""
+        status = {}
+        for node, shard in self.shards.items():
+            snapshot = shard.get_snapshot()
+            status[node] = None if snapshot is None else {
+                'version': snapshot.version,
+                'age_seconds': (datetime.now() - snapshot.generated_at).total_seconds(),
+                'devices': len(snapshot.metrics)
+            }
+        return status
+
+    def is_running(self) -> bool:
+        """Indica se ao menos um nó coletor publicou recentemente"""
+        return self.get_snapshot() is not None
+
+    def close(self):
+        for shard in self.shards.values():
+            shard.close()
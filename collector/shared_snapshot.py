@@ -0,0 +1,342 @@
+"""
+Snapshot compartilhado entre processos via mmap
+
+Um único processo coletor (SharedSnapshotWriter) publica o último
+snapshot em um arquivo mapeado em memória; os workers WSGI
+(SharedSnapshotReader) apenas mapeiam o arquivo. O tráfego SNMP não
+cresce com o número de workers.
+
+Layout do arquivo:
+    [magic 8s][seq Q][length Q][retired Q][payload ...]
+
+A escrita segue um seqlock: seq ímpar durante a escrita, par quando o
+payload está completo. O leitor descarta leituras em que seq mudou ou
+estava ímpar, e guarda o último payload decodificado: enquanto seq não
+muda, uma leitura custa apenas o unpack do cabeçalho.
+
+Quando o payload não cabe mais, o escritor cria um arquivo maior,
+troca-o de lugar com os.replace e marca o antigo como `retired`; os
+leitores reabrem o caminho ao ver a marca.
+
+O payload é o SharedSnapshot do coletor (encode_shared_snapshot /
+decode_shared_snapshot), lido nos workers por SharedSnapshotCollector.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from collector.energy import EnergySummary
+from collector.models import CollectorSnapshot, SensorReadings, ServerMetrics, SharedSnapshot
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ECOSNAP1"
+HEADER = struct.Struct("<8sQQQ")
+HEADER_SIZE = HEADER.size
+DEFAULT_CAPACITY = 1 << 20  # 1 MiB de payload inicial
+
+# Tentativas de leitura enquanto o escritor está no meio de uma publicação
+READ_RETRIES = 100
+READ_RETRY_SLEEP_SECONDS = 0.001
+
+
+class SharedSnapshotWriter:
+    """Publica payloads JSON no arquivo compartilhado (um único escritor)"""
+
+    def __init__(self, path: str, initial_capacity: int = DEFAULT_CAPACITY):
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self._mmap: Optional[mmap.mmap] = None
+        self._capacity = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def write(self, payload: Any) -> int:
+        """
+        Serializa e publica um payload
+
+        Returns:
+            Número de sequência publicado
+        """
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            if self._mmap is None or len(data) > self._capacity:
+                self._remap(max(self.initial_capacity, self._capacity * 2, len(data) * 2))
+
+            mm = self._mmap
+            self._seq += 1  # ímpar: escrita em andamento
+            struct.pack_into("<Q", mm, 8, self._seq)
+            mm[HEADER_SIZE:HEADER_SIZE + len(data)] = data
+            struct.pack_into("<Q", mm, 16, len(data))
+            self._seq += 1  # par: payload completo
+            struct.pack_into("<Q", mm, 8, self._seq)
+            return self._seq
+
+    def _remap(self, capacity: int):
+        """Cria um arquivo com `capacity` bytes de payload e o coloca no caminho final"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.truncate(HEADER_SIZE + capacity)
+        with open(tmp_path, "r+b") as f:
+            new_map = mmap.mmap(f.fileno(), HEADER_SIZE + capacity)
+        HEADER.pack_into(new_map, 0, MAGIC, self._seq, 0, 0)
+        previous_map = self._mmap if self._mmap is not None else self._map_existing()
+        os.replace(tmp_path, self.path)
+
+        self._mmap, self._capacity = new_map, capacity
+        if previous_map is not None:
+            # Leitores do arquivo antigo (inclusive de uma execução anterior) reabrem o caminho
+            struct.pack_into("<Q", previous_map, 24, 1)
+            previous_map.close()
+        logger.debug(f"Snapshot compartilhado {self.path}: capacidade {capacity} bytes")
+
+    def _map_existing(self) -> Optional[mmap.mmap]:
+        """Mapeia um arquivo de snapshot já existente no caminho (None se não houver)"""
+        try:
+            with open(self.path, "r+b") as f:
+                existing = mmap.mmap(f.fileno(), 0)
+        except (FileNotFoundError, ValueError):
+            return None
+        if existing[:len(MAGIC)] != MAGIC:
+            existing.close()
+            return None
+        return existing
+
+    def close(self):
+        """Libera o mapeamento (o arquivo permanece com o último snapshot)"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+
+class SharedSnapshotReader:
+    """
+    Lê o último payload publicado, decodificando apenas quando ele muda
+
+    `decode` converte o dict JSON no objeto entregue ao chamador (ex.:
+    CollectorSnapshot); o resultado fica em cache até a próxima publicação.
+    """
+
+    def __init__(self, path: str, decode: Callable[[Any], Any] = lambda payload: payload):
+        self.path = path
+        self.decode = decode
+        self._mmap: Optional[mmap.mmap] = None
+        self._seq: Optional[int] = None
+        self._value: Any = None
+        self._lock = threading.Lock()
+
+    def read(self) -> Any:
+        """Último payload decodificado (None se nada foi publicado ainda)"""
+        with self._lock:
+            for _ in range(READ_RETRIES):
+                if self._mmap is None and not self._open():
+                    return self._value
+
+                magic, seq, length, retired = HEADER.unpack_from(self._mmap, 0)
+                if magic != MAGIC:
+                    logger.warning(f"Arquivo de snapshot inválido: {self.path}")
+                    self._close()
+                    return self._value
+                if retired:
+                    # Arquivo substituído: o novo recomeça a sequência
+                    self._close()
+                    self._seq = None
+                    continue
+                if seq == self._seq:
+                    return self._value
+                if seq % 2:
+                    # Escrita em andamento: aguardar o escritor terminar
+                    time.sleep(READ_RETRY_SLEEP_SECONDS)
+                    continue
+                if length == 0:
+                    # Nada publicado ainda
+                    return self._value
+
+                data = bytes(self._mmap[HEADER_SIZE:HEADER_SIZE + length])
+                if struct.unpack_from("<Q", self._mmap, 8)[0] != seq:
+                    continue
+
+                self._value = self.decode(json.loads(data))
+                self._seq = seq
+                return self._value
+
+            logger.debug(f"Snapshot {self.path} em escrita contínua - usando último valor lido")
+            return self._value
+
+    def _open(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Arquivo ainda não criado pelo coletor (ou vazio)
+            return False
+        return True
+
+    def _close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+def encode_shared_snapshot(shared: SharedSnapshot) -> Dict:
+    """Converte snapshot, energia e telemetria em payload JSON compacto (timestamps em epoch)"""
+    snapshot, energy = shared.snapshot, shared.energy
+    return {
+        'version': snapshot.version,
+        'generated_at': snapshot.generated_at.timestamp(),
+        'total_watts': snapshot.total_watts,
+        'fonte': snapshot.fonte,
+        'cycle_duration_seconds': snapshot.cycle_duration_seconds,
+        'metrics': [
+            [
+                m.device_id, m.power_consumption_watts, m.timestamp.timestamp(), m.source, m.status,
+                m.error_message, m.system_health,
+                list(m.power_supply_status) if m.power_supply_status is not None else None,
+                list(m.power_stats) if m.power_stats is not None else None,
+                list(m.sensors.as_tuple()) if m.sensors is not None else None
+            ]
+            for m in snapshot.metrics
+        ],
+        'energy': {
+            'total_kwh': energy.total_kwh,
+            'current_hour_kwh': energy.current_hour_kwh,
+            'today_kwh': energy.today_kwh,
+            'last_24h_kwh': energy.last_24h_kwh,
+            'devices': energy.devices,
+            'gap_seconds': energy.gap_seconds,
+            'since': energy.since.timestamp() if energy.since else None,
+            'last_24h_device_seconds': energy.last_24h_device_seconds,
+            'hourly': [[hour.timestamp(), kwh] for hour, kwh in shared.hourly],
+            'daily': [[day.isoformat(), kwh] for day, kwh in shared.daily]
+        },
+        'telemetry': shared.telemetry
+    }
+
+
+def decode_shared_snapshot(payload: Dict) -> SharedSnapshot:
+    """Inverso de encode_shared_snapshot"""
+    metrics = tuple(
+        ServerMetrics(
+            device_id=device_id,
+            power_consumption_watts=watts,
+            timestamp=datetime.fromtimestamp(timestamp),
+            source=source,
+            status=status,
+            error_message=error_message,
+            system_health=system_health,
+            power_supply_status=tuple(psu) if psu is not None else None,
+            power_stats=tuple(extra[0]) if extra and extra[0] is not None else None,
+            sensors=SensorReadings(*extra[1]) if len(extra) > 1 and extra[1] is not None else None
+        )
+        for device_id, watts, timestamp, source, status, error_message, system_health, psu, *extra
+        in payload['metrics']
+    )
+    snapshot = CollectorSnapshot(
+        version=payload['version'],
+        generated_at=datetime.fromtimestamp(payload['generated_at']),
+        metrics=metrics,
+        total_watts=payload['total_watts'],
+        fonte=payload['fonte'],
+        cycle_duration_seconds=payload['cycle_duration_seconds']
+    )
+    energy = payload['energy']
+    summary = EnergySummary(
+        total_kwh=energy['total_kwh'],
+        current_hour_kwh=energy['current_hour_kwh'],
+        today_kwh=energy['today_kwh'],
+        last_24h_kwh=energy['last_24h_kwh'],
+        devices=energy['devices'],
+        gap_seconds=energy['gap_seconds'],
+        since=datetime.fromtimestamp(energy['since']) if energy['since'] is not None else None,
+        last_24h_device_seconds=energy.get('last_24h_device_seconds', 0.0)
+    )
+    return SharedSnapshot(
+        snapshot=snapshot,
+        energy=summary,
+        hourly=tuple((datetime.fromtimestamp(hour), kwh) for hour, kwh in energy['hourly']),
+        daily=tuple((date.fromisoformat(day), kwh) for day, kwh in energy['daily']),
+        telemetry=payload.get('telemetry')
+    )
+
+
+class SharedSnapshotCollector:
+    """
+    Leitor do snapshot publicado por um processo coletor separado
+
+    Substitui o SNMPCollector nos workers WSGI: mesma interface de leitura
+    (get_total_power_kw, get_snapshot, energia), sem nenhum tráfego
+    SNMP. Cada leitura só decodifica o mmap quando há publicação nova.
+    """
+
+    def __init__(self, path: str, max_age_seconds: float = 300.0):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._reader = SharedSnapshotReader(path, decode=decode_shared_snapshot)
+
+    def read(self) -> SharedSnapshot:
+        """Último payload publicado; erro se ausente ou velho demais (coletor parado)"""
+        value = self._reader.read()
+        if value is None:
+            raise RuntimeError(f"Snapshot compartilhado indisponível: {self.path}")
+
+        age = (datetime.now() - value.snapshot.generated_at).total_seconds()
+        if age > self.max_age_seconds:
+            raise RuntimeError(f"Snapshot compartilhado desatualizado há {age:.0f}s (processo coletor parado?)")
+        return value
+
+    def get_snapshot(self) -> Optional[CollectorSnapshot]:
+        """Último snapshot publicado pelo processo coletor (None se indisponível)"""
+        try:
+            return self.read().snapshot
+        except RuntimeError:
+            return None
+
+    def get_total_power_kw(self) -> Tuple[float, str]:
+        """Potência instantânea total (kW) e fonte do último snapshot compartilhado"""
+        snapshot = self.read().snapshot
+        return snapshot.total_kw, snapshot.fonte
+
+    def get_energy_summary(self) -> EnergySummary:
+        """Energia acumulada publicada pelo processo coletor"""
+        return self.read().energy
+
+    def get_energy_buckets(self) -> Tuple[List[Tuple[datetime, float]], List[Tuple[date, float]]]:
+        """kWh da frota por hora e por dia publicados pelo processo coletor"""
+        shared = self.read()
+        return list(shared.hourly), list(shared.daily)
+
+    def get_telemetry(self, devices: bool = False) -> Dict:
+        """Telemetria publicada pelo processo coletor (sem detalhe por dispositivo)"""
+        telemetry = self.read().telemetry
+        if telemetry is None:
+            raise RuntimeError("Processo coletor não publica telemetria")
+        return telemetry
+
+    def get_data_version(self) -> Tuple:
+        """
+        Versão barata do payload publicado (base dos ETags)
+
+        Toda publicação traz um generated_at novo, mesmo quando a versão do
+        snapshot se repete; erro se o snapshot estiver indisponível.
+        """
+        snapshot = self.read().snapshot
+        return snapshot.version, snapshot.generated_at
+
+    def is_running(self) -> bool:
+        """Indica se há um snapshot recente do processo coletor"""
+        return self.get_snapshot() is not None
+
+    def close(self):
+        self._reader.close()
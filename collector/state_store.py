@@ -0,0 +1,143 @@
+"""
+Persistência do estado do coletor para warm start
+
+Grava em SQLite as últimas métricas por dispositivo (com fonte, estatísticas
+de potência e sensores), o estado dos circuit breakers e as estimativas de
+RTT. Na inicialização o coletor recarrega esse
+estado, de modo que deploys e reciclagem de workers não provocam uma coleta
+fria de toda a frota nem um intervalo servindo dados simulados.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    device_id TEXT PRIMARY KEY,
+    power_consumption_watts REAL NOT NULL,
+    timestamp REAL NOT NULL,
+    cached_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    error_message TEXT,
+    system_health INTEGER,
+    power_supply_status TEXT,
+    source TEXT,
+    power_stats TEXT,
+    sensors TEXT
+);
+CREATE TABLE IF NOT EXISTS device_health (
+    device_id TEXT PRIMARY KEY,
+    breaker_state TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    opened_at REAL,
+    cooldown_seconds REAL NOT NULL,
+    srtt REAL,
+    rttvar REAL
+);
+"""
+
+_METRIC_COLUMNS = (
+    "device_id", "power_consumption_watts", "timestamp", "cached_at",
+    "status", "error_message", "system_health", "power_supply_status",
+    "source", "power_stats", "sensors",
+)
+# Colunas acrescentadas depois da primeira versão do arquivo (ALTER TABLE ao abrir)
+_ADDED_METRIC_COLUMNS = ("source", "power_stats", "sensors")
+_HEALTH_COLUMNS = (
+    "device_id", "breaker_state", "failures", "opened_at", "cooldown_seconds", "srtt", "rttvar",
+)
+
+
+class CollectorStateStore:
+    """
+    Snapshot compacto do estado do coletor em um arquivo SQLite
+
+    Cada save substitui o conteúdo inteiro em uma única transação, então
+    um processo que reinicia no meio de uma gravação lê o snapshot anterior.
+    Linhas são dicts simples; a conversão para ServerMetrics/DeviceHealth
+    fica no coletor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(metrics)")}
+        for column in _ADDED_METRIC_COLUMNS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE metrics ADD COLUMN {column} TEXT")
+        return conn
+
+    def save(self, metric_rows: List[Dict], health_rows: List[Dict]) -> bool:
+        """
+        Substitui o snapshot gravado
+
+        Args:
+            metric_rows: Uma linha por dispositivo (colunas de `metrics`)
+            health_rows: Uma linha por dispositivo (colunas de `device_health`)
+
+        Returns:
+            True se gravado com sucesso
+        """
+        metric_values = [tuple(row.get(col) for col in _METRIC_COLUMNS) for row in metric_rows]
+        health_values = [tuple(row.get(col) for col in _HEALTH_COLUMNS) for row in health_rows]
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM metrics")
+                        conn.execute("DELETE FROM device_health")
+                        conn.executemany(
+                            f"INSERT INTO metrics ({', '.join(_METRIC_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(_METRIC_COLUMNS))})",
+                            metric_values,
+                        )
+                        conn.executemany(
+                            f"INSERT INTO device_health ({', '.join(_HEALTH_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(_HEALTH_COLUMNS))})",
+                            health_values,
+                        )
+                finally:
+                    conn.close()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao gravar estado do coletor em {self.path}: {e}")
+                return False
+
+    def load(self) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Lê o último snapshot gravado
+
+        Returns:
+            Tupla (linhas de métricas, linhas de saúde); listas vazias se o
+            arquivo não existe ou está corrompido
+        """
+        with self._lock:
+            try:
+                conn = self._connect()
+                try:
+                    metric_rows = [
+                        dict(zip(_METRIC_COLUMNS, row))
+                        for row in conn.execute(f"SELECT {', '.join(_METRIC_COLUMNS)} FROM metrics")
+                    ]
+                    health_rows = [
+                        dict(zip(_HEALTH_COLUMNS, row))
+                        for row in conn.execute(f"SELECT {', '.join(_HEALTH_COLUMNS)} FROM device_health")
+                    ]
+                finally:
+                    conn.close()
+                return metric_rows, health_rows
+            except sqlite3.Error as e:
+                logger.warning(f"Estado do coletor em {self.path} ilegível - partida fria: {e}")
+                return [], []
@@ -0,0 +1,259 @@
+"""
+Telemetria do coletor SNMP
+
+Contadores e histogramas em memória, baratos o bastante para o caminho
+quente do fan-out: cada observação é um bisect em uma tupla fixa de
+limites e um incremento de inteiro. Nada é registrado em log; os dados
+são lidos sob demanda (snapshot) pelo endpoint /api/collector/stats.
+
+Percentis são estimados a partir dos buckets (interpolação linear dentro
+do bucket), com erro limitado à largura do bucket.
+"""
+
+import bisect
+import heapq
+import threading
+from typing import Dict, List, Optional
+
+# Limites superiores dos buckets, em segundos (escala ~1-2-5)
+LATENCY_BOUNDS = (
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+    1.0, 2.0, 5.0, 10.0, 30.0, 60.0
+)
+
+
+class LatencyHistogram:
+    """Histograma de durações com buckets fixos (último bucket: acima de 60s)"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Estimativa do percentil p (0-100); None sem observações"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = LATENCY_BOUNDS[index - 1] if index > 0 else 0.0
+                upper = LATENCY_BOUNDS[index] if index < len(LATENCY_BOUNDS) else self.max
+                estimate = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': {
+                **{str(bound): count for bound, count in zip(LATENCY_BOUNDS, self.counts)},
+                '+Inf': self.counts[-1]
+            }
+        }
+
+
+class DeviceTelemetry:
+    """Contadores e RTT de um dispositivo"""
+
+    __slots__ = ('rtt', 'polls', 'successes', 'timeouts', 'errors', 'retries')
+
+    def __init__(self):
+        self.rtt = LatencyHistogram()
+        self.polls = 0
+        self.successes = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.retries = 0
+
+    def snapshot(self) -> Dict:
+        return {
+            'polls': self.polls,
+            'successes': self.successes,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'retries': self.retries,
+            'rtt': self.rtt.snapshot()
+        }
+
+
+class CollectorTelemetry:
+    """
+    Telemetria agregada do coletor
+
+    As observações chegam do event loop do coletor (e de coletas
+    síncronas em threads HTTP); o lock é mantido só pelo incremento.
+    """
+
+    COUNTERS = (
+        'polls', 'successes', 'timeouts', 'errors', 'retries', 'circuit_open',
+        'cache_hits', 'cache_stale_hits', 'cache_misses'
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = dict.fromkeys(self.COUNTERS, 0)
+        self.rtt = LatencyHistogram()
+        self.cycle = LatencyHistogram()
+        self.slot = LatencyHistogram()
+        self.last_cycle_seconds: Optional[float] = None
+        self.queue_depth = 0
+        self.queue_depth_peak = 0
+        self.in_flight = 0
+        self.devices: Dict[str, DeviceTelemetry] = {}
+        self.sequence = 0  # Incrementado a cada observação (versão barata da telemetria)
+
+    def _device(self, device_id: str) -> DeviceTelemetry:
+        device = self.devices.get(device_id)
+        if device is None:
+            device = self.devices[device_id] = DeviceTelemetry()
+        return device
+
+    def record_cache(self, hit: bool, stale: bool = False):
+        """
+        Consulta ao cache: hit (fresco ou stale) ou miss
+
+        Só o caminho sob demanda (collect_all_metrics, _snmp_get_power)
+        consulta o cache; a coleta agendada lê os dispositivos diretamente
+        e não entra em cache_hit_ratio.
+        """
+        key = ('cache_stale_hits' if stale else 'cache_hits') if hit else 'cache_misses'
+        with self._lock:
+            self.sequence += 1
+            self.counters[key] += 1
+
+    def record_attempt(self, device_id: str, attempt: int):
+        """Início de uma tentativa de GET (attempt > 0 conta como retry)"""
+        with self._lock:
+            self.sequence += 1
+            device = self._device(device_id)
+            self.counters['polls'] += 1
+            device.polls += 1
+            if attempt:
+                self.counters['retries'] += 1
+                device.retries += 1
+
+    def record_success(self, device_id: str, rtt_seconds: float):
+        with self._lock:
+            self.sequence += 1
+            device = self._device(device_id)
+            self.counters['successes'] += 1
+            device.successes += 1
+            self.rtt.observe(rtt_seconds)
+            device.rtt.observe(rtt_seconds)
+
+    def record_failure(self, device_id: str, timeout: bool):
+        with self._lock:
+            self.sequence += 1
+            device = self._device(device_id)
+            if timeout:
+                self.counters['timeouts'] += 1
+                device.timeouts += 1
+            else:
+                self.counters['errors'] += 1
+                device.errors += 1
+
+    def record_circuit_open(self):
+        with self._lock:
+            self.sequence += 1
+            self.counters['circuit_open'] += 1
+
+    def record_cycle(self, seconds: float):
+        """Duração de um ciclo completo (collect_all_metrics)"""
+        with self._lock:
+            self.sequence += 1
+            self.cycle.observe(seconds)
+            self.last_cycle_seconds = seconds
+
+    def record_slot(self, seconds: float):
+        """Duração da coleta de um slot do agendador"""
+        with self._lock:
+            self.sequence += 1
+            self.slot.observe(seconds)
+
+    def enter_queue(self):
+        """Consulta aguardando vaga no semáforo de concorrência"""
+        with self._lock:
+            self.sequence += 1
+            self.queue_depth += 1
+            if self.queue_depth > self.queue_depth_peak:
+                self.queue_depth_peak = self.queue_depth
+
+    def leave_queue(self):
+        """Consulta saiu da fila (obteve a vaga ou foi cancelada)"""
+        with self._lock:
+            self.sequence += 1
+            self.queue_depth -= 1
+
+    def start_request(self):
+        with self._lock:
+            self.sequence += 1
+            self.in_flight += 1
+
+    def finish_request(self):
+        with self._lock:
+            self.sequence += 1
+            self.in_flight -= 1
+
+    def forget(self, device_id: str):
+        """Descarta a telemetria de um dispositivo removido da configuração"""
+        with self._lock:
+            self.sequence += 1
+            self.devices.pop(device_id, None)
+
+    def snapshot(self, devices: bool = False, slowest: int = 10) -> Dict:
+        """
+        Retrato da telemetria
+
+        Args:
+            devices: Incluir contadores e histograma de RTT de cada dispositivo
+            slowest: Quantos dispositivos com maior RTT médio listar (O(1) por dispositivo)
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            lookups = counters['cache_hits'] + counters['cache_stale_hits'] + counters['cache_misses']
+            ranking: List = heapq.nlargest(slowest, (
+                (device.rtt.total / device.rtt.count, device_id)
+                for device_id, device in self.devices.items() if device.rtt.count
+            )) if slowest else []
+            result = {
+                'counters': counters,
+                # Apenas coletas sob demanda (None enquanto só o agendador coleta)
+                'cache_hit_ratio': (
+                    (counters['cache_hits'] + counters['cache_stale_hits']) / lookups if lookups else None
+                ),
+                'rtt': self.rtt.snapshot(),
+                'cycle': {**self.cycle.snapshot(), 'last': self.last_cycle_seconds},
+                'slot': self.slot.snapshot(),
+                'queue': {
+                    'depth': self.queue_depth,
+                    'peak': self.queue_depth_peak,
+                    'in_flight': self.in_flight
+                },
+                'slowest_devices': [{'device_id': device_id, 'rtt_mean': mean} for mean, device_id in ranking],
+                'device_count': len(self.devices)
+            }
+            if devices:
+                result['devices'] = {device_id: device.snapshot() for device_id, device in self.devices.items()}
+            return result
@@ -0,0 +1,269 @@
+"""
+Cache de descoberta SNMPv3 por target (engine ID e timeline USM)
+
+O SnmpEngine do pysnmp já guarda, por target, o engine ID autoritativo
+descoberto e o par snmpEngineBoots/snmpEngineTime (timeline USM), e as
+chaves localizadas ficam nas linhas clonadas do LCD. Porém engine ID e
+timeline expiram 300s após a descoberta, mesmo com o target respondendo
+a cada ciclo: a consulta seguinte repete a descoberta (report
+unknownEngineID, um round trip extra — um por PDU no modo batch).
+
+EngineDiscoveryCache guarda esses dados por (credenciais, ip, porta)
+após cada resposta autenticada e os reinstala no SnmpEngine antes do
+próximo GET quando o pysnmp os descartou, extrapolando snmpEngineTime
+pelo tempo decorrido. Em regime, cada consulta é um único round trip.
+
+Entradas reinstaladas entram na mesma fila de expiração do pysnmp (300s),
+como as descobertas por ele; registros sem resposta autenticada há mais de
+max_age_seconds não são reinstalados. Um erro USM (notInTimeWindow,
+unknownEngineID, ...) descarta o registro e as entradas do próprio
+SnmpEngine, forçando nova descoberta (agente substituído ou reiniciado).
+
+O pysnmp não expõe escrita nesses caches; o acesso aos atributos
+internos fica isolado aqui e, se a versão instalada não os tiver, o
+cache apenas não atua (comportamento padrão do pysnmp).
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from pysnmp.proto import errind
+
+    # Falhas que indicam engine ID ou timeline do agente diferentes dos guardados
+    USM_ERRORS: Tuple[type, ...] = (
+        errind.NotInTimeWindow, errind.UnknownEngineID, errind.EngineIDMismatch,
+        errind.WrongDigest, errind.DecryptionError, errind.UnknownUserName
+    )
+except ImportError:
+    USM_ERRORS = ()
+
+logger = logging.getLogger(__name__)
+
+# Modelos padrão do SNMPv3 (RFC 3411): MP v3 e USM
+MP_MODEL_V3 = 3
+SECURITY_MODEL_USM = 3
+
+# Atributos internos do pysnmp (name mangling de __engineIdCache, __timeline e
+# das filas de expiração correspondentes)
+_MP_ENGINE_CACHE_ATTR = '_SnmpV3MessageProcessingModel__engineIdCache'
+_MP_EXPIRY_QUEUE_ATTR = '_SnmpV3MessageProcessingModel__engineIdCacheExpQueue'
+_MP_EXPIRY_TIMER_ATTR = '_SnmpV3MessageProcessingModel__expirationTimer'
+_USM_TIMELINE_ATTR = '_SnmpUSMSecurityModel__timeline'
+_USM_EXPIRY_QUEUE_ATTR = '_SnmpUSMSecurityModel__timelineExpQueue'
+_USM_EXPIRY_TIMER_ATTR = '_SnmpUSMSecurityModel__expirationTimer'
+
+# Vida útil que o pysnmp dá ao engine ID e à timeline descobertos (rfc3412/rfc3414)
+DISCOVERY_LIFETIME_SECONDS = 300
+
+Target = Tuple[str, int]
+
+
+@dataclass
+class EngineRecord:
+    """Dados de descoberta de um agente SNMPv3"""
+    security_engine_id: Any
+    context_engine_id: Any
+    context_name: Any
+    boots: int
+    engine_time: int
+    learned_at: float  # time.time() em que boots/engine_time foram observados
+
+    def estimated_time(self, now: float) -> int:
+        """snmpEngineTime estimado do agente no instante `now`"""
+        return self.engine_time + max(0, int(now - self.learned_at))
+
+
+def credentials_fingerprint(*fields: str) -> str:
+    """Identificador das credenciais (sem manter as chaves em texto no cache)"""
+    return hashlib.sha256('\0'.join(fields).encode('utf-8')).hexdigest()[:16]
+
+
+def is_usm_error(error_indication) -> bool:
+    """Indica se a falha SNMP invalida a descoberta guardada do agente"""
+    return isinstance(error_indication, USM_ERRORS)
+
+
+def _mp_model(engine):
+    return getattr(engine, 'message_processing_subsystems', {}).get(MP_MODEL_V3)
+
+
+def _usm_model(engine):
+    return getattr(engine, 'security_models', {}).get(SECURITY_MODEL_USM)
+
+
+def _engine_id_cache(engine) -> Optional[Dict]:
+    cache = getattr(_mp_model(engine), _MP_ENGINE_CACHE_ATTR, None)
+    return cache if isinstance(cache, dict) else None
+
+
+def _usm_timeline(engine) -> Optional[Dict]:
+    timeline = getattr(_usm_model(engine), _USM_TIMELINE_ATTR, None)
+    return timeline if isinstance(timeline, dict) else None
+
+
+def _schedule_expiry(engine, model, queue_attr: str, timer_attr: str, key) -> bool:
+    """
+    Agenda a expiração de uma entrada reinstalada, como o pysnmp faz com as
+    que ele mesmo descobre (sem isso ela nunca sairia do SnmpEngine)
+    """
+    queue = getattr(model, queue_attr, None)
+    timer = getattr(model, timer_attr, None)
+    if not isinstance(queue, dict) or not isinstance(timer, int):
+        return False
+    dispatcher = getattr(engine, 'transport_dispatcher', None)
+    resolution = dispatcher.get_timer_resolution() if dispatcher is not None else 1.0
+    queue.setdefault(int(timer + DISCOVERY_LIFETIME_SECONDS / resolution), []).append(key)
+    return True
+
+
+def _unschedule_expiry(model, queue_attr: str, key):
+    """Remove a entrada da fila de expiração (o pysnmp apaga sem checar se ainda existe)"""
+    queue = getattr(model, queue_attr, None)
+    if isinstance(queue, dict):
+        for keys in queue.values():
+            while key in keys:
+                keys.remove(key)
+
+
+class EngineDiscoveryCache:
+    """
+    Engine ID e timeline de cada target, mantidos entre ciclos de coleta
+
+    Usado apenas no event loop dedicado do coletor (dono do SnmpEngine);
+    o lock protege leituras de estatísticas a partir de outras threads.
+    """
+
+    def __init__(self, max_age_seconds: float = 3600.0):
+        self._records: Dict[Tuple[str, str, int], EngineRecord] = {}
+        self.max_age_seconds = max_age_seconds  # Sem resposta autenticada há mais que isso: não reinstala
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.restored = 0
+        self.available = True
+
+    def capture(self, engine, credentials_key: str, transport_domain, address: Target) -> bool:
+        """
+        Registra os dados de descoberta do target após uma resposta autenticada
+
+        Returns:
+            True se engine ID e timeline estavam disponíveis no SnmpEngine
+        """
+        engine_cache, timeline = _engine_id_cache(engine), _usm_timeline(engine)
+        if engine_cache is None or timeline is None:
+            self._mark_unavailable()
+            return False
+
+        peer = engine_cache.get((transport_domain, address))
+        if peer is None:
+            return False
+        security_engine_id = peer['securityEngineId']
+        entry = timeline.get(security_engine_id)
+        if entry is None:
+            return False
+
+        boots, engine_time, _, updated_at = entry
+        record = EngineRecord(
+            security_engine_id=security_engine_id,
+            context_engine_id=peer['contextEngineId'],
+            context_name=peer['contextName'],
+            boots=int(boots),
+            engine_time=int(engine_time),
+            learned_at=float(updated_at)
+        )
+        with self._lock:
+            self._records[(credentials_key,) + tuple(address)] = record
+            self.captured += 1
+        return True
+
+    def restore(self, engine, credentials_key: str, transport_domain, address: Target) -> bool:
+        """
+        Reinstala engine ID e timeline do target se o pysnmp os expirou
+
+        Returns:
+            True se algum dado foi reinstalado
+        """
+        with self._lock:
+            record = self._records.get((credentials_key,) + tuple(address))
+        if record is None:
+            return False
+
+        engine_cache, timeline = _engine_id_cache(engine), _usm_timeline(engine)
+        if engine_cache is None or timeline is None:
+            self._mark_unavailable()
+            return False
+
+        key = (transport_domain, address)
+        if key in engine_cache and record.security_engine_id in timeline:
+            return False
+
+        now = time.time()
+        if now - record.learned_at > self.max_age_seconds:
+            # Timeline antiga demais para extrapolar: deixa o pysnmp redescobrir
+            self.forget(engine, credentials_key, transport_domain, address)
+            return False
+
+        restored = False
+        if key not in engine_cache:
+            engine_cache[key] = {
+                'securityEngineId': record.security_engine_id,
+                'contextEngineId': record.context_engine_id,
+                'contextName': record.context_name
+            }
+            _schedule_expiry(engine, _mp_model(engine), _MP_EXPIRY_QUEUE_ATTR, _MP_EXPIRY_TIMER_ATTR, key)
+            restored = True
+        if record.security_engine_id not in timeline:
+            engine_time = record.estimated_time(now)
+            timeline[record.security_engine_id] = (record.boots, engine_time, engine_time, int(now))
+            _schedule_expiry(
+                engine, _usm_model(engine), _USM_EXPIRY_QUEUE_ATTR, _USM_EXPIRY_TIMER_ATTR,
+                record.security_engine_id
+            )
+            restored = True
+
+        if restored:
+            with self._lock:
+                self.restored += 1
+            logger.debug(f"Descoberta SNMPv3 reaproveitada para {address[0]}:{address[1]}")
+        return restored
+
+    def forget(self, engine, credentials_key: str, transport_domain, address: Target):
+        """
+        Descarta a descoberta do target, no cache e no SnmpEngine
+
+        Usado após um erro USM (agente reiniciado, reflash ou substituído):
+        a próxima consulta refaz a descoberta em vez de reaproveitar engine
+        ID e timeline que o agente já não reconhece.
+        """
+        with self._lock:
+            record = self._records.pop((credentials_key,) + tuple(address), None)
+
+        engine_cache, timeline = _engine_id_cache(engine), _usm_timeline(engine)
+        if engine_cache is None or timeline is None:
+            return
+
+        key = (transport_domain, address)
+        peer = engine_cache.pop(key, None)
+        if peer is not None:
+            _unschedule_expiry(_mp_model(engine), _MP_EXPIRY_QUEUE_ATTR, key)
+            # A expiração da timeline no pysnmp já tolera chaves ausentes
+            timeline.pop(peer['securityEngineId'], None)
+        if record is not None:
+            timeline.pop(record.security_engine_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def _mark_unavailable(self):
+        if self.available:
+            self.available = False
+            logger.warning("Versão do pysnmp sem caches de descoberta acessíveis - cache de engine ID desativado")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
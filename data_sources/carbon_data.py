@@ -3,16 +3,66 @@ Carbon Data Loader - Real data integration from PDF studies
 Loads and processes carbon consumption data from Renault's infrastructure studies
 """
 
+import hashlib
 import json
-from typing import Dict, List, Optional
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
 
+# Derived metrics as a dependency graph: node -> data sections and nodes it reads.
+# Each node is cached per arguments, keyed by the versions of the sections it
+# depends on (directly or through other nodes), so it is computed once and
+# recomputed only after reload() changes one of those sections.
+DERIVED_GRAPH: Dict[str, Tuple[str, ...]] = {
+    "get_server_metrics": ("servers", "emission_factors"),
+    "get_consolidation_potential": ("servers", "energy_costs", "emission_factors"),
+    "get_cooling_efficiency": ("datacenter", "servers"),
+    "get_datacenter_consumption": ("servers", "workload_patterns", "datacenter"),
+    "get_optimization_potential": (
+        "get_consolidation_potential", "get_cooling_efficiency", "get_datacenter_consumption",
+        "energy_costs", "emission_factors", "carbon_sequestration"
+    ),
+}
+
+
+def _node_sections(node: str) -> Tuple[str, ...]:
+    """Data sections a graph node depends on, following node-to-node edges"""
+    sections = set()
+    for dependency in DERIVED_GRAPH[node]:
+        sections.update(_node_sections(dependency) if dependency in DERIVED_GRAPH else (dependency,))
+    return tuple(sorted(sections))
+
+
+def _derived(method):
+    """Serve a DERIVED_GRAPH node from cache while its input sections are unchanged"""
+    name = method.__name__
+    sections = _node_sections(name)
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        inputs = tuple(self._section_versions.get(section) for section in sections)
+        entry = self._derived_cache.get(key)
+        if entry is not None and entry[0] == inputs:
+            self.cache_hits += 1
+            return entry[1]
+        
+        self.cache_misses += 1
+        value = method(self, *args, **kwargs)
+        self._derived_cache[key] = (inputs, value)
+        return value
+    return wrapper
+
+
 class CarbonDataLoader:
     """
     Loads real carbon consumption data from PDF studies and configuration files
     
     Based on the 'Relação de consumo de carbono' PDF study for Renault
+    
+    Derived metrics (see DERIVED_GRAPH) are cached and shared between all
+    callers: treat the returned dicts and lists as read-only.
     """
     
     def __init__(self, config_path: Optional[str] = None):
@@ -24,6 +74,49 @@ class CarbonDataLoader:
         """
         self.config_path = config_path or "config/carbon_data.json"
         self.data = self._load_data()
+        self.data_version = self._digest(self.data)
+        self._section_versions = self._section_digests(self.data)
+        self._derived_cache: Dict[tuple, Tuple[tuple, Any]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    @staticmethod
+    def _digest(data: Dict) -> str:
+        """
+        Content version of the loaded data
+        
+        Derived from the data itself (not a counter), so every worker process
+        loading the same file reports the same version.
+        """
+        canonical = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=8).hexdigest()
+    
+    @classmethod
+    def _section_digests(cls, data: Dict) -> Dict[str, str]:
+        """Version of each top-level section (the inputs of DERIVED_GRAPH)"""
+        return {section: cls._digest(value) for section, value in data.items()}
+    
+    def reload(self) -> bool:
+        """
+        Re-read the configuration file
+        
+        Only derived metrics depending on a section that changed are
+        recomputed; the others keep being served from cache.
+        
+        Returns:
+            True if the data changed
+        """
+        data = self._load_data()
+        version = self._digest(data)
+        if version == self.data_version:
+            return False
+        
+        # Data before versions: a result cached under the new versions is
+        # always computed from the new data
+        self.data = data
+        self._section_versions = self._section_digests(data)
+        self.data_version = version
+        return True
     
     def _load_data(self) -> Dict:
         """
@@ -123,6 +216,7 @@ class CarbonDataLoader:
         """Get server-specific data"""
         return self.data.get("servers", {})
     
+    @_derived
     def get_server_metrics(self) -> List[Dict]:
         """
         Get metrics for each server type
@@ -172,6 +266,7 @@ class CarbonDataLoader:
         datacenter = self.get_datacenter_data()
         return datacenter.get("pue_current", 2.0)
     
+    @_derived
     def get_consolidation_potential(self) -> Dict:
         """
         Analyze potential for server consolidation via virtualization
@@ -210,6 +305,7 @@ class CarbonDataLoader:
             "co2_reduction_kg": round(co2_reduction_kg, 2)
         }
     
+    @_derived
     def get_cooling_efficiency(self) -> Dict:
         """
         Get cooling efficiency metrics
@@ -248,6 +344,7 @@ class CarbonDataLoader:
             "pue_contribution": round(cooling_overhead / pue * 100, 1)
         }
     
+    @_derived
     def get_datacenter_consumption(self, hour: Optional[int] = None) -> Dict:
         """
         Get total datacenter consumption with breakdown
@@ -326,6 +423,7 @@ class CarbonDataLoader:
         night = patterns.get("night_maintenance", {})
         return night.get("avg_load_percent", 15) / 100.0
     
+    @_derived
     def get_optimization_potential(self) -> Dict:
         """
         Calculate potential savings from server optimization (consolidation + PUE)
@@ -4,9 +4,12 @@ Extended endpoints for demonstration and advanced features
 """
 
 import logging
-from flask import Blueprint, jsonify, request
+from typing import Any, Callable, Dict, Optional, Tuple
+from flask import Blueprint, g, jsonify, request
+from werkzeug.datastructures import MultiDict
 from data_sources.carbon_data import get_carbon_data_loader
 from ai_engine.recommendations import get_recommendations_engine
+from routes.conditional import etag_from
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -18,150 +21,171 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 carbon_loader = get_carbon_data_loader()
 recommendations_engine = get_recommendations_engine()
 
+# Version of the version-tagged data behind each endpoint (ETag / If-None-Match)
+API_VERSION = "3.0.0"
 
-@api_bp.route('/servers', methods=['GET'])
-def get_servers():
+
+def _carbon_data_version():
+    return carbon_loader.data_version
+
+
+def _recommendations_version():
+    return recommendations_engine.data_version()
+
+
+class InvalidParameter(ValueError):
+    """A query parameter has an unsupported value (answered with 400)"""
+
+
+def _respond(view_name: str, build: Callable[[MultiDict], Any]):
     """
-    Get detailed metrics for all servers
+    Run a resource builder for the current request in the standard envelope
     
-    Returns detailed breakdown of server consumption, utilization, and specs
+    Derived carbon data comes from the loader's cache (see DERIVED_GRAPH),
+    so resources sharing an intermediate result never recompute it.
     """
     try:
-        server_metrics = carbon_loader.get_server_metrics()
-        
-        total_consumption_kw = sum(s['consumption_kw'] for s in server_metrics)
-        total_annual_kwh = sum(s['annual_consumption_kwh'] for s in server_metrics)
-        total_co2_kg = sum(s['annual_co2_kg'] for s in server_metrics)
-        
+        data = build(request.args)
+    except InvalidParameter as e:
         return jsonify({
-            "success": True,
-            "data": {
-                "servers": server_metrics,
-                "summary": {
-                    "total_servers": sum(s['count'] for s in server_metrics),
-                    "total_consumption_kw": round(total_consumption_kw, 2),
-                    "total_annual_kwh": round(total_annual_kwh, 2),
-                    "total_co2_kg": round(total_co2_kg, 2),
-                    "avg_utilization_percent": round(
-                        sum(s['utilization_percent'] * s['count'] for s in server_metrics) / 
-                        sum(s['count'] for s in server_metrics), 1
-                    ) if server_metrics else 0
-                }
-            }
-        })
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
-        logger.error(f"Error in get_servers: {str(e)}")
+        logger.error(f"Error in {view_name}: {str(e)}")
         return jsonify({
             "success": False,
             "error": "Internal server error"
         }), 500
+    
+    return jsonify({
+        "success": True,
+        "data": data
+    })
+
+
+@api_bp.route('/servers', methods=['GET'])
+@etag_from(_carbon_data_version)
+def get_servers():
+    """
+    Get detailed metrics for all servers
+    
+    Returns detailed breakdown of server consumption, utilization, and specs
+    """
+    return _respond('get_servers', _servers_data)
+
+
+def _servers_data(args: MultiDict) -> Dict:
+    server_metrics = carbon_loader.get_server_metrics()
+    
+    total_consumption_kw = sum(s['consumption_kw'] for s in server_metrics)
+    total_annual_kwh = sum(s['annual_consumption_kwh'] for s in server_metrics)
+    total_co2_kg = sum(s['annual_co2_kg'] for s in server_metrics)
+    
+    return {
+        "servers": server_metrics,
+        "summary": {
+            "total_servers": sum(s['count'] for s in server_metrics),
+            "total_consumption_kw": round(total_consumption_kw, 2),
+            "total_annual_kwh": round(total_annual_kwh, 2),
+            "total_co2_kg": round(total_co2_kg, 2),
+            "avg_utilization_percent": round(
+                sum(s['utilization_percent'] * s['count'] for s in server_metrics) / 
+                sum(s['count'] for s in server_metrics), 1
+            ) if server_metrics else 0
+        }
+    }
 
 
 @api_bp.route('/consolidation', methods=['GET'])
+@etag_from(_carbon_data_version)
 def get_consolidation_analysis():
     """
     Get server consolidation analysis and potential
     
     Returns analysis of consolidation opportunities via virtualization
     """
-    try:
-        consolidation = carbon_loader.get_consolidation_potential()
-        
-        return jsonify({
-            "success": True,
-            "data": consolidation
-        })
-    except Exception as e:
-        logger.error(f"Error in get_consolidation_analysis: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return _respond('get_consolidation_analysis', _consolidation_data)
+
+
+def _consolidation_data(args: MultiDict) -> Dict:
+    return carbon_loader.get_consolidation_potential()
 
 
 @api_bp.route('/pue', methods=['GET'])
+@etag_from(_carbon_data_version)
 def get_pue_metrics():
     """
     Get PUE (Power Usage Effectiveness) metrics
     
     Returns current PUE, target, and breakdown of datacenter consumption
     """
-    try:
-        cooling = carbon_loader.get_cooling_efficiency()
-        datacenter = carbon_loader.get_datacenter_data()
-        consumption = carbon_loader.get_datacenter_consumption()
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "pue": {
-                    "current": cooling["current_pue"],
-                    "target": cooling["target_pue"],
-                    "best_practice": datacenter.get("pue_best_practice", 1.2)
-                },
-                "breakdown": {
-                    "servers_kwh": consumption["servers_kwh"],
-                    "cooling_kwh": consumption["cooling_kwh"],
-                    "total_kwh": consumption["total_kwh"]
-                },
-                "cooling_efficiency": cooling,
-                "location": datacenter.get("location", "Unknown")
-            }
-        })
-    except Exception as e:
-        logger.error(f"Error in get_pue_metrics: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return _respond('get_pue_metrics', _pue_data)
+
+
+def _pue_data(args: MultiDict) -> Dict:
+    cooling = carbon_loader.get_cooling_efficiency()
+    datacenter = carbon_loader.get_datacenter_data()
+    consumption = carbon_loader.get_datacenter_consumption()
+    
+    return {
+        "pue": {
+            "current": cooling["current_pue"],
+            "target": cooling["target_pue"],
+            "best_practice": datacenter.get("pue_best_practice", 1.2)
+        },
+        "breakdown": {
+            "servers_kwh": consumption["servers_kwh"],
+            "cooling_kwh": consumption["cooling_kwh"],
+            "total_kwh": consumption["total_kwh"]
+        },
+        "cooling_efficiency": cooling,
+        "location": datacenter.get("location", "Unknown")
+    }
 
 
 @api_bp.route('/virtualization', methods=['GET'])
+@etag_from(_carbon_data_version)
 def get_virtualization_metrics():
     """
     Get virtualization metrics and VM density
     
     Returns VM density, consolidation opportunities, and hypervisor info
     """
-    try:
-        server_metrics = carbon_loader.get_server_metrics()
-        consolidation = carbon_loader.get_consolidation_potential()
-        
-        # Extract VxRail VM info
-        vxrail = next((s for s in server_metrics if s["type"] == "vxrail"), None)
-        
-        vm_info = {}
-        if vxrail:
-            total_vms = vxrail["count"] * vxrail["vm_density"]
-            vm_info = {
-                "total_vms": total_vms,
-                "vms_per_host": vxrail["vm_density"],
-                "hypervisor": vxrail["virtualization"],
-                "host_count": vxrail["count"]
-            }
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "vm_metrics": vm_info,
-                "consolidation_opportunities": {
-                    "servers_can_consolidate": consolidation["servers_to_consolidate"],
-                    "reduction_percent": consolidation["reduction_percent"],
-                    "energy_savings_kwh": consolidation["energy_savings_kwh"],
-                    "cost_savings_brl": consolidation["cost_savings_brl"]
-                },
-                "server_details": server_metrics
-            }
-        })
-    except Exception as e:
-        logger.error(f"Error in get_virtualization_metrics: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return _respond('get_virtualization_metrics', _virtualization_data)
+
+
+def _virtualization_data(args: MultiDict) -> Dict:
+    server_metrics = carbon_loader.get_server_metrics()
+    consolidation = carbon_loader.get_consolidation_potential()
+    
+    # Extract VxRail VM info
+    vxrail = next((s for s in server_metrics if s["type"] == "vxrail"), None)
+    
+    vm_info = {}
+    if vxrail:
+        total_vms = vxrail["count"] * vxrail["vm_density"]
+        vm_info = {
+            "total_vms": total_vms,
+            "vms_per_host": vxrail["vm_density"],
+            "hypervisor": vxrail["virtualization"],
+            "host_count": vxrail["count"]
+        }
+    
+    return {
+        "vm_metrics": vm_info,
+        "consolidation_opportunities": {
+            "servers_can_consolidate": consolidation["servers_to_consolidate"],
+            "reduction_percent": consolidation["reduction_percent"],
+            "energy_savings_kwh": consolidation["energy_savings_kwh"],
+            "cost_savings_brl": consolidation["cost_savings_brl"]
+        },
+        "server_details": server_metrics
+    }
 
 
 @api_bp.route('/recommendations', methods=['GET'])
+@etag_from(_recommendations_version)
 def get_recommendations():
     """
     Get AI-powered optimization recommendations
@@ -170,88 +194,78 @@ def get_recommendations():
         - limit: Number of recommendations to return (default: 5)
         - category: Filter by category (optional)
     """
-    try:
-        limit = request.args.get('limit', 5, type=int)
-        category = request.args.get('category', None, type=str)
-        
-        if category:
-            recommendations = recommendations_engine.get_recommendations_by_category(category)
-        else:
-            recommendations = recommendations_engine.get_top_recommendations(limit)
-        
-        # Calculate total impact
-        total_impact = {
-            "energy_savings_kwh": sum(r['impact']['energy_savings_kwh'] for r in recommendations),
-            "co2_reduction_kg": sum(r['impact']['co2_reduction_kg'] for r in recommendations),
-            "cost_savings_brl": sum(r['impact']['cost_savings_brl'] for r in recommendations)
-        }
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "recommendations": recommendations,
-                "count": len(recommendations),
-                "total_impact": total_impact
-            }
-        })
-    except Exception as e:
-        logger.error(f"Error in get_recommendations: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return _respond('get_recommendations', _recommendations_data)
+
+
+def _recommendations_data(args: MultiDict) -> Dict:
+    limit = args.get('limit', 5, type=int)
+    category = args.get('category', None, type=str)
+    
+    if category:
+        recommendations = recommendations_engine.get_recommendations_by_category(category)
+    else:
+        recommendations = recommendations_engine.get_top_recommendations(limit)
+    
+    # Calculate total impact
+    total_impact = {
+        "energy_savings_kwh": sum(r['impact']['energy_savings_kwh'] for r in recommendations),
+        "co2_reduction_kg": sum(r['impact']['co2_reduction_kg'] for r in recommendations),
+        "cost_savings_brl": sum(r['impact']['cost_savings_brl'] for r in recommendations)
+    }
+    
+    return {
+        "recommendations": recommendations,
+        "count": len(recommendations),
+        "total_impact": total_impact
+    }
 
 
 @api_bp.route('/savings', methods=['GET'])
+@etag_from(_recommendations_version)
 def get_savings():
     """
     Get detailed savings projections from datacenter optimization
     
     Returns comprehensive analysis of potential savings from virtualization and PUE optimization
     """
-    try:
-        optimization_data = carbon_loader.get_optimization_potential()
-        consolidation = carbon_loader.get_consolidation_potential()
-        cooling = carbon_loader.get_cooling_efficiency()
-        idle_resources = recommendations_engine.detect_idle_resources()
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "consolidation_savings": {
-                    "servers_to_consolidate": consolidation['servers_to_consolidate'],
-                    "annual_savings_kwh": consolidation['energy_savings_kwh'],
-                    "annual_savings_brl": consolidation['cost_savings_brl'],
-                    "co2_reduction_kg": consolidation['co2_reduction_kg'],
-                    "strategy": "Consolidação via virtualização"
-                },
-                "pue_optimization": {
-                    "current_pue": cooling['current_pue'],
-                    "target_pue": cooling['target_pue'],
-                    "annual_savings_kwh": cooling['annual_savings_kwh'],
-                    "cooling_power_kw": cooling['cooling_power_kw'],
-                    "strategy": "Otimização de cooling e PUE"
-                },
-                "idle_resources": idle_resources,
-                "total_potential": {
-                    "annual_savings_kwh": optimization_data['annual_savings_kwh'],
-                    "annual_savings_brl": optimization_data['annual_savings_brl'],
-                    "co2_reduction_kg": optimization_data['co2_reduction_kg'],
-                    "trees_equivalent": optimization_data['trees_equivalent'],
-                    "reduction_percentage": optimization_data['reduction_percentage'],
-                    "payback_months": 13  # From issue: R$200k investment, R$185k/year savings
-                }
-            }
-        })
-    except Exception as e:
-        logger.error(f"Error in get_savings: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+    return _respond('get_savings', _savings_data)
+
+
+def _savings_data(args: MultiDict) -> Dict:
+    optimization_data = carbon_loader.get_optimization_potential()
+    consolidation = carbon_loader.get_consolidation_potential()
+    cooling = carbon_loader.get_cooling_efficiency()
+    idle_resources = recommendations_engine.detect_idle_resources()
+    
+    return {
+        "consolidation_savings": {
+            "servers_to_consolidate": consolidation['servers_to_consolidate'],
+            "annual_savings_kwh": consolidation['energy_savings_kwh'],
+            "annual_savings_brl": consolidation['cost_savings_brl'],
+            "co2_reduction_kg": consolidation['co2_reduction_kg'],
+            "strategy": "Consolidação via virtualização"
+        },
+        "pue_optimization": {
+            "current_pue": cooling['current_pue'],
+            "target_pue": cooling['target_pue'],
+            "annual_savings_kwh": cooling['annual_savings_kwh'],
+            "cooling_power_kw": cooling['cooling_power_kw'],
+            "strategy": "Otimização de cooling e PUE"
+        },
+        "idle_resources": idle_resources,
+        "total_potential": {
+            "annual_savings_kwh": optimization_data['annual_savings_kwh'],
+            "annual_savings_brl": optimization_data['annual_savings_brl'],
+            "co2_reduction_kg": optimization_data['co2_reduction_kg'],
+            "trees_equivalent": optimization_data['trees_equivalent'],
+            "reduction_percentage": optimization_data['reduction_percentage'],
+            "payback_months": 13  # From issue: R$200k investment, R$185k/year savings
+        }
+    }
 
 
 @api_bp.route('/trends', methods=['GET'])
+@etag_from(_carbon_data_version)
 def get_trends():
     """
     Get datacenter consumption trends and load patterns
@@ -259,107 +273,198 @@ def get_trends():
     Query parameters:
         - period: Time period for analysis (day, week)
     """
-    try:
-        import datetime
-        
-        period = request.args.get('period', 'day', type=str)
-        
-        if period == 'day':
-            # Hourly trend for 24 hours - server load patterns
-            trends = []
-            for hour in range(24):
-                load_factor = carbon_loader.calculate_utilization_factor(hour)
-                consumption_data = carbon_loader.get_datacenter_consumption(hour=hour)
-                
-                energy_costs = carbon_loader.get_energy_costs()
-                is_peak = hour in energy_costs.get("peak_hours", [18, 19, 20, 21])
-                cost_multiplier = energy_costs.get("peak_multiplier", 1.5) if is_peak else 1.0
-                
-                trends.append({
-                    "hour": hour,
-                    "timestamp": f"{hour:02d}:00",
-                    "servers_kw": consumption_data["servers_kwh"],
-                    "cooling_kw": consumption_data["cooling_kwh"],
-                    "total_kw": consumption_data["total_kwh"],
-                    "pue": consumption_data["pue"],
-                    "load_percent": round(load_factor * 100, 1),
-                    "is_peak_hour": is_peak,
-                    "co2_kg": round(consumption_data["total_kwh"] * carbon_loader.get_emission_factor(), 2),
-                    "cost_brl": round(consumption_data["total_kwh"] * energy_costs.get("base_rate_brl_per_kwh", 0.60) * cost_multiplier, 2)
-                })
+    return _respond('get_trends', _trends_data)
+
+
+def _trends_data(args: MultiDict) -> Dict:
+    period = args.get('period', 'day', type=str)
+    
+    if period == 'day':
+        # Hourly trend for 24 hours - server load patterns
+        trends = []
+        for hour in range(24):
+            load_factor = carbon_loader.calculate_utilization_factor(hour)
+            consumption_data = carbon_loader.get_datacenter_consumption(hour=hour)
             
-            return jsonify({
-                "success": True,
-                "data": {
-                    "period": period,
-                    "trends": trends,
-                    "peak_hour": max(trends, key=lambda x: x['total_kw'])['hour'],
-                    "lowest_hour": min(trends, key=lambda x: x['total_kw'])['hour'],
-                    "average_consumption_kw": round(sum(t['total_kw'] for t in trends) / len(trends), 2),
-                    "average_load_percent": round(sum(t['load_percent'] for t in trends) / len(trends), 1)
-                }
+            energy_costs = carbon_loader.get_energy_costs()
+            is_peak = hour in energy_costs.get("peak_hours", [18, 19, 20, 21])
+            cost_multiplier = energy_costs.get("peak_multiplier", 1.5) if is_peak else 1.0
+            
+            trends.append({
+                "hour": hour,
+                "timestamp": f"{hour:02d}:00",
+                "servers_kw": consumption_data["servers_kwh"],
+                "cooling_kw": consumption_data["cooling_kwh"],
+                "total_kw": consumption_data["total_kwh"],
+                "pue": consumption_data["pue"],
+                "load_percent": round(load_factor * 100, 1),
+                "is_peak_hour": is_peak,
+                "co2_kg": round(consumption_data["total_kwh"] * carbon_loader.get_emission_factor(), 2),
+                "cost_brl": round(consumption_data["total_kwh"] * energy_costs.get("base_rate_brl_per_kwh", 0.60) * cost_multiplier, 2)
             })
         
-        elif period == 'week':
-            # Daily trend for 7 days - datacenter runs 24/7 but with load variation
-            trends = []
-            for day in range(7):
-                # Simulate weekly pattern (slightly lower on weekends)
-                is_weekend = day in [5, 6]  # Saturday, Sunday
-                avg_load = 0.50 if is_weekend else 0.60  # Servers run 24/7 but lower workload
-                
-                # Get average daily consumption
-                daily_consumption_kwh = 0
-                for hour in range(24):
-                    hour_consumption = carbon_loader.get_datacenter_consumption(hour=hour)
-                    daily_consumption_kwh += hour_consumption["total_kwh"]
-                
-                # Adjust by weekend factor
-                if is_weekend:
-                    daily_consumption_kwh *= 0.85
-                
-                energy_costs = carbon_loader.get_energy_costs()
-                
-                trends.append({
-                    "day": day,
-                    "day_name": ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"][day],
-                    "consumption_kwh": round(daily_consumption_kwh, 2),
-                    "avg_load_percent": round(avg_load * 100, 1),
-                    "co2_kg": round(daily_consumption_kwh * carbon_loader.get_emission_factor(), 2),
-                    "cost_brl": round(daily_consumption_kwh * energy_costs.get("base_rate_brl_per_kwh", 0.60), 2)
-                })
+        return {
+            "period": period,
+            "trends": trends,
+            "peak_hour": max(trends, key=lambda x: x['total_kw'])['hour'],
+            "lowest_hour": min(trends, key=lambda x: x['total_kw'])['hour'],
+            "average_consumption_kw": round(sum(t['total_kw'] for t in trends) / len(trends), 2),
+            "average_load_percent": round(sum(t['load_percent'] for t in trends) / len(trends), 1)
+        }
+    
+    elif period == 'week':
+        # Daily trend for 7 days - datacenter runs 24/7 but with load variation
+        trends = []
+        for day in range(7):
+            # Simulate weekly pattern (slightly lower on weekends)
+            is_weekend = day in [5, 6]  # Saturday, Sunday
+            avg_load = 0.50 if is_weekend else 0.60  # Servers run 24/7 but lower workload
+            
+            # Get average daily consumption
+            daily_consumption_kwh = 0
+            for hour in range(24):
+                hour_consumption = carbon_loader.get_datacenter_consumption(hour=hour)
+                daily_consumption_kwh += hour_consumption["total_kwh"]
             
-            return jsonify({
-                "success": True,
-                "data": {
-                    "period": period,
-                    "trends": trends,
-                    "total_weekly_kwh": round(sum(t['consumption_kwh'] for t in trends), 2),
-                    "average_daily_kwh": round(sum(t['consumption_kwh'] for t in trends) / len(trends), 2)
-                }
+            # Adjust by weekend factor
+            if is_weekend:
+                daily_consumption_kwh *= 0.85
+            
+            energy_costs = carbon_loader.get_energy_costs()
+            
+            trends.append({
+                "day": day,
+                "day_name": ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"][day],
+                "consumption_kwh": round(daily_consumption_kwh, 2),
+                "avg_load_percent": round(avg_load * 100, 1),
+                "co2_kg": round(daily_consumption_kwh * carbon_loader.get_emission_factor(), 2),
+                "cost_brl": round(daily_consumption_kwh * energy_costs.get("base_rate_brl_per_kwh", 0.60), 2)
             })
         
-        else:
-            return jsonify({
-                "success": False,
-                "error": "Invalid period. Use 'day' or 'week'"
-            }), 400
-            
-    except Exception as e:
-        logger.error(f"Error in get_trends: {str(e)}")
-        return jsonify({
-            "success": False,
-            "error": "Internal server error"
-        }), 500
+        return {
+            "period": period,
+            "trends": trends,
+            "total_weekly_kwh": round(sum(t['consumption_kwh'] for t in trends), 2),
+            "average_daily_kwh": round(sum(t['consumption_kwh'] for t in trends) / len(trends), 2)
+        }
+    
+    else:
+        raise InvalidParameter("Invalid period. Use 'day' or 'week'")
+
+
+# Resources /api/batch can compose: name -> (build(args) -> data, version() -> ETag part)
+BATCH_RESOURCES: Dict[str, Tuple[Callable[..., Any], Callable[..., Any], Optional[Callable[[], Any]]]] = {}
+
+
+def register_batch_resource(name: str, build: Callable[..., Any], version: Callable[..., Any],
+                            resolve: Optional[Callable[[], Any]] = None):
+    """
+    Make a resource available to /api/batch
+    
+    Args:
+        name: Resource name used in ?resources=
+        build: Returns the resource data for its query parameters
+        version: Version of the data behind the resource (None = unversioned)
+        resolve: Optional; returns the object behind the resource (e.g. a
+            snapshot). It runs once per batch request and its result is
+            passed as version(obj) and build(args, obj), so the ETag always
+            describes the body that is sent
+    """
+    BATCH_RESOURCES[name] = (build, version, resolve)
+
+
+register_batch_resource('servers', _servers_data, _carbon_data_version)
+register_batch_resource('consolidation', _consolidation_data, _carbon_data_version)
+register_batch_resource('pue', _pue_data, _carbon_data_version)
+register_batch_resource('virtualization', _virtualization_data, _carbon_data_version)
+register_batch_resource('recommendations', _recommendations_data, _recommendations_version)
+register_batch_resource('savings', _savings_data, _recommendations_version)
+register_batch_resource('trends', _trends_data, _carbon_data_version)
+
+
+def _batch_names():
+    """Requested resource names, in request order and without duplicates"""
+    names = list(dict.fromkeys(
+        name.strip() for name in request.args.get('resources', '').split(',') if name.strip()
+    ))
+    if not names:
+        raise InvalidParameter("No resources requested. Use ?resources=" + ",".join(BATCH_RESOURCES))
+    unknown = [name for name in names if name not in BATCH_RESOURCES]
+    if unknown:
+        raise InvalidParameter(f"Unknown resources: {', '.join(unknown)}")
+    return names
+
+
+def _resolved(name: str) -> Any:
+    """Result of a resource's resolve(), computed once per request"""
+    resolved = g.setdefault('batch_resolved', {})
+    if name not in resolved:
+        resolved[name] = BATCH_RESOURCES[name][2]()
+    return resolved[name]
+
+
+def _resource_version(name: str) -> Any:
+    _, version, resolve = BATCH_RESOURCES[name]
+    return version(_resolved(name)) if resolve else version()
+
+
+def _build_resource(name: str, args: MultiDict) -> Any:
+    build, _, resolve = BATCH_RESOURCES[name]
+    return build(args, _resolved(name)) if resolve else build(args)
+
+
+def _batch_version():
+    try:
+        names = _batch_names()
+    except InvalidParameter:
+        return None
+    versions = tuple(_resource_version(name) for name in names)
+    return None if None in versions else versions
+
+
+def _resource_args(name: str) -> MultiDict:
+    """Query parameters addressed to one resource (trends.period=week -> period=week)"""
+    prefix = name + '.'
+    return MultiDict(
+        (key[len(prefix):], value) for key, value in request.args.items(multi=True) if key.startswith(prefix)
+    )
+
+
+@api_bp.route('/batch', methods=['GET'])
+@etag_from(_batch_version)
+def get_batch():
+    """
+    Compose several resources in one round trip
+    
+    Query parameters:
+        - resources: Comma-separated resource names (e.g. metrics,servers,pue,trends,recommendations)
+        - <resource>.<param>: Parameter for one resource (e.g. trends.period=week)
+    
+    Intermediate results shared by the resources (server metrics, cooling
+    efficiency, consolidation potential, ...) come from the loader's cache.
+    """
+    return _respond('get_batch', _batch_data)
+
+
+def _batch_data(args: MultiDict) -> Dict:
+    names = _batch_names()
+    data = {}
+    for name in names:
+        try:
+            data[name] = _build_resource(name, _resource_args(name))
+        except InvalidParameter as e:
+            raise InvalidParameter(f"{name}: {e}") from e
+    return data
 
 
 @api_bp.route('/health', methods=['GET'])
+@etag_from(lambda: API_VERSION)
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "success": True,
         "status": "healthy",
-        "version": "3.0.0",
+        "version": API_VERSION,
         "scope": "datacenter-servers-only",
         "endpoints": [
             "/api/metrics",
@@ -370,6 +475,8 @@ def health_check():
             "/api/recommendations",
             "/api/savings",
             "/api/trends",
+            "/api/batch",
+            "/api/stream",
             "/api/health"
         ]
     })
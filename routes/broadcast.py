@@ -0,0 +1,125 @@
+"""
+Server-Sent Events fan-out
+
+One publisher thread pushes snapshot deltas; every subscriber streams the
+same pre-encoded frames. Each publish serializes the payload exactly once,
+so N connected dashboards cost one json.dumps per change instead of N.
+Frames are kept in a short backlog so a reconnecting client (Last-Event-ID)
+receives only what it missed; a client that fell further behind gets the
+full current state instead.
+"""
+
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, List, Optional, Tuple
+
+
+def encode_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Encode one SSE frame (data is serialized as compact JSON)"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+class Broadcaster:
+    """
+    Fan-out of snapshot/delta events to any number of SSE subscribers
+
+    Thread-safe: publish() is called from a single producer thread while
+    request threads block in next_frames().
+    """
+
+    def __init__(self, backlog: int = 64):
+        self._cond = threading.Condition()
+        self._frames: Deque[Tuple[int, bytes]] = deque(maxlen=backlog)
+        self._state_frame: Optional[bytes] = None
+        self._last_id = 0
+        self._closed = False
+        self.subscribers = 0
+        self.published = 0  # Events encoded (one serialization each)
+
+    @property
+    def last_id(self) -> int:
+        """Id of the most recent event (0 before the first publish)"""
+        return self._last_id
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def publish(self, delta: Any, state: Any) -> int:
+        """
+        Publish a change to every subscriber
+
+        Args:
+            delta: Fields that changed since the previous event
+            state: Full current state, sent to new or lagging subscribers
+
+        Returns:
+            Id of the published event
+        """
+        with self._cond:
+            event_id = self._last_id + 1
+            # Encoded once here, shared by every subscriber
+            self._frames.append((event_id, encode_event('delta', delta, event_id)))
+            self._state_frame = encode_event('snapshot', state, event_id)
+            self._last_id = event_id
+            self.published += 1
+            self._cond.notify_all()
+        return event_id
+
+    def next_frames(self, after: Optional[int], timeout: Optional[float] = None) -> Tuple[List[bytes], Optional[int]]:
+        """
+        Frames a subscriber that has seen event `after` must receive next
+
+        Blocks until an event newer than `after` is published, the timeout
+        expires or the broadcaster is closed.
+
+        Args:
+            after: Last event id the subscriber received (None = nothing yet)
+            timeout: Maximum wait in seconds (None = wait indefinitely)
+
+        Returns:
+            Tuple (frames, last_id) - frames is empty on timeout/close; it holds
+            the missed deltas when they are still in the backlog, otherwise
+            the full state snapshot
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._closed or (self._state_frame is not None and self._last_id != after),
+                timeout
+            )
+            if self._closed or self._state_frame is None or self._last_id == after:
+                return [], after
+
+            if after is not None and self._frames and self._frames[0][0] <= after + 1 <= self._last_id:
+                frames = [frame for event_id, frame in self._frames if event_id > after]
+            else:
+                # First frame for this subscriber, or it fell out of the backlog
+                frames = [self._state_frame]
+            return frames, self._last_id
+
+    @contextmanager
+    def subscription(self):
+        """Count a connected subscriber for the duration of the block"""
+        with self._cond:
+            self.subscribers += 1
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def close(self):
+        """Wake every subscriber and end their streams"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,80 @@
+"""
+HTTP conditional GET helpers (ETag / Last-Modified)
+
+Each endpoint names the version of the data behind its response (snapshot
+version, config digest, ...). The ETag is derived from that version plus
+the request path and query string, so a matching If-None-Match is answered
+with 304 before the view runs: no computation, no serialization and no
+body bytes.
+"""
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from flask import Response, make_response, request
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag value (unquoted) from the repr of the given parts"""
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        modified = last_modified.astimezone().replace(microsecond=0)
+        return modified <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag: str, build: Callable[[], Any],
+                         last_modified: Optional[datetime] = None) -> Response:
+    """
+    Answer with 304 when the client already has this version, else build the response
+
+    Args:
+        etag: ETag of the current representation (see make_etag)
+        build: Returns the view's response; only called on a cache miss
+        last_modified: When the data behind the response last changed
+
+    Returns:
+        304 without body, or the built response carrying ETag/Last-Modified
+        (error responses are returned untouched)
+    """
+    if request.method in ('GET', 'HEAD') and _not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.astimezone()
+    # Cached copies must be revalidated on every poll
+    response.cache_control.no_cache = True
+    return response
+
+
+def etag_from(version: Callable[[], Any]):
+    """
+    Decorator: conditional GET for a view whose data is identified by version()
+
+    version() must be cheap; the ETag also covers the path and query string.
+    A version of None means the data is not versioned right now: the view
+    runs unconditionally and no ETag is sent.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = version()
+            if current is None:
+                return view(*args, **kwargs)
+            etag = make_etag(request.path, request.query_string, current)
+            return conditional_response(etag, lambda: view(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,85 @@
+"""
+Single-flight request coalescing
+
+Concurrent callers asking for the same key share one in-flight
+computation: the first caller runs it, the others block until it finishes
+and receive the same result (or the same exception). Nothing is cached
+after the flight lands, so a caller arriving later always starts a fresh
+computation.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    """One in-flight computation and its outcome"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one execution
+
+    Thread-safe; meant for request handlers running on a threaded WSGI server.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions = 0  # Computations actually run
+        self.coalesced = 0  # Calls served by another caller's computation
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once for all concurrent callers of the same key
+
+        Args:
+            key: Identity of the request (callers with equal keys are merged)
+            fn: Computation to run when no flight is in progress for key
+
+        Returns:
+            Tuple (result, shared) - shared is True when the result came from
+            another caller's computation
+
+        Raises:
+            Whatever fn raised, re-raised in every caller of the flight
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            # Unregister before waking waiters: later callers start a new flight
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._flights)
@@ -7,22 +7,55 @@ dos servidores HP DL380 (G8/G9/G10) e VxRail T560F da infraestrutura Renault.
 Características:
 - SNMPv3 com autenticação SHA + criptografia AES (seguro)
 - Suporte a múltiplas gerações HP com OIDs diferentes
-- Rate limiting (max 10 conexões simultâneas)
-- Cache com TTL de 5 minutos
-- Retry logic com backoff exponencial
+- Fan-out assíncrono com concorrência limitada (max_concurrent_connections)
+- Cache stale-while-revalidate com refresh antecipado em background
+- Retry não bloqueante com backoff exponencial e prazo por dispositivo
+- Circuit breaker e timeout adaptativo (EWMA do RTT) por dispositivo
 - Fallback automático para dados simulados
+- Agendador em background que publica snapshots imutáveis por ciclo
+- Event loop dedicado com SnmpEngine, credenciais USM e targets reutilizados
+- Modo 'batch': todos os OIDs escalares em um GET + GETBULK da tabela de fontes
+- Hot reload de renault_servers.json sem reiniciar o coletor
+- Energia real (kWh) por integração trapezoidal das leituras de potência
+- Snapshot compartilhado via mmap para workers WSGI (processo coletor único)
+- Sharding da frota entre nós coletores por hash consistente
+- Engine ID e timeline SNMPv3 reaproveitados entre ciclos (um round trip por consulta)
+- Telemetria em memória (RTT por dispositivo, timeouts, retries, cache, ciclos e fila)
+- Histórico recente de potência por dispositivo em buffers circulares compactos
+- Backend Redfish (iLO 5 / iDRAC 9) por servidor, com sessões e conexões keep-alive reaproveitadas
+- Sensores no modo 'batch' (temperatura de entrada, ventilação, CPU) sem passada extra de polling
 """
 
 import asyncio
+import contextlib
+import concurrent.futures
 import json
 import logging
+import os
+import random
 import time
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
+from collector.deltas import ChangeTracker, MetricChange
+from collector.energy import EnergyIntegrator, EnergySummary
+from collector.history import HistoryWindow, SampleHistory
+from collector.models import CollectorSnapshot, SensorReadings, ServerMetrics, SharedSnapshot, summarize_metrics
+from collector.redfish import DEFAULT_CHASSIS, DEFAULT_CHASSIS_ID, RedfishClient
+from collector.redfish import DEFAULT_PORT as REDFISH_DEFAULT_PORT
+from collector.resilience import CircuitBreaker, DeviceHealth, RTTEstimator
+from collector.scheduling import TimingWheel
+# Leitores para os processos web, reexportados para quem importa de snmp_collector
+from collector.shared_snapshot import (
+    SharedSnapshotCollector, SharedSnapshotWriter, decode_shared_snapshot, encode_shared_snapshot
+)
+from collector.sharding import DEFAULT_VNODES, HashRing, ShardedSnapshotCollector, select_shard
+from collector.usm_cache import EngineDiscoveryCache, credentials_fingerprint, is_usm_error
+from collector.state_store import CollectorStateStore
+from collector.telemetry import CollectorTelemetry
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,6 +65,8 @@ try:
     # pysnmp 7.x imports
     from pysnmp.hlapi.v3arch.asyncio import (
         get_cmd,
+        bulk_cmd,
+        EndOfMibView,
         SnmpEngine,
         UsmUserData,
         UdpTransportTarget,
@@ -39,6 +74,7 @@ try:
         ObjectType,
         ObjectIdentity
     )
+    from pysnmp.proto.rfc1902 import ObjectName
     from pysnmp.proto.secmod.rfc3414.auth import hmacsha, hmacmd5
     from pysnmp.proto.secmod.rfc3826.priv import aes
     from pysnmp.proto.secmod.rfc3414.priv import des
@@ -55,17 +91,6 @@ except ImportError:
     logger.warning("pysnmp not available - SNMP collector will use fallback mode")
 
 
-@dataclass
-class ServerMetrics:
-    """Métricas coletadas de um servidor"""
-    device_id: str
-    power_consumption_watts: float
-    timestamp: datetime
-    source: str  # 'snmp_real', 'cached', 'simulated'
-    status: str  # 'success', 'timeout', 'error'
-    error_message: Optional[str] = None
-
-
 @dataclass
 class SNMPCredentials:
     """Credenciais SNMPv3"""
@@ -76,6 +101,16 @@ class SNMPCredentials:
     priv_protocol: str = "AES"
 
 
+@dataclass
+class RedfishCredentials:
+    """Credenciais Redfish (iLO / iDRAC)"""
+    username: str
+    password: str
+    auth: str = "session"  # 'session' (X-Auth-Token reaproveitado) ou 'basic'
+    verify_tls: bool = True
+    ca_file: Optional[str] = None
+
+
 class HPServerOIDs:
     """OIDs para diferentes gerações de servidores HP DL380"""
     
@@ -83,28 +118,50 @@ class HPServerOIDs:
     GEN8 = {
         "power_consumption": "1.3.6.1.4.1.232.6.2.1.3.1.4.1.3",  # cpqHePowerMeterCurrReading
         "power_supply_status": "1.3.6.1.4.1.232.6.2.9.3.1.1.4",
-        "system_health": "1.3.6.1.4.1.232.6.2.1.3.1.3"
+        "system_health": "1.3.6.1.4.1.232.6.2.1.3.1.3",
+        "inlet_temperature": "1.3.6.1.4.1.232.6.2.6.8.1.4.0.1",  # cpqHeTemperatureCelsius, sensor 1 (ambiente/entrada)
+        "fan_speed": "1.3.6.1.4.1.232.6.2.6.7.1.12.0.1",  # cpqHeFltTolFanPctMax, ventilador 1 (% do máximo)
+        "cpu_utilization": "1.3.6.1.4.1.232.11.2.3.1.1.2.0"  # cpqHoCpuUtilMin (% no último minuto)
     }
     
     # HP DL380 Gen9
     GEN9 = {
         "power_consumption": "1.3.6.1.4.1.232.6.2.1.3.1.4.1.3",
         "power_supply_status": "1.3.6.1.4.1.232.6.2.9.3.1.1.4",
-        "system_health": "1.3.6.1.4.1.232.6.2.1.3.1.3"
+        "system_health": "1.3.6.1.4.1.232.6.2.1.3.1.3",
+        "inlet_temperature": "1.3.6.1.4.1.232.6.2.6.8.1.4.0.1",  # cpqHeTemperatureCelsius, sensor 1 (ambiente/entrada)
+        "fan_speed": "1.3.6.1.4.1.232.6.2.6.7.1.12.0.1",  # cpqHeFltTolFanPctMax, ventilador 1 (% do máximo)
+        "cpu_utilization": "1.3.6.1.4.1.232.11.2.3.1.1.2.0"  # cpqHoCpuUtilMin (% no último minuto)
     }
     
     # HP DL380 Gen10
     GEN10 = {
         "power_consumption": "1.3.6.1.4.1.232.6.2.1.3.1.4.1.3",
         "power_supply_status": "1.3.6.1.4.1.232.6.2.9.3.1.1.4",
-        "system_health": "1.3.6.1.4.1.232.6.2.1.3.1.3"
+        "system_health": "1.3.6.1.4.1.232.6.2.1.3.1.3",
+        "inlet_temperature": "1.3.6.1.4.1.232.6.2.6.8.1.4.0.1",  # cpqHeTemperatureCelsius, sensor 1 (ambiente/entrada)
+        "fan_speed": "1.3.6.1.4.1.232.6.2.6.7.1.12.0.1",  # cpqHeFltTolFanPctMax, ventilador 1 (% do máximo)
+        "cpu_utilization": "1.3.6.1.4.1.232.11.2.3.1.1.2.0"  # cpqHoCpuUtilMin (% no último minuto)
     }
     
     # VxRail (Dell EMC - using iDRAC OIDs)
     VXRAIL = {
         "power_consumption": "1.3.6.1.4.1.674.10892.5.4.600.30.1.6.1.3",  # Dell iDRAC power reading
         "power_supply_status": "1.3.6.1.4.1.674.10892.5.4.600.12.1.5",
-        "system_health": "1.3.6.1.4.1.674.10892.5.2.1.0"
+        "system_health": "1.3.6.1.4.1.674.10892.5.2.1.0",
+        "inlet_temperature": "1.3.6.1.4.1.674.10892.5.4.700.20.1.6.1.1"  # temperatureProbeReading (System Board Inlet)
+    }
+    
+    # Sensores opcionais (modo 'batch'): nome do OID -> campo de SensorReadings
+    SENSOR_FIELDS = {
+        "inlet_temperature": "inlet_temp_c",
+        "fan_speed": "fan_percent",
+        "cpu_utilization": "cpu_percent"
+    }
+    
+    # Multiplicadores de OIDs que não reportam na unidade do campo (iDRAC: décimos de °C)
+    SCALES = {
+        "1.3.6.1.4.1.674.10892.5.4.700.20.1.6.1.1": 0.1
     }
     
     @classmethod
@@ -124,12 +181,19 @@ class SNMPCollector:
     Coletor SNMP para servidores Renault
     
     Coleta métricas de consumo de energia via SNMPv3 com:
-    - Rate limiting (max 10 conexões simultâneas)
-    - Cache com TTL de 5 minutos
-    - Retry logic com backoff exponencial
+    - Fan-out assíncrono limitado por asyncio.Semaphore
+    - Cache stale-while-revalidate (TTL de 5 minutos + janela stale)
+    - Retry não bloqueante com prazo por dispositivo e por ciclo
+    - Circuit breaker e timeout adaptativo por dispositivo
     - Fallback para dados simulados
+    - Agendador em background (start/stop) com snapshot imutável
+    - Hot reload incremental da configuração (reload_config)
+    - Sharding opcional: cada nó coleta apenas a sua parte da frota
     """
     
+    # Campos de um servidor que identificam o endpoint SNMP consultado
+    ENDPOINT_KEYS = ('ip_address', 'port', 'generation', 'protocol', 'scheme', 'redfish_chassis')
+    
     def __init__(self, config_file: str = "renault_servers.json"):
         """
         Inicializa o coletor SNMP
@@ -142,144 +206,689 @@ class SNMPCollector:
         self.credentials: Optional[SNMPCredentials] = None
         self.cache: Dict[str, Tuple[ServerMetrics, datetime]] = {}
         self.cache_ttl_seconds = 300  # 5 minutos
+        self.cache_stale_seconds = 300  # Janela em que o valor expirado ainda é servido
+        self.refresh_ahead_ratio = 0.8  # Revalidar ao atingir 80% do TTL
         self.max_concurrent = 10
         self.timeout_seconds = 3
         self.max_retries = 3
         self.cache_lock = threading.Lock()
+        self.collection_interval_seconds = 30
+        self.device_deadline_seconds: Optional[float] = None  # None = orçamento completo de retry
+        self.cycle_deadline_seconds: Optional[float] = None  # None = collection_interval_seconds
+        self.collection_mode = 'power'  # 'power' (apenas consumo) ou 'batch' (todos os OIDs)
+        self.psu_max_repetitions = 8
+        
+        # Circuit breaker e timeout adaptativo por dispositivo
+        self.circuit_failure_threshold = 3
+        self.circuit_cooldown_seconds = 60.0
+        self.circuit_max_cooldown_seconds = 600.0
+        self.adaptive_timeout_min_seconds = 0.2
+        self.device_health: Dict[str, DeviceHealth] = {}
+        
+        # Agendador em background e snapshot publicado
+        self._snapshot: Optional[CollectorSnapshot] = None
+        self._snapshot_version = 0
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_published = threading.Condition(self._snapshot_lock)
+        
+        # Publicação por diferença: só variações além da banda morta (W) viram eventos
+        self.publish_deadband_watts = 0.0
+        self.changes = ChangeTracker(self.publish_deadband_watts)
+        self._scheduler_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        
+        # Event loop dedicado: dono do SnmpEngine e do estado de transporte/USM
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._engine = None
+        self._user_data = None
+        self._credentials_key = ''
+        self._targets: Dict[Tuple[str, int], object] = {}
+        self.engine_discovery = EngineDiscoveryCache()
+        
+        # Servidores com "protocol": "redfish" (cliente criado no event loop)
+        self.redfish_credentials: Optional[RedfishCredentials] = None
+        self._redfish: Optional[RedfishClient] = None
+        
+        # Revalidações em background (stale-while-revalidate)
+        self._refreshing: set = set()
+        self._refresh_tasks: set = set()
+        
+        # Limite de GETs simultâneos compartilhado por ciclos, slots e revalidações
+        self._poll_semaphore: Optional[asyncio.Semaphore] = None
+        self._poll_semaphore_size = 0
+        
+        # Polling escalonado: roda de tempo e últimas métricas por dispositivo
+        self.schedule_slots: Optional[int] = None  # None = um slot por segundo do intervalo
+        self.schedule_jitter_ratio = 1.0  # Jitter de até 1 tick antes de cada consulta
+        self._wheel: Optional[TimingWheel] = None
+        self._latest_metrics: Dict[str, ServerMetrics] = {}
+        self._in_flight: set = set()
+        
+        # Warm start: snapshot do estado em disco (None = desabilitado)
+        self.state_file: Optional[str] = None
+        
+        # Energia acumulada (kWh) a partir das leituras de potência
+        self.energy = EnergyIntegrator()
+        
+        # Histórico recente de potência por dispositivo (célula = intervalo de coleta)
+        self.history_retention_hours = 24.0
+        self.history = SampleHistory(self.collection_interval_seconds, self.history_retention_hours * 3600)
+        
+        # Contadores e histogramas da coleta (/api/collector/stats)
+        self.telemetry = CollectorTelemetry()
+        
+        # Snapshot compartilhado com outros processos (None = desabilitado)
+        self.shared_snapshot_file: Optional[str] = None
+        self._shared_writer: Optional[SharedSnapshotWriter] = None
+        
+        # Sharding entre nós coletores (shard_nodes vazio = este nó coleta a frota inteira)
+        self.shard_nodes: List[str] = []
+        self.shard_node_id: Optional[str] = None
+        self.shard_vnodes = DEFAULT_VNODES
+        self._all_servers: List[Dict] = []
+        
+        # Hot reload do arquivo de configuração (0 = desabilitado)
+        self.config_reload_seconds = 5.0
+        self._config_signature: Optional[Tuple[int, int]] = None
         
         # Não carregar configuração durante testes para evitar timeouts
-        import os
         if os.environ.get('TESTING') != '1':
             self._load_config()
+            if self.state_file:
+                self._restore_state()
         else:
             logger.info("Modo de teste detectado - configuração SNMP não carregada")
         
     def _load_config(self) -> bool:
         """Carrega configuração do arquivo JSON"""
+        config = self._read_config()
+        if config is None:
+            return False
+        
+        self._apply_config(config)
+        logger.info(f"Configuração carregada: {len(self.servers_config)} servidores")
+        return True
+    
+    def _read_config(self) -> Optional[Dict]:
+        """Lê e valida o JSON de configuração (None em caso de erro)"""
+        self._config_signature = self._get_config_signature()
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                
-            # Carregar credenciais SNMPv3
-            if 'snmp_credentials' in config:
-                creds = config['snmp_credentials']
-                self.credentials = SNMPCredentials(
-                    username=creds.get('username', ''),
-                    auth_key=creds.get('auth_key', ''),
-                    priv_key=creds.get('priv_key', ''),
-                    auth_protocol=creds.get('auth_protocol', 'SHA'),
-                    priv_protocol=creds.get('priv_protocol', 'AES')
-                )
-            
-            # Carregar lista de servidores
-            self.servers_config = config.get('servers', [])
-            
-            logger.info(f"Configuração carregada: {len(self.servers_config)} servidores")
-            return True
+                return json.load(f)
             
         except FileNotFoundError:
             logger.warning(f"Arquivo de configuração {self.config_file} não encontrado - usando modo simulado")
-            return False
+            return None
         except json.JSONDecodeError as e:
             logger.error(f"Erro ao parsear JSON: {e}")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Erro ao carregar configuração: {e}")
+            return None
+    
+    def _apply_config(self, config: Dict):
+        """Aplica credenciais, parâmetros de coleta e lista de servidores"""
+        # Carregar credenciais SNMPv3
+        if 'snmp_credentials' in config:
+            creds = config['snmp_credentials']
+            self.credentials = SNMPCredentials(
+                username=creds.get('username', ''),
+                auth_key=creds.get('auth_key', ''),
+                priv_key=creds.get('priv_key', ''),
+                auth_protocol=creds.get('auth_protocol', 'SHA'),
+                priv_protocol=creds.get('priv_protocol', 'AES')
+            )
+        
+        if 'redfish_credentials' in config:
+            creds = config['redfish_credentials']
+            self.redfish_credentials = RedfishCredentials(
+                username=creds.get('username', ''),
+                password=creds.get('password', ''),
+                auth=creds.get('auth', 'session'),
+                verify_tls=creds.get('verify_tls', True),
+                ca_file=creds.get('ca_file')
+            )
+        
+        # Carregar parâmetros de coleta
+        coleta = config.get('coleta_config', {})
+        self.timeout_seconds = coleta.get('timeout_seconds', self.timeout_seconds)
+        self.max_retries = coleta.get('max_retries', self.max_retries)
+        self.cache_ttl_seconds = coleta.get('cache_ttl_minutes', self.cache_ttl_seconds / 60) * 60
+        self.cache_stale_seconds = coleta.get('cache_stale_minutes', self.cache_stale_seconds / 60) * 60
+        self.refresh_ahead_ratio = coleta.get('refresh_ahead_ratio', self.refresh_ahead_ratio)
+        self.max_concurrent = coleta.get('max_concurrent_connections', self.max_concurrent)
+        self.collection_interval_seconds = coleta.get(
+            'collection_interval_seconds', self.collection_interval_seconds
+        )
+        self.device_deadline_seconds = coleta.get('device_deadline_seconds', self.device_deadline_seconds)
+        self.cycle_deadline_seconds = coleta.get('cycle_deadline_seconds', self.cycle_deadline_seconds)
+        self.collection_mode = coleta.get('collection_mode', self.collection_mode)
+        self.psu_max_repetitions = coleta.get('psu_max_repetitions', self.psu_max_repetitions)
+        self.circuit_failure_threshold = coleta.get('circuit_failure_threshold', self.circuit_failure_threshold)
+        self.circuit_cooldown_seconds = coleta.get('circuit_cooldown_seconds', self.circuit_cooldown_seconds)
+        self.circuit_max_cooldown_seconds = coleta.get(
+            'circuit_max_cooldown_seconds', self.circuit_max_cooldown_seconds
+        )
+        self.adaptive_timeout_min_seconds = coleta.get(
+            'adaptive_timeout_min_seconds', self.adaptive_timeout_min_seconds
+        )
+        self.schedule_slots = coleta.get('schedule_slots', self.schedule_slots)
+        self.schedule_jitter_ratio = coleta.get('schedule_jitter_ratio', self.schedule_jitter_ratio)
+        self.state_file = coleta.get('state_file', self.state_file)
+        self.config_reload_seconds = coleta.get('config_reload_seconds', self.config_reload_seconds)
+        self.energy.max_gap_seconds = coleta.get('energy_max_gap_seconds', self.energy.max_gap_seconds)
+        self.history_retention_hours = coleta.get('history_retention_hours', self.history_retention_hours)
+        self.history.configure(self.collection_interval_seconds, self.history_retention_hours * 3600)
+        self.publish_deadband_watts = coleta.get('publish_deadband_watts', self.publish_deadband_watts)
+        self.changes.deadband_watts = self.publish_deadband_watts
+        self.shared_snapshot_file = coleta.get('shared_snapshot_file', self.shared_snapshot_file)
+        self.shard_nodes = list(coleta.get('shard_nodes', self.shard_nodes) or [])
+        self.shard_node_id = coleta.get('shard_node_id', self.shard_node_id)
+        self.shard_vnodes = coleta.get('shard_vnodes', self.shard_vnodes)
+        
+        # Carregar lista de servidores (troca atômica da referência)
+        self._all_servers = list(config.get('servers', []))
+        self.servers_config = self._select_shard(self._all_servers)
+    
+    def _select_shard(self, servers: List[Dict]) -> List[Dict]:
+        """Servidores que cabem a este nó (todos, se o sharding estiver desabilitado)"""
+        if not self.shard_nodes:
+            return servers
+        if self.shard_node_id not in self.shard_nodes:
+            logger.error(
+                f"shard_node_id {self.shard_node_id!r} não está em shard_nodes {self.shard_nodes} - "
+                "nenhum servidor será coletado por este nó"
+            )
+            return []
+        ring = HashRing(self.shard_nodes, self.shard_vnodes)
+        selected = select_shard(servers, ring, self.shard_node_id)
+        logger.info(
+            f"Shard {self.shard_node_id}: {len(selected)} de {len(servers)} servidores "
+            f"({len(self.shard_nodes)} nós)"
+        )
+        return selected
+    
+    def configure_shard(self, node_id: str, nodes: Optional[List[str]] = None):
+        """
+        Define o nó deste coletor (e opcionalmente a lista de nós) antes de start()
+        
+        Recargas posteriores da configuração mantêm estes valores enquanto
+        o arquivo não definir shard_node_id/shard_nodes.
+        """
+        if self.is_running():
+            raise RuntimeError("configure_shard deve ser chamado antes de start()")
+        self.shard_node_id = node_id
+        if nodes is not None:
+            self.shard_nodes = list(nodes)
+        self.servers_config = self._select_shard(self._all_servers)
+    
+    def _uses_default_fleet(self) -> bool:
+        """Sem servidores configurados e sem sharding: simular a frota padrão Renault"""
+        return not self.servers_config and not self.shard_nodes
+    
+    def _get_config_signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, tamanho) do arquivo de configuração; None se inacessível"""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def reload_config(self) -> bool:
+        """
+        Recarrega renault_servers.json se o arquivo mudou desde a última leitura
+        
+        Compara `servers` e `snmp_credentials` com a configuração em uso e
+        aplica apenas a diferença: dispositivos inalterados mantêm cache,
+        circuit breaker e RTT; removidos são descartados; alterados no
+        endereço ou geração recomeçam do zero. A nova lista de servidores é
+        publicada com uma única troca de referência.
+        
+        Returns:
+            True se uma nova configuração foi aplicada
+        """
+        if self._config_signature is None:
+            # Configuração nunca lida do disco (ex.: TESTING) - nada a recarregar
             return False
+        
+        signature = self._get_config_signature()
+        if signature is None or signature == self._config_signature:
+            return False
+        
+        config = self._read_config()
+        if config is None:
+            logger.error("Nova configuração inválida - mantendo a configuração em uso")
+            return False
+        
+        old_servers = {server.get('device_id'): server for server in self.servers_config}
+        old_credentials = self.credentials
+        old_redfish_credentials = self.redfish_credentials
+        old_slots = self._get_slot_count()
+        
+        self._apply_config(config)
+        new_servers = {server.get('device_id'): server for server in self.servers_config}
+        
+        removed = [device_id for device_id in old_servers if device_id not in new_servers]
+        added = [device_id for device_id in new_servers if device_id not in old_servers]
+        changed = [
+            device_id for device_id, server in new_servers.items()
+            if device_id in old_servers and server != old_servers[device_id]
+        ]
+        
+        for device_id in removed:
+            self._forget_device(device_id, old_servers[device_id])
+            self.energy.forget(device_id)
+            self.history.forget(device_id)
+        for device_id in changed:
+            old, new = old_servers[device_id], new_servers[device_id]
+            if any(old.get(key) != new.get(key) for key in self.ENDPOINT_KEYS):
+                # Outro endpoint: cache e histórico de RTT não valem mais
+                self._forget_device(device_id, old)
+        
+        if self.credentials != old_credentials:
+            # Novas chaves USM; falhas anteriores podem ter sido de autenticação
+            self._user_data = None
+            self.engine_discovery.clear()
+            for health in self.device_health.values():
+                health.breaker.reset()
+        if self.redfish_credentials != old_redfish_credentials:
+            # Sessões abertas com as credenciais antigas são encerradas
+            self._reset_redfish_client()
+            for health in self.device_health.values():
+                health.breaker.reset()
+        
+        if self._wheel is not None:
+            if self._get_slot_count() != old_slots:
+                self._wheel = TimingWheel.from_servers(self.servers_config, self._get_slot_count())
+            else:
+                for device_id in removed:
+                    self._wheel.remove(device_id)
+                for device_id in added + changed:
+                    self._wheel.add(new_servers[device_id])
+        
+        if self.is_running():
+            for device_id in added:
+                if device_id not in self._latest_metrics:
+                    metric = self._simulate_server_metrics(new_servers[device_id])
+                    self._latest_metrics[device_id] = metric
+            self._publish_latest()
+        
+        logger.info(
+            f"Configuração recarregada: {len(self.servers_config)} servidores "
+            f"(+{len(added)} -{len(removed)} ~{len(changed)})"
+            + (" - credenciais SNMPv3 atualizadas" if self.credentials != old_credentials else "")
+        )
+        return True
+    
+    def _forget_device(self, device_id: str, server_config: Optional[Dict] = None):
+        """
+        Descarta cache, saúde e última métrica de um dispositivo
+        
+        Com a configuração antiga do dispositivo, também encerra a sessão e as
+        conexões Redfish abertas com aquele endpoint.
+        """
+        with self.cache_lock:
+            self.cache.pop(device_id, None)
+        self.device_health.pop(device_id, None)
+        self._latest_metrics.pop(device_id, None)
+        self.telemetry.forget(device_id)
+        with self._snapshot_lock:
+            # Mesma versão que a próxima publicação atribuirá aos seus eventos
+            self.changes.remove(device_id, self._snapshot_version + 1)
+        if server_config is not None and self._is_redfish(server_config):
+            self._forget_redfish_endpoint(server_config)
+    
+    def _forget_redfish_endpoint(self, server_config: Dict):
+        """Descarta sessão e conexões Redfish de um endpoint (executado no event loop do cliente)"""
+        client, loop = self._redfish, self._loop
+        if client is None or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(
+            client.forget,
+            server_config.get('ip_address', ''),
+            server_config.get('port', REDFISH_DEFAULT_PORT),
+            server_config.get('scheme', 'https')
+        )
+    
+    def _cache_age(self, device_id: str) -> Optional[float]:
+        """Idade em segundos da entrada de cache (None se ausente)"""
+        with self.cache_lock:
+            entry = self.cache.get(device_id)
+        if entry is None:
+            return None
+        return (datetime.now() - entry[1]).total_seconds()
     
     def _is_cache_valid(self, device_id: str) -> bool:
-        """Verifica se cache é válido para um dispositivo"""
+        """Verifica se cache está dentro do TTL (fresco) para um dispositivo"""
+        age = self._cache_age(device_id)
+        return age is not None and age < self.cache_ttl_seconds
+    
+    def _lookup_cache(self, device_id: str) -> Tuple[Optional[ServerMetrics], bool]:
+        """
+        Consulta stale-while-revalidate
+        
+        - idade < TTL x refresh_ahead_ratio: fresco, serve sem revalidar
+        - idade < TTL + janela stale: serve imediatamente e pede revalidação
+        - além disso: ausente, o chamador precisa coletar
+        
+        Returns:
+            Tupla (métrica em cache ou None, precisa_revalidar)
+        """
         with self.cache_lock:
-            if device_id not in self.cache:
-                return False
-            
-            _, cached_time = self.cache[device_id]
-            age = (datetime.now() - cached_time).total_seconds()
-            return age < self.cache_ttl_seconds
+            entry = self.cache.get(device_id)
+        if entry is None:
+            return None, True
+        
+        metrics, cached_time = entry
+        age = (datetime.now() - cached_time).total_seconds()
+        if age >= self.cache_ttl_seconds + self.cache_stale_seconds:
+            return None, True
+        return metrics, age >= self.cache_ttl_seconds * self.refresh_ahead_ratio
     
     def _get_from_cache(self, device_id: str) -> Optional[ServerMetrics]:
-        """Obtém métrica do cache se válida"""
+        """Obtém métrica do cache se válida (cópia imutável com source='cached')"""
         if self._is_cache_valid(device_id):
-            with self.cache_lock:
-                metrics, _ = self.cache[device_id]
-                # Atualizar fonte para indicar que vem do cache
-                metrics.source = 'cached'
-                return metrics
+            metrics, _ = self._lookup_cache(device_id)
+            return metrics
         return None
     
     def _update_cache(self, device_id: str, metrics: ServerMetrics):
-        """Atualiza cache com novas métricas"""
+        """
+        Atualiza cache com novas métricas
+        
+        Guarda uma cópia com source='cached' criada uma única vez; como
+        ServerMetrics é imutável, a mesma instância é entregue a todos os leitores.
+        """
+        cached = replace(metrics, source='cached')
         with self.cache_lock:
-            self.cache[device_id] = (metrics, datetime.now())
+            self.cache[device_id] = (cached, datetime.now())
+    
+    def _schedule_refresh(self, server_config: Dict):
+        """
+        Agenda revalidação em background de um dispositivo (chamar no event loop)
+        
+        Revalidações do mesmo dispositivo são deduplicadas; a concorrência
+        é limitada pelo mesmo semáforo das coletas (max_concurrent vagas).
+        """
+        device_id = server_config.get('device_id', 'unknown')
+        if device_id in self._refreshing:
+            return
+        
+        self._refreshing.add(device_id)
+        task = asyncio.ensure_future(self._refresh_device(server_config))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _refresh_device(self, server_config: Dict):
+        """Revalida um dispositivo; em caso de falha o valor stale continua no cache"""
+        device_id = server_config.get('device_id', 'unknown')
+        try:
+            await self._poll_device(server_config, self._get_poll_semaphore())
+        except Exception as e:
+            logger.warning(f"Revalidação em background falhou para {device_id}: {e}")
+        finally:
+            self._refreshing.discard(device_id)
     
     def _snmp_get_power(self, server_config: Dict) -> ServerMetrics:
         """
         Coleta consumo de energia via SNMP de um servidor
         
+        Wrapper síncrono sobre _collect_device, executado no event loop dedicado
+        
         Args:
             server_config: Dicionário com configuração do servidor
             
+        Returns:
+            ServerMetrics com dados coletados ou erro
+        """
+        return self._run_coroutine(
+            self._collect_device(server_config),
+            timeout=self._get_device_deadline() + 5
+        )
+    
+    def _get_device_deadline(self) -> float:
+        """
+        Prazo total por dispositivo (todas as tentativas + backoff)
+        
+        Padrão: orçamento completo de retry (timeout x tentativas + 1s, 2s, 4s...)
+        """
+        if self.device_deadline_seconds is not None:
+            return self.device_deadline_seconds
+        backoff_total = sum(2 ** attempt for attempt in range(self.max_retries - 1))
+        return self.timeout_seconds * self.max_retries + backoff_total
+    
+    def _get_cycle_deadline(self) -> float:
+        """Prazo máximo de um ciclo completo de coleta (padrão: intervalo de coleta)"""
+        if self.cycle_deadline_seconds is not None:
+            return self.cycle_deadline_seconds
+        return self.collection_interval_seconds
+    
+    async def _collect_device(self, server_config: Dict,
+                              semaphore: Optional[asyncio.Semaphore] = None,
+                              use_cache: bool = True) -> ServerMetrics:
+        """
+        Coleta um dispositivo: cache stale-while-revalidate, depois SNMP
+        
+        Args:
+            server_config: Dicionário com configuração do servidor
+            semaphore: Limite de concorrência compartilhado pelo ciclo
+            use_cache: False consulta o dispositivo diretamente (o cache
+                continua sendo preenchido em caso de sucesso)
+            
         Returns:
             ServerMetrics com dados coletados ou erro
         """
         device_id = server_config.get('device_id', 'unknown')
-        ip_address = server_config.get('ip_address', '')
-        generation = server_config.get('generation', 'gen9')
         
-        # Verificar cache primeiro
-        cached = self._get_from_cache(device_id)
+        if not use_cache:
+            return await self._poll_device(server_config, semaphore)
+        
+        # Verificar cache primeiro: valores stale são servidos e revalidados em background
+        cached, needs_refresh = self._lookup_cache(device_id)
         if cached:
-            logger.debug(f"Cache hit para {device_id}")
+            self.telemetry.record_cache(hit=True, stale=needs_refresh)
+            if needs_refresh and self._can_poll(server_config):
+                self._schedule_refresh(server_config)
             return cached
         
-        # Se SNMP não disponível, retornar dados simulados
-        if not SNMP_AVAILABLE or not self.credentials:
+        self.telemetry.record_cache(hit=False)
+        return await self._poll_device(server_config, semaphore)
+    
+    async def _poll_device(self, server_config: Dict,
+                           semaphore: Optional[asyncio.Semaphore] = None) -> ServerMetrics:
+        """
+        Consulta SNMP de um dispositivo, com retry dentro do prazo do dispositivo
+        
+        O semáforo é mantido apenas durante cada GET; o backoff entre
+        tentativas usa asyncio.sleep e libera a vaga para outros dispositivos.
+        Dispositivos com circuito aberto não são consultados, e o timeout de
+        cada tentativa vem da EWMA do RTT observado do dispositivo.
+        Atualiza o cache apenas em caso de sucesso.
+        
+        Returns:
+            ServerMetrics coletado ou simulado em caso de falha
+        """
+        device_id = server_config.get('device_id', 'unknown')
+        ip_address = server_config.get('ip_address', '')
+        redfish = self._is_redfish(server_config)
+        port = server_config.get('port', REDFISH_DEFAULT_PORT if redfish else 161)
+        generation = server_config.get('generation', 'gen9')
+        
+        # Se SNMP (ou Redfish) não disponível, retornar dados simulados
+        if not self._can_poll(server_config):
             return self._simulate_server_metrics(server_config)
         
+        health = self._get_device_health(device_id)
+        if not health.breaker.allow_request():
+            logger.debug(f"Circuito aberto para {device_id} - consulta ignorada")
+            self.telemetry.record_circuit_open()
+            return self._simulate_server_metrics(
+                server_config, error_msg="Circuito aberto: dispositivo indisponível"
+            )
+        
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(1)
+        
         # Obter OIDs para a geração do servidor
         oids = HPServerOIDs.get_oids_for_generation(generation)
         power_oid = oids.get('power_consumption', '')
         
-        # Tentar coleta SNMP com retry
-        for attempt in range(self.max_retries):
-            try:
-                # Criar um novo event loop para esta thread
-                # Necessário pois ThreadPoolExecutor pode reusar threads
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                # Executar coleta SNMP assíncrona
-                metrics = loop.run_until_complete(self._async_snmp_get(
-                    device_id, ip_address, power_oid, attempt
-                ))
-                
-                # Atualizar cache
-                self._update_cache(device_id, metrics)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._get_device_deadline()
+        # Sonda half-open: uma única tentativa
+        max_attempts = 1 if health.breaker.is_half_open else self.max_retries
+        last_error: Optional[Exception] = None
+        
+        try:
+            # Tentar coleta SNMP com retry dentro do prazo do dispositivo
+            for attempt in range(max_attempts):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
                 
-                logger.info(f"SNMP success: {device_id} = {metrics.power_consumption_watts}W")
-                return metrics
+                self.telemetry.record_attempt(device_id, attempt)
+                try:
+                    async with self._poll_slot(semaphore):
+                        if redfish:
+                            request = self._async_redfish_get(device_id, server_config, port)
+                        elif self.collection_mode == 'batch':
+                            request = self._async_snmp_get_batch(device_id, ip_address, oids, attempt, port=port)
+                        else:
+                            request = self._async_snmp_get(device_id, ip_address, power_oid, attempt, port=port)
+                        
+                        started = loop.time()
+                        metrics = await asyncio.wait_for(
+                            request, timeout=min(health.rtt.timeout(), remaining)
+                        )
+                        rtt = loop.time() - started
+                        health.rtt.observe(rtt)
+                    
+                    health.breaker.record_success()
+                    self.telemetry.record_success(device_id, rtt)
+                    
+                    # Atualizar cache
+                    self._update_cache(device_id, metrics)
+                    
+                    logger.debug(f"SNMP success: {device_id} = {metrics.power_consumption_watts}W")
+                    return metrics
+                    
+                except asyncio.TimeoutError as e:
+                    last_error = e
+                    health.rtt.on_timeout()
+                    self.telemetry.record_failure(device_id, timeout=True)
+                except Exception as e:
+                    last_error = e
+                    self.telemetry.record_failure(device_id, timeout=False)
                 
-            except Exception as e:
                 wait_time = 2 ** attempt  # Backoff exponencial: 1s, 2s, 4s
-                logger.warning(f"SNMP falhou para {device_id} (tentativa {attempt+1}/{self.max_retries}): {e}")
+                logger.warning(f"SNMP falhou para {device_id} (tentativa {attempt+1}/{max_attempts}): {last_error}")
                 
-                if attempt < self.max_retries - 1:
-                    time.sleep(wait_time)
-                else:
-                    # Última tentativa falhou - usar simulação
-                    logger.error(f"SNMP falhou definitivamente para {device_id} - usando simulação")
-                    return self._simulate_server_metrics(server_config, error_msg=str(e))
+                if attempt >= max_attempts - 1 or loop.time() + wait_time >= deadline:
+                    break
+                await asyncio.sleep(wait_time)
+        except asyncio.CancelledError:
+            # Ciclo expirou no meio da consulta: não deixar sonda half-open presa
+            health.breaker.record_failure()
+            raise
+        
+        health.breaker.record_failure()
         
-        # Fallback (não deveria chegar aqui)
-        return self._simulate_server_metrics(server_config)
+        # Tentativas esgotadas ou prazo excedido - usar simulação
+        error_msg = (str(last_error) or type(last_error).__name__) if last_error else "Prazo de coleta do dispositivo excedido"
+        logger.error(f"SNMP falhou definitivamente para {device_id} - usando simulação")
+        return self._simulate_server_metrics(server_config, error_msg=error_msg)
+    
+    @staticmethod
+    def _is_redfish(server_config: Dict) -> bool:
+        return server_config.get('protocol', 'snmp') == 'redfish'
+    
+    def _can_poll(self, server_config: Dict) -> bool:
+        """Há backend e credenciais para consultar o servidor (senão: simulação)"""
+        if self._is_redfish(server_config):
+            return self.redfish_credentials is not None
+        return SNMP_AVAILABLE and self.credentials is not None
+    
+    @contextlib.asynccontextmanager
+    async def _poll_slot(self, semaphore: asyncio.Semaphore):
+        """Vaga no semáforo de concorrência, contabilizando fila e consultas em andamento"""
+        telemetry = self.telemetry
+        telemetry.enter_queue()
+        try:
+            await semaphore.acquire()
+        finally:
+            telemetry.leave_queue()
+        telemetry.start_request()
+        try:
+            yield
+        finally:
+            telemetry.finish_request()
+            semaphore.release()
     
-    async def _async_snmp_get(self, device_id: str, ip_address: str, power_oid: str, attempt: int) -> ServerMetrics:
+    def _get_poll_semaphore(self) -> asyncio.Semaphore:
+        """Semáforo de GETs simultâneos (chamar no event loop; recriado se max_concurrent mudar)"""
+        if self._poll_semaphore is None or self._poll_semaphore_size != self.max_concurrent:
+            self._poll_semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._poll_semaphore_size = self.max_concurrent
+        return self._poll_semaphore
+    
+    def _get_device_health(self, device_id: str) -> DeviceHealth:
+        """Circuit breaker e estimador de RTT de um dispositivo (criados sob demanda)"""
+        health = self.device_health.get(device_id)
+        if health is None:
+            health = DeviceHealth(
+                breaker=CircuitBreaker(
+                    failure_threshold=self.circuit_failure_threshold,
+                    cooldown_seconds=self.circuit_cooldown_seconds,
+                    max_cooldown_seconds=self.circuit_max_cooldown_seconds
+                ),
+                rtt=RTTEstimator(
+                    min_timeout=self.adaptive_timeout_min_seconds,
+                    max_timeout=self.timeout_seconds
+                )
+            )
+            self.device_health[device_id] = health
+        return health
+    
+    async def _collect_async(self, servers: List[Dict]) -> List[ServerMetrics]:
+        """
+        Fan-out assíncrono sobre todos os servidores de um ciclo
+        
+        Concorrência limitada pelo semáforo compartilhado; o ciclo
+        inteiro respeita _get_cycle_deadline() e dispositivos pendentes ao fim
+        do prazo são cancelados e substituídos por dados simulados.
+        
+        Returns:
+            Lista de ServerMetrics na mesma ordem de `servers`
+        """
+        semaphore = self._get_poll_semaphore()
+        tasks = [asyncio.ensure_future(self._collect_device(server, semaphore)) for server in servers]
+        if not tasks:
+            return []
+        
+        _, pending = await asyncio.wait(tasks, timeout=self._get_cycle_deadline())
+        if pending:
+            logger.warning(f"Prazo do ciclo excedido: {len(pending)} dispositivos sem resposta")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        metrics_list = []
+        for server, task in zip(servers, tasks):
+            if task in pending:
+                metrics_list.append(self._simulate_server_metrics(server, "Prazo do ciclo de coleta excedido"))
+            elif task.exception() is not None:
+                error = task.exception()
+                logger.error(f"Erro ao coletar métricas de {server.get('device_id', 'unknown')}: {error}")
+                metrics_list.append(self._simulate_server_metrics(server, str(error)))
+            else:
+                metrics_list.append(task.result())
+        
+        return metrics_list
+    
+    async def _async_snmp_get(self, device_id: str, ip_address: str, power_oid: str, attempt: int,
+                              port: int = 161) -> ServerMetrics:
         """
         Executa consulta SNMP assíncrona
         
@@ -288,32 +897,16 @@ class SNMPCollector:
             ip_address: Endereço IP
             power_oid: OID para consumo de energia
             attempt: Número da tentativa (para logging)
+            port: Porta UDP do agente SNMP
             
         Returns:
             ServerMetrics com dados coletados
         """
         try:
-            # Configurar autenticação SNMPv3
-            auth_protocol = usmHMACSHAAuthProtocol if self.credentials.auth_protocol == 'SHA' else usmHMACMD5AuthProtocol
-            priv_protocol = usmAesCfb128Protocol if self.credentials.priv_protocol == 'AES' else usmDESPrivProtocol
-            
-            engine = SnmpEngine()
-            user_data = UsmUserData(
-                self.credentials.username,
-                authKey=self.credentials.auth_key,
-                privKey=self.credentials.priv_key,
-                authProtocol=auth_protocol,
-                privProtocol=priv_protocol
-            )
-            
-            # Criar transport target (async)
-            logger.debug(f"Creating UdpTransportTarget for {ip_address}")
-            target = await UdpTransportTarget.create(
-                (ip_address, 161),
-                timeout=self.timeout_seconds,
-                retries=0
-            )
-            logger.debug(f"Target created: {target}")
+            engine = self._get_engine()
+            user_data = self._get_user_data()
+            target = await self._get_target(ip_address, port)
+            self._restore_discovery(engine, target)
             
             context = ContextData()
             obj_type = ObjectType(ObjectIdentity(power_oid))
@@ -324,16 +917,16 @@ class SNMPCollector:
                 engine, user_data, target, context, obj_type
             )
             
-            # Fechar engine (não é async)
-            engine.close_dispatcher()
-            
             if errorIndication:
+                if is_usm_error(errorIndication):
+                    self._forget_discovery(engine, target)
                 raise Exception(f"SNMP error: {errorIndication}")
             elif errorStatus:
                 raise Exception(f"SNMP error: {errorStatus.prettyPrint()}")
             
             # Extrair valor de consumo
             power_watts = float(varBinds[0][1])
+            self._capture_discovery(engine, target)
             
             return ServerMetrics(
                 device_id=device_id,
@@ -343,9 +936,304 @@ class SNMPCollector:
                 status='success'
             )
         except Exception as e:
-            logger.error(f"Error in _async_snmp_get for {device_id}: {e}", exc_info=True)
+            # _poll_device registra a falha; aqui só o detalhe para depuração
+            logger.debug(f"Error in _async_snmp_get for {device_id}: {e}")
             raise
     
+    async def _async_snmp_get_batch(self, device_id: str, ip_address: str,
+                                    oids: Dict[str, str], attempt: int, port: int = 161) -> ServerMetrics:
+        """
+        Coleta todos os OIDs configurados de um dispositivo em uma única ida
+        
+        Consumo, saúde do sistema e sensores (temperatura de entrada,
+        ventilação, CPU) seguem em um único PDU GET; a tabela de
+        fontes (power_supply_status) é percorrida com GETBULK. As duas PDUs
+        são disparadas em paralelo, então a latência é de um único RTT.
+        
+        Args:
+            device_id: ID do dispositivo
+            ip_address: Endereço IP
+            oids: OIDs da geração do servidor (HPServerOIDs)
+            attempt: Número da tentativa (para logging)
+            port: Porta UDP do agente SNMP
+            
+        Returns:
+            ServerMetrics com consumo, saúde, sensores e status das fontes
+        """
+        engine = self._get_engine()
+        user_data = self._get_user_data()
+        target = await self._get_target(ip_address, port)
+        self._restore_discovery(engine, target)
+        
+        scalar_names = [
+            name for name in ('power_consumption', 'system_health', *HPServerOIDs.SENSOR_FIELDS) if oids.get(name)
+        ]
+        scalar_types = [ObjectType(ObjectIdentity(oids[name])) for name in scalar_names]
+        psu_oid = oids.get('power_supply_status')
+        
+        requests = [get_cmd(engine, user_data, target, ContextData(), *scalar_types)]
+        if psu_oid:
+            requests.append(bulk_cmd(
+                engine, user_data, target, ContextData(),
+                0, self.psu_max_repetitions,
+                ObjectType(ObjectIdentity(psu_oid))
+            ))
+        
+        logger.debug(f"Batch GET para {device_id} (tentativa {attempt+1}): {scalar_names} + walk PSU")
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        
+        get_result = results[0]
+        if isinstance(get_result, Exception):
+            raise get_result
+        errorIndication, errorStatus, errorIndex, varBinds = get_result
+        if errorIndication:
+            if is_usm_error(errorIndication):
+                self._forget_discovery(engine, target)
+            raise Exception(f"SNMP error: {errorIndication}")
+        elif errorStatus:
+            raise Exception(f"SNMP error: {errorStatus.prettyPrint()}")
+        self._capture_discovery(engine, target)
+        
+        values = dict(zip(scalar_names, (var_bind[1] for var_bind in varBinds)))
+        
+        psu_status = None
+        if psu_oid:
+            psu_status = self._parse_psu_walk(device_id, psu_oid, results[1])
+        
+        return ServerMetrics(
+            device_id=device_id,
+            power_consumption_watts=float(values['power_consumption']),
+            timestamp=datetime.now(),
+            source='snmp_real',
+            status='success',
+            system_health=self._to_int(values.get('system_health')),
+            power_supply_status=psu_status,
+            sensors=self._parse_sensors(oids, values)
+        )
+    
+    async def _async_redfish_get(self, device_id: str, server_config: Dict, port: int) -> ServerMetrics:
+        """
+        Lê o recurso Power do chassi via Redfish
+        
+        Args:
+            device_id: ID do dispositivo
+            server_config: Configuração do servidor (ip_address, scheme, redfish_chassis)
+            port: Porta HTTPS do BMC
+            
+        Returns:
+            ServerMetrics com consumo instantâneo e média/mínimo/máximo do BMC
+        """
+        chassis_id = server_config.get('redfish_chassis') or DEFAULT_CHASSIS.get(
+            server_config.get('generation', '').lower(), DEFAULT_CHASSIS_ID
+        )
+        reading = await self._get_redfish_client().get_power(
+            server_config.get('ip_address', ''), port, chassis_id, server_config.get('scheme', 'https')
+        )
+        logger.debug(f"Redfish {device_id}: {reading.consumed_watts}W (média {reading.average_watts}W)")
+        stats = (reading.average_watts, reading.min_watts, reading.max_watts)
+        return ServerMetrics(
+            device_id=device_id,
+            power_consumption_watts=reading.consumed_watts,
+            timestamp=datetime.now(),
+            source='redfish',
+            status='success',
+            power_stats=stats if any(value is not None for value in stats) else None
+        )
+    
+    @staticmethod
+    def _to_int(value) -> Optional[int]:
+        """Converte um valor SNMP para int (None para noSuchObject/noSuchInstance)"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _parse_sensors(oids: Dict[str, str], values: Dict) -> Optional[SensorReadings]:
+        """Converte os OIDs de sensores do GET em SensorReadings (None se nenhum respondeu)"""
+        readings = {}
+        for name, field in HPServerOIDs.SENSOR_FIELDS.items():
+            raw = SNMPCollector._to_int(values.get(name))
+            if raw is not None:
+                readings[field] = round(raw * HPServerOIDs.SCALES.get(oids[name], 1.0), 2)
+        return SensorReadings(**readings) if readings else None
+    
+    def _parse_psu_walk(self, device_id: str, psu_oid: str, bulk_result) -> Optional[Tuple[int, ...]]:
+        """
+        Extrai o status de cada fonte da resposta GETBULK
+        
+        Mantém apenas as linhas dentro da coluna PSU; a falha do walk não
+        invalida a leitura de consumo.
+        """
+        if isinstance(bulk_result, Exception):
+            logger.debug(f"Walk PSU falhou para {device_id}: {bulk_result}")
+            return None
+        
+        errorIndication, errorStatus, errorIndex, varBinds = bulk_result
+        if errorIndication or errorStatus:
+            logger.debug(f"Walk PSU falhou para {device_id}: {errorIndication or errorStatus.prettyPrint()}")
+            return None
+        
+        column = ObjectName(psu_oid)
+        statuses = []
+        for var_bind in varBinds:
+            if isinstance(var_bind[1], EndOfMibView) or not column.isPrefixOf(var_bind[0].get_oid()):
+                break
+            status = self._to_int(var_bind[1])
+            if status is not None:
+                statuses.append(status)
+        return tuple(statuses)
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Retorna o event loop dedicado, criando a thread na primeira chamada
+        
+        Todo acesso ao SnmpEngine acontece nesta thread, então engine,
+        credenciais USM e targets são configurados uma única vez.
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                
+                def run_loop():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                
+                thread = threading.Thread(target=run_loop, name="snmp-collector-loop", daemon=True)
+                thread.start()
+                ready.wait()
+                self._loop = loop
+                self._loop_thread = thread
+            return self._loop
+    
+    def _run_coroutine(self, coro, timeout: Optional[float] = None):
+        """Executa uma corrotina no event loop dedicado e aguarda o resultado"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+    
+    def _get_engine(self):
+        """SnmpEngine compartilhado (chamar apenas dentro do event loop dedicado)"""
+        if self._engine is None:
+            self._engine = SnmpEngine()
+        return self._engine
+    
+    def _get_user_data(self):
+        """UsmUserData construído uma vez a partir das credenciais SNMPv3"""
+        if self._user_data is None:
+            auth_protocol = usmHMACSHAAuthProtocol if self.credentials.auth_protocol == 'SHA' else usmHMACMD5AuthProtocol
+            priv_protocol = usmAesCfb128Protocol if self.credentials.priv_protocol == 'AES' else usmDESPrivProtocol
+            
+            self._user_data = UsmUserData(
+                self.credentials.username,
+                authKey=self.credentials.auth_key,
+                privKey=self.credentials.priv_key,
+                authProtocol=auth_protocol,
+                privProtocol=priv_protocol
+            )
+            self._credentials_key = credentials_fingerprint(
+                self.credentials.username, self.credentials.auth_protocol, self.credentials.auth_key,
+                self.credentials.priv_protocol, self.credentials.priv_key
+            )
+        return self._user_data
+    
+    def _restore_discovery(self, engine, target):
+        """Reinstala engine ID/timeline do target expirados pelo pysnmp (evita rediscovery)"""
+        self.engine_discovery.restore(
+            engine, self._credentials_key, target.TRANSPORT_DOMAIN, target.transport_address
+        )
+    
+    def _capture_discovery(self, engine, target):
+        """Guarda engine ID/timeline do target após uma resposta autenticada"""
+        self.engine_discovery.capture(
+            engine, self._credentials_key, target.TRANSPORT_DOMAIN, target.transport_address
+        )
+    
+    def _forget_discovery(self, engine, target):
+        """Erro USM: o agente reiniciou ou foi substituído, descarta a descoberta no engine também"""
+        self.engine_discovery.forget(
+            engine, self._credentials_key, target.TRANSPORT_DOMAIN, target.transport_address
+        )
+    
+    def _get_redfish_client(self) -> RedfishClient:
+        """Cliente Redfish (pool de conexões e sessões), criado uma vez no event loop"""
+        if self._redfish is None:
+            creds = self.redfish_credentials
+            self._redfish = RedfishClient(
+                creds.username, creds.password, auth=creds.auth,
+                verify_tls=creds.verify_tls, ca_file=creds.ca_file,
+                max_idle_per_host=max(1, min(self.max_concurrent, 2))
+            )
+        return self._redfish
+    
+    def _reset_redfish_client(self):
+        """Descarta o cliente Redfish; sessões e conexões são encerradas no event loop"""
+        client, self._redfish = self._redfish, None
+        loop = self._loop
+        if client is not None and loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.close(), loop)
+    
+    async def _get_target(self, ip_address: str, port: int = 161):
+        """UdpTransportTarget reutilizado por endereço (resolve o host uma única vez)"""
+        key = (ip_address, port)
+        target = self._targets.get(key)
+        if target is None:
+            logger.debug(f"Creating UdpTransportTarget for {ip_address}")
+            target = await UdpTransportTarget.create(
+                (ip_address, port),
+                timeout=self.timeout_seconds,
+                retries=0
+            )
+            self._targets[key] = target
+        return target
+    
+    def close(self):
+        """Para o agendador, persiste o estado, libera o SnmpEngine e encerra o event loop"""
+        was_running = self.is_running()
+        self.stop(timeout=5)
+        if was_running and self.state_file:
+            self._save_state()
+        if self._shared_writer is not None:
+            self._shared_writer.close()
+            self._shared_writer = None
+        
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = None
+            self._loop_thread = None
+        
+        if loop is None or loop.is_closed():
+            return
+        
+        async def shutdown():
+            if self._redfish is not None:
+                await self._redfish.close()
+                self._redfish = None
+            if self._engine is not None:
+                self._engine.close_dispatcher()
+            self._engine = None
+            self._targets.clear()
+            # Cancelar tarefas pendentes (timers do dispatcher, refreshes)
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            loop.stop()
+        
+        asyncio.run_coroutine_threadsafe(shutdown(), loop)
+        if thread is not None:
+            thread.join(timeout=5)
+            if thread.is_alive():
+                logger.warning("Event loop SNMP não encerrou a tempo")
+                return
+        loop.close()
+    
     def _simulate_server_metrics(self, server_config: Dict, error_msg: Optional[str] = None) -> ServerMetrics:
         """
         Gera métricas simuladas para um servidor
@@ -396,35 +1284,28 @@ class SNMPCollector:
         """
         Coleta métricas de todos os servidores configurados
         
-        Usa ThreadPoolExecutor para coletar em paralelo com rate limiting
+        Executa o fan-out assíncrono no event loop dedicado, com concorrência
+        limitada por semáforo e prazo por dispositivo e por ciclo
         
         Returns:
             Lista de ServerMetrics
         """
-        if not self.servers_config:
+        if self.config_reload_seconds and not self.is_running():
+            self.reload_config()
+        
+        if self._uses_default_fleet():
             logger.warning("Nenhum servidor configurado - usando dados simulados padrão")
             return self._get_default_simulated_metrics()
         
-        metrics_list = []
-        
-        # Coletar em paralelo com rate limiting
-        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
-            future_to_server = {
-                executor.submit(self._snmp_get_power, server): server
-                for server in self.servers_config
-            }
-            
-            for future in as_completed(future_to_server):
-                try:
-                    metrics = future.result(timeout=self.timeout_seconds + 5)
-                    metrics_list.append(metrics)
-                except Exception as e:
-                    server = future_to_server[future]
-                    logger.error(f"Erro ao coletar métricas de {server.get('device_id', 'unknown')}: {e}")
-                    # Adicionar métrica simulada em caso de erro
-                    metrics_list.append(self._simulate_server_metrics(server, str(e)))
-        
-        return metrics_list
+        inicio = time.monotonic()
+        metrics = self._run_coroutine(
+            self._collect_async(list(self.servers_config)),
+            timeout=self._get_cycle_deadline() + 5
+        )
+        self.telemetry.record_cycle(time.monotonic() - inicio)
+        self._record_energy(metrics)
+        self._record_history(metrics)
+        return metrics
     
     def _get_default_simulated_metrics(self) -> List[ServerMetrics]:
         """
@@ -463,32 +1344,467 @@ class SNMPCollector:
         
         return metrics
     
-    def get_total_consumption_kwh(self) -> Tuple[float, str]:
+    def get_total_power_kw(self) -> Tuple[float, str]:
         """
-        Calcula consumo total atual em kWh
+        Potência instantânea total da frota em kW
+        
+        Com o agendador ativo, apenas lê o último snapshot publicado (O(1));
+        caso contrário, executa uma coleta completa na chamada. A energia
+        consumida (kWh integrados das leituras) vem de get_energy_summary.
         
         Returns:
-            Tupla (consumo_kwh, fonte)
-            fonte: 'snmp_real', 'cached', 'simulado', 'mixed'
+            Tupla (potencia_kw, fonte)
+            fonte: 'snmp_real', 'redfish', 'cached', 'simulado', 'mixed'
         """
+        snapshot = self._snapshot
+        if snapshot is not None and self.is_running():
+            logger.debug(f"Snapshot v{snapshot.version}: {snapshot.total_kw:.2f} kW (fonte: {snapshot.fonte})")
+            return snapshot.total_kw, snapshot.fonte
+        
         metrics = self.collect_all_metrics()
+        total_watts, fonte = self._summarize(metrics)
+        total_kw = total_watts / 1000
         
-        total_watts = sum(m.power_consumption_watts for m in metrics)
-        total_kwh = total_watts / 1000
-        
-        # Determinar fonte dominante
-        sources = [m.source for m in metrics]
-        if all(s == 'snmp_real' for s in sources):
-            fonte = 'snmp_real'
-        elif all(s == 'cached' for s in sources):
-            fonte = 'cached'
-        elif all(s == 'simulado' for s in sources):
-            fonte = 'simulado'
-        else:
-            fonte = 'mixed'
+        logger.info(f"Potência total: {total_kw:.2f} kW (fonte: {fonte})")
+        return total_kw, fonte
+    
+    def _record_energy(self, metrics: List[ServerMetrics]):
+        """
+        Integra as leituras de um ciclo no acumulador de energia
         
-        logger.info(f"Consumo total: {total_kwh:.2f} kWh (fonte: {fonte})")
-        return total_kwh, fonte
+        Só entram leituras obtidas do dispositivo neste ciclo: falhas, valores
+        simulados e cópias em cache não são energia medida, e o intervalo
+        sem leitura vira lacuna no integrador.
+        """
+        for metric in metrics:
+            if metric.status == 'success' and metric.source != 'cached':
+                self.energy.add_sample(metric.device_id, metric.timestamp, metric.power_consumption_watts)
+    
+    def _record_history(self, metrics: List[ServerMetrics]):
+        """Guarda as leituras de um ciclo no histórico (falhas ficam como células vazias)"""
+        for metric in metrics:
+            if metric.status in ('success', 'simulated'):
+                self.history.record(metric.device_id, metric.timestamp, metric.power_consumption_watts)
+    
+    def get_history(self, device_id: str, seconds: Optional[float] = None) -> Optional[HistoryWindow]:
+        """Leituras de potência dos últimos `seconds` segundos (None = toda a retenção)"""
+        return self.history.window(device_id, seconds)
+    
+    def get_energy_summary(self) -> EnergySummary:
+        """Energia consumida pelos servidores (kWh): acumulado, hora, dia e últimas 24h"""
+        return self.energy.summary()
+    
+    def get_energy_buckets(self) -> Tuple[List[Tuple[datetime, float]], List[Tuple[date, float]]]:
+        """kWh da frota por hora e por dia, em ordem cronológica"""
+        return self.energy.hourly(), self.energy.daily()
+    
+    def get_telemetry(self, devices: bool = False) -> Dict:
+        """Contadores e histogramas da coleta (devices=True inclui cada dispositivo)"""
+        return self.telemetry.snapshot(devices=devices)
+    
+    def get_data_version(self) -> Tuple:
+        """
+        Versão barata de snapshot, energia e telemetria (base dos ETags)
+        
+        Usa só contadores: muda a cada publicação do snapshot, amostra
+        integrada ou observação da telemetria. A hora corrente entra porque
+        o resumo de energia (hora, dia, 24h) é relativo ao momento da leitura.
+        """
+        snapshot = self._snapshot
+        return (
+            None if snapshot is None else (snapshot.version, snapshot.generated_at),
+            self.energy.sequence,
+            self.telemetry.sequence,
+            datetime.now().replace(minute=0, second=0, microsecond=0),
+            self.is_running()
+        )
+    
+    @staticmethod
+    def _summarize(metrics: List[ServerMetrics]) -> Tuple[float, str]:
+        """Soma o consumo e determina a fonte dominante (ver summarize_metrics)"""
+        return summarize_metrics(metrics)
+    
+    def get_snapshot(self) -> Optional[CollectorSnapshot]:
+        """Retorna o último snapshot publicado (None se nenhum ciclo rodou)"""
+        return self._snapshot
+    
+    def get_changes(self, since_version: int) -> Optional[List[MetricChange]]:
+        """
+        Eventos de mudança publicados depois de `since_version`
+        
+        Returns:
+            Lista em ordem de versão, ou None se o log já descartou parte
+            dos eventos (recomeçar por get_snapshot)
+        """
+        return self.changes.changes_since(since_version)
+    
+    def wait_for_snapshot(self, after_version: int, timeout: Optional[float] = None) -> Optional[CollectorSnapshot]:
+        """
+        Bloqueia até um snapshot com versão maior que `after_version` ser publicado
+        
+        Permite que um consumidor (ex.: o stream SSE) reaja à publicação do
+        ciclo sem polling.
+        
+        Returns:
+            Snapshot atual (o mesmo de antes se o timeout expirou sem publicação)
+        """
+        with self._snapshot_published:
+            self._snapshot_published.wait_for(lambda: self._snapshot_version > after_version, timeout)
+            return self._snapshot
+    
+    def _publish_snapshot(self, metrics: List[ServerMetrics], cycle_duration: float = 0.0) -> CollectorSnapshot:
+        """
+        Publica um novo snapshot imutável com a frota completa de um ciclo
+        
+        Dispositivos ausentes de `metrics` saem do estado publicado. ServerMetrics
+        é imutável, então o snapshot compartilha as instâncias sem cópia.
+        """
+        with self._snapshot_lock:
+            self.changes.sync(metrics, self._snapshot_version + 1)
+            self._snapshot_version += 1
+            return self._swap_snapshot(cycle_duration)
+    
+    def _publish_changes(self, metrics: List[ServerMetrics], cycle_duration: float = 0.0) -> Optional[CollectorSnapshot]:
+        """
+        Aplica um lote parcial e publica apenas se algo mudou além da banda morta
+        
+        Sem eventos, o snapshot atual continua valendo; ele só é republicado
+        (mesma versão, generated_at novo) uma vez por intervalo de coleta, para
+        que os workers não o considerem abandonado.
+        
+        Returns:
+            Snapshot publicado, ou None se o lote não alterou nada
+        """
+        with self._snapshot_lock:
+            changes = self.changes.apply(metrics, self._snapshot_version + 1)
+            if changes:
+                self._snapshot_version += 1
+                return self._swap_snapshot(cycle_duration)
+            
+            current = self._snapshot
+            if current is not None:
+                age = (datetime.now() - current.generated_at).total_seconds()
+                if age < self.collection_interval_seconds:
+                    return None
+                snapshot = replace(current, generated_at=datetime.now(), cycle_duration_seconds=cycle_duration)
+                self._snapshot = snapshot
+                if self.shared_snapshot_file:
+                    self._write_shared_snapshot(snapshot)
+                return snapshot
+            return self._swap_snapshot(cycle_duration)
+    
+    def _swap_snapshot(self, cycle_duration: float) -> CollectorSnapshot:
+        """Troca o snapshot pelo estado publicado do ChangeTracker (chamar com _snapshot_lock)"""
+        metrics, total_watts, fonte = self.changes.state()
+        snapshot = CollectorSnapshot(
+            version=self._snapshot_version,
+            generated_at=datetime.now(),
+            metrics=metrics,
+            total_watts=total_watts,
+            fonte=fonte,
+            cycle_duration_seconds=cycle_duration
+        )
+        # Troca atômica da referência: leitores nunca veem estado parcial
+        self._snapshot = snapshot
+        if self.shared_snapshot_file:
+            self._write_shared_snapshot(snapshot)
+        self._snapshot_published.notify_all()
+        return snapshot
+    
+    def _write_shared_snapshot(self, snapshot: CollectorSnapshot):
+        """Publica o snapshot (e a energia acumulada) para os workers via mmap"""
+        try:
+            if self._shared_writer is None or self._shared_writer.path != self.shared_snapshot_file:
+                self._shared_writer = SharedSnapshotWriter(self.shared_snapshot_file)
+            hourly, daily = self.get_energy_buckets()
+            self._shared_writer.write(encode_shared_snapshot(SharedSnapshot(
+                snapshot, self.get_energy_summary(), tuple(hourly), tuple(daily),
+                self.telemetry.snapshot()
+            )))
+        except Exception as e:
+            logger.error(f"Erro ao publicar snapshot compartilhado em {self.shared_snapshot_file}: {e}")
+    
+    def _get_fallback_metrics(self) -> List[ServerMetrics]:
+        """Métricas simuladas usadas antes do primeiro ciclo de coleta"""
+        if self._uses_default_fleet():
+            return self._get_default_simulated_metrics()
+        return [self._simulate_server_metrics(server) for server in self.servers_config]
+    
+    def start(self) -> bool:
+        """
+        Inicia o agendador de coleta em background
+        
+        Publica imediatamente um snapshot (estado restaurado do disco ou
+        simulado) para que as requisições nunca esperem pelo primeiro ciclo SNMP.
+        
+        Returns:
+            True se o agendador foi iniciado, False se já estava rodando
+        """
+        if self.is_running():
+            return False
+        
+        self._wheel = TimingWheel.from_servers(self.servers_config, self._get_slot_count())
+        
+        if self._snapshot is None:
+            if not self._uses_default_fleet():
+                # Últimos valores restaurados do disco; simulação só para o que faltar
+                for server in self.servers_config:
+                    if server.get('device_id') not in self._latest_metrics:
+                        metric = self._simulate_server_metrics(server)
+                        self._latest_metrics[metric.device_id] = metric
+                self._publish_latest()
+            else:
+                self._publish_snapshot(self._get_default_simulated_metrics())
+        
+        self._stop_event.clear()
+        self._scheduler_thread = threading.Thread(
+            target=self._scheduler_loop,
+            name="snmp-collector-scheduler",
+            daemon=True
+        )
+        self._scheduler_thread.start()
+        logger.info(
+            f"Agendador SNMP iniciado (intervalo: {self.collection_interval_seconds}s, "
+            f"{self._wheel.slot_count} slots)"
+        )
+        return True
+    
+    def _save_state(self) -> bool:
+        """Grava últimas métricas, circuit breakers e RTT no state_file"""
+        with self.cache_lock:
+            cache_items = list(self.cache.items())
+        health_items = list(self.device_health.items())
+        
+        metric_rows = [
+            {
+                'device_id': device_id,
+                'power_consumption_watts': metrics.power_consumption_watts,
+                'timestamp': metrics.timestamp.timestamp(),
+                'cached_at': cached_at.timestamp(),
+                'status': metrics.status,
+                'error_message': metrics.error_message,
+                'system_health': metrics.system_health,
+                'power_supply_status': (
+                    json.dumps(metrics.power_supply_status)
+                    if metrics.power_supply_status is not None else None
+                ),
+                'source': metrics.source,
+                'power_stats': (
+                    json.dumps(metrics.power_stats) if metrics.power_stats is not None else None
+                ),
+                'sensors': (
+                    json.dumps(metrics.sensors.as_tuple()) if metrics.sensors is not None else None
+                )
+            }
+            for device_id, (metrics, cached_at) in cache_items
+        ]
+        health_rows = [
+            {
+                'device_id': device_id,
+                'breaker_state': health.breaker.state,
+                'failures': health.breaker.failures,
+                'opened_at': health.breaker.opened_at,
+                'cooldown_seconds': health.breaker.cooldown_seconds,
+                'srtt': health.rtt.srtt,
+                'rttvar': health.rtt.rttvar
+            }
+            for device_id, health in health_items
+        ]
+        
+        saved = CollectorStateStore(self.state_file).save(metric_rows, health_rows)
+        if saved:
+            logger.debug(f"Estado do coletor gravado: {len(metric_rows)} métricas, {len(health_rows)} dispositivos")
+        return saved
+    
+    def _restore_state(self) -> int:
+        """
+        Recarrega o estado gravado por _save_state
+        
+        Entradas de cache mantêm o instante original, então o cache
+        stale-while-revalidate decide se ainda podem ser servidas; o último
+        valor de cada servidor configurado alimenta o snapshot inicial.
+        
+        Returns:
+            Número de dispositivos com métricas restauradas
+        """
+        metric_rows, health_rows = CollectorStateStore(self.state_file).load()
+        configured = {server.get('device_id') for server in self.servers_config}
+        
+        restored = 0
+        with self.cache_lock:
+            for row in metric_rows:
+                device_id = row['device_id']
+                if device_id not in configured:
+                    continue
+                psu = row.get('power_supply_status')
+                power_stats = row.get('power_stats')
+                sensors = row.get('sensors')
+                metrics = ServerMetrics(
+                    device_id=device_id,
+                    power_consumption_watts=row['power_consumption_watts'],
+                    timestamp=datetime.fromtimestamp(row['timestamp']),
+                    # Arquivos gravados antes da coluna source: todo valor do cache é 'cached'
+                    source=row.get('source') or 'cached',
+                    status=row['status'],
+                    error_message=row.get('error_message'),
+                    system_health=row.get('system_health'),
+                    power_supply_status=tuple(json.loads(psu)) if psu else None,
+                    power_stats=tuple(json.loads(power_stats)) if power_stats else None,
+                    sensors=SensorReadings(*json.loads(sensors)) if sensors else None
+                )
+                self.cache[device_id] = (metrics, datetime.fromtimestamp(row['cached_at']))
+                self._latest_metrics[device_id] = metrics
+                restored += 1
+        
+        for row in health_rows:
+            if row['device_id'] not in configured:
+                continue
+            health = self._get_device_health(row['device_id'])
+            health.breaker.restore(
+                row['breaker_state'], row['failures'], row['opened_at'], row['cooldown_seconds']
+            )
+            health.rtt.restore(row['srtt'], row['rttvar'])
+        
+        if restored:
+            logger.info(f"Warm start: {restored} dispositivos restaurados de {self.state_file}")
+        return restored
+    
+    def _get_slot_count(self) -> int:
+        """Número de slots da roda de tempo (padrão: um por segundo do intervalo)"""
+        if self.schedule_slots:
+            return max(1, int(self.schedule_slots))
+        return max(1, int(round(self.collection_interval_seconds)))
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Para o agendador de coleta e aguarda o ciclo corrente terminar"""
+        self._stop_event.set()
+        thread = self._scheduler_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._scheduler_thread = None
+    
+    def is_running(self) -> bool:
+        """Indica se o agendador em background está ativo"""
+        thread = self._scheduler_thread
+        return thread is not None and thread.is_alive()
+    
+    def _scheduler_loop(self):
+        """
+        Loop do agendador: a cada tick dispara a coleta do slot corrente
+        
+        O tick vale collection_interval_seconds / slots, então cada
+        dispositivo é consultado uma vez por intervalo, em momentos
+        espalhados. A coleta do slot roda no event loop sem bloquear o tick.
+        """
+        slot = 0
+        next_tick = time.monotonic()
+        next_reload_check = next_tick + self.config_reload_seconds
+        
+        while not self._stop_event.is_set():
+            if self.config_reload_seconds and time.monotonic() >= next_reload_check:
+                next_reload_check = time.monotonic() + self.config_reload_seconds
+                try:
+                    self.reload_config()
+                except Exception as e:
+                    logger.error(f"Erro ao recarregar configuração: {e}")
+            
+            wheel = self._wheel
+            tick = self.collection_interval_seconds / wheel.slot_count
+            try:
+                if self._uses_default_fleet():
+                    if slot == 0:
+                        self._publish_snapshot(self._get_default_simulated_metrics())
+                else:
+                    devices = [d for d in wheel.devices_in(slot) if d.get('device_id') not in self._in_flight]
+                    if devices:
+                        self._dispatch_slot(devices, tick * self.schedule_jitter_ratio)
+            except Exception as e:
+                logger.error(f"Erro no ciclo de coleta agendado: {e}")
+            
+            slot = (slot + 1) % wheel.slot_count
+            if slot == 0 and self.state_file:
+                # Uma volta completa da roda: persistir estado para warm start
+                self._save_state()
+            next_tick += tick
+            atraso = time.monotonic() - next_tick
+            if atraso > self.collection_interval_seconds:
+                # Atraso maior que um intervalo inteiro: realinhar em vez de disparar rajada
+                next_tick = time.monotonic()
+            self._stop_event.wait(max(0.0, next_tick - time.monotonic()))
+    
+    def _dispatch_slot(self, servers: List[Dict], jitter_seconds: float) -> concurrent.futures.Future:
+        """Dispara a coleta do slot no event loop sem bloquear o tick do agendador"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._collect_slot(servers, jitter_seconds), self._ensure_loop()
+        )
+        device_ids = [server.get('device_id', 'unknown') for server in servers]
+        future.add_done_callback(lambda done: self._log_slot_failure(done, device_ids))
+        return future
+    
+    @staticmethod
+    def _log_slot_failure(future: concurrent.futures.Future, device_ids: List[str]):
+        """Falha na coleta/publicação de um slot: registra em vez de perder com o future"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(
+                f"Erro na coleta do slot ({', '.join(device_ids)}): {error!r}",
+                exc_info=(type(error), error, error.__traceback__)
+            )
+    
+    async def _collect_slot(self, servers: List[Dict], jitter_seconds: float):
+        """
+        Coleta os dispositivos de um slot e publica as mudanças no snapshot
+        
+        Cada consulta é atrasada por um jitter uniforme em [0, jitter_seconds)
+        para não disparar todo o slot no mesmo instante. O agendador consulta
+        os dispositivos diretamente: servir o cache aqui repetiria leituras de
+        até cache_ttl_seconds atrás no snapshot, na energia e no histórico.
+        """
+        inicio = time.monotonic()
+        semaphore = self._get_poll_semaphore()
+        device_ids = [server.get('device_id', 'unknown') for server in servers]
+        self._in_flight.update(device_ids)
+        
+        async def collect_with_jitter(server: Dict) -> ServerMetrics:
+            if jitter_seconds > 0:
+                await asyncio.sleep(random.uniform(0, jitter_seconds))
+            return await self._collect_device(server, semaphore, use_cache=False)
+        
+        try:
+            results = await asyncio.gather(
+                *(collect_with_jitter(server) for server in servers),
+                return_exceptions=True
+            )
+        finally:
+            self._in_flight.difference_update(device_ids)
+        
+        collected = []
+        for server, result in zip(servers, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Erro ao coletar métricas de {server.get('device_id', 'unknown')}: {result}")
+                result = self._simulate_server_metrics(server, str(result))
+            self._latest_metrics[result.device_id] = result
+            collected.append(result)
+        
+        self._record_energy(collected)
+        self._record_history(collected)
+        duration = time.monotonic() - inicio
+        self.telemetry.record_slot(duration)
+        # Dispositivos removidos por recarga durante a coleta não voltam ao snapshot
+        wheel = self._wheel
+        self._publish_changes([m for m in collected if wheel is None or m.device_id in wheel], duration)
+    
+    def _publish_latest(self, cycle_duration: float = 0.0) -> CollectorSnapshot:
+        """Publica snapshot com a última métrica de cada servidor configurado"""
+        latest = self._latest_metrics
+        metrics = [
+            latest[server['device_id']]
+            for server in self.servers_config
+            if server.get('device_id') in latest
+        ]
+        return self._publish_snapshot(metrics, cycle_duration)
     
     def get_server_count(self) -> Dict[str, int]:
         """
@@ -83,10 +83,7 @@ async function fetchMetrics() {
     const data = await response.json();
     
     // Update app data with real API data
-    appData.metricas_atuais.consumo_atual_kwh = data.consumo_atual;
-    appData.metricas_atuais.emissoes_co2_kg_ano = data.emissoes_co2;
-    appData.metricas_atuais.economia_potencial_reais = data.economia_potencial;
-    appData.metricas_atuais.arvores_equivalentes = data.arvores_equivalentes;
+    storeMetrics(data);
     
     console.log('✅ Metrics fetched from Flask API:', data);
     return data;
@@ -102,49 +99,119 @@ async function fetchMetrics() {
   }
 }
 
+// Keep app data in sync with metrics received from the Flask API
+function storeMetrics(data) {
+  appData.metricas_atuais.consumo_atual_kwh = data.consumo_atual;
+  appData.metricas_atuais.emissoes_co2_kg_ano = data.emissoes_co2;
+  appData.metricas_atuais.economia_potencial_reais = data.economia_potencial;
+  appData.metricas_atuais.arvores_equivalentes = data.arvores_equivalentes;
+}
+
 // Update metrics display with real data
 function updateMetricsDisplay() {
-  fetchMetrics().then(data => {
-    // Update the main metric cards
-    const consumptionEl = document.getElementById('currentConsumption');
-    const emissionsEl = document.getElementById('co2Emissions');
-    const savingsEl = document.getElementById('potentialSavings');
-    const treesEl = document.getElementById('treeEquivalent');
-    
-    if (consumptionEl) {
-      consumptionEl.textContent = `${Math.round(data.consumo_atual)} kWh`;
-    }
-    
-    if (emissionsEl) {
-      emissionsEl.textContent = `${Math.round(data.emissoes_co2).toLocaleString('pt-BR')} kg`;
-    }
-    
-    if (savingsEl) {
-      savingsEl.textContent = `R$ ${Math.round(data.economia_potencial).toLocaleString('pt-BR')}`;
-    }
-    
-    if (treesEl) {
-      treesEl.textContent = `${data.arvores_equivalentes.toLocaleString('pt-BR')}`;
-    }
-    
-    // Update workstation status
-    const onlineEl = document.getElementById('workstationsOnline');
-    if (onlineEl) {
-      onlineEl.textContent = `${appData.metricas_atuais.workstations_ativas.toLocaleString('pt-BR')} Online`;
-    }
-    
-    const offlineEl = document.getElementById('workstationsOffline');
-    if (offlineEl) {
-      const offline = appData.infraestrutura.workstations - appData.metricas_atuais.workstations_ativas;
-      offlineEl.textContent = `${offline.toLocaleString('pt-BR')} Offline`;
-    }
-    
-    console.log('✅ Metrics updated from Flask API:', data);
-  }).catch(error => {
+  fetchMetrics().then(renderMetrics).catch(error => {
     console.error('❌ Failed to update metrics:', error);
   });
 }
 
+// Render the metric cards
+function renderMetrics(data) {
+  // Update the main metric cards
+  const consumptionEl = document.getElementById('currentConsumption');
+  const emissionsEl = document.getElementById('co2Emissions');
+  const savingsEl = document.getElementById('potentialSavings');
+  const treesEl = document.getElementById('treeEquivalent');
+  
+  if (consumptionEl) {
+    consumptionEl.textContent = `${Math.round(data.consumo_atual)} kWh`;
+  }
+  
+  if (emissionsEl) {
+    emissionsEl.textContent = `${Math.round(data.emissoes_co2).toLocaleString('pt-BR')} kg`;
+  }
+  
+  if (savingsEl) {
+    savingsEl.textContent = `R$ ${Math.round(data.economia_potencial).toLocaleString('pt-BR')}`;
+  }
+  
+  if (treesEl) {
+    treesEl.textContent = `${data.arvores_equivalentes.toLocaleString('pt-BR')}`;
+  }
+  
+  // Update workstation status
+  const onlineEl = document.getElementById('workstationsOnline');
+  if (onlineEl) {
+    onlineEl.textContent = `${appData.metricas_atuais.workstations_ativas.toLocaleString('pt-BR')} Online`;
+  }
+  
+  const offlineEl = document.getElementById('workstationsOffline');
+  if (offlineEl) {
+    const offline = appData.infraestrutura.workstations - appData.metricas_atuais.workstations_ativas;
+    offlineEl.textContent = `${offline.toLocaleString('pt-BR')} Offline`;
+  }
+  
+  console.log('✅ Metrics updated from Flask API:', data);
+}
+
+// Live metrics: Server-Sent Events from /api/stream, polling as fallback
+let metricsStream = null;
+let metricsPollTimer = null;
+let liveMetrics = null;
+
+function startMetricsPolling() {
+  if (metricsPollTimer === null) {
+    metricsPollTimer = setInterval(updateMetricsDisplay, 10000);
+  }
+}
+
+function stopMetricsPolling() {
+  if (metricsPollTimer !== null) {
+    clearInterval(metricsPollTimer);
+    metricsPollTimer = null;
+  }
+}
+
+function startMetricsStream() {
+  // Static version (local calculator) or no EventSource support: poll
+  if (typeof window.RenaultInfrastructure !== 'undefined' || typeof window.EventSource === 'undefined') {
+    startMetricsPolling();
+    return;
+  }
+  
+  metricsStream = new EventSource('/api/stream');
+  metricsStream.onopen = stopMetricsPolling;
+  
+  // Full payload on connect (or after falling too far behind)
+  metricsStream.addEventListener('snapshot', event => {
+    liveMetrics = JSON.parse(event.data);
+    storeMetrics(liveMetrics);
+    renderMetrics(liveMetrics);
+  });
+  
+  // Only the fields that changed in the last collection cycle
+  metricsStream.addEventListener('delta', event => {
+    if (liveMetrics === null) {
+      return;
+    }
+    const delta = JSON.parse(event.data);
+    Object.keys(delta).forEach(key => {
+      if (delta[key] === null) {
+        delete liveMetrics[key];
+      } else {
+        liveMetrics[key] = delta[key];
+      }
+    });
+    storeMetrics(liveMetrics);
+    renderMetrics(liveMetrics);
+  });
+  
+  // EventSource reconnects by itself (sending Last-Event-ID); poll meanwhile
+  metricsStream.onerror = () => {
+    console.warn('⚠️ Metrics stream interrupted, polling /api/metrics until it reconnects');
+    startMetricsPolling();
+  };
+}
+
 // Tab Navigation
 function initializeTabNavigation() {
   const tabButtons = document.querySelectorAll('.tab-btn');
@@ -364,8 +431,8 @@ document.addEventListener('DOMContentLoaded', function() {
   // Update time every minute
   setInterval(updateCurrentTime, 60000);
   
-  // Update metrics every 10 seconds (real-time)
-  setInterval(updateMetricsDisplay, 10000);
+  // Live metrics pushed by the server (falls back to polling every 10 seconds)
+  startMetricsStream();
   
   // Initialize button handlers
   initializeButtonHandlers();
@@ -105,6 +105,376 @@ class TestFlaskAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertLess(response_time, 2.0)  # Should respond within 2 seconds
 
+    def test_concurrent_metrics_requests_coalesce(self):
+        """Test that a burst of /api/metrics requests shares one computation"""
+        import threading
+        import time
+        import app_renault_mvp
+
+        calls = []
+        original = app_renault_mvp.infra.carbon_loader.get_optimization_potential
+
+        def slow_optimization():
+            calls.append(1)
+            time.sleep(0.2)
+            return original()
+
+        responses = []
+
+        def fetch():
+            responses.append(app.test_client().get("/api/metrics"))
+
+        with patch.object(app_renault_mvp.infra.carbon_loader, 'get_optimization_potential',
+                          side_effect=slow_optimization):
+            threads = [threading.Thread(target=fetch) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual([r.status_code for r in responses], [200] * 20)
+        self.assertEqual(len({r.data for r in responses}), 1)
+        # calcular_economia_potencial also reads it once per computation
+        self.assertEqual(len(calls), 2)
+
+    def test_metrics_snapshot_built_once_per_cycle(self):
+        """Test that /api/metrics reuses one immutable snapshot per collector cycle"""
+        import datetime
+        import app_renault_mvp
+        from types import SimpleNamespace
+
+        collector = MagicMock()
+        collector.is_running.return_value = True
+        collector.get_snapshot.return_value = SimpleNamespace(version=7, generated_at=datetime.datetime.now())
+        collector.get_total_power_kw.return_value = (50.0, 'snmp_real')
+        collector.get_energy_summary.side_effect = RuntimeError("sem energia")
+        consumo_inicial = infra.consumo_atual
+
+        with patch.object(app_renault_mvp, 'snmp_collector', collector):
+            first = app_renault_mvp.obter_snapshot_metricas()
+            data = json.loads(self.app.get("/api/metrics").data)
+            self.assertIs(app_renault_mvp.obter_snapshot_metricas(), first)
+            self.assertEqual(collector.get_total_power_kw.call_count, 1)
+
+            collector.get_snapshot.return_value = SimpleNamespace(version=8, generated_at=datetime.datetime.now())
+            collector.get_total_power_kw.return_value = (60.0, 'snmp_real')
+            second = app_renault_mvp.obter_snapshot_metricas()
+
+        self.assertEqual(data["consumo_atual"], 100.0)  # 50 kWh x PUE 2.0
+        self.assertEqual(data["fonte"], 'snmp_real')
+        self.assertEqual(second.consumo_atual, 120.0)
+        self.assertGreater(second.version, first.version)
+        self.assertEqual(second.emissoes_co2, round(120.0 * 24 * 365 * infra.fator_emissao, 2))
+        self.assertTrue(data["emissoes_estimadas"])
+        # Handlers no longer write the shared infrastructure object
+        self.assertEqual(infra.consumo_atual, consumo_inicial)
+
+    def test_emissions_from_measured_energy(self):
+        """Test that annual emissions come from the integrated kWh once enough is measured"""
+        import datetime
+        import app_renault_mvp
+        from dataclasses import replace
+        from collector.energy import EnergySummary
+
+        agora = datetime.datetime(2025, 1, 20, 10, 30)
+        duas_horas = 2 * 3600
+        resumo = EnergySummary(total_kwh=30.0, current_hour_kwh=5.0, today_kwh=20.0, last_24h_kwh=20.0,
+                               devices=2, gap_seconds=0.0, since=agora - datetime.timedelta(hours=2),
+                               last_24h_device_seconds=2 * duas_horas)
+        # 20 kWh over 2 measured hours of the whole fleet, annualized, times PUE 2.0
+        self.assertAlmostEqual(app_renault_mvp._consumo_anual_medido(resumo, 2, agora), 10.0 * 8760 * 2.0)
+        # The window is capped at the last 24 hours even with older data
+        resumo = replace(resumo, since=agora - datetime.timedelta(days=3), last_24h_kwh=235.0,
+                         last_24h_device_seconds=2 * 23.5 * 3600)
+        self.assertAlmostEqual(app_renault_mvp._consumo_anual_medido(resumo, 2, agora), 10.0 * 8760 * 2.0)
+        # Too little measured energy: callers fall back to the estimate
+        resumo = replace(resumo, since=agora - datetime.timedelta(minutes=20))
+        self.assertIsNone(app_renault_mvp._consumo_anual_medido(resumo, 2, agora))
+
+    def test_emissions_scaled_by_fleet_coverage(self):
+        """Test that devices without measured energy are accounted for, not silently dropped"""
+        import datetime
+        import app_renault_mvp
+        from collector.energy import EnergySummary
+
+        agora = datetime.datetime(2025, 1, 20, 10, 30)
+        duas_horas = 2 * 3600
+        # 10 devices, 9 measured for 2 hours at 1 kW each; one keeps failing
+        resumo = EnergySummary(total_kwh=18.0, current_hour_kwh=9.0, today_kwh=18.0, last_24h_kwh=18.0,
+                               devices=9, gap_seconds=0.0, since=agora - datetime.timedelta(hours=2),
+                               last_24h_device_seconds=9 * duas_horas)
+        self.assertAlmostEqual(app_renault_mvp._consumo_anual_medido(resumo, 10, agora), 10.0 * 8760 * 2.0)
+        # Half the fleet failing: the measured energy is not representative
+        self.assertIsNone(app_renault_mvp._consumo_anual_medido(resumo, 18, agora))
+
+    def test_metrics_flag_estimated_emissions(self):
+        """Test that /api/metrics marks emissions as estimated when the fleet coverage is low"""
+        import datetime
+        import app_renault_mvp
+        from types import SimpleNamespace
+        from collector.energy import EnergySummary
+
+        agora = datetime.datetime.now()
+        janela = (agora - agora.replace(minute=0, second=0, microsecond=0)).total_seconds() + 23 * 3600
+        collector = MagicMock()
+        collector.is_running.return_value = True
+        collector.get_total_power_kw.return_value = (50.0, 'snmp_real')
+
+        def metricas(version, measured_fraction):
+            collector.get_snapshot.return_value = SimpleNamespace(
+                version=version, generated_at=datetime.datetime.now(), metrics=(None,) * 4
+            )
+            collector.get_energy_summary.return_value = EnergySummary(
+                1200.0, 50.0, 600.0, 1200.0, 4, 0.0, agora - datetime.timedelta(hours=30),
+                last_24h_device_seconds=4 * janela * measured_fraction
+            )
+            return app_renault_mvp.obter_snapshot_metricas()
+
+        with patch.object(app_renault_mvp, 'snmp_collector', collector):
+            measured = metricas(41, 1.0)
+            partial = metricas(42, 0.5)
+
+        self.assertFalse(measured.emissoes_estimadas)
+        anual = 1200.0 / (janela / 3600) * 8760 * infra.pue_atual
+        self.assertAlmostEqual(measured.emissoes_co2, anual * infra.fator_emissao, delta=5)
+        # Only half the fleet measured: the instantaneous estimate is used and flagged
+        self.assertTrue(partial.emissoes_estimadas)
+        self.assertEqual(partial.emissoes_co2, round(100.0 * 24 * 365 * infra.fator_emissao, 2))
+
+
+@unittest.skipUnless(APP_AVAILABLE, "Flask app not available")
+class TestConditionalGet(unittest.TestCase):
+    """Test ETag / If-None-Match handling across /api endpoints"""
+
+    def setUp(self):
+        """Setup test client"""
+        self.app = app.test_client()
+
+    def assert_revalidates(self, url):
+        first = self.app.get(url)
+        self.assertEqual(first.status_code, 200, url)
+        etag = first.headers.get("ETag")
+        self.assertTrue(etag, url)
+        self.assertIn("no-cache", first.headers.get("Cache-Control", ""))
+
+        again = self.app.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304, url)
+        self.assertEqual(again.data, b"")
+        self.assertEqual(again.headers.get("ETag"), etag)
+
+        stale = self.app.get(url, headers={"If-None-Match": '"outra-versao"'})
+        self.assertEqual(stale.status_code, 200, url)
+        return etag
+
+    def test_all_api_endpoints_revalidate(self):
+        """Test that every versioned endpoint answers a matching If-None-Match with 304"""
+        for url in ("/api/metrics", "/api/servers", "/api/consolidation", "/api/pue",
+                    "/api/virtualization", "/api/recommendations", "/api/savings",
+                    "/api/trends", "/api/health", "/api/batch?resources=metrics,servers,savings"):
+            self.assert_revalidates(url)
+
+    def test_query_string_is_part_of_the_etag(self):
+        """Test that different query strings never share a representation"""
+        day = self.assert_revalidates("/api/trends?period=day")
+        week = self.assert_revalidates("/api/trends?period=week")
+        self.assertNotEqual(day, week)
+
+    def test_not_modified_skips_the_view(self):
+        """Test that a 304 answer does not run the computation behind the endpoint"""
+        import routes.api_routes as api_routes
+
+        etag = self.app.get("/api/servers").headers["ETag"]
+        with patch.object(api_routes.carbon_loader, "get_server_metrics",
+                          side_effect=AssertionError("view should not run")):
+            response = self.app.get("/api/servers", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_errors_carry_no_etag(self):
+        """Test that error responses are never cached"""
+        response = self.app.get("/api/trends?period=month")
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(response.headers.get("ETag"))
+
+    def test_collector_endpoints_follow_their_content(self):
+        """Test that /api/collector/stats and /api/energy are versioned by the collector counters"""
+        import datetime
+        import app_renault_mvp
+        from types import SimpleNamespace
+        from collector.energy import EnergySummary
+
+        collector = MagicMock()
+        collector.is_running.return_value = True
+        collector.get_data_version.return_value = ((3, "t0"), 10, 20)
+        collector.get_snapshot.return_value = SimpleNamespace(
+            version=3, generated_at=datetime.datetime(2025, 1, 20, 10), metrics=(), cycle_duration_seconds=0.5
+        )
+        collector.get_telemetry.return_value = {"counters": {"timeouts": 0}}
+        collector.get_energy_summary.return_value = EnergySummary(1.0, 0.5, 1.0, 1.0, 2, 0.0, None)
+        collector.get_energy_buckets.return_value = ([], [])
+
+        with patch.object(app_renault_mvp, "snmp_collector", collector):
+            stats = self.assert_revalidates("/api/collector/stats")
+            energy = self.assert_revalidates("/api/energy")
+
+            # A matching ETag never builds the payload
+            collector.get_telemetry.reset_mock()
+            collector.get_energy_summary.reset_mock()
+            for url, etag in (("/api/collector/stats", stats), ("/api/energy", energy)):
+                self.assertEqual(self.app.get(url, headers={"If-None-Match": etag}).status_code, 304, url)
+            collector.get_telemetry.assert_not_called()
+            collector.get_energy_summary.assert_not_called()
+
+            # Same snapshot version, new telemetry and energy samples
+            collector.get_data_version.return_value = ((3, "t0"), 11, 21)
+            for url, etag in (("/api/collector/stats", stats), ("/api/energy", energy)):
+                response = self.app.get(url, headers={"If-None-Match": etag})
+                self.assertEqual(response.status_code, 200, url)
+                self.assertNotEqual(response.headers["ETag"], etag, url)
+
+    def test_collector_endpoints_unavailable_without_etag(self):
+        """Test that an unavailable collector answers 503 without an ETag"""
+        import app_renault_mvp
+
+        collector = MagicMock()
+        collector.get_data_version.side_effect = RuntimeError("no snapshot")
+        collector.get_telemetry.side_effect = RuntimeError("no snapshot")
+        collector.get_energy_summary.side_effect = RuntimeError("no snapshot")
+
+        with patch.object(app_renault_mvp, "snmp_collector", collector):
+            for url in ("/api/collector/stats", "/api/energy"):
+                response = self.app.get(url)
+                self.assertEqual(response.status_code, 503, url)
+                self.assertNotIn("ETag", response.headers)
+
+
+@unittest.skipUnless(APP_AVAILABLE, "Flask app not available")
+class TestBatchEndpoint(unittest.TestCase):
+    """Test composing several resources with /api/batch"""
+
+    def setUp(self):
+        """Setup test client"""
+        self.app = app.test_client()
+
+    def test_batch_matches_individual_endpoints(self):
+        """Test that each batched resource equals the standalone endpoint data"""
+        response = self.app.get("/api/batch?resources=servers,pue,trends,recommendations"
+                                "&trends.period=week&recommendations.limit=2")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertTrue(data["success"])
+
+        for name, url in (("servers", "/api/servers"), ("pue", "/api/pue"),
+                          ("trends", "/api/trends?period=week")):
+            self.assertEqual(data["data"][name], json.loads(self.app.get(url).data)["data"], name)
+        self.assertEqual(data["data"]["recommendations"]["count"], 2)
+
+    def test_batch_includes_main_metrics(self):
+        """Test that the /api/metrics payload can be batched with the other resources"""
+        response = self.app.get("/api/batch?resources=metrics,servers")
+        metrics = json.loads(response.data)["data"]["metrics"]
+
+        self.assertEqual(set(metrics), set(json.loads(self.app.get("/api/metrics").data)))
+
+    def test_batch_metrics_resolved_once(self):
+        """Test that the metrics ETag and body come from the same snapshot, built once per request"""
+        import app_renault_mvp
+        from routes.conditional import make_etag
+
+        collector = MagicMock()
+        collector.is_running.return_value = False  # Every read rebuilds the snapshot
+        collector.get_total_power_kw.return_value = (50.0, 'snmp_real')
+        collector.get_energy_summary.side_effect = RuntimeError("sem energia")
+        with patch.object(app_renault_mvp, 'snmp_collector', collector), \
+                patch.object(app_renault_mvp, '_publicar_snapshot_metricas',
+                             wraps=app_renault_mvp._publicar_snapshot_metricas) as builds:
+            response = self.app.get("/api/batch?resources=metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(builds.call_count, 1)
+        snapshot = app_renault_mvp._metrics_snapshot
+        self.assertEqual(json.loads(response.data)["data"]["metrics"], snapshot.to_dict())
+        self.assertEqual(response.headers["ETag"].strip('"'),
+                         make_etag("/api/batch", b"resources=metrics", (snapshot.etag,)))
+
+    def test_shared_intermediate_results_computed_once(self):
+        """Test that resources needing the same loader result share one computation"""
+        import routes.api_routes as api_routes
+
+        loader = api_routes.carbon_loader
+        url = "/api/batch?resources=servers,virtualization,pue,savings,recommendations"
+        with patch.object(loader, "_derived_cache", {}), \
+                patch.object(loader, "get_server_data", wraps=loader.get_server_data) as walks:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200)
+            # server metrics, cooling efficiency, consumption, consolidation: once each
+            self.assertEqual(walks.call_count, 4)
+
+            # Later requests are served from the loader's cache
+            self.app.get(url)
+            self.app.get("/api/savings")
+            self.assertEqual(walks.call_count, 4)
+
+    def test_invalid_requests(self):
+        """Test that unknown resources and bad parameters are rejected with 400"""
+        for url in ("/api/batch", "/api/batch?resources=servers,unknown",
+                    "/api/batch?resources=servers,trends&trends.period=month"):
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertFalse(json.loads(response.data)["success"])
+
+        error = json.loads(self.app.get("/api/batch?resources=trends&trends.period=month").data)["error"]
+        self.assertTrue(error.startswith("trends: "))
+
+
+@unittest.skipUnless(APP_AVAILABLE, "Flask app not available")
+class TestMetricsStream(unittest.TestCase):
+    """Test the /api/stream Server-Sent Events endpoint"""
+
+    def setUp(self):
+        """Setup test client"""
+        self.app = app.test_client()
+
+    def read_events(self, response, count):
+        """Read the first count events (data frames) from a streaming response"""
+        events = []
+        for chunk in response.response:
+            for frame in chunk.decode("utf-8").split("\n\n"):
+                fields = dict(line.split(": ", 1) for line in frame.split("\n") if ": " in line)
+                if "data" in fields:
+                    fields["data"] = json.loads(fields["data"])
+                    events.append(fields)
+            if len(events) >= count:
+                return events
+        return events
+
+    def test_stream_starts_with_full_snapshot(self):
+        """Test that a new subscriber first receives the complete /api/metrics payload"""
+        response = self.app.get("/api/stream", buffered=False)
+        try:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "text/event-stream")
+            self.assertEqual(response.headers.get("Cache-Control"), "no-cache")
+
+            event = self.read_events(response, 1)[0]
+        finally:
+            response.close()
+
+        self.assertEqual(event["event"], "snapshot")
+        self.assertTrue(event["id"].isdigit())
+        metrics = json.loads(self.app.get("/api/metrics").data)
+        self.assertEqual(set(event["data"]), set(metrics))
+        self.assertEqual(event["data"]["escopo"], "datacenter-servidores-apenas")
+
+    def test_delta_contains_only_changed_fields(self):
+        """Test that deltas carry changed fields and mark removed ones as None"""
+        from app_renault_mvp import _diferenca_metricas
+
+        anterior = {"consumo_atual": 44.5, "fonte": "simulado", "energia": {"dispositivos": 0}}
+        atual = {"consumo_atual": 47.0, "fonte": "simulado"}
+
+        self.assertEqual(_diferenca_metricas(anterior, atual), {"consumo_atual": 47.0, "energia": None})
+        self.assertEqual(_diferenca_metricas(atual, atual), {})
+
 
 class TestInfrastructureCalculations(unittest.TestCase):
     """Test infrastructure calculation logic"""
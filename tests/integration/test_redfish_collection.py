@@ -0,0 +1,157 @@
+"""
+Integration tests for Redfish collection against the local mock Redfish server
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+os.environ['TESTING'] = '1'
+
+try:
+    from benchmarks.redfish_mock_server import RedfishMockServer, DEFAULT_CREDENTIALS
+    from snmp_collector import SNMPCollector, RedfishCredentials
+
+    MOCK_AVAILABLE = True
+except ImportError:
+    MOCK_AVAILABLE = False
+
+
+@unittest.skipUnless(MOCK_AVAILABLE, "benchmarks/pysnmp not available")
+class TestRedfishCollection(unittest.TestCase):
+    """End-to-end Redfish collection from mock chassis on localhost"""
+
+    def _make_collector(self, server, auth='session'):
+        collector = SNMPCollector()
+        collector.redfish_credentials = RedfishCredentials(auth=auth, **DEFAULT_CREDENTIALS)
+        collector.servers_config = server.servers_config()
+        collector.cache_ttl_seconds = 0
+        collector.cache_stale_seconds = 0
+        collector.timeout_seconds = 2
+        collector.max_retries = 1
+        self.addCleanup(collector.close)
+        return collector
+
+    def test_collects_power_control(self):
+        """Each chassis reports its consumption plus the BMC average/min/max"""
+        with RedfishMockServer(5, base_port=18100) as server:
+            collector = self._make_collector(server)
+            metrics = collector.collect_all_metrics()
+
+        self.assertEqual([m.source for m in metrics], ['redfish'] * 5)
+        for metric, device in zip(metrics, server.devices):
+            self.assertEqual(metric.device_id, device.device_id)
+            self.assertAlmostEqual(metric.power_consumption_watts, device.base_watts,
+                                   delta=device.base_watts * 0.06)
+            self.assertEqual(metric.power_stats, (
+                float(device.base_watts), float(int(device.base_watts * 0.9)), float(int(device.base_watts * 1.1))
+            ))
+        self.assertEqual(collector._summarize(metrics)[1], 'redfish')
+
+    def test_sessions_and_connections_are_reused(self):
+        """Later cycles reuse the keep-alive connection and the session token"""
+        with RedfishMockServer(4, base_port=18200) as server:
+            collector = self._make_collector(server)
+            for _ in range(3):
+                metrics = collector.collect_all_metrics()
+            self.assertTrue(all(m.source == 'redfish' for m in metrics))
+
+            self.assertEqual(server.connections, 4)
+            self.assertEqual(server.logins, 4)
+            self.assertEqual(server.requests, 4 + 3 * 4)
+
+            collector.close()
+            time.sleep(0.1)
+            # Sessions are logged out on close
+            self.assertEqual(server.sessions, {})
+
+    def test_idle_connections_closed_by_server(self):
+        """Connections the BMC closed while idle are replaced without failures"""
+        with RedfishMockServer(3, base_port=18300, keepalive_timeout=0.1, chunked=True) as server:
+            collector = self._make_collector(server)
+            collector.collect_all_metrics()
+            time.sleep(0.3)
+            metrics = collector.collect_all_metrics()
+
+        self.assertEqual([m.source for m in metrics], ['redfish'] * 3)
+        self.assertEqual(server.connections, 6)
+        self.assertEqual(server.logins, 3)
+        self.assertEqual(collector.telemetry.counters['errors'], 0)
+
+    def test_expired_session_logs_in_again(self):
+        """A 401 on the Power resource drops the token and logs in once more"""
+        with RedfishMockServer(2, base_port=18400) as server:
+            collector = self._make_collector(server)
+            collector.collect_all_metrics()
+            server.sessions.clear()
+            metrics = collector.collect_all_metrics()
+
+        self.assertEqual([m.source for m in metrics], ['redfish'] * 2)
+        self.assertEqual(server.logins, 4)
+
+    def test_forgotten_device_drops_session_and_connections(self):
+        """Removing a chassis from the configuration logs out its session and closes its idle connections"""
+        with RedfishMockServer(2, base_port=18450) as server:
+            collector = self._make_collector(server)
+            collector.collect_all_metrics()
+            removed, kept = collector.servers_config
+            client = collector._redfish
+            key = ('http', removed['ip_address'], removed['port'])
+            self.assertIn(key, client._sessions)
+            self.assertIn(key, client.pool._idle)
+
+            self.assertEqual(len(server.sessions), 2)
+
+            collector._forget_device(removed['device_id'], removed)
+
+            async def wait_logouts():
+                await asyncio.gather(*client._forgetting)
+
+            # forget runs on the event loop, before any later coroutine; the logout follows it
+            collector._run_coroutine(wait_logouts())
+            self.assertNotIn(key, client._sessions)
+            self.assertNotIn(key, client.pool._idle)
+            self.assertIn(('http', kept['ip_address'], kept['port']), client._sessions)
+            # The session was closed on the BMC, not just dropped locally
+            self.assertEqual(list(server.sessions.values()), [kept['port']])
+
+    def test_basic_auth(self):
+        """Basic auth sends credentials on each request and never creates sessions"""
+        with RedfishMockServer(2, base_port=18500) as server:
+            collector = self._make_collector(server, auth='basic')
+            metrics = collector.collect_all_metrics()
+
+        self.assertEqual([m.source for m in metrics], ['redfish'] * 2)
+        self.assertEqual(server.logins, 0)
+
+    def test_wrong_credentials_fall_back_to_simulation(self):
+        """A refused login is a failure of the device, not of the cycle"""
+        with RedfishMockServer(2, base_port=18600) as server:
+            collector = self._make_collector(server)
+            collector.redfish_credentials = RedfishCredentials('ecoti_sim', 'errada')
+            metrics = collector.collect_all_metrics()
+
+        self.assertTrue(all(m.status == 'error' for m in metrics))
+        self.assertIn('HTTP 401', metrics[0].error_message)
+
+    def test_mute_chassis_time_out(self):
+        """Chassis that accept the connection but never answer time out"""
+        with RedfishMockServer(10, base_port=18700, profile='outage') as server:
+            collector = self._make_collector(server)
+            collector.timeout_seconds = 0.5
+            metrics = collector.collect_all_metrics()
+
+        mute = {device.device_id for device in server.devices if device.mute}
+        self.assertEqual(len(mute), 2)
+        for metric in metrics:
+            expected = 'error' if metric.device_id in mute else 'success'
+            self.assertEqual(metric.status, expected, metric.device_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
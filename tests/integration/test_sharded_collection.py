@@ -0,0 +1,141 @@
+"""
+Integration tests for sharded collection with several local collector processes
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.sharding import HashRing
+from snmp_collector import ShardedSnapshotCollector
+
+NODES = ["coletor-a", "coletor-b", "coletor-c"]
+
+
+def write_config(path, servers, node_id, snapshot_file, nodes=NODES):
+    config = {
+        "coleta_config": {
+            "collection_interval_seconds": 1,
+            "config_reload_seconds": 0,
+            "shard_nodes": nodes,
+            "shard_node_id": node_id,
+            "shared_snapshot_file": snapshot_file
+        },
+        "servers": servers
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+def integrated_energy(collector, device_id):
+    state = collector.energy.device_energy(device_id)
+    return state.total_kwh if state is not None else 0.0
+
+
+def run_collector_node(config_file, seconds):
+    """Collector process: polls its shard (fake SNMP agent, fixed 250 W) and publishes it"""
+    os.environ.pop("TESTING", None)
+    from datetime import datetime
+    import snmp_collector
+    from snmp_collector import SNMPCollector, SNMPCredentials, ServerMetrics
+
+    async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+        return ServerMetrics(device_id, 250.0, datetime.now(), 'snmp_real', 'success')
+
+    snmp_collector.SNMP_AVAILABLE = True
+    collector = SNMPCollector(config_file=config_file)
+    collector.credentials = SNMPCredentials(username="test_user", auth_key="auth_password", priv_key="priv_password")
+    collector.collection_mode = 'power'
+    collector._async_snmp_get = fake_snmp_get
+    collector.start()
+    time.sleep(seconds)
+    # Under load a slot may not have polled twice yet: wait until every device integrated energy
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and not all(
+        integrated_energy(collector, server["device_id"]) > 0 for server in collector.servers_config
+    ):
+        time.sleep(0.1)
+    # One more cycle so the published snapshot carries the energy
+    time.sleep(1.2)
+    collector.close()
+
+
+class TestShardedCollection(unittest.TestCase):
+    """Several collector processes split the fleet; the aggregator merges it"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.servers = [
+            {"device_id": f"SRV-HP-{i:03d}", "ip_address": f"10.0.1.{i}", "generation": "gen10"}
+            for i in range(1, 31)
+        ]
+
+    def _run_nodes(self, nodes, seconds=2.5, ring_nodes=NODES):
+        context = multiprocessing.get_context("spawn")
+        paths, processes = {}, []
+        for node in nodes:
+            paths[node] = os.path.join(self.tmpdir.name, node)
+            config_file = os.path.join(self.tmpdir.name, f"{node}.json")
+            write_config(config_file, self.servers, node, paths[node], ring_nodes)
+            processes.append(context.Process(target=run_collector_node, args=(config_file, seconds)))
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+            self.assertEqual(process.exitcode, 0)
+        return paths
+
+    def test_nodes_split_fleet_and_aggregator_merges(self):
+        """Each device is collected by exactly one node and appears once in the merge"""
+        paths = self._run_nodes(NODES)
+        aggregator = ShardedSnapshotCollector(paths)
+        self.addCleanup(aggregator.close)
+
+        ring = HashRing(NODES)
+        status = aggregator.get_shard_status()
+        for node in NODES:
+            expected = sum(1 for server in self.servers if ring.node_for(server["device_id"]) == node)
+            self.assertEqual(status[node]["devices"], expected)
+
+        snapshot = aggregator.get_snapshot()
+        self.assertEqual([m.device_id for m in snapshot.metrics], [s["device_id"] for s in self.servers])
+        self.assertAlmostEqual(snapshot.total_watts, sum(m.power_consumption_watts for m in snapshot.metrics))
+
+        total_kw, fonte = aggregator.get_total_power_kw()
+        self.assertAlmostEqual(total_kw, snapshot.total_watts / 1000)
+        self.assertEqual(fonte, 'snmp_real')
+
+        energy = aggregator.get_energy_summary()
+        self.assertEqual(energy.devices, len(self.servers))
+        self.assertGreater(energy.total_kwh, 0)
+        hourly, _ = aggregator.get_energy_buckets()
+        self.assertAlmostEqual(sum(kwh for _, kwh in hourly), energy.total_kwh)
+
+    def test_missing_node_gives_partial_view(self):
+        """A node that never published is left out instead of failing the read"""
+        paths = self._run_nodes(NODES[:2], seconds=1)  # coletor-c is configured but down
+        paths["coletor-c"] = os.path.join(self.tmpdir.name, "coletor-c")
+        aggregator = ShardedSnapshotCollector(paths)
+        self.addCleanup(aggregator.close)
+
+        self.assertIsNone(aggregator.get_shard_status()["coletor-c"])
+        ring = HashRing(NODES)
+        expected = [s["device_id"] for s in self.servers if ring.node_for(s["device_id"]) != "coletor-c"]
+        self.assertEqual([m.device_id for m in aggregator.get_snapshot().metrics], expected)
+
+        empty = ShardedSnapshotCollector({"coletor-x": os.path.join(self.tmpdir.name, "coletor-x")})
+        with self.assertRaises(RuntimeError):
+            empty.get_total_power_kw()
+        self.assertFalse(empty.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Unit tests for the Server-Sent Events broadcaster
+"""
+
+import unittest
+import sys
+import os
+import json
+import threading
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from routes import broadcast
+from routes.broadcast import Broadcaster, encode_event
+
+
+def parse(frame):
+    """Split an SSE frame into its fields (data decoded from JSON)"""
+    fields = dict(line.split(': ', 1) for line in frame.decode('utf-8').strip().split('\n'))
+    fields['data'] = json.loads(fields['data'])
+    return fields
+
+
+class TestBroadcaster(unittest.TestCase):
+    """Test fan-out, catch-up and keepalive behaviour"""
+
+    def setUp(self):
+        self.stream = Broadcaster(backlog=3)
+
+    def test_encode_event(self):
+        """Test the SSE wire format"""
+        frame = encode_event('delta', {'consumo_atual': 44.5}, 7)
+
+        self.assertEqual(frame, b'id: 7\nevent: delta\ndata: {"consumo_atual":44.5}\n\n')
+
+    def test_new_subscriber_gets_full_state(self):
+        """Test that a subscriber without Last-Event-ID starts from the snapshot"""
+        self.stream.publish({'a': 1, 'b': 2}, {'a': 1, 'b': 2})
+        self.stream.publish({'b': 3}, {'a': 1, 'b': 3})
+
+        frames, last_id = self.stream.next_frames(None, timeout=0)
+
+        self.assertEqual(last_id, 2)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(parse(frames[0]), {'id': '2', 'event': 'snapshot', 'data': {'a': 1, 'b': 3}})
+
+    def test_reconnect_replays_missed_deltas(self):
+        """Test that Last-Event-ID inside the backlog receives only the deltas after it"""
+        for value in range(1, 4):
+            self.stream.publish({'b': value}, {'b': value})
+
+        frames, last_id = self.stream.next_frames(1, timeout=0)
+
+        self.assertEqual(last_id, 3)
+        self.assertEqual([parse(frame)['event'] for frame in frames], ['delta', 'delta'])
+        self.assertEqual([parse(frame)['data'] for frame in frames], [{'b': 2}, {'b': 3}])
+
+    def test_lagging_subscriber_gets_full_state(self):
+        """Test that a subscriber behind the backlog is resynchronised with the snapshot"""
+        for value in range(1, 6):
+            self.stream.publish({'b': value}, {'b': value})
+
+        frames, last_id = self.stream.next_frames(1, timeout=0)
+
+        self.assertEqual(last_id, 5)
+        self.assertEqual([parse(frame)['event'] for frame in frames], ['snapshot'])
+
+    def test_unknown_event_id_gets_full_state(self):
+        """Test that an id from a previous server process does not skip the snapshot"""
+        self.stream.publish({'b': 1}, {'b': 1})
+
+        frames, _ = self.stream.next_frames(40, timeout=0)
+
+        self.assertEqual(parse(frames[0])['event'], 'snapshot')
+
+    def test_timeout_without_events(self):
+        """Test that an up-to-date subscriber gets no frames after the timeout"""
+        self.stream.publish({'b': 1}, {'b': 1})
+
+        self.assertEqual(self.stream.next_frames(1, timeout=0.01), ([], 1))
+        self.assertEqual(Broadcaster().next_frames(None, timeout=0.01), ([], None))
+
+    def test_subscribers_share_one_serialization(self):
+        """Test that N waiting subscribers receive the same encoded frame"""
+        self.stream.publish({'b': 1}, {'b': 1})
+        received = []
+        ready = threading.Barrier(21)
+
+        def subscriber():
+            with self.stream.subscription():
+                ready.wait(5)
+                received.append(self.stream.next_frames(1, timeout=5)[0])
+
+        threads = [threading.Thread(target=subscriber) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        ready.wait(5)
+
+        with patch.object(broadcast, 'encode_event', wraps=encode_event) as encode:
+            self.stream.publish({'b': 2}, {'b': 2})
+        for thread in threads:
+            thread.join(5)
+
+        # One delta frame and one snapshot frame, whatever the subscriber count
+        self.assertEqual(encode.call_count, 2)
+        self.assertEqual(len(received), 20)
+        self.assertTrue(all(frames[0] is received[0][0] for frames in received))
+        self.assertEqual(self.stream.subscribers, 0)
+
+    def test_close_wakes_subscribers(self):
+        """Test that close() ends blocked subscribers"""
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.stream.next_frames(None)))
+        thread.start()
+
+        self.stream.close()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result, [([], None)])
+        self.assertTrue(self.stream.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Unit tests for the carbon data loader
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from data_sources.carbon_data import CarbonDataLoader, DERIVED_GRAPH, _node_sections
+
+
+class TestDerivedGraph(unittest.TestCase):
+    """Test the memoized dependency graph of derived metrics"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmpdir.name, 'carbon_data.json')
+        self.data = CarbonDataLoader(config_path=self.config_path).data
+        self.write_config()
+        self.loader = CarbonDataLoader(config_path=self.config_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_config(self):
+        with open(self.config_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+
+    def count_walks(self, fn):
+        """Run fn and count how many times it walked the server data"""
+        with patch.object(self.loader, 'get_server_data', wraps=self.loader.get_server_data) as walks:
+            fn()
+        return walks.call_count
+
+    def all_endpoints(self):
+        """The loader calls made by /api/servers, /api/pue, /api/virtualization and /api/savings"""
+        self.loader.get_server_metrics()
+        self.loader.get_cooling_efficiency()
+        self.loader.get_datacenter_consumption()
+        self.loader.get_server_metrics()
+        self.loader.get_consolidation_potential()
+        self.loader.get_optimization_potential()
+        self.loader.get_consolidation_potential()
+        self.loader.get_cooling_efficiency()
+
+    def test_node_sections_follow_node_edges(self):
+        """Test that a node depends on the sections of the nodes it reads"""
+        self.assertEqual(
+            _node_sections('get_optimization_potential'),
+            ('carbon_sequestration', 'datacenter', 'emission_factors', 'energy_costs',
+             'servers', 'workload_patterns')
+        )
+        self.assertEqual(_node_sections('get_cooling_efficiency'), ('datacenter', 'servers'))
+        # Every edge points to a node or to a section of the data
+        for dependencies in DERIVED_GRAPH.values():
+            for dependency in dependencies:
+                self.assertTrue(dependency in DERIVED_GRAPH or dependency in self.data, dependency)
+
+    def test_each_node_computed_once(self):
+        """Test that every derived metric walks the data once, then is served from cache"""
+        # server metrics, cooling, consumption, consolidation
+        self.assertEqual(self.count_walks(self.all_endpoints), 4)
+        self.assertEqual(self.count_walks(self.all_endpoints), 0)
+        self.assertEqual(self.loader.cache_misses, 5)
+        self.assertIs(self.loader.get_server_metrics(), self.loader.get_server_metrics())
+
+    def test_cache_keyed_by_arguments(self):
+        """Test that different arguments are separate nodes"""
+        day = self.loader.get_datacenter_consumption(hour=10)
+        night = self.loader.get_datacenter_consumption(hour=2)
+
+        self.assertIs(self.loader.get_datacenter_consumption(hour=10), day)
+        self.assertNotEqual(day, night)
+
+    def test_reload_without_changes_keeps_cache(self):
+        """Test that reloading an unchanged file invalidates nothing"""
+        self.all_endpoints()
+
+        self.assertFalse(self.loader.reload())
+        self.assertEqual(self.count_walks(self.all_endpoints), 0)
+
+    def test_reload_recomputes_only_affected_nodes(self):
+        """Test that a changed section invalidates just the nodes depending on it"""
+        self.all_endpoints()
+        metrics = self.loader.get_server_metrics()
+        cooling = self.loader.get_cooling_efficiency()
+        version = self.loader.data_version
+
+        self.data["energy_costs"]["base_rate_brl_per_kwh"] = 0.90
+        self.write_config()
+        self.assertTrue(self.loader.reload())
+        self.assertNotEqual(self.loader.data_version, version)
+
+        # Unaffected by energy costs: same cached objects
+        self.assertIs(self.loader.get_server_metrics(), metrics)
+        self.assertIs(self.loader.get_cooling_efficiency(), cooling)
+        # Consolidation reads energy costs; optimization reads consolidation
+        misses = self.loader.cache_misses
+        consolidation = self.loader.get_consolidation_potential()
+        self.loader.get_optimization_potential()
+        self.assertEqual(self.loader.cache_misses, misses + 2)
+        self.assertEqual(
+            consolidation["cost_savings_brl"], round(consolidation["energy_savings_kwh"] * 0.90, 2)
+        )
+
+    def test_loaders_do_not_share_results(self):
+        """Test that two loaders with different data never share cached results"""
+        self.data["servers"]["hp_proliant"]["count"] = 1
+        self.write_config()
+        other = CarbonDataLoader(config_path=self.config_path)
+
+        self.assertNotEqual(self.loader.get_server_metrics(), other.get_server_metrics())
+
+
+if __name__ == '__main__':
+    unittest.main()
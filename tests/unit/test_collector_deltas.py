@@ -0,0 +1,88 @@
+"""
+Unit tests for delta-only publishing (ChangeTracker)
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.deltas import ChangeTracker
+from snmp_collector import ServerMetrics
+
+
+def metric(device_id, watts, status='success', source='snmp_real'):
+    return ServerMetrics(device_id, watts, datetime(2025, 1, 20, 10, 0), source, status)
+
+
+class TestChangeTracker(unittest.TestCase):
+    """Test deadband filtering, running totals and the change log"""
+
+    def setUp(self):
+        self.tracker = ChangeTracker(deadband_watts=5.0)
+        self.tracker.sync([metric('A', 400.0), metric('B', 300.0)], version=1)
+
+    def test_small_moves_are_suppressed(self):
+        """Test that readings within the deadband keep the published metric"""
+        changes = self.tracker.apply([metric('A', 404.0), metric('B', 295.0)], version=2)
+
+        self.assertEqual(changes, [])
+        self.assertEqual(self.tracker.suppressed, 2)
+        metrics, total_watts, fonte = self.tracker.state()
+        self.assertEqual([m.power_consumption_watts for m in metrics], [400.0, 300.0])
+        self.assertEqual(total_watts, 700.0)
+
+    def test_large_move_updates_total(self):
+        """Test that a move beyond the deadband emits one event and adjusts the total"""
+        changes = self.tracker.apply([metric('A', 450.5), metric('B', 301.0)], version=2)
+
+        self.assertEqual([c.device_id for c in changes], ['A'])
+        self.assertEqual(changes[0].version, 2)
+        self.assertAlmostEqual(changes[0].delta_watts, 50.5)
+        self.assertEqual(self.tracker.total_watts, 750.5)
+
+    def test_status_change_is_always_published(self):
+        """Test that a status or source change bypasses the deadband"""
+        changes = self.tracker.apply([metric('B', 300.0, status='error', source='simulado')], version=2)
+
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(self.tracker.state()[2], 'mixed')
+        self.tracker.apply([metric('A', 400.0, source='simulado')], version=3)
+        self.assertEqual(self.tracker.state()[2], 'simulado')
+
+    def test_sync_removes_missing_devices(self):
+        """Test that a full sync drops absent devices and follows the new order"""
+        changes = self.tracker.sync([metric('C', 100.0), metric('A', 401.0)], version=2)
+
+        self.assertEqual(sorted((c.device_id, c.current is None) for c in changes), [('B', True), ('C', False)])
+        metrics, total_watts, _ = self.tracker.state()
+        self.assertEqual([m.device_id for m in metrics], ['C', 'A'])
+        self.assertEqual(total_watts, 500.0)
+        self.assertIsNone(self.tracker.remove('B', version=3))
+
+    def test_total_does_not_drift(self):
+        """Test that many incremental updates add up exactly"""
+        tracker = ChangeTracker()
+        for version in range(1, 1001):
+            tracker.apply([metric('A', 0.1 * version), metric('B', 0.3 * version)], version)
+        self.assertEqual(tracker.total_watts, 400.0)
+
+    def test_changes_since(self):
+        """Test that consumers read events after a version until the log overflows"""
+        tracker = ChangeTracker(log_size=3)
+        tracker.apply([metric('A', 1.0), metric('B', 2.0)], version=1)
+        tracker.apply([metric('A', 10.0)], version=2)
+
+        self.assertEqual([c.version for c in tracker.changes_since(1)], [2])
+        self.assertEqual(len(tracker.changes_since(0)), 3)
+
+        tracker.apply([metric('B', 20.0)], version=3)
+        self.assertIsNone(tracker.changes_since(0))
+        self.assertEqual([c.device_id for c in tracker.changes_since(1)], ['A', 'B'])
+
+
+if __name__ == '__main__':
+    unittest.main()
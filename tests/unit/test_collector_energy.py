@@ -0,0 +1,112 @@
+"""
+Unit tests for trapezoidal energy integration
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.energy import EnergyIntegrator
+
+
+class TestEnergyIntegrator(unittest.TestCase):
+    """Test per-device kWh accumulation and bucket roll-ups"""
+
+    def setUp(self):
+        self.integrator = EnergyIntegrator(max_gap_seconds=600)
+        self.start = datetime(2025, 1, 20, 9, 50, 0)
+
+    def at(self, minutes):
+        return self.start + timedelta(minutes=minutes)
+
+    def test_constant_power(self):
+        """Test that a constant 1 kW load over one hour yields 1 kWh"""
+        for minute in range(0, 61, 5):
+            self.integrator.add_sample('SRV-1', self.at(minute), 1000.0)
+
+        self.assertAlmostEqual(self.integrator.total_kwh, 1.0)
+        self.assertAlmostEqual(self.integrator.device_energy('SRV-1').total_kwh, 1.0)
+
+    def test_trapezoid_between_readings(self):
+        """Test linear interpolation between two readings"""
+        self.integrator.add_sample('SRV-1', self.at(0), 200.0)
+        added = self.integrator.add_sample('SRV-1', self.at(6), 400.0)
+
+        # 0.1h x 300W average
+        self.assertAlmostEqual(added, 0.03)
+
+    def test_segment_split_at_hour_boundary(self):
+        """Test that a segment crossing the hour is split between buckets"""
+        self.integrator.add_sample('SRV-1', self.at(0), 600.0)
+        self.integrator.add_sample('SRV-1', self.at(10), 600.0)
+        self.integrator.add_sample('SRV-1', self.at(20), 600.0)
+
+        hourly = dict(self.integrator.hourly())
+        self.assertAlmostEqual(hourly[datetime(2025, 1, 20, 9)], 0.1)
+        self.assertAlmostEqual(hourly[datetime(2025, 1, 20, 10)], 0.1)
+
+    def test_gap_is_not_integrated(self):
+        """Test that readings further apart than max_gap_seconds leave a gap"""
+        self.integrator.add_sample('SRV-1', self.at(0), 500.0)
+        added = self.integrator.add_sample('SRV-1', self.at(30), 500.0)
+
+        self.assertEqual(added, 0.0)
+        state = self.integrator.device_energy('SRV-1')
+        self.assertEqual(state.gaps, 1)
+        self.assertAlmostEqual(state.gap_seconds, 1800)
+        self.assertAlmostEqual(self.integrator.summary(self.at(30)).gap_seconds, 1800)
+
+        # Integration resumes from the reading after the gap
+        self.integrator.add_sample('SRV-1', self.at(36), 500.0)
+        self.assertAlmostEqual(self.integrator.total_kwh, 0.05)
+
+    def test_duplicate_and_out_of_order_samples_ignored(self):
+        """Test that repeated or older timestamps add nothing"""
+        self.integrator.add_sample('SRV-1', self.at(0), 500.0)
+        self.integrator.add_sample('SRV-1', self.at(6), 500.0)
+        self.assertEqual(self.integrator.add_sample('SRV-1', self.at(6), 500.0), 0.0)
+        self.assertEqual(self.integrator.add_sample('SRV-1', self.at(3), 500.0), 0.0)
+        self.assertEqual(self.integrator.device_energy('SRV-1').samples, 2)
+        # Ignored samples leave the sequence (ETag version) untouched
+        self.assertEqual(self.integrator.sequence, 2)
+        self.integrator.forget('SRV-1')
+        self.assertEqual(self.integrator.sequence, 3)
+
+    def test_summary_and_daily_rollup(self):
+        """Test fleet summary windows and daily buckets across devices"""
+        for device in ('SRV-1', 'SRV-2'):
+            self.integrator.add_sample(device, self.at(0), 1000.0)
+            self.integrator.add_sample(device, self.at(6), 1000.0)
+
+        summary = self.integrator.summary(self.at(8))
+        self.assertEqual(summary.devices, 2)
+        self.assertAlmostEqual(summary.total_kwh, 0.2)
+        self.assertAlmostEqual(summary.current_hour_kwh, 0.2)
+        self.assertAlmostEqual(summary.today_kwh, 0.2)
+        self.assertAlmostEqual(summary.last_24h_kwh, 0.2)
+        self.assertAlmostEqual(summary.last_24h_device_seconds, 2 * 6 * 60)
+        self.assertEqual(summary.since, self.at(0))
+        self.assertEqual(self.integrator.daily(), [(self.start.date(), summary.today_kwh)])
+
+        # Next day: today's bucket is empty, the 24h window still sees it
+        tomorrow = self.integrator.summary(self.start + timedelta(hours=20))
+        self.assertEqual(tomorrow.today_kwh, 0.0)
+        self.assertAlmostEqual(tomorrow.last_24h_kwh, 0.2)
+
+    def test_bucket_retention(self):
+        """Test that old hourly buckets are pruned"""
+        integrator = EnergyIntegrator(max_gap_seconds=7200, hourly_retention=3)
+        for hour in range(6):
+            integrator.add_sample('SRV-1', self.start + timedelta(hours=hour), 100.0)
+
+        hours = [hour for hour, _ in integrator.hourly()]
+        self.assertEqual(len(hours), 3)
+        self.assertEqual(hours[-1], datetime(2025, 1, 20, 14))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Unit tests for the per-device power history ring buffers
+"""
+
+import unittest
+import sys
+import os
+from array import array
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.history import MISSING, SampleHistory, SampleRing
+
+
+class TestSampleRing(unittest.TestCase):
+    """Test cell placement, gaps and wrap-around"""
+
+    def setUp(self):
+        self.ring = SampleRing(capacity=4, step=30.0)
+
+    def test_window_of_consecutive_samples(self):
+        """Test that samples land in consecutive cells and are returned in order"""
+        for index, watts in enumerate((400, 410, 420)):
+            self.ring.append(3000 + index * 30, watts)
+
+        window = self.ring.window(0, 10_000)
+        self.assertEqual(list(window.watts), [400, 410, 420])
+        self.assertEqual(window.start, 3000)
+        self.assertEqual(window.end, 3090)
+        self.assertEqual(window.count, 3)
+        self.assertAlmostEqual(window.mean(), 410.0)
+        self.assertEqual((window.minimum(), window.maximum()), (400, 420))
+
+    def test_same_cell_replaces_previous_reading(self):
+        """Test that a second reading in the same cell overwrites the first"""
+        self.ring.append(3000, 400.4)
+        self.ring.append(3010, 450.6)
+
+        self.assertEqual(list(self.ring.window(0, 10_000).watts), [451])
+
+    def test_gap_cells_are_missing(self):
+        """Test that cells skipped between readings are marked as missing"""
+        self.ring.append(3000, 400)
+        self.ring.append(3090, 500)
+
+        window = self.ring.window(0, 10_000)
+        self.assertEqual(list(window.watts), [400, MISSING, MISSING, 500])
+        self.assertEqual(window.count, 2)
+        self.assertEqual(window.coverage, 0.5)
+        self.assertAlmostEqual(window.mean(), 450.0)
+        self.assertEqual((window.minimum(), window.maximum()), (400, 500))
+        self.assertEqual(list(window.points()), [(3000, 400), (3090, 500)])
+
+    def test_wrap_around_keeps_latest_cells(self):
+        """Test that the buffer keeps only the last `capacity` cells"""
+        for index in range(10):
+            self.ring.append(3000 + index * 30, 100 + index)
+
+        window = self.ring.window(0, 10_000)
+        self.assertEqual(list(window.watts), [106, 107, 108, 109])
+        self.assertEqual(window.start, 3000 + 6 * 30)
+
+        # Older than the buffer: dropped; out of order but inside: placed
+        self.assertFalse(self.ring.append(3000, 999))
+        self.assertTrue(self.ring.append(3000 + 7 * 30, 200))
+        self.assertEqual(list(self.ring.window(0, 10_000).watts), [106, 200, 108, 109])
+
+    def test_long_gap_clears_buffer(self):
+        """Test that a gap longer than the buffer leaves only the new reading"""
+        for index in range(3):
+            self.ring.append(3000 + index * 30, 400)
+        self.ring.append(3000 + 100 * 30, 500)
+
+        window = self.ring.window(0, 10_000)
+        self.assertEqual(list(window.watts), [MISSING, MISSING, MISSING, 500])
+        self.assertEqual(window.count, 1)
+
+    def test_partial_window(self):
+        """Test that the window covers only the cells intersecting the range"""
+        for index in range(4):
+            self.ring.append(3000 + index * 30, 100 + index)
+
+        window = self.ring.window(3040, 3070)
+        self.assertEqual(list(window.watts), [101, 102])
+        self.assertEqual(window.start, 3030)
+        self.assertEqual(len(self.ring.window(5000, 6000)), 0)
+
+    def test_values_are_clamped_to_storage_range(self):
+        """Test that readings outside the 16-bit range do not collide with MISSING"""
+        self.ring.append(3000, -5)
+        self.ring.append(3030, 1e9)
+
+        self.assertEqual(list(self.ring.window(0, 10_000).watts), [0, MISSING - 1])
+
+    def test_window_is_a_copy(self):
+        """Test that returned windows do not change with later readings"""
+        self.ring.append(3000, 400)
+        window = self.ring.window(0, 10_000)
+        self.ring.append(3000, 800)
+
+        self.assertEqual(list(window.watts), [400])
+        self.assertIsInstance(window.watts, array)
+
+    def test_empty_window(self):
+        """Test statistics of a ring without readings"""
+        window = self.ring.window(0, 10_000)
+
+        self.assertEqual(len(window), 0)
+        self.assertIsNone(window.mean())
+        self.assertIsNone(window.minimum())
+        self.assertIsNone(window.maximum())
+
+
+class TestSampleHistory(unittest.TestCase):
+    """Test the per-device history container"""
+
+    def setUp(self):
+        self.history = SampleHistory(step_seconds=30, retention_seconds=3600)
+        self.start = datetime(2025, 1, 20, 10, 0, 0)
+
+    def test_capacity_from_retention(self):
+        """Test that one hour of 30s cells holds 120 cells of 2 bytes"""
+        self.history.record('SRV-1', self.start, 400)
+
+        self.assertEqual(self.history.capacity, 120)
+        self.assertEqual(self.history.nbytes(), 240)
+
+    def test_window_relative_to_now(self):
+        """Test that the window ends at `now` and spans `seconds`"""
+        base = self.start.timestamp()
+        for minute in range(10):
+            self.history.record('SRV-1', datetime.fromtimestamp(base + minute * 60), 400 + minute)
+
+        window = self.history.window('SRV-1', seconds=150, now=base + 9 * 60)
+        self.assertEqual(list(window.points())[-1], (base + 9 * 60, 409))
+        self.assertEqual(window.count, 3)
+        self.assertIsNone(self.history.window('SRV-2'))
+
+    def test_forget_and_reconfigure(self):
+        """Test that forgetting a device or changing the cell size drops history"""
+        self.history.record('SRV-1', self.start, 400)
+        self.history.record('SRV-2', self.start, 500)
+
+        self.history.forget('SRV-1')
+        self.assertEqual(self.history.devices(), ['SRV-2'])
+
+        self.history.configure(30, 3600)
+        self.assertEqual(len(self.history), 1)
+        self.history.configure(60, 3600)
+        self.assertEqual(len(self.history), 0)
+        self.assertEqual(self.history.capacity, 60)
+
+    def test_invalid_configuration(self):
+        """Test that non-positive cell size or retention is rejected"""
+        with self.assertRaises(ValueError):
+            self.history.configure(0, 3600)
+        with self.assertRaises(ValueError):
+            SampleRing(capacity=0, step=30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Unit tests for the Redfish client helpers (incremental PowerControl parsing, sessions)
+"""
+
+import unittest
+import sys
+import os
+import json
+import asyncio
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.redfish import MAX_POWER_CONTROL_BYTES, PowerControlParser, PowerReading, RedfishClient, RedfishError
+
+
+POWER_RESOURCE = {
+    '@odata.id': '/redfish/v1/Chassis/1/Power',
+    'Id': 'Power',
+    'Name': 'Potência — chassi',
+    'PowerControl': [{
+        '@odata.id': '/redfish/v1/Chassis/1/Power#/PowerControl/0',
+        'PowerConsumedWatts': 412,
+        'PowerMetrics': {
+            'IntervalInMin': 20,
+            'AverageConsumedWatts': 400,
+            'MinConsumedWatts': 380,
+            'MaxConsumedWatts': 450
+        },
+        'RelatedItem': [{'@odata.id': '/redfish/v1/Chassis/1'}]
+    }],
+    'Voltages': [{'MemberId': str(i), 'ReadingVolts': 12.0} for i in range(50)]
+}
+
+
+class TestPowerControlParser(unittest.TestCase):
+    """Test that PowerControl is extracted from a body arriving in pieces"""
+
+    def parse(self, body: bytes, size: int) -> PowerControlParser:
+        parser = PowerControlParser()
+        for start in range(0, len(body), size):
+            parser.feed(body[start:start + size])
+        return parser
+
+    def test_any_chunk_size(self):
+        """Test that the result does not depend on where chunks are split"""
+        body = json.dumps(POWER_RESOURCE, ensure_ascii=False, indent=1).encode('utf-8')
+        for size in (1, 2, 7, 64, 1000, len(body)):
+            parser = self.parse(body, size)
+            self.assertTrue(parser.done, size)
+            self.assertEqual(parser.value, POWER_RESOURCE['PowerControl'])
+
+    def test_stops_buffering_after_power_control(self):
+        """Test that chunks after the array are ignored without buffering"""
+        body = json.dumps(POWER_RESOURCE).encode('utf-8')
+        end = body.index(b'"Voltages"')
+        parser = self.parse(body[:end], 16)
+        self.assertTrue(parser.done)
+
+        parser.feed(b'garbage that is not JSON ]')
+        self.assertEqual(parser.value[0]['PowerConsumedWatts'], 412)
+        self.assertEqual(len(parser._buffer), 0)
+
+    def test_prefix_is_not_accumulated(self):
+        """Test that only a short tail is kept while the key has not arrived"""
+        parser = PowerControlParser()
+        for _ in range(100):
+            parser.feed(b'{"Voltages": [' + b'{"ReadingVolts": 12.0}, ' * 40)
+        self.assertFalse(parser.done)
+        self.assertLessEqual(len(parser._buffer), 64)
+
+    def test_size_limit_without_closing_bracket(self):
+        """Test that an array that never closes cannot grow the buffer past the limit"""
+        parser = PowerControlParser()
+        parser.feed(b'{"PowerControl": [')
+        with self.assertRaises(RedfishError):
+            for _ in range(MAX_POWER_CONTROL_BYTES // 1024 + 2):
+                parser.feed(b'{"MemberId": "0"}, ' * 55 + b' ' * (1024 - 55 * 19))
+        self.assertLessEqual(len(parser._buffer), MAX_POWER_CONTROL_BYTES + 1024)
+
+    def test_array_decoded_once(self):
+        """Test that nested brackets and brackets inside strings do not trigger early decodes"""
+        body = json.dumps(POWER_RESOURCE, ensure_ascii=False).encode('utf-8')
+        with patch('collector.redfish.json.loads', wraps=json.loads) as loads:
+            parser = self.parse(body, 7)
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(parser.value, POWER_RESOURCE['PowerControl'])
+
+        parser = self.parse(b'{"PowerControl": [{"Name": "fonte ] \\"[x\\" }"}], "x": 1}', 3)
+        self.assertEqual(parser.value, [{'Name': 'fonte ] "[x" }'}])
+
+    def test_missing_power_control(self):
+        """Test a resource without PowerControl"""
+        parser = self.parse(json.dumps({'Id': 'Power', 'Voltages': []}).encode(), 8)
+        self.assertFalse(parser.done)
+
+    def test_power_control_must_be_array(self):
+        """Test that a non-array PowerControl is rejected"""
+        with self.assertRaises(RedfishError):
+            self.parse(b'{"PowerControl": {"PowerConsumedWatts": 1}, "x": []}', 100)
+
+
+class TestPowerReading(unittest.TestCase):
+    """Test conversion of PowerControl members"""
+
+    def test_reading_with_metrics(self):
+        """Test that consumed, average, min and max watts are read"""
+        reading = PowerReading.from_power_control(POWER_RESOURCE['PowerControl'])
+
+        self.assertEqual(reading.consumed_watts, 412.0)
+        self.assertEqual((reading.average_watts, reading.min_watts, reading.max_watts), (400.0, 380.0, 450.0))
+        self.assertEqual(reading.interval_minutes, 20)
+
+    def test_first_member_with_consumption(self):
+        """Test that members without PowerConsumedWatts are skipped"""
+        reading = PowerReading.from_power_control([
+            {'MemberId': '0', 'PowerConsumedWatts': None},
+            {'MemberId': '1', 'PowerConsumedWatts': 250}
+        ])
+
+        self.assertEqual(reading.consumed_watts, 250.0)
+        self.assertIsNone(reading.average_watts)
+
+    def test_no_consumption(self):
+        """Test that PowerControl without any reading is an error"""
+        with self.assertRaises(RedfishError):
+            PowerReading.from_power_control([{'MemberId': '0'}])
+
+
+class TestRedfishSessions(unittest.TestCase):
+    """Test session handling without a network"""
+
+    def test_rejected_session_is_forgotten(self):
+        """Test that a session refused right after login is logged out and dropped with the host connections"""
+        client = RedfishClient('ecoti', 'senha')
+        key = ('https', '10.0.3.1', 443)
+        discarded = []
+        requests = []
+        client.pool.discard = discarded.append
+
+        async def fake_request(key, method, path, headers, body=None, on_chunk=None):
+            requests.append((method, path, headers.get('X-Auth-Token')))
+            if method == 'POST':
+                return 201, {'x-auth-token': f"token-{client.logins}", 'location': f"/s/{client.logins}"}, b''
+            return 401, {}, b''
+
+        async def poll():
+            try:
+                await client.get_power('10.0.3.1', 443)
+            finally:
+                await asyncio.gather(*client._forgetting)
+
+        client._request = fake_request
+        with self.assertRaises(RedfishError) as error:
+            asyncio.run(poll())
+
+        self.assertEqual(error.exception.status, 401)
+        self.assertEqual(client.logins, 2)
+        self.assertEqual(client._sessions, {})
+        # The rejected session is still deleted on the BMC (best effort) before the connections go
+        self.assertEqual(requests[-1], ('DELETE', '/s/1', 'token-1'))
+        self.assertEqual(discarded, [key])
+
+    def test_forget_survives_failed_logout(self):
+        """Test that an unreachable BMC does not keep a forgotten host's connections"""
+        client = RedfishClient('ecoti', 'senha')
+        key = ('https', '10.0.3.2', 443)
+        discarded = []
+        client.pool.discard = discarded.append
+        client._sessions[key] = ('token', '/redfish/v1/SessionService/Sessions/7')
+
+        async def fake_request(key, method, path, headers, body=None, on_chunk=None):
+            raise RedfishError("Conexão recusada")
+
+        async def forget():
+            client.forget('10.0.3.2', 443)
+            await asyncio.gather(*client._forgetting)
+
+        client._request = fake_request
+        asyncio.run(forget())
+
+        self.assertEqual(client._sessions, {})
+        self.assertEqual(discarded, [key])
+
+if __name__ == '__main__':
+    unittest.main()
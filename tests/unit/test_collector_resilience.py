@@ -0,0 +1,128 @@
+"""
+Unit tests for per-device collector resilience (circuit breaker, adaptive timeouts)
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.resilience import CircuitBreaker, RTTEstimator
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test circuit breaker state machine"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=3, cooldown_seconds=60, max_cooldown_seconds=200, clock=self.clock
+        )
+
+    def test_opens_after_threshold(self):
+        """Test that the breaker opens after consecutive failures"""
+        for _ in range(2):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_success_resets_failures(self):
+        """Test that a success clears the failure count"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_single_probe(self):
+        """Test that only one probe is allowed after the cooldown"""
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.clock.now += 61
+        self.assertTrue(self.breaker.allow_request())
+        self.assertTrue(self.breaker.is_half_open)
+        self.assertFalse(self.breaker.allow_request())  # Probe already in flight
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_probe_doubles_cooldown(self):
+        """Test that a failed half-open probe reopens with a longer, capped cooldown"""
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.clock.now += 61
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.cooldown_seconds, 120)
+
+        self.clock.now += 100
+        self.assertFalse(self.breaker.allow_request())
+
+        self.clock.now += 21
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.cooldown_seconds, 200)  # Capped
+
+
+class TestRTTEstimator(unittest.TestCase):
+    """Test EWMA RTT estimation and adaptive timeout"""
+
+    def test_initial_timeout_is_max(self):
+        """Test that the timeout starts at the configured maximum"""
+        estimator = RTTEstimator(min_timeout=0.2, max_timeout=3.0)
+        self.assertEqual(estimator.timeout(), 3.0)
+
+    def test_timeout_converges_to_observed_rtt(self):
+        """Test that a stable RTT yields a tight timeout"""
+        estimator = RTTEstimator(min_timeout=0.05, max_timeout=3.0)
+        for _ in range(50):
+            estimator.observe(0.1)
+
+        self.assertAlmostEqual(estimator.srtt, 0.1, places=3)
+        self.assertLess(estimator.timeout(), 0.2)
+        self.assertGreaterEqual(estimator.timeout(), 0.1)
+
+    def test_timeout_is_clamped(self):
+        """Test min/max clamping"""
+        estimator = RTTEstimator(min_timeout=0.2, max_timeout=3.0)
+        estimator.observe(0.001)
+        self.assertEqual(estimator.timeout(), 0.2)
+
+        estimator.observe(10.0)
+        self.assertEqual(estimator.timeout(), 3.0)
+
+    def test_timeout_backs_off_until_next_sample(self):
+        """Test that timeouts double the timeout until a response arrives"""
+        estimator = RTTEstimator(min_timeout=0.01, max_timeout=3.0)
+        estimator.observe(0.1)
+        base = estimator.timeout()
+
+        estimator.on_timeout()
+        self.assertAlmostEqual(estimator.timeout(), base * 2)
+
+        estimator.observe(0.1)
+        self.assertLess(estimator.timeout(), base * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Unit tests for the staggered collection schedule (timing wheel)
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.scheduling import TimingWheel
+
+
+def make_servers(count, prefix="SRV-HP"):
+    return [{"device_id": f"{prefix}-{i:05d}", "ip_address": f"10.0.{i // 250}.{i % 250}"} for i in range(count)]
+
+
+class TestTimingWheel(unittest.TestCase):
+    """Test device distribution across the collection interval"""
+
+    def test_slot_is_stable(self):
+        """Test that a device always lands on the same slot"""
+        self.assertEqual(TimingWheel.slot_for("SRV-HP-001", 30), TimingWheel.slot_for("SRV-HP-001", 30))
+        self.assertTrue(0 <= TimingWheel.slot_for("VXRAIL-01", 30) < 30)
+
+    def test_devices_spread_evenly(self):
+        """Test that a large fleet is spread across all slots"""
+        wheel = TimingWheel.from_servers(make_servers(10000), 30)
+        sizes = wheel.slot_sizes()
+
+        self.assertEqual(len(wheel), 10000)
+        self.assertEqual(sum(sizes), 10000)
+        expected = 10000 / 30
+        self.assertGreater(min(sizes), expected * 0.8)
+        self.assertLess(max(sizes), expected * 1.2)
+
+    def test_add_and_remove_do_not_move_other_devices(self):
+        """Test that membership changes only touch the affected device"""
+        servers = make_servers(100)
+        wheel = TimingWheel.from_servers(servers, 10)
+        before = {s["device_id"]: TimingWheel.slot_for(s["device_id"], 10) for s in servers}
+
+        wheel.add({"device_id": "NEW-001"})
+        self.assertTrue(wheel.remove("SRV-HP-00000"))
+        self.assertFalse(wheel.remove("SRV-HP-00000"))
+
+        self.assertIn("NEW-001", wheel)
+        self.assertNotIn("SRV-HP-00000", wheel)
+        for slot in range(10):
+            for server in wheel.devices_in(slot):
+                if server["device_id"] in before:
+                    self.assertEqual(before[server["device_id"]], slot)
+
+    def test_invalid_slot_count(self):
+        """Test that a wheel needs at least one slot"""
+        with self.assertRaises(ValueError):
+            TimingWheel(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
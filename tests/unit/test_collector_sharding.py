@@ -0,0 +1,133 @@
+"""
+Unit tests for consistent-hash sharding of the fleet across collector nodes
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.energy import EnergySummary
+from collector.models import CollectorSnapshot, ServerMetrics, SharedSnapshot
+from collector.shared_snapshot import SharedSnapshotWriter, encode_shared_snapshot
+from collector.sharding import HashRing, ShardedSnapshotCollector, select_shard
+
+
+def make_device_ids(count):
+    return [f"SRV-HP-{i:05d}" for i in range(count)]
+
+
+class TestHashRing(unittest.TestCase):
+    """Test device assignment to collector nodes"""
+
+    def test_assignment_is_stable(self):
+        """Test that the owner depends only on the key and the node set"""
+        first = HashRing(["coletor-a", "coletor-b", "coletor-c"])
+        second = HashRing(["coletor-c", "coletor-a", "coletor-b"])
+        for device_id in make_device_ids(200):
+            self.assertEqual(first.node_for(device_id), second.node_for(device_id))
+
+    def test_load_is_balanced(self):
+        """Test that virtual nodes spread a large fleet evenly"""
+        ring = HashRing([f"coletor-{i}" for i in range(4)])
+        sizes = [len(keys) for keys in ring.assign(make_device_ids(10000)).values()]
+
+        self.assertEqual(sum(sizes), 10000)
+        self.assertGreater(min(sizes), 2500 * 0.8)
+        self.assertLess(max(sizes), 2500 * 1.2)
+
+    def test_adding_node_moves_only_its_share(self):
+        """Test that a joining node only takes devices from the others"""
+        devices = make_device_ids(10000)
+        ring = HashRing(["coletor-a", "coletor-b", "coletor-c"])
+        before = {device_id: ring.node_for(device_id) for device_id in devices}
+
+        ring.add_node("coletor-d")
+        moved = [device_id for device_id in devices if ring.node_for(device_id) != before[device_id]]
+
+        self.assertTrue(all(ring.node_for(device_id) == "coletor-d" for device_id in moved))
+        self.assertGreater(len(moved), 10000 * 0.25 * 0.8)
+        self.assertLess(len(moved), 10000 * 0.25 * 1.2)
+
+    def test_removing_node_moves_only_its_devices(self):
+        """Test that devices of the remaining nodes keep their owner"""
+        devices = make_device_ids(1000)
+        ring = HashRing(["coletor-a", "coletor-b", "coletor-c"])
+        before = {device_id: ring.node_for(device_id) for device_id in devices}
+
+        self.assertTrue(ring.remove_node("coletor-b"))
+        self.assertFalse(ring.remove_node("coletor-b"))
+        for device_id in devices:
+            if before[device_id] != "coletor-b":
+                self.assertEqual(ring.node_for(device_id), before[device_id])
+            else:
+                self.assertIn(ring.node_for(device_id), ("coletor-a", "coletor-c"))
+
+    def test_empty_ring(self):
+        """Test that an empty ring owns nothing"""
+        ring = HashRing()
+        self.assertIsNone(ring.node_for("SRV-HP-00001"))
+        self.assertEqual(ring.assign(["SRV-HP-00001"]), {})
+        with self.assertRaises(ValueError):
+            HashRing(vnodes=0)
+
+    def test_select_shard_partitions_servers(self):
+        """Test that every server belongs to exactly one shard"""
+        servers = [{"device_id": device_id} for device_id in make_device_ids(300)]
+        ring = HashRing(["coletor-a", "coletor-b"])
+        shard_a = select_shard(servers, ring, "coletor-a")
+        shard_b = select_shard(servers, ring, "coletor-b")
+
+        self.assertEqual(len(shard_a) + len(shard_b), 300)
+        self.assertFalse({s["device_id"] for s in shard_a} & {s["device_id"] for s in shard_b})
+
+
+class TestShardedSnapshotCollector(unittest.TestCase):
+    """Test merging the partial snapshots published by each node"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = {node: os.path.join(self.tmpdir.name, node) for node in ("node-a", "node-b")}
+        self.writers = {node: SharedSnapshotWriter(path) for node, path in self.paths.items()}
+
+    def tearDown(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.tmpdir.cleanup()
+
+    def publish(self, node, version, device_id, watts, age_seconds=0.0):
+        now = datetime.now() - timedelta(seconds=age_seconds)
+        snapshot = CollectorSnapshot(
+            version, now, (ServerMetrics(device_id, watts, now, "snmp_real", "success"),), watts, "snmp_real"
+        )
+        energy = EnergySummary(0.0, 0.0, 0.0, 0.0, 1, 0.0, None)
+        self.writers[node].write(encode_shared_snapshot(SharedSnapshot(snapshot, energy, (), ())))
+
+    def test_merge_through_public_shard_reads(self):
+        """Test the merged view and that its summed version only holds for a fixed node set"""
+        self.publish("node-a", 5, "SRV-A", 300.0)
+        self.publish("node-b", 7, "SRV-B", 200.0)
+        collector = ShardedSnapshotCollector(self.paths)
+        try:
+            shared = collector.shards["node-a"].read()
+            self.assertEqual(shared.snapshot.version, 5)
+
+            merged = collector.get_snapshot()
+            self.assertEqual(merged.version, 12)
+            self.assertEqual(merged.total_watts, 500.0)
+            before = collector.get_data_version()
+
+            # node-b stops publishing: the summed version moves backwards
+            self.publish("node-b", 8, "SRV-B", 200.0, age_seconds=600)
+            self.assertEqual(collector.get_snapshot().version, 5)
+            self.assertNotEqual(collector.get_data_version(), before)
+        finally:
+            collector.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
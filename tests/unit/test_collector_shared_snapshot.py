@@ -0,0 +1,117 @@
+"""
+Unit tests for the mmap snapshot shared between collector and web workers
+"""
+
+import unittest
+import sys
+import os
+import struct
+import tempfile
+import multiprocessing
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.shared_snapshot import HEADER_SIZE, SharedSnapshotReader, SharedSnapshotWriter
+
+
+def _publish_from_child(path, value):
+    writer = SharedSnapshotWriter(path)
+    writer.write({"value": value})
+    writer.close()
+
+
+class TestSharedSnapshot(unittest.TestCase):
+    """Test seqlock-protected publication through a memory-mapped file"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "snapshot")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reader_before_first_publication(self):
+        """Test that a missing file reads as None"""
+        reader = SharedSnapshotReader(self.path)
+        self.assertIsNone(reader.read())
+
+    def test_roundtrip_and_decode_cache(self):
+        """Test that payloads are decoded once per publication"""
+        decoded = []
+
+        def decode(payload):
+            decoded.append(payload)
+            return payload["n"]
+
+        writer = SharedSnapshotWriter(self.path, initial_capacity=256)
+        reader = SharedSnapshotReader(self.path, decode=decode)
+
+        writer.write({"n": 1})
+        self.assertEqual(reader.read(), 1)
+        self.assertEqual(reader.read(), 1)
+        self.assertEqual(len(decoded), 1)
+
+        writer.write({"n": 2})
+        self.assertEqual(reader.read(), 2)
+        self.assertEqual(len(decoded), 2)
+        writer.close()
+        reader.close()
+
+    def test_growth_replaces_file(self):
+        """Test that a larger payload moves readers to the new file"""
+        writer = SharedSnapshotWriter(self.path, initial_capacity=64)
+        reader = SharedSnapshotReader(self.path)
+
+        writer.write({"data": "x"})
+        self.assertEqual(reader.read(), {"data": "x"})
+
+        writer.write({"data": "y" * 1000})
+        self.assertEqual(reader.read(), {"data": "y" * 1000})
+        self.assertGreater(os.path.getsize(self.path), HEADER_SIZE + 1000)
+        writer.close()
+        reader.close()
+
+    def test_write_in_progress_keeps_last_value(self):
+        """Test that an odd sequence number (torn write) is never decoded"""
+        writer = SharedSnapshotWriter(self.path, initial_capacity=256)
+        reader = SharedSnapshotReader(self.path)
+        writer.write({"n": 1})
+        self.assertEqual(reader.read(), {"n": 1})
+
+        # Simulate a writer stopped in the middle of a publication
+        struct.pack_into("<Q", writer._mmap, 8, writer._seq + 1)
+        writer._mmap[HEADER_SIZE:HEADER_SIZE + 3] = b"{{{"
+        self.assertEqual(reader.read(), {"n": 1})
+        writer.close()
+        reader.close()
+
+    def test_restarted_writer_retires_previous_file(self):
+        """Test that readers follow a new collector process writing from scratch"""
+        first = SharedSnapshotWriter(self.path, initial_capacity=256)
+        for n in range(3):
+            first.write({"n": n})
+        first.close()
+
+        reader = SharedSnapshotReader(self.path)
+        self.assertEqual(reader.read(), {"n": 2})
+
+        second = SharedSnapshotWriter(self.path, initial_capacity=256)
+        second.write({"n": 100})
+        self.assertEqual(reader.read(), {"n": 100})
+        second.close()
+        reader.close()
+
+    def test_cross_process_publication(self):
+        """Test that a payload written by another process is visible"""
+        context = multiprocessing.get_context("spawn")
+        child = context.Process(target=_publish_from_child, args=(self.path, 42))
+        child.start()
+        child.join(timeout=30)
+        self.assertEqual(child.exitcode, 0)
+
+        self.assertEqual(SharedSnapshotReader(self.path).read(), {"value": 42})
+
+
+if __name__ == '__main__':
+    unittest.main()
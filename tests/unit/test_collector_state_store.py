@@ -0,0 +1,104 @@
+"""
+Unit tests for the collector warm-start state store
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.state_store import CollectorStateStore
+
+
+class TestCollectorStateStore(unittest.TestCase):
+    """Test SQLite persistence of collector state"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "collector_state.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_missing_file_loads_empty(self):
+        """Test that a fresh store yields no rows"""
+        store = CollectorStateStore(self.path)
+        self.assertEqual(store.load(), ([], []))
+
+    def test_round_trip(self):
+        """Test that saved rows are loaded back unchanged"""
+        store = CollectorStateStore(self.path)
+        metric = {
+            "device_id": "SRV-HP-001",
+            "power_consumption_watts": 412.5,
+            "timestamp": 1700000000.0,
+            "cached_at": 1700000001.0,
+            "status": "success",
+            "error_message": None,
+            "system_health": 2,
+            "power_supply_status": "[1, 1]",
+            "source": "cached",
+            "power_stats": "[410.0, 380.5, 455.0]",
+            "sensors": "[24.5, 38.0, null]",
+        }
+        health = {
+            "device_id": "SRV-HP-001",
+            "breaker_state": "open",
+            "failures": 3,
+            "opened_at": 1700000002.0,
+            "cooldown_seconds": 120.0,
+            "srtt": 0.05,
+            "rttvar": 0.01,
+        }
+
+        self.assertTrue(store.save([metric], [health]))
+        metrics, healths = CollectorStateStore(self.path).load()
+
+        self.assertEqual(metrics, [metric])
+        self.assertEqual(healths, [health])
+
+    def test_save_replaces_previous_snapshot(self):
+        """Test that each save replaces the whole snapshot"""
+        store = CollectorStateStore(self.path)
+        row = {"device_id": "A", "power_consumption_watts": 1.0, "timestamp": 0.0,
+               "cached_at": 0.0, "status": "success"}
+        store.save([row, dict(row, device_id="B")], [])
+        store.save([dict(row, device_id="C")], [])
+
+        metrics, _ = store.load()
+        self.assertEqual([m["device_id"] for m in metrics], ["C"])
+
+    def test_file_without_added_columns(self):
+        """Test that a file written before the source/power_stats/sensors columns still loads and saves"""
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            "CREATE TABLE metrics (device_id TEXT PRIMARY KEY, power_consumption_watts REAL NOT NULL, "
+            "timestamp REAL NOT NULL, cached_at REAL NOT NULL, status TEXT NOT NULL, error_message TEXT, "
+            "system_health INTEGER, power_supply_status TEXT);"
+            "INSERT INTO metrics VALUES ('A', 1.0, 0.0, 0.0, 'success', NULL, NULL, NULL);"
+        )
+        conn.commit()
+        conn.close()
+
+        store = CollectorStateStore(self.path)
+        metrics, _ = store.load()
+        self.assertEqual(metrics[0]["device_id"], "A")
+        self.assertIsNone(metrics[0]["sensors"])
+
+        self.assertTrue(store.save([dict(metrics[0], sensors="[20.0, null, null]")], []))
+        self.assertEqual(store.load()[0][0]["sensors"], "[20.0, null, null]")
+
+    def test_corrupted_file_loads_empty(self):
+        """Test that an unreadable file falls back to a cold start"""
+        with open(self.path, "wb") as f:
+            f.write(b"not a sqlite database" * 100)
+
+        self.assertEqual(CollectorStateStore(self.path).load(), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
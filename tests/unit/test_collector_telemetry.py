@@ -0,0 +1,97 @@
+"""
+Unit tests for the collector telemetry counters and latency histograms
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.telemetry import CollectorTelemetry, LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test bucketed latency percentiles"""
+
+    def test_empty_histogram(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        self.assertEqual(histogram.snapshot()['count'], 0)
+
+    def test_percentiles_stay_within_bucket(self):
+        """Test that estimates fall inside the bucket holding the true percentile"""
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.observe(0.004)  # bucket (0.002, 0.005]
+        for _ in range(10):
+            histogram.observe(0.15)   # bucket (0.1, 0.2]
+
+        self.assertTrue(0.002 <= histogram.percentile(50) <= 0.005)
+        self.assertTrue(0.1 <= histogram.percentile(99) <= 0.15)
+        self.assertEqual(histogram.min, 0.004)
+        self.assertEqual(histogram.max, 0.15)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['buckets']['0.005'], 90)
+        self.assertEqual(snapshot['buckets']['0.2'], 10)
+        self.assertAlmostEqual(snapshot['mean'], (90 * 0.004 + 10 * 0.15) / 100)
+
+    def test_overflow_bucket(self):
+        """Test that durations above the last bound are capped at the observed max"""
+        histogram = LatencyHistogram()
+        histogram.observe(120.0)
+        self.assertEqual(histogram.snapshot()['buckets']['+Inf'], 1)
+        self.assertEqual(histogram.percentile(99), 120.0)
+
+
+class TestCollectorTelemetry(unittest.TestCase):
+    """Test collector counters, queue gauge and device ranking"""
+
+    def test_poll_counters(self):
+        telemetry = CollectorTelemetry()
+        telemetry.record_cache(hit=False)
+        telemetry.record_attempt('SRV-1', 0)
+        telemetry.record_failure('SRV-1', timeout=True)
+        telemetry.record_attempt('SRV-1', 1)
+        telemetry.record_success('SRV-1', 0.02)
+        telemetry.record_cache(hit=True)
+        telemetry.record_cache(hit=True, stale=True)
+
+        snapshot = telemetry.snapshot(devices=True)
+        counters = snapshot['counters']
+        self.assertEqual((counters['polls'], counters['retries']), (2, 1))
+        self.assertEqual((counters['timeouts'], counters['errors'], counters['successes']), (1, 0, 1))
+        self.assertAlmostEqual(snapshot['cache_hit_ratio'], 2 / 3)
+        self.assertEqual(snapshot['devices']['SRV-1']['timeouts'], 1)
+        self.assertEqual(snapshot['devices']['SRV-1']['rtt']['count'], 1)
+
+    def test_queue_gauge(self):
+        telemetry = CollectorTelemetry()
+        for _ in range(3):
+            telemetry.enter_queue()
+        telemetry.leave_queue()
+        telemetry.start_request()
+
+        queue = telemetry.snapshot()['queue']
+        self.assertEqual(queue, {'depth': 2, 'peak': 3, 'in_flight': 1})
+        self.assertEqual(telemetry.sequence, 5)
+        telemetry.snapshot()
+        self.assertEqual(telemetry.sequence, 5)
+
+    def test_slowest_devices_and_forget(self):
+        telemetry = CollectorTelemetry()
+        for index, rtt in enumerate((0.01, 0.5, 0.05)):
+            telemetry.record_success(f'SRV-{index}', rtt)
+
+        slowest = telemetry.snapshot(slowest=2)['slowest_devices']
+        self.assertEqual([d['device_id'] for d in slowest], ['SRV-1', 'SRV-2'])
+        self.assertNotIn('devices', telemetry.snapshot())
+
+        telemetry.forget('SRV-1')
+        self.assertEqual(telemetry.snapshot()['device_count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
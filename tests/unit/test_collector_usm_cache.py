@@ -0,0 +1,172 @@
+"""
+Unit tests for the SNMPv3 engine-ID / timeline discovery cache
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from collector.usm_cache import (
+    EngineDiscoveryCache, EngineRecord, credentials_fingerprint, is_usm_error, _engine_id_cache,
+    _mp_model, _usm_model, _usm_timeline, _MP_EXPIRY_QUEUE_ATTR, _USM_EXPIRY_QUEUE_ATTR
+)
+
+try:
+    from pysnmp.entity.engine import SnmpEngine
+    from pysnmp.proto import errind
+
+    PYSNMP_AVAILABLE = True
+except ImportError:
+    PYSNMP_AVAILABLE = False
+
+UDP = (1, 3, 6, 1, 6, 1, 1)
+ADDRESS = ('10.0.0.1', 161)
+ENGINE_ID = b'\x80\x00\x4f\xb8\x05agent1'
+
+
+class TestEngineRecord(unittest.TestCase):
+    """Test engine time extrapolation and credential fingerprints"""
+
+    def test_estimated_time_advances_with_wall_clock(self):
+        record = EngineRecord(ENGINE_ID, ENGINE_ID, b'', boots=4, engine_time=1000, learned_at=5000.0)
+        self.assertEqual(record.estimated_time(5000.0), 1000)
+        self.assertEqual(record.estimated_time(5330.7), 1330)
+        self.assertEqual(record.estimated_time(4000.0), 1000)
+
+    def test_fingerprint_changes_with_any_field(self):
+        base = credentials_fingerprint('monitor', 'SHA', 'auth', 'AES', 'priv')
+        self.assertEqual(base, credentials_fingerprint('monitor', 'SHA', 'auth', 'AES', 'priv'))
+        self.assertNotEqual(base, credentials_fingerprint('monitor', 'SHA', 'auth', 'AES', 'priv2'))
+        self.assertNotIn('auth', base)
+
+
+@unittest.skipUnless(PYSNMP_AVAILABLE, "pysnmp not available")
+class TestEngineDiscoveryCache(unittest.TestCase):
+    """Test capture and re-installation of pysnmp discovery state"""
+
+    def setUp(self):
+        self.engine = SnmpEngine()
+        self.engine_ids = _engine_id_cache(self.engine)
+        self.timeline = _usm_timeline(self.engine)
+        self.assertIsNotNone(self.engine_ids)
+        self.assertIsNotNone(self.timeline)
+
+    def _discover(self, boots=7, engine_time=1200, updated_at=10_000):
+        self.engine_ids[(UDP, ADDRESS)] = {
+            'securityEngineId': ENGINE_ID, 'contextEngineId': ENGINE_ID, 'contextName': b''
+        }
+        self.timeline[ENGINE_ID] = (boots, engine_time, engine_time, updated_at)
+
+    def test_restore_after_pysnmp_expiry(self):
+        """Test that expired engine ID and timeline are put back with extrapolated time"""
+        cache = EngineDiscoveryCache()
+        self.assertFalse(cache.capture(self.engine, 'creds', UDP, ADDRESS))
+
+        self._discover()
+        self.assertTrue(cache.capture(self.engine, 'creds', UDP, ADDRESS))
+        self.assertFalse(cache.restore(self.engine, 'creds', UDP, ADDRESS))
+
+        # pysnmp drops both 300s after discovery
+        self.engine_ids.clear()
+        self.timeline.clear()
+        with patch('collector.usm_cache.time.time', return_value=10_400.0):
+            self.assertTrue(cache.restore(self.engine, 'creds', UDP, ADDRESS))
+
+        self.assertEqual(self.engine_ids[(UDP, ADDRESS)]['securityEngineId'], ENGINE_ID)
+        self.assertEqual(self.timeline[ENGINE_ID], (7, 1600, 1600, 10_400))
+        self.assertEqual(cache.restored, 1)
+
+    def test_records_are_keyed_by_credentials_and_target(self):
+        """Test that other credentials or a forgotten target are not restored"""
+        cache = EngineDiscoveryCache()
+        self._discover()
+        cache.capture(self.engine, 'creds', UDP, ADDRESS)
+        self.engine_ids.clear()
+        self.timeline.clear()
+
+        self.assertFalse(cache.restore(self.engine, 'other-creds', UDP, ADDRESS))
+        self.assertFalse(cache.restore(self.engine, 'creds', UDP, ('10.0.0.2', 161)))
+
+        cache.forget(self.engine, 'creds', UDP, ADDRESS)
+        self.assertFalse(cache.restore(self.engine, 'creds', UDP, ADDRESS))
+        self.assertEqual(len(cache), 0)
+
+    def _queued(self, model, attr):
+        return [key for keys in getattr(model, attr).values() for key in keys]
+
+    def test_restored_entries_expire_like_discovered_ones(self):
+        """Test that re-installed entries are queued for pysnmp's 300s expiry"""
+        cache = EngineDiscoveryCache()
+        self._discover()
+        cache.capture(self.engine, 'creds', UDP, ADDRESS)
+        self.engine_ids.clear()
+        self.timeline.clear()
+
+        with patch('collector.usm_cache.time.time', return_value=10_400.0):
+            self.assertTrue(cache.restore(self.engine, 'creds', UDP, ADDRESS))
+
+        self.assertEqual(self._queued(_mp_model(self.engine), _MP_EXPIRY_QUEUE_ATTR), [(UDP, ADDRESS)])
+        self.assertEqual(self._queued(_usm_model(self.engine), _USM_EXPIRY_QUEUE_ATTR), [ENGINE_ID])
+
+        # Run pysnmp's own expiry until the queued entries are dropped
+        mp, usm = _mp_model(self.engine), _usm_model(self.engine)
+        for _ in range(301):
+            mp._SnmpV3MessageProcessingModel__expire_engines_info()
+            usm._SnmpUSMSecurityModel__expire_timeline_info()
+        self.assertNotIn((UDP, ADDRESS), self.engine_ids)
+        self.assertNotIn(ENGINE_ID, self.timeline)
+
+    def test_forget_removes_restored_entries_from_engine(self):
+        """Test that forget() after a USM error drops engine ID and timeline from the SnmpEngine"""
+        cache = EngineDiscoveryCache()
+        self._discover()
+        cache.capture(self.engine, 'creds', UDP, ADDRESS)
+        self.engine_ids.clear()
+        self.timeline.clear()
+        with patch('collector.usm_cache.time.time', return_value=10_400.0):
+            cache.restore(self.engine, 'creds', UDP, ADDRESS)
+
+        cache.forget(self.engine, 'creds', UDP, ADDRESS)
+
+        self.assertNotIn((UDP, ADDRESS), self.engine_ids)
+        self.assertNotIn(ENGINE_ID, self.timeline)
+        self.assertEqual(self._queued(_mp_model(self.engine), _MP_EXPIRY_QUEUE_ATTR), [])
+        self.assertEqual(len(cache), 0)
+        # pysnmp's expiry must not trip over the key removed from under it
+        mp = _mp_model(self.engine)
+        for _ in range(301):
+            mp._SnmpV3MessageProcessingModel__expire_engines_info()
+
+    def test_stale_records_are_not_restored(self):
+        """Test that a record older than max_age_seconds is dropped instead of extrapolated"""
+        cache = EngineDiscoveryCache(max_age_seconds=3600)
+        self._discover(updated_at=10_000)
+        cache.capture(self.engine, 'creds', UDP, ADDRESS)
+        self.engine_ids.clear()
+        self.timeline.clear()
+
+        with patch('collector.usm_cache.time.time', return_value=10_000.0 + 3601):
+            self.assertFalse(cache.restore(self.engine, 'creds', UDP, ADDRESS))
+        self.assertEqual(len(cache), 0)
+        self.assertNotIn((UDP, ADDRESS), self.engine_ids)
+
+    def test_usm_errors(self):
+        """Test that only USM failures invalidate the discovery"""
+        self.assertTrue(is_usm_error(errind.notInTimeWindow))
+        self.assertTrue(is_usm_error(errind.unknownEngineID))
+        self.assertFalse(is_usm_error(errind.requestTimedOut))
+        self.assertFalse(is_usm_error(None))
+
+    def test_degrades_without_pysnmp_internals(self):
+        """Test that an engine without the expected internals disables the cache"""
+        cache = EngineDiscoveryCache()
+        self.assertFalse(cache.capture(object(), 'creds', UDP, ADDRESS))
+        self.assertFalse(cache.available)
+
+
+if __name__ == '__main__':
+    unittest.main()
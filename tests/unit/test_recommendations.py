@@ -0,0 +1,80 @@
+"""
+Unit tests for the recommendations engine using measured sensor data
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from ai_engine.recommendations import RecommendationsEngine
+from data_sources.carbon_data import CarbonDataLoader
+from snmp_collector import CollectorSnapshot, SensorReadings, ServerMetrics
+
+
+class FakeCollector:
+    """Minimal metrics source returning a fixed snapshot"""
+
+    def __init__(self, metrics):
+        self.snapshot = CollectorSnapshot(1, datetime.now(), tuple(metrics), 0.0, 'snmp_real')
+
+    def get_snapshot(self):
+        return self.snapshot
+
+
+def reading(device_id, status='success', **sensors):
+    return ServerMetrics(device_id, 400.0, datetime.now(), 'snmp_real', status,
+                         sensors=SensorReadings(**sensors) if sensors else None)
+
+
+class TestMeasuredRecommendations(unittest.TestCase):
+    """Test that measured sensors replace the static utilization and setpoint"""
+
+    def setUp(self):
+        self.loader = CarbonDataLoader()
+
+    def engine(self, metrics):
+        return RecommendationsEngine(self.loader, metrics_source=FakeCollector(metrics))
+
+    def test_idle_detection_uses_measured_cpu(self):
+        """Test that measured CPU overrides avg_utilization_percent per server type"""
+        engine = self.engine([
+            reading('SRV-HP-001', cpu_percent=10.0, inlet_temp_c=21.0),
+            reading('SRV-HP-002', cpu_percent=20.0),
+            reading('SRV-HP-003', 'simulated', cpu_percent=95.0),
+            reading('VXRAIL-01', cpu_percent=30.0)
+        ])
+
+        idle = {item['server_type']: item for item in engine.detect_idle_resources()}
+        self.assertEqual(idle['hp_proliant']['current_utilization'], 15.0)
+        self.assertEqual(idle['hp_proliant']['utilization_source'], 'measured')
+        self.assertEqual(idle['hp_proliant']['measured_devices'], 2)
+        # VxRail is idle by measurement even though the config says 65%
+        self.assertEqual(idle['vxrail']['current_utilization'], 30.0)
+
+    def test_falls_back_to_config(self):
+        """Test that server types without CPU readings keep the static value"""
+        engine = self.engine([reading('VXRAIL-01', inlet_temp_c=22.0)])
+
+        idle = engine.detect_idle_resources()
+        self.assertEqual([item['server_type'] for item in idle], ['hp_proliant'])
+        self.assertEqual(idle[0]['utilization_source'], 'config')
+        self.assertEqual(idle[0]['current_utilization'], 35)
+
+    def test_setpoint_uses_measured_inlet(self):
+        """Test that the setpoint recommendation follows the measured inlet temperature"""
+        titles = [r.title for r in self.engine([
+            reading('SRV-HP-001', inlet_temp_c=20.0), reading('VXRAIL-01', inlet_temp_c=21.0)
+        ])._get_pue_optimization_recommendations()]
+        self.assertIn("Aumentar Temperatura do Datacenter de 20.5°C para 24°C", titles)
+
+        warm = self.engine([reading('SRV-HP-001', inlet_temp_c=25.0)])
+        self.assertFalse(any(r.title.startswith("Aumentar Temperatura")
+                             for r in warm._get_pue_optimization_recommendations()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for single-flight request coalescing
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from routes.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test that concurrent identical calls share one computation"""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.runs = 0
+        self.release = threading.Event()
+
+    def compute(self):
+        self.runs += 1
+        self.release.wait(5)
+        return {'run': self.runs}
+
+    def burst(self, count, key='metrics'):
+        """Start count callers, release the computation once all of them joined"""
+        results = []
+
+        def call():
+            results.append(self.flight.do(key, self.compute))
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while self.flight.coalesced + self.flight.executions < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_burst_runs_once(self):
+        """Test that 200 concurrent callers cost one computation"""
+        results = self.burst(200)
+
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(len(results), 200)
+        self.assertTrue(all(value is results[0][0] for value, _ in results))
+        self.assertEqual(sum(1 for _, shared in results if not shared), 1)
+        self.assertEqual((self.flight.executions, self.flight.coalesced), (1, 199))
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_later_call_recomputes(self):
+        """Test that results are not cached once the flight has landed"""
+        self.release.set()
+        first, _ = self.flight.do('metrics', self.compute)
+        second, shared = self.flight.do('metrics', self.compute)
+
+        self.assertEqual((first['run'], second['run']), (1, 2))
+        self.assertFalse(shared)
+
+    def test_distinct_keys_do_not_merge(self):
+        """Test that different keys run their own computations"""
+        self.release.set()
+        self.flight.do('a', self.compute)
+        self.flight.do('b', self.compute)
+        self.assertEqual(self.runs, 2)
+
+    def test_error_reaches_every_caller(self):
+        """Test that an exception is re-raised in all callers and the key is freed"""
+        started = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("SNMP indisponível")
+
+        def call():
+            try:
+                self.flight.do('metrics', fail)
+            except RuntimeError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
+        self.assertEqual(self.flight.in_flight(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
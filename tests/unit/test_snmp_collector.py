@@ -7,6 +7,8 @@ import sys
 import os
 import json
 import tempfile
+import time
+from dataclasses import replace
 from unittest.mock import patch, MagicMock
 
 # Add the project root to the Python path
@@ -161,6 +163,90 @@ class TestSNMPCollector(unittest.TestCase):
         self.assertIsNotNone(cached_metric)
         self.assertEqual(cached_metric.device_id, "TEST-001")
         self.assertEqual(cached_metric.source, 'cached')  # Source should be updated
+        self.assertEqual(test_metric.source, 'snmp_real')  # Original is never mutated
+
+    def test_stale_while_revalidate(self):
+        """Test that stale entries are served immediately and refreshed in background"""
+        import asyncio
+        import time
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials, ServerMetrics
+        from datetime import datetime, timedelta
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        server = {'device_id': 'TEST-001', 'ip_address': '10.0.0.1', 'generation': 'gen9'}
+        
+        # Entry past the refresh-ahead point but inside the stale window
+        old_metric = ServerMetrics("TEST-001", 350.0, datetime.now(), 'snmp_real', 'success')
+        collector._update_cache("TEST-001", old_metric)
+        with collector.cache_lock:
+            cached, _ = collector.cache["TEST-001"]
+            collector.cache["TEST-001"] = (cached, datetime.now() - timedelta(seconds=collector.cache_ttl_seconds + 10))
+        self.assertFalse(collector._is_cache_valid("TEST-001"))
+        
+        polls = []
+        
+        async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+            polls.append(device_id)
+            await asyncio.sleep(0.05)
+            return ServerMetrics(device_id, 420.0, datetime.now(), 'snmp_real', 'success')
+        
+        collector._async_snmp_get = fake_snmp_get
+        try:
+            with patch.object(snmp_collector, 'SNMP_AVAILABLE', True):
+                start = time.monotonic()
+                metric = collector._snmp_get_power(server)
+                self.assertLess(time.monotonic() - start, 0.05)  # Served without waiting for SNMP
+                self.assertEqual(metric.power_consumption_watts, 350.0)
+                self.assertEqual(metric.source, 'cached')
+                
+                # Concurrent lookups do not start a second refresh
+                collector._snmp_get_power(server)
+                
+                deadline = time.time() + 2
+                while not collector._is_cache_valid("TEST-001") and time.time() < deadline:
+                    time.sleep(0.01)
+        finally:
+            collector.close()
+        
+        self.assertEqual(polls, ["TEST-001"])
+        refreshed = collector._get_from_cache("TEST-001")
+        self.assertEqual(refreshed.power_consumption_watts, 420.0)
+        self.assertEqual(refreshed.source, 'cached')
+
+    def test_circuit_breaker_skips_dead_devices(self):
+        """Test that a device with an open circuit is not polled again"""
+        import asyncio
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        collector.max_retries = 1
+        collector.circuit_failure_threshold = 2
+        server = {'device_id': 'TEST-DEAD', 'ip_address': '10.0.0.99', 'generation': 'gen9'}
+        polls = []
+        
+        async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+            polls.append(device_id)
+            raise Exception("No SNMP response received before timeout")
+        
+        collector._async_snmp_get = fake_snmp_get
+        try:
+            with patch.object(snmp_collector, 'SNMP_AVAILABLE', True):
+                results = [collector._snmp_get_power(server) for _ in range(5)]
+        finally:
+            collector.close()
+        
+        self.assertEqual(len(polls), 2)
+        self.assertTrue(all(m.status == 'error' for m in results))
+        self.assertIn("Circuito aberto", results[-1].error_message)
+        self.assertEqual(collector.device_health['TEST-DEAD'].breaker.state, 'open')
 
     def test_get_total_consumption(self):
         """Test total consumption calculation"""
@@ -169,13 +255,705 @@ class TestSNMPCollector(unittest.TestCase):
         collector = SNMPCollector(config_file="non_existent.json")
         
         # Get total consumption (should fallback to simulated)
-        consumption_kwh, fonte = collector.get_total_consumption_kwh()
+        power_kw, fonte = collector.get_total_power_kw()
         
         # Verify reasonable values
-        self.assertGreater(consumption_kwh, 0)
-        self.assertLess(consumption_kwh, 200)  # 100 servers * ~500W avg = ~50kW max
+        self.assertGreater(power_kw, 0)
+        self.assertLess(power_kw, 200)  # 100 servers * ~500W avg = ~50kW max
         self.assertEqual(fonte, 'simulado')  # No real SNMP, should be simulated
 
+    def test_background_scheduler_publishes_snapshot(self):
+        """Test that the background scheduler publishes immutable snapshots"""
+        from snmp_collector import SNMPCollector
+        from dataclasses import FrozenInstanceError
+        import time
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.collection_interval_seconds = 0.05
+        
+        self.assertTrue(collector.start())
+        try:
+            self.assertFalse(collector.start())  # Already running
+            
+            # Initial snapshot is published synchronously
+            first = collector.get_snapshot()
+            self.assertIsNotNone(first)
+            self.assertEqual(len(first.metrics), 100)
+            
+            # Wait for at least one scheduled cycle
+            deadline = time.time() + 2
+            while collector.get_snapshot().version == first.version and time.time() < deadline:
+                time.sleep(0.01)
+            snapshot = collector.get_snapshot()
+            self.assertGreater(snapshot.version, first.version)
+            
+            # Requests read the published snapshot
+            power_kw, fonte = collector.get_total_power_kw()
+            self.assertEqual(fonte, 'simulado')
+            self.assertGreater(power_kw, 0)
+            
+            with self.assertRaises(FrozenInstanceError):
+                snapshot.total_watts = 0
+        finally:
+            collector.stop(timeout=1)
+        
+        self.assertFalse(collector.is_running())
+
+    def test_shared_event_loop_is_reused(self):
+        """Test that coroutines run on one dedicated, long-lived event loop"""
+        from snmp_collector import SNMPCollector
+        import asyncio
+        import threading
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        
+        async def current_loop_and_thread():
+            return asyncio.get_running_loop(), threading.current_thread()
+        
+        try:
+            loop1, thread1 = collector._run_coroutine(current_loop_and_thread())
+            loop2, thread2 = collector._run_coroutine(current_loop_and_thread())
+            
+            self.assertIs(loop1, loop2)
+            self.assertIs(thread1, thread2)
+            self.assertIsNot(thread1, threading.current_thread())
+        finally:
+            collector.close()
+        
+        self.assertTrue(loop1.is_closed())
+
+    def test_snmp_engine_is_shared(self):
+        """Test that the SnmpEngine and USM user data are built once"""
+        from snmp_collector import SNMPCollector, SNMPCredentials, SNMP_AVAILABLE
+        
+        if not SNMP_AVAILABLE:
+            self.skipTest("pysnmp not available")
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        
+        async def engine_and_user():
+            return collector._get_engine(), collector._get_user_data()
+        
+        try:
+            engine1, user1 = collector._run_coroutine(engine_and_user())
+            engine2, user2 = collector._run_coroutine(engine_and_user())
+            self.assertIs(engine1, engine2)
+            self.assertIs(user1, user2)
+        finally:
+            collector.close()
+
+    def test_async_fanout_bounded_concurrency(self):
+        """Test that the async fan-out respects the semaphore and device deadlines"""
+        import asyncio
+        import time
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials, ServerMetrics
+        from datetime import datetime
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        collector.max_concurrent = 5
+        collector.device_deadline_seconds = 0.5
+        collector.servers_config = [
+            {'device_id': f'TEST-{i:03d}', 'ip_address': f'10.0.0.{i}', 'generation': 'gen9'}
+            for i in range(50)
+        ]
+        
+        state = {'in_flight': 0, 'peak': 0}
+        
+        async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+            try:
+                await asyncio.sleep(0.01)
+                if device_id.endswith('7'):
+                    raise Exception("No SNMP response received before timeout")
+                return ServerMetrics(device_id, 300.0, datetime.now(), 'snmp_real', 'success')
+            finally:
+                state['in_flight'] -= 1
+        
+        collector._async_snmp_get = fake_snmp_get
+        try:
+            with patch.object(snmp_collector, 'SNMP_AVAILABLE', True):
+                start = time.monotonic()
+                metrics = collector.collect_all_metrics()
+                elapsed = time.monotonic() - start
+        finally:
+            collector.close()
+        
+        self.assertEqual([m.device_id for m in metrics], [s['device_id'] for s in collector.servers_config])
+        self.assertLessEqual(state['peak'], 5)
+        # Backoff (1s) exceeds the 0.5s device deadline, so dead hosts are not retried
+        self.assertLess(elapsed, 1.0)
+        
+        dead = [m for m in metrics if m.device_id.endswith('7')]
+        self.assertEqual(len(dead), 5)
+        for metric in dead:
+            self.assertEqual(metric.status, 'error')
+            self.assertEqual(metric.source, 'simulado')
+        self.assertTrue(all(m.source == 'snmp_real' for m in metrics if m not in dead))
+
+    def test_batch_mode_collects_all_oids(self):
+        """Test that batch mode reads power, health, sensors and the PSU table together"""
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials, HPServerOIDs, SNMP_AVAILABLE
+        
+        if not SNMP_AVAILABLE:
+            self.skipTest("pysnmp not available")
+        
+        from pysnmp.proto.rfc1902 import ObjectName, Integer
+        from pysnmp.proto.rfc1905 import noSuchInstance
+        
+        class FakeIdentity:
+            def __init__(self, oid):
+                self.oid = ObjectName(oid)
+            
+            def get_oid(self):
+                return self.oid
+        
+        oids = HPServerOIDs.get_oids_for_generation("gen10")
+        psu = oids['power_supply_status']
+        calls = {'get': 0, 'bulk': 0}
+        
+        async def fake_get_cmd(engine, user, target, context, *var_types):
+            calls['get'] += 1
+            self.assertEqual(len(var_types), 5)  # power + health + 3 sensors in one PDU
+            return None, 0, 0, [(FakeIdentity(oids['power_consumption']), Integer(412)),
+                                (FakeIdentity(oids['system_health']), Integer(2)),
+                                (FakeIdentity(oids['inlet_temperature']), Integer(23)),
+                                (FakeIdentity(oids['fan_speed']), Integer(41)),
+                                (FakeIdentity(oids['cpu_utilization']), noSuchInstance)]
+        
+        async def fake_bulk_cmd(engine, user, target, context, non_repeaters, max_repetitions, *var_types):
+            calls['bulk'] += 1
+            return None, 0, 0, [(FakeIdentity(psu + '.0.1'), Integer(1)),
+                                (FakeIdentity(psu + '.0.2'), Integer(1)),
+                                (FakeIdentity('1.3.6.1.4.1.232.6.2.9.3.1.1.5.0.1'), Integer(9))]
+        
+        class FakeTarget:
+            TRANSPORT_DOMAIN = (1, 3, 6, 1, 6, 1, 1)
+            transport_address = ('10.0.0.10', 161)
+        
+        async def fake_target(ip_address, port=161):
+            return FakeTarget()
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        collector.collection_mode = 'batch'
+        collector._get_target = fake_target
+        
+        server = {'device_id': 'TEST-HP-010', 'ip_address': '10.0.0.10', 'generation': 'gen10'}
+        try:
+            with patch.object(snmp_collector, 'get_cmd', fake_get_cmd), \
+                 patch.object(snmp_collector, 'bulk_cmd', fake_bulk_cmd):
+                metric = collector._snmp_get_power(server)
+        finally:
+            collector.close()
+        
+        self.assertEqual(calls, {'get': 1, 'bulk': 1})
+        self.assertEqual(metric.source, 'snmp_real')
+        self.assertEqual(metric.power_consumption_watts, 412.0)
+        self.assertEqual(metric.system_health, 2)
+        self.assertEqual(metric.power_supply_status, (1, 1))  # Walk stops outside the PSU column
+        self.assertEqual(metric.sensors.as_tuple(), (23.0, 41.0, None))  # No CPU agent answering
+
+    def test_staggered_schedule_polls_each_device_once_per_interval(self):
+        """Test that the timing wheel spreads polls across the interval"""
+        import asyncio
+        import time
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials, ServerMetrics
+        from datetime import datetime
+        
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        collector.collection_interval_seconds = 0.4
+        collector.schedule_slots = 4
+        collector.servers_config = [
+            {'device_id': f'TEST-{i:03d}', 'ip_address': f'10.0.0.{i}', 'generation': 'gen9'}
+            for i in range(40)
+        ]
+        poll_times = {}
+        
+        async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+            poll_times.setdefault(device_id, time.monotonic())
+            return ServerMetrics(device_id, 300.0, datetime.now(), 'snmp_real', 'success')
+        
+        collector._async_snmp_get = fake_snmp_get
+        try:
+            with patch.object(snmp_collector, 'SNMP_AVAILABLE', True):
+                collector.start()
+                deadline = time.time() + 3
+                while len(poll_times) < 40 and time.time() < deadline:
+                    time.sleep(0.02)
+                time.sleep(0.05)
+                snapshot = collector.get_snapshot()
+        finally:
+            collector.close()
+        
+        self.assertEqual(len(poll_times), 40)
+        # Polls are spread over the interval instead of one burst
+        spread = max(poll_times.values()) - min(poll_times.values())
+        self.assertGreater(spread, 0.15)
+        
+        self.assertEqual(len(snapshot.metrics), 40)
+        self.assertEqual([m.device_id for m in snapshot.metrics],
+                         [s['device_id'] for s in collector.servers_config])
+        self.assertTrue(all(m.source in ('snmp_real', 'cached') for m in snapshot.metrics))
+
+    def test_warm_start_restores_state(self):
+        """Test that a restarted collector resumes from the persisted state"""
+        from snmp_collector import SNMPCollector, SensorReadings, ServerMetrics
+        from datetime import datetime
+        
+        servers = [
+            {'device_id': 'TEST-HP-001', 'ip_address': '10.0.0.1', 'generation': 'gen9'},
+            {'device_id': 'TEST-HP-002', 'ip_address': '10.0.0.2', 'generation': 'gen10'}
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_file = os.path.join(tmpdir, 'collector_state.db')
+            
+            first = SNMPCollector(config_file="non_existent.json")
+            first.servers_config = servers
+            first.state_file = state_file
+            first._update_cache('TEST-HP-001', ServerMetrics(
+                'TEST-HP-001', 412.0, datetime.now(), 'snmp_real', 'success',
+                system_health=2, power_supply_status=(1, 1),
+                power_stats=(410.0, 380.5, None), sensors=SensorReadings(24.5, 38.0, None)
+            ))
+            health = first._get_device_health('TEST-HP-002')
+            for _ in range(first.circuit_failure_threshold):
+                health.breaker.record_failure()
+            first._get_device_health('TEST-HP-001').rtt.observe(0.05)
+            self.assertTrue(first._save_state())
+            
+            second = SNMPCollector(config_file="non_existent.json")
+            second.servers_config = servers
+            second.state_file = state_file
+            self.assertEqual(second._restore_state(), 1)
+            
+            cached = second._get_from_cache('TEST-HP-001')
+            self.assertEqual(cached.power_consumption_watts, 412.0)
+            self.assertEqual(cached.power_supply_status, (1, 1))
+            self.assertEqual(cached.power_stats, (410.0, 380.5, None))
+            self.assertEqual(cached.sensors, SensorReadings(24.5, 38.0, None))
+            self.assertEqual(cached.source, 'cached')
+            self.assertEqual(second.device_health['TEST-HP-002'].breaker.state, 'open')
+            self.assertAlmostEqual(second.device_health['TEST-HP-001'].rtt.srtt, 0.05)
+            
+            # The first snapshot serves the restored value instead of simulation
+            second.collection_interval_seconds = 60
+            second.start()
+            try:
+                snapshot = second.get_snapshot()
+            finally:
+                second.stop(timeout=1)
+            
+            by_id = {m.device_id: m for m in snapshot.metrics}
+            self.assertEqual(by_id['TEST-HP-001'].source, 'cached')
+            self.assertEqual(by_id['TEST-HP-001'].power_consumption_watts, 412.0)
+            self.assertEqual(by_id['TEST-HP-002'].source, 'simulado')
+
+    def test_hot_reload_applies_config_diff(self):
+        """Test that a changed config file is diffed without losing unchanged state"""
+        from snmp_collector import SNMPCollector, ServerMetrics
+        from collector.scheduling import TimingWheel
+        from datetime import datetime
+
+        config = {
+            "snmp_credentials": {"username": "monitor", "auth_key": "auth-1", "priv_key": "priv-1"},
+            "servers": [
+                {"device_id": "TEST-HP-001", "ip_address": "10.0.0.1", "generation": "gen9"},
+                {"device_id": "TEST-HP-002", "ip_address": "10.0.0.2", "generation": "gen9"},
+                {"device_id": "TEST-HP-003", "ip_address": "10.0.0.3", "generation": "gen9"}
+            ]
+        }
+
+        def write_config(path, data, mtime_ns):
+            with open(path, 'w') as f:
+                json.dump(data, f)
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_file = os.path.join(tmpdir, 'renault_servers.json')
+            write_config(config_file, config, 1_000_000_000)
+
+            with patch.dict(os.environ, {'TESTING': '0'}):
+                collector = SNMPCollector(config_file=config_file)
+            collector._wheel = TimingWheel.from_servers(collector.servers_config, 4)
+            for device_id in ('TEST-HP-001', 'TEST-HP-002', 'TEST-HP-003'):
+                collector._update_cache(device_id, ServerMetrics(
+                    device_id, 300.0, datetime.now(), 'snmp_real', 'success'
+                ))
+                collector._get_device_health(device_id).rtt.observe(0.05)
+            collector._user_data = object()
+
+            # Unchanged file: nothing to do
+            self.assertFalse(collector.reload_config())
+
+            # Remove 002, move 003 to a new address, add 004
+            config["servers"] = [
+                {"device_id": "TEST-HP-001", "ip_address": "10.0.0.1", "generation": "gen9"},
+                {"device_id": "TEST-HP-003", "ip_address": "10.0.0.33", "generation": "gen9"},
+                {"device_id": "TEST-HP-004", "ip_address": "10.0.0.4", "generation": "gen10"}
+            ]
+            write_config(config_file, config, 2_000_000_000)
+            previous_servers = collector.servers_config
+            self.assertTrue(collector.reload_config())
+
+            self.assertIsNot(collector.servers_config, previous_servers)
+            self.assertEqual(
+                [s["device_id"] for s in collector.servers_config],
+                ["TEST-HP-001", "TEST-HP-003", "TEST-HP-004"]
+            )
+            self.assertIsNotNone(collector._get_from_cache('TEST-HP-001'))
+            self.assertIn('TEST-HP-001', collector.device_health)
+            self.assertIsNone(collector._get_from_cache('TEST-HP-002'))
+            self.assertNotIn('TEST-HP-002', collector.device_health)
+            self.assertIsNone(collector._get_from_cache('TEST-HP-003'))
+            self.assertNotIn('TEST-HP-003', collector.device_health)
+            self.assertNotIn('TEST-HP-002', collector._wheel)
+            self.assertIn('TEST-HP-004', collector._wheel)
+            slot = TimingWheel.slot_for('TEST-HP-003', 4)
+            moved = [d for d in collector._wheel.devices_in(slot) if d["device_id"] == 'TEST-HP-003']
+            self.assertEqual(moved[0]["ip_address"], "10.0.0.33")
+            # Same credentials: USM user data kept
+            self.assertIsNotNone(collector._user_data)
+
+            # New credentials reset USM user data and open circuits
+            breaker = collector.device_health['TEST-HP-001'].breaker
+            for _ in range(collector.circuit_failure_threshold):
+                breaker.record_failure()
+            config["snmp_credentials"]["auth_key"] = "auth-2"
+            write_config(config_file, config, 3_000_000_000)
+            self.assertTrue(collector.reload_config())
+            self.assertEqual(collector.credentials.auth_key, "auth-2")
+            self.assertIsNone(collector._user_data)
+            self.assertEqual(breaker.state, 'closed')
+            self.assertIsNotNone(collector._get_from_cache('TEST-HP-001'))
+
+            # Invalid JSON keeps the running configuration
+            with open(config_file, 'w') as f:
+                f.write('{"servers": [')
+            os.utime(config_file, ns=(4_000_000_000, 4_000_000_000))
+            self.assertFalse(collector.reload_config())
+            self.assertEqual(len(collector.servers_config), 3)
+
+    def test_energy_integration_from_cycles(self):
+        """Test that only readings taken from the device accumulate kWh"""
+        from snmp_collector import SNMPCollector, ServerMetrics
+        from datetime import datetime, timedelta
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        start = datetime(2025, 1, 20, 10, 0, 0)
+
+        def reading(minutes, watts, status='success', source='snmp_real'):
+            return ServerMetrics('TEST-HP-001', watts, start + timedelta(minutes=minutes), source, status)
+
+        collector._record_energy([reading(0, 400.0)])
+        collector._record_energy([reading(6, 400.0)])
+        # Cached copies and simulated values are not measured energy
+        collector._record_energy([reading(6, 400.0, source='cached')])
+        collector._record_energy([reading(9, 400.0, source='cached')])
+        collector._record_energy([reading(9, 2000.0, status='simulated', source='simulado')])
+        collector._record_energy([reading(7, 999.0, status='error', source='simulado')])
+        collector._record_energy([reading(12, 600.0)])
+
+        # 0.1h x 400W + 0.1h x (400+600)/2 W
+        self.assertAlmostEqual(collector.energy.total_kwh, 0.04 + 0.05)
+        self.assertEqual(collector.energy.device_energy('TEST-HP-001').samples, 3)
+
+    def test_history_from_cycles(self):
+        """Test that successful readings fill the per-device history and failures leave gaps"""
+        from snmp_collector import SNMPCollector, ServerMetrics
+        from collector.history import MISSING
+        from datetime import datetime, timedelta
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        start = datetime(2025, 1, 20, 10, 0, 0)
+
+        def reading(seconds, watts, status='success', source='snmp_real'):
+            return ServerMetrics('TEST-HP-001', watts, start + timedelta(seconds=seconds), source, status)
+
+        collector._record_history([reading(0, 400.0)])
+        collector._record_history([reading(30, 410.0)])
+        collector._record_history([reading(30, 410.0, source='cached')])
+        collector._record_history([reading(60, 999.0, status='error', source='simulado')])
+        collector._record_history([reading(90, 430.0)])
+
+        with patch('collector.history.time.time', return_value=start.timestamp() + 90):
+            window = collector.get_history('TEST-HP-001', seconds=120)
+        self.assertEqual(list(window.watts), [400, 410, MISSING, 430])
+        self.assertEqual(window.count, 3)
+        self.assertIsNone(collector.get_history('TEST-HP-002'))
+
+    def test_publish_only_changes(self):
+        """Test that slot batches within the deadband do not publish a new snapshot"""
+        from snmp_collector import SNMPCollector, ServerMetrics
+        from dataclasses import replace
+        from datetime import datetime, timedelta
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector._apply_config({
+            "coleta_config": {"publish_deadband_watts": 5},
+            "servidores": [
+                {"device_id": "TEST-HP-001", "ip_address": "10.0.0.1"},
+                {"device_id": "TEST-HP-002", "ip_address": "10.0.0.2"}
+            ]
+        })
+        now = datetime.now()
+        first = collector._publish_snapshot([
+            ServerMetrics('TEST-HP-001', 400.0, now, 'snmp_real', 'success'),
+            ServerMetrics('TEST-HP-002', 300.0, now, 'snmp_real', 'success')
+        ])
+
+        quiet = collector._publish_changes([ServerMetrics('TEST-HP-001', 403.0, now, 'snmp_real', 'success')])
+        self.assertIsNone(quiet)
+        self.assertIs(collector.get_snapshot(), first)
+
+        moved = collector._publish_changes([ServerMetrics('TEST-HP-002', 320.0, now, 'snmp_real', 'success')])
+        self.assertEqual(moved.version, first.version + 1)
+        self.assertEqual(moved.total_watts, 720.0)
+        self.assertEqual([m.device_id for m in moved.metrics], ['TEST-HP-001', 'TEST-HP-002'])
+        self.assertEqual([c.device_id for c in collector.get_changes(first.version)], ['TEST-HP-002'])
+
+        # An old snapshot is refreshed once per interval even without changes
+        collector._snapshot = replace(moved, generated_at=now - timedelta(seconds=collector.collection_interval_seconds))
+        heartbeat = collector._publish_changes([ServerMetrics('TEST-HP-002', 321.0, now, 'snmp_real', 'success')])
+        self.assertEqual(heartbeat.version, moved.version)
+        self.assertGreater(heartbeat.generated_at, now)
+        collector.close()
+
+    def test_wait_for_snapshot_wakes_on_publish(self):
+        """Test that a waiter is released by the next published version"""
+        from snmp_collector import SNMPCollector, ServerMetrics
+        from datetime import datetime
+        import threading
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        first = collector._publish_snapshot([ServerMetrics('TEST-HP-001', 400.0, datetime.now(), 'snmp_real', 'success')])
+
+        # Nothing newer: returns the current snapshot once the timeout expires
+        self.assertIs(collector.wait_for_snapshot(first.version, timeout=0.01), first)
+
+        woken = []
+        waiter = threading.Thread(target=lambda: woken.append(collector.wait_for_snapshot(first.version, timeout=5)))
+        waiter.start()
+        second = collector._publish_snapshot([ServerMetrics('TEST-HP-001', 450.0, datetime.now(), 'snmp_real', 'success')])
+        waiter.join(5)
+
+        self.assertEqual(woken, [second])
+        self.assertEqual(second.version, first.version + 1)
+        collector.close()
+
+    def test_slot_failure_is_logged(self):
+        """Test that an exception in a scheduled slot is logged instead of lost with its future"""
+        from snmp_collector import SNMPCollector
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        servers = [{"device_id": "TEST-HP-001", "ip_address": "10.0.0.1"}]
+        with patch.object(collector, '_record_energy', side_effect=RuntimeError("state store offline")), \
+                patch.object(collector, '_collect_device', return_value=collector._simulate_server_metrics(servers[0])):
+            with self.assertLogs('snmp_collector', level='ERROR') as logs:
+                future = collector._dispatch_slot(servers, 0)
+                with self.assertRaises(RuntimeError):
+                    future.result(5)
+                # The done callback runs right after the result is set
+                deadline = time.monotonic() + 5
+                while not any('TEST-HP-001' in line for line in logs.output) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+        self.assertTrue(any('TEST-HP-001' in line and 'state store offline' in line for line in logs.output))
+        collector.close()
+
+    def test_scheduled_slot_bypasses_cache(self):
+        """Test that scheduled polls read the device even while its cache entry is fresh"""
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials, ServerMetrics
+        from datetime import datetime
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        server = {'device_id': 'TEST-HP-001', 'ip_address': '10.0.0.1', 'generation': 'gen9'}
+        collector._update_cache('TEST-HP-001', ServerMetrics(
+            'TEST-HP-001', 300.0, datetime.now(), 'snmp_real', 'success'
+        ))
+        polls = []
+
+        async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+            polls.append(device_id)
+            return ServerMetrics(device_id, 420.0, datetime.now(), 'snmp_real', 'success')
+
+        collector._async_snmp_get = fake_snmp_get
+        try:
+            with patch.object(snmp_collector, 'SNMP_AVAILABLE', True):
+                collector._run_coroutine(collector._collect_slot([server], 0), timeout=5)
+                scheduled_stats = collector.get_telemetry()
+                # The on-request path still serves the cache, now holding the new reading
+                on_request = collector._snmp_get_power(server)
+        finally:
+            collector.close()
+
+        self.assertEqual(polls, ['TEST-HP-001'])
+        self.assertEqual(collector._latest_metrics['TEST-HP-001'].source, 'snmp_real')
+        self.assertEqual(collector._latest_metrics['TEST-HP-001'].power_consumption_watts, 420.0)
+        self.assertEqual(on_request.source, 'cached')
+        self.assertEqual(on_request.power_consumption_watts, 420.0)
+
+        # The cache-hit ratio covers only on-request lookups
+        self.assertEqual(scheduled_stats['counters']['polls'], 1)
+        self.assertEqual(scheduled_stats['counters']['cache_misses'], 0)
+        self.assertIsNone(scheduled_stats['cache_hit_ratio'])
+        self.assertEqual(collector.get_telemetry()['cache_hit_ratio'], 1.0)
+
+    def test_shard_rebalance_on_node_join(self):
+        """Test that a node joining the ring only moves the devices it takes over"""
+        from snmp_collector import SNMPCollector, ServerMetrics
+        from collector.sharding import HashRing
+        from datetime import datetime
+
+        servers = [{"device_id": f"TEST-HP-{i:03d}", "ip_address": f"10.0.0.{i}"} for i in range(1, 41)]
+        config = {
+            "coleta_config": {"shard_nodes": ["coletor-a", "coletor-b"], "shard_node_id": "coletor-a"},
+            "servers": servers
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_file = os.path.join(tmpdir, 'renault_servers.json')
+            with open(config_file, 'w') as f:
+                json.dump(config, f)
+            os.utime(config_file, ns=(1_000_000_000, 1_000_000_000))
+
+            with patch.dict(os.environ, {'TESTING': '0'}):
+                collector = SNMPCollector(config_file=config_file)
+            owned = [s["device_id"] for s in collector.servers_config]
+            ring = HashRing(["coletor-a", "coletor-b"])
+            self.assertEqual(owned, [s["device_id"] for s in servers if ring.node_for(s["device_id"]) == "coletor-a"])
+            for device_id in owned:
+                collector._update_cache(device_id, ServerMetrics(
+                    device_id, 300.0, datetime.now(), 'snmp_real', 'success'
+                ))
+
+            config["coleta_config"]["shard_nodes"].append("coletor-c")
+            with open(config_file, 'w') as f:
+                json.dump(config, f)
+            os.utime(config_file, ns=(2_000_000_000, 2_000_000_000))
+            self.assertTrue(collector.reload_config())
+
+            ring.add_node("coletor-c")
+            kept = [s["device_id"] for s in collector.servers_config]
+            self.assertTrue(set(kept) < set(owned))
+            for device_id in owned:
+                if device_id in kept:
+                    self.assertIsNotNone(collector._get_from_cache(device_id))
+                else:
+                    self.assertEqual(ring.node_for(device_id), "coletor-c")
+                    self.assertIsNone(collector._get_from_cache(device_id))
+
+            # A node outside the ring collects nothing instead of the whole fleet
+            collector.configure_shard("coletor-x")
+            self.assertEqual(collector.servers_config, [])
+            self.assertEqual(collector._get_fallback_metrics(), [])
+            collector.close()
+
+    def test_shared_snapshot_for_workers(self):
+        """Test that workers read the collector process snapshot through mmap"""
+        from snmp_collector import SNMPCollector, SharedSnapshotCollector
+
+        servers = [
+            {'device_id': 'TEST-HP-001', 'ip_address': '10.0.0.1', 'generation': 'gen9'},
+            {'device_id': 'TEST-HP-002', 'ip_address': '10.0.0.2', 'generation': 'gen10'}
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            snapshot_file = os.path.join(tmpdir, 'snapshot')
+            worker = SharedSnapshotCollector(snapshot_file)
+            with self.assertRaises(RuntimeError):
+                worker.get_total_power_kw()
+
+            collector = SNMPCollector(config_file="non_existent.json")
+            collector.servers_config = servers
+            collector.shared_snapshot_file = snapshot_file
+            metrics = collector._get_fallback_metrics()
+            # Energy only integrates readings taken from the devices
+            collector._record_energy([replace(m, status='success', source='snmp_real') for m in metrics])
+            published = collector._publish_snapshot(metrics)
+
+            total_kw, fonte = worker.get_total_power_kw()
+            self.assertAlmostEqual(total_kw, published.total_kw)
+            self.assertEqual(fonte, 'simulado')
+
+            snapshot = worker.get_snapshot()
+            self.assertEqual(snapshot.version, published.version)
+            self.assertEqual(snapshot.metrics, published.metrics)
+            self.assertEqual(worker.get_energy_summary().devices, 2)
+            self.assertEqual(worker.get_energy_buckets(), ([], []))
+            self.assertIs(worker.get_snapshot(), snapshot)  # decoded once per publication
+
+            # A stale snapshot means the collector process is gone
+            worker.max_age_seconds = -1
+            self.assertIsNone(worker.get_snapshot())
+            worker.close()
+            collector.close()
+
+    def test_telemetry_counts_retries_and_cache(self):
+        """Test that polls feed the telemetry surface instead of per-device logs"""
+        import asyncio
+        import snmp_collector
+        from snmp_collector import SNMPCollector, SNMPCredentials, ServerMetrics
+        from datetime import datetime
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector.credentials = SNMPCredentials(
+            username="test_user", auth_key="auth_password", priv_key="priv_password"
+        )
+        server = {'device_id': 'TEST-001', 'ip_address': '10.0.0.1', 'generation': 'gen9'}
+        attempts = []
+
+        async def fake_snmp_get(device_id, ip_address, power_oid, attempt, port=161):
+            attempts.append(attempt)
+            if attempt == 0:
+                raise Exception("SNMP error: requestTimedOut")
+            return ServerMetrics(device_id, 420.0, datetime.now(), 'snmp_real', 'success')
+
+        async def no_backoff(seconds):
+            return None
+
+        collector._async_snmp_get = fake_snmp_get
+        try:
+            with patch.object(snmp_collector, 'SNMP_AVAILABLE', True), \
+                 patch.object(snmp_collector.asyncio, 'sleep', no_backoff), \
+                 patch.object(snmp_collector.logger, 'info') as info_log:
+                self.assertEqual(collector._snmp_get_power(server).source, 'snmp_real')
+                self.assertEqual(collector._snmp_get_power(server).source, 'cached')
+        finally:
+            collector.close()
+
+        self.assertEqual(attempts, [0, 1])
+        info_log.assert_not_called()
+
+        stats = collector.get_telemetry(devices=True)
+        self.assertEqual(stats['counters']['polls'], 2)
+        self.assertEqual(stats['counters']['retries'], 1)
+        self.assertEqual(stats['counters']['errors'], 1)
+        self.assertEqual(stats['counters']['successes'], 1)
+        self.assertEqual(stats['cache_hit_ratio'], 0.5)
+        self.assertEqual(stats['devices']['TEST-001']['rtt']['count'], 1)
+        self.assertEqual(stats['queue']['in_flight'], 0)
+        self.assertEqual(stats['queue']['depth'], 0)
+
     def test_get_server_count(self):
         """Test server count functionality"""
         from snmp_collector import SNMPCollector
@@ -223,6 +1001,40 @@ class TestSNMPCollector(unittest.TestCase):
         self.assertEqual(creds.auth_protocol, "SHA")
         self.assertEqual(creds.priv_protocol, "AES")
 
+    def test_redfish_servers_use_redfish_credentials(self):
+        """Test that Redfish servers are polled only with Redfish credentials and keep BMC stats"""
+        from snmp_collector import (
+            SNMPCollector, ServerMetrics, SharedSnapshot, decode_shared_snapshot, encode_shared_snapshot
+        )
+        from datetime import datetime
+
+        collector = SNMPCollector(config_file="non_existent.json")
+        collector._apply_config({
+            "redfish_credentials": {"username": "rf_user", "password": "rf_pass", "verify_tls": False},
+            "servers": [
+                {"device_id": "TEST-HP-010", "ip_address": "10.0.0.10", "protocol": "redfish"},
+                {"device_id": "TEST-HP-011", "ip_address": "10.0.0.11"}
+            ]
+        })
+        redfish_server, snmp_server = collector.servers_config
+
+        self.assertEqual(collector.redfish_credentials.username, "rf_user")
+        self.assertFalse(collector.redfish_credentials.verify_tls)
+        self.assertTrue(collector._can_poll(redfish_server))
+        self.assertFalse(collector._can_poll(snmp_server))  # no snmp_credentials
+
+        metric = ServerMetrics('TEST-HP-010', 412.0, datetime(2025, 1, 20, 10, 0), 'redfish', 'success',
+                               power_stats=(400.0, 380.0, None))
+        collector._update_cache('TEST-HP-010', metric)
+        snapshot = collector._publish_snapshot([metric])
+        self.assertEqual(snapshot.fonte, 'redfish')
+
+        shared = decode_shared_snapshot(encode_shared_snapshot(
+            SharedSnapshot(snapshot, collector.get_energy_summary(), (), ())
+        ))
+        self.assertEqual(shared.snapshot.metrics[0].power_stats, (400.0, 380.0, None))
+        collector.close()
+
 
 class TestFlaskIntegration(unittest.TestCase):
     """Test Flask app integration with SNMP collector"""
@@ -268,6 +1080,44 @@ class TestFlaskIntegration(unittest.TestCase):
         except Exception as e:
             self.fail(f"API metrics test failed: {e}")
 
+    def test_api_energy_endpoint(self):
+        """Test that integrated energy is exposed in /api/metrics and /api/energy"""
+        import app_renault_mvp
+
+        if app_renault_mvp.snmp_collector is None:
+            self.skipTest("SNMP collector not available")
+
+        client = app_renault_mvp.app.test_client()
+
+        data = client.get('/api/metrics').get_json()
+        self.assertIn('energia', data)
+        self.assertIn('servidores_kwh_hoje', data['energia'])
+        self.assertIn('lacunas_segundos', data['energia'])
+
+        response = client.get('/api/energy')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertIn('resumo', data)
+        self.assertIsInstance(data['por_hora'], list)
+        self.assertIsInstance(data['por_dia'], list)
+
+    def test_api_collector_stats_endpoint(self):
+        """Test that collector telemetry is exposed at /api/collector/stats"""
+        import app_renault_mvp
+
+        if app_renault_mvp.snmp_collector is None:
+            self.skipTest("SNMP collector not available")
+
+        client = app_renault_mvp.app.test_client()
+        response = client.get('/api/collector/stats?dispositivos=1')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertIn('counters', data['telemetria'])
+        self.assertIn('rtt', data['telemetria'])
+        self.assertIn('queue', data['telemetria'])
+        self.assertIn('devices', data['telemetria'])
+        self.assertIn('coletando', data)
+
 
 if __name__ == "__main__":
     unittest.main()